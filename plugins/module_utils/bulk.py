@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Bulk mode shared by the modules managing either a single object or a
+# list of objects (filesystems, users, groups) in one task.
+#
+# In bulk mode the options not set for an entry of the list are those of
+# the module, and the module returns the result of each entry under the
+# list option, also when an entry fails.
+
+
+def bulk_entries(module, list_key):
+    """
+    Returns the options of each object to process.
+
+    arguments:
+        module  (dict): The Ansible module
+        list_key (str): The option listing the objects in bulk mode
+    return:
+        the list of the options of each entry of the list option, merged
+        with the module options, or the module options alone when the
+        list option is not set
+    """
+    if not module.params[list_key]:
+        return [module.params]
+
+    entries = []
+    for entry in module.params[list_key]:
+        params = dict(module.params)
+        params.update((key, value) for key, value in entry.items() if value is not None)
+        entries.append(params)
+    return entries
+
+
+def bulk_fail(module, list_key, results, exc):
+    """
+    Exits with fail_json for the failed command, returning the results of
+    the entries processed before it in bulk mode.
+
+    arguments:
+        module      (dict): The Ansible module
+        list_key     (str): The option listing the objects in bulk mode
+        results     (list): The results of the entries processed so far
+        exc (CommandError): The error of the failed command
+    """
+    kwargs = {}
+    if module.params[list_key]:
+        kwargs[list_key] = results
+    module.fail_json(msg=str(exc), rc=exc.rc, stdout=exc.stdout, stderr=exc.stderr, **kwargs)
+
+
+def bulk_exit(module, list_key, noun, results):
+    """
+    Exits with exit_json, returning the result of the single entry or the
+    results of all the entries with a summary in bulk mode.
+
+    arguments:
+        module  (dict): The Ansible module
+        list_key (str): The option listing the objects in bulk mode
+        noun     (str): The kind of object, used in the summary message
+        results (list): The result dictionary of each entry, with at least
+                        the 'changed' and 'msg' keys
+    """
+    if not module.params[list_key]:
+        module.exit_json(**results[0])
+
+    changed = len([result for result in results if result['changed']])
+    msg = "%d %s(s) processed, %d changed" % (len(results), noun, changed)
+    module.exit_json(changed=bool(changed), msg=msg, **{list_key: results})
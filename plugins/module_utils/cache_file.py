@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# JSON cache files kept on the NIM master by the modules.
+#
+# A cache file holds a dictionary with the 'version' of its layout. It is
+# written to a temporary file renamed over the previous one, so that a
+# concurrent task or thread never reads a partial file, and a missing, unreadable or
+# outdated file is simply ignored.
+
+import json
+import os
+import threading
+import time
+
+CACHE_DIR = '/var/adm/ansible/cache'
+
+
+def load_cache(path, version):
+    """
+    Read a cache file written by save_cache.
+
+    arguments:
+        path    (str): The cache file
+        version (int): The expected layout version
+    return:
+        the cached dictionary, None if the file is missing, unreadable or
+        of another version
+    """
+    try:
+        with open(path, 'r') as cache:
+            data = json.load(cache)
+    except (IOError, OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get('version') != version:
+        return None
+    return data
+
+
+def save_cache(module, path, version, data, desc='cache'):
+    """
+    Atomically write a cache file, creating its directory if needed.
+
+    arguments:
+        module  (dict): The Ansible module
+        path     (str): The cache file
+        version  (int): The layout version
+        data    (dict): The data to cache, must be JSON serializable
+        desc     (str): What is cached, for the warning if it cannot be written
+    return:
+        True if the file has been written
+        False otherwise
+    """
+    data = dict(data)
+    data['version'] = version
+    tmp_file = '{0}.{1}.{2}'.format(path, os.getpid(), threading.current_thread().ident)
+    try:
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path), 0o700)
+        with open(tmp_file, 'w') as cache:
+            json.dump(data, cache)
+        os.rename(tmp_file, path)
+    except (IOError, OSError) as exc:
+        module.log('[WARNING] Cannot write {0} {1}: {2}'.format(desc, path, exc))
+        return False
+    return True
+
+
+class TtlCache(object):
+    """
+    On-disk cache of entries valid for ttl seconds.
+
+    entries maps a key to a dictionary of values with the 'time' they were
+    recorded. The expired entries are dropped when the cache is saved.
+    """
+
+    def __init__(self, module, cache_file, version, ttl, desc='cache'):
+        self.module = module
+        self.cache_file = cache_file
+        self.version = version
+        self.ttl = ttl
+        self.desc = desc
+        self.lock = threading.Lock()
+        self.entries = (load_cache(cache_file, version) or {}).get('entries', {})
+        self.changed = False
+
+    def expired(self, entry, now=None):
+        """
+        Return True if the entry is older than ttl seconds
+        """
+        return (now or time.time()) - entry['time'] > self.ttl
+
+    def get_entry(self, key):
+        """
+        Return the entry of the key, None if missing or expired
+        """
+        entry = self.entries.get(key)
+        if not entry or self.expired(entry):
+            return None
+        return entry
+
+    def set_entry(self, key, **values):
+        """
+        Record the values of the key at the current time
+        """
+        with self.lock:
+            self.entries[key] = dict(values, time=time.time())
+            self.changed = True
+
+    def invalidate(self, keys):
+        """
+        Remove the entries of the keys, when they turn out to be stale
+        """
+        with self.lock:
+            for key in keys:
+                if self.entries.pop(key, None):
+                    self.changed = True
+
+    def save(self):
+        """
+        Atomically write the cache file, dropping the expired entries
+        """
+        if not self.changed:
+            return
+        now = time.time()
+        with self.lock:
+            entries = dict((key, entry) for key, entry in self.entries.items() if not self.expired(entry, now))
+        if save_cache(self.module, self.cache_file, self.version, {'entries': entries}, self.desc):
+            self.changed = False
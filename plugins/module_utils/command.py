@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Error raised by the module_utils when a command they run fails.
+
+
+class CommandError(Exception):
+    """
+    Raised when a command fails, with its output so that the module can
+    return it, and the message describing the failure if any
+    """
+
+    def __init__(self, cmd, rc, stdout, stderr, msg=None):
+        self.cmd = cmd
+        self.rc = rc
+        self.stdout = stdout
+        self.stderr = stderr
+        if msg is None:
+            msg = 'Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), rc)
+        super(CommandError, self).__init__(msg)
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Disk inventory shared by the alt_disk modules.
+#
+# The PVs, their volume group and state, and the size and LVM signature of
+# the free ones are collected by a single shell script per host, run locally
+# or through c_rsh on a VIOS, instead of a few commands per disk. The
+# inventory of a host is kept until a command changing its disks is run.
+
+import re
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+
+# Lists the PVs, then probes the disks not in a volume group, PROBE_BATCH
+# disks at a time. Each probe line is written at once so that the lines of
+# the concurrent probes do not mix.
+PROBE_BATCH = 16
+LOCAL_SCRIPT = '''LC_ALL=C
+export LC_ALL
+pvs=$(lspv) || exit $?
+echo "$pvs" | {{
+    n=0
+    while read name pvid vg state rest; do
+        case "$name" in hdisk*) ;; *) continue;; esac
+        echo "pv $name $pvid $vg $state"
+        [ "$vg" = None ] || continue
+        (
+            echo "lvm $name $(lquerypv -V $name 2>/dev/null)"
+            echo "size $name $(getconf DISK_SIZE /dev/$name 2>/dev/null)"
+        ) &
+        n=$((n + 1))
+        [ $((n % {0})) -ne 0 ] || wait
+    done
+    wait
+}}'''.format(PROBE_BATCH)
+
+# ioscli lspv -free also leaves out the disks mapped to a client
+VIOS_FREE_MARK = '=free'
+VIOS_SCRIPT = '/usr/ios/cli/ioscli lspv && echo {0} && /usr/ios/cli/ioscli lspv -free'.format(VIOS_FREE_MARK)
+
+
+def parse_lspv(stdout):
+    """
+    Parse the output of lspv or ioscli lspv.
+
+    return: dictionary of the PVs indexed by name with their 'pvid',
+            'vg' and 'status'
+    """
+    # hdisk0           000018fa3b12f5cb                     rootvg           active
+    pvs = {}
+    for line in stdout.splitlines():
+        match_key = re.match(r"^(hdisk\S+)\s+(\S+)\s+(\S+)\s*(\S*)", line)
+        if match_key:
+            pvs[match_key.group(1)] = {'pvid': match_key.group(2),
+                                       'vg': match_key.group(3),
+                                       'status': match_key.group(4)}
+    return pvs
+
+
+def parse_lspv_free(stdout):
+    """
+    Parse the output of ioscli lspv -free.
+
+    return: dictionary of the free PVs indexed by name with their 'pvid'
+            and 'size' in megabytes
+    """
+    # NAME            PVID                                SIZE(megabytes)
+    # hdiskX          none                                572325
+    free_pvs = {}
+    for line in stdout.splitlines():
+        match_key = re.match(r"^(hdisk\S+)\s+(\S+)\s+(\d+)", line)
+        if match_key:
+            free_pvs[match_key.group(1)] = {'pvid': match_key.group(2),
+                                            'size': int(match_key.group(3))}
+    return free_pvs
+
+
+def parse_local_inventory(module, stdout):
+    """
+    Parse the output of LOCAL_SCRIPT.
+
+    return: dictionary with 'pvs' as returned by parse_lspv and 'free_pvs'
+            the disks not in a volume group with an LVM signature and a
+            known size, with their 'pvid' and 'size' in megabytes
+    """
+    pvs = {}
+    probes = {}
+    for line in stdout.splitlines():
+        fields = line.split()
+        if len(fields) < 2:
+            continue
+        if fields[0] == 'pv' and len(fields) >= 4:
+            pvs[fields[1]] = {'pvid': fields[2],
+                              'vg': fields[3],
+                              'status': fields[4] if len(fields) > 4 else ''}
+        elif fields[0] in ('lvm', 'size'):
+            probes.setdefault(fields[1], {})[fields[0]] = fields[2] if len(fields) > 2 else ''
+
+    free_pvs = {}
+    for hdisk, probe in probes.items():
+        if hdisk not in pvs:
+            continue
+        if not probe.get('lvm'):
+            module.log('[WARN] could not query pv {0}'.format(hdisk))
+            continue
+        if probe['lvm'] != '1':
+            continue
+        if not probe.get('size', '').isdigit():
+            module.log('[WARN] could not retrieve {0} size'.format(hdisk))
+            continue
+        free_pvs[hdisk] = {'pvid': pvs[hdisk]['pvid'], 'size': int(probe['size'])}
+    return {'pvs': pvs, 'free_pvs': free_pvs}
+
+
+def collect_local_disks(module, host=None):
+    """
+    Collect the disk inventory of the local host with a single command.
+
+    return: dictionary with 'pvs' and 'free_pvs', see parse_local_inventory
+    raise: CommandError if the PVs cannot be listed
+    """
+    cmd = ['/bin/sh', '-c', LOCAL_SCRIPT]
+    ret, stdout, stderr = module.run_command(cmd)
+    if ret != 0:
+        raise CommandError(['lspv'], ret, stdout, stderr)
+    return parse_local_inventory(module, stdout)
+
+
+def vios_disk_collector(nim_exec):
+    """
+    Build the collector of the disk inventory of a VIOS.
+
+    arguments:
+        nim_exec (function): runs a command on a NIM client through c_rsh,
+                             called with the module, the client address
+                             and the command, returns (rc, stdout, stderr)
+    return: function called with the module and the VIOS address, returning
+            a dictionary with 'pvs' as returned by parse_lspv and 'free_pvs'
+            as returned by parse_lspv_free, raising CommandError
+            if the PVs cannot be listed
+    """
+    def collect(module, host):
+        """
+        Collect the disk inventory of the VIOS with a single remote command
+        """
+        ret, stdout, stderr = nim_exec(module, host, [VIOS_SCRIPT])
+        listed, sep, free = stdout.partition(VIOS_FREE_MARK + '\n')
+        if ret != 0:
+            cmd = ['/usr/ios/cli/ioscli', 'lspv'] + (['-free'] if sep else [])
+            raise CommandError(cmd, ret, stdout, stderr)
+        return {'pvs': parse_lspv(listed), 'free_pvs': parse_lspv_free(free)}
+
+    return collect
+
+
+class DiskInventory(object):
+    """
+    Disk inventory of the hosts, collected once and kept until a command
+    changing the disks of the host invalidates it.
+    """
+
+    def __init__(self, module, collect):
+        """
+        arguments:
+            module      (dict): The Ansible module
+            collect (function): called with the module and the host, returns
+                                a dictionary with 'pvs' and 'free_pvs'
+        """
+        self.module = module
+        self.collect = collect
+        self.disks = {}
+
+    def get(self, host=None):
+        """
+        Return the disk inventory of the host, collecting it if needed.
+
+        return: dictionary with 'pvs' and 'free_pvs'
+        raise: CommandError if the PVs cannot be listed
+        """
+        if host not in self.disks:
+            self.disks[host] = self.collect(self.module, host)
+            self.module.debug('Disk inventory of {0}: {1} PVs, {2} free'
+                              .format(host or 'localhost', len(self.disks[host]['pvs']),
+                                      len(self.disks[host]['free_pvs'])))
+        return self.disks[host]
+
+    def invalidate(self, host=None):
+        """
+        Forget the disk inventory of the host, when its disks change
+        """
+        self.disks.pop(host, None)
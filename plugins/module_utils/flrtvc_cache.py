@@ -0,0 +1,529 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# FLRTVC tool, APAR CSV and efix metadata caches shared by the flrtvc and
+# nim_flrtvc modules.
+#
+# The FLRTVC zip file is refreshed with a conditional request and the
+# script extracted again only when it changed. The APAR CSV file is reused
+# for a number of hours. The emgr metadata of each efix package is parsed
+# once and indexed by the checksum of the package.
+#
+# The functions reporting a problem append it to the 'messages' list of
+# their output dictionary: the meta result of flrtvc, the result of the
+# target for nim_flrtvc.
+
+import calendar
+import hashlib
+import os
+import re
+import shutil
+import stat
+import threading
+import time
+import zipfile
+
+from ansible.module_utils.six.moves.urllib.error import HTTPError
+from ansible.module_utils.urls import open_url, SSLValidationError
+from ansible_collections.ibm.power_aix.plugins.module_utils.cache_file import (
+    load_cache, save_cache)
+
+FLRTVC_URL = 'https://www-304.ibm.com/webapp/set2/sas/f/flrt3/FLRTVC-latest.zip'
+APAR_CSV_URL = 'https://esupport.ibm.com/customercare/flrt/doc?page=aparCSV'
+CACHE_VERSION = 1
+
+
+def file_checksum(path):
+    """
+    Compute the sha256 checksum of a file
+    args:
+        path (str): The absolute filename
+    return:
+        The hexadecimal digest of the file content
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as myfile:
+        for chunk in iter(lambda: myfile.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def load_json(path):
+    """
+    Load a json file written by dump_json
+    args:
+        path (str): The absolute filename
+    return:
+        The loaded data, an empty dictionary if the file cannot be read
+    """
+    return load_cache(path, CACHE_VERSION) or {}
+
+
+def dump_json(module, path, data):
+    """
+    Atomically write data into a json file
+    args:
+        module (dict): The Ansible module
+        path    (str): The absolute filename
+        data   (dict): The data to write
+    """
+    save_cache(module, path, CACHE_VERSION, data, 'FLRTVC cache file')
+
+
+def increase_fs(module, output, dest):
+    """
+    Increase filesystem by 100Mb
+    args:
+        module (dict): The Ansible module
+        output (dict): The result of the execution
+        dest    (str): The absolute filename
+    return:
+        True if increase succeeded
+        False otherwise
+    """
+    cmd = ['/bin/df', '-c', dest]
+    rc, stdout, stderr = module.run_command(cmd)
+    if rc == 0:
+        mount_point = stdout.splitlines()[1].split(':')[6]
+        cmd = ['chfs', '-a', 'size=+100M', mount_point]
+        rc, stdout, stderr = module.run_command(cmd)
+        if rc == 0:
+            module.debug('{0}: increased 100Mb: {1}'.format(mount_point, stdout))
+            return True
+
+    module.log('[WARNING] {0}: cmd:{1} failed rc={2} stdout:{3} stderr:{4}'
+               .format(dest, cmd, rc, stdout, stderr))
+    msg = 'Cannot increase filesystem for {0}.'.format(dest)
+    output['messages'].append(msg)
+    return False
+
+
+def unzip(module, output, src, dst, resize_fs=True):
+    """
+    Unzip source into the destination directory
+    args:
+        module    (dict): The Ansible module
+        output    (dict): The result of the execution
+        src        (str): The zip file to extract
+        dst        (str): The absolute destination path
+        resize_fs (bool): Increase the filesystem size if needed
+    return:
+        True if unzip succeeded
+        False otherwise
+    """
+    try:
+        zfile = zipfile.ZipFile(src)
+        zfile.extractall(dst)
+    except (zipfile.BadZipfile, zipfile.LargeZipFile, RuntimeError) as exc:
+        if resize_fs and increase_fs(module, output, dst):
+            return unzip(module, output, src, dst, resize_fs)
+        msg = 'Cannot unzip {0}, exception:{1}'.format(src, exc)
+        module.log(msg)
+        output['messages'].append(msg)
+        return False
+    return True
+
+
+def refresh_flrtvc_zip(module, output, tooldir):
+    """
+    Refresh the cached FLRTVC zip file with a conditional request.
+
+    The zip file is kept in tooldir with its ETag and Last-Modified headers
+    in FLRTVC-latest.json. It is downloaded again only if the server reports
+    a newer version, and replaces the cached one only if it is a zip file.
+    If the server cannot be reached, the cached zip file is used.
+    args:
+        module    (dict): The Ansible module
+        output    (dict): The result of the execution
+        tooldir    (str): The tool cache directory
+    return:
+        The absolute path of the cached zip file
+        None if there is no usable zip file
+    """
+    zip_file = os.path.join(tooldir, 'FLRTVC-latest.zip')
+    meta_file = os.path.join(tooldir, 'FLRTVC-latest.json')
+    tool_meta = load_json(meta_file)
+
+    headers = {}
+    if os.path.isfile(zip_file):
+        if tool_meta.get('etag'):
+            headers['If-None-Match'] = tool_meta['etag']
+        if tool_meta.get('last_modified'):
+            headers['If-Modified-Since'] = tool_meta['last_modified']
+
+    try:
+        response = open_url(FLRTVC_URL, headers=headers, validate_certs=False)
+    except HTTPError as exc:
+        if exc.code == 304:
+            module.debug('{0} not modified, use {1}'.format(FLRTVC_URL, zip_file))
+            return zip_file
+        msg = 'Cannot download {0}: {1}'.format(FLRTVC_URL, exc)
+    except (IOError, OSError, SSLValidationError) as exc:
+        msg = 'Cannot download {0}: {1}'.format(FLRTVC_URL, exc)
+    else:
+        tmp_file = zip_file + '.tmp'
+        try:
+            with open(tmp_file, 'wb') as myfile:
+                shutil.copyfileobj(response, myfile)
+            # a proxy error page must not replace the cached zip file
+            if not zipfile.is_zipfile(tmp_file):
+                raise ValueError('not a zip file')
+            os.rename(tmp_file, zip_file)
+        except ValueError as exc:
+            msg = 'Cannot download {0}: {1}'.format(FLRTVC_URL, exc)
+        except (IOError, OSError) as exc:
+            msg = 'Cannot write {0}: {1}'.format(zip_file, exc)
+        else:
+            tool_meta = {'etag': response.headers.get('ETag'),
+                         'last_modified': response.headers.get('Last-Modified')}
+            dump_json(module, meta_file, tool_meta)
+            module.debug('downloaded {0} to {1}'.format(FLRTVC_URL, zip_file))
+            return zip_file
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+    if os.path.isfile(zip_file):
+        msg += ', using cached {0}'.format(zip_file)
+        module.log('[WARNING] ' + msg)
+        output['messages'].append(msg)
+        return zip_file
+    module.log(msg)
+    output['messages'].append(msg)
+    return None
+
+
+def install_flrtvc(module, output, tooldir, flrtvc_path, local_zip=None, resize_fs=True):
+    """
+    Install the flrtvc script from the FLRTVC zip file.
+
+    The zip file is either the local copy provided by the user or the one
+    cached in tooldir, refreshed from the fix server. The script is only
+    extracted again when the zip file or the installed script changed.
+    args:
+        module      (dict): The Ansible module
+        output      (dict): The result of the execution
+        tooldir      (str): The tool cache directory
+        flrtvc_path  (str): The absolute path of the flrtvc script
+        local_zip    (str): The local FLRTVC zip file to use, if any
+        resize_fs   (bool): Increase the filesystem size if needed
+    return:
+        True if the flrtvc script is installed
+        False otherwise
+    """
+    if not os.path.exists(tooldir):
+        os.makedirs(tooldir)
+
+    if local_zip:
+        if not os.path.isfile(local_zip):
+            msg = 'Cannot find FLRTVC zip file {0}'.format(local_zip)
+            module.log(msg)
+            output['messages'].append(msg)
+            return False
+        zip_file = local_zip
+    else:
+        zip_file = refresh_flrtvc_zip(module, output, tooldir)
+        if not zip_file:
+            return False
+
+    install_file = os.path.join(tooldir, 'flrtvc_install.json')
+    installed = load_json(install_file)
+    zip_sum = file_checksum(zip_file)
+    if os.path.isfile(flrtvc_path) and installed.get('zip_sha256') == zip_sum \
+       and installed.get('script_sha256') == file_checksum(flrtvc_path):
+        module.debug('{0} is up to date'.format(flrtvc_path))
+    else:
+        # remove previous version if any
+        if os.path.exists(flrtvc_path):
+            try:
+                os.remove(flrtvc_path)
+            except OSError as exc:
+                msg = 'Cannot remove {0}, exception:{1}'.format(flrtvc_path, exc)
+                module.log('[WARNING] ' + msg)
+                output['messages'].append(msg)
+
+        if not unzip(module, output, zip_file, os.path.dirname(flrtvc_path), resize_fs):
+            return False
+        if not os.path.isfile(flrtvc_path):
+            msg = 'Cannot find {0} in {1}'.format(os.path.basename(flrtvc_path), zip_file)
+            module.log(msg)
+            output['messages'].append(msg)
+            return False
+        dump_json(module, install_file, {'zip_sha256': zip_sum,
+                                         'script_sha256': file_checksum(flrtvc_path)})
+
+    flrtvc_stat = os.stat(flrtvc_path)
+    if not flrtvc_stat.st_mode & stat.S_IEXEC:
+        os.chmod(flrtvc_path, flrtvc_stat.st_mode | stat.S_IEXEC)
+    return True
+
+
+def get_apar_csv(module, output, tooldir, ttl):
+    """
+    Get the APAR CSV file from the cache or the fix server.
+
+    The file is downloaded once into tooldir and reused for all the
+    flrtvc runs until it is older than ttl hours. A file that does not
+    look like the APAR CSV is never cached. If the download fails, the
+    cached file is used whatever its age.
+    args:
+        module  (dict): The Ansible module
+        output  (dict): The result of the execution
+        tooldir  (str): The tool cache directory
+        ttl      (int): The maximum age of the cached file in hours
+    return:
+        The absolute path of the APAR CSV file, None if not available
+        The dictionary describing where the file comes from and timing
+    """
+    csv_file = os.path.join(tooldir, 'apar.csv')
+    meta_file = os.path.join(tooldir, 'apar.json')
+    csv_meta = load_json(meta_file)
+    start = time.time()
+
+    if not os.path.exists(tooldir):
+        os.makedirs(tooldir)
+
+    cached = os.path.isfile(csv_file) and csv_meta.get('sha256') == file_checksum(csv_file)
+    age = int(start - csv_meta.get('fetched', 0))
+    if cached and age < ttl * 3600:
+        module.debug('use cached APAR CSV {0}, age {1}s'.format(csv_file, age))
+        return csv_file, {'path': csv_file, 'source': 'cache', 'age': age,
+                          'time': round(time.time() - start, 3)}
+
+    tmp_file = csv_file + '.tmp'
+    try:
+        response = open_url(APAR_CSV_URL, validate_certs=False)
+        with open(tmp_file, 'wb') as myfile:
+            shutil.copyfileobj(response, myfile)
+        # bytes, an error page may not be in the encoding of the locale
+        with open(tmp_file, 'rb') as myfile:
+            header = myfile.readline()
+        if header.lstrip().startswith(b'<') or header.count(b',') < 3:
+            raise ValueError('unexpected content: {0}'.format(header.strip()[:80].decode('latin-1')))
+        os.rename(tmp_file, csv_file)
+    except (IOError, OSError, SSLValidationError, ValueError) as exc:
+        msg = 'Cannot download APAR CSV from {0}: {1}'.format(APAR_CSV_URL, exc)
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        if cached:
+            msg += ', using cached {0}'.format(csv_file)
+            module.log('[WARNING] ' + msg)
+            output['messages'].append(msg)
+            return csv_file, {'path': csv_file, 'source': 'cache', 'age': age,
+                              'time': round(time.time() - start, 3)}
+        module.log('[WARNING] ' + msg)
+        output['messages'].append(msg)
+        return None, {'path': None, 'source': 'flrtvc', 'age': 0,
+                      'time': round(time.time() - start, 3)}
+
+    csv_meta = {'fetched': int(time.time()), 'sha256': file_checksum(csv_file)}
+    dump_json(module, meta_file, csv_meta)
+    module.debug('downloaded APAR CSV {0}'.format(csv_file))
+    return csv_file, {'path': csv_file, 'source': 'download', 'age': 0,
+                      'time': round(time.time() - start, 3)}
+
+
+def to_utc_epoch(date):
+    """
+    Return the time (UTC time zone) in second from unix epoch (int)
+
+    args:
+        date (str) : time to convert in sec from epoch with the format:
+                     'Mon Oct 9 23:35:09 CDT 2017'
+    returns: (epoch, msg)
+        The value in sec from epoch , ''
+        -1,  'error message in case of error'
+    """
+
+    TZ = 'UTC'
+    msg = ''
+    sec_from_epoch = -1
+    # supported TZ translation
+    shift = {'CDT': -5, 'CEST': 2, 'CET': 1, 'CST': -6, 'CT': -6,
+             'EDT': -4, 'EET': 2, 'EST': -5, 'ET': -5,
+             'IST': 5.5,
+             'JST': 9,
+             'MSK': 3, 'MT': 2,
+             'NZST': 12,
+             'PDT': -7, 'PST': -8,
+             'SAST': 2,
+             'UTC': 0,
+             'WEST': 1, 'WET': 0}
+
+    # if no time zone, consider it's UTC
+    match = re.match(r'^(\S+\s+\S+\s+\d+\s+\d+:\d+:\d+)\s+(\d{4})$', date)
+    if match:
+        date = '{0} UTC {1}'.format(match.group(1), match.group(2))
+    else:
+        match = re.match(r'^(\S+\s+\S+\s+\d+\s+\d+:\d+:\d+)\s+(\S+)\s+(\d{4})$', date)
+        if match:
+            date = '{0} UTC {1}'.format(match.group(1), match.group(3))
+            TZ = match.group(2)
+        else:  # should not happen
+            return (-1, 'bad packaging date format')
+
+    try:
+        datet = time.strptime(date, "%a %b %d %H:%M:%S %Z %Y")
+        sec_from_epoch = calendar.timegm(datet)
+    except ValueError:
+        return (-1, 'EXCEPTION: cannot parse packaging date')
+
+    if TZ not in shift:
+        msg = 'Unsuported Time Zone: "TZ", using "UTC"'
+        TZ = 'UTC'
+
+    sec_from_epoch = sec_from_epoch - (shift[TZ] * 3600)
+
+    return (sec_from_epoch, msg)
+
+
+def parse_epkg_info(stdout):
+    """
+    Parse the emgr preview output of an efix package
+    args:
+        stdout (str): The output of 'emgr -dXv3 -e <epkg>' filtered on PREREQ and PACKAG
+    return:
+        The dictionary with the efix label, packaging date and its conversion
+        in sec from epoch, filesets, files and ordered list of prerequisites
+        [fileset, minlvl, maxlvl]
+    """
+    info = {'label': '',
+            'pkg_date': None,
+            'sec_from_epoch': -1,
+            'filesets': [],
+            'files': [],
+            'prereq': []}
+
+    # ordered parsing: expecting the following line order:
+    # LABEL, PACKAGING DATE, then PACKAGE, then prerequisites levels
+    for line in stdout.splitlines():
+        # skip comments and empty lines
+        line = line.rstrip()
+        if not line or line.startswith('+'):
+            continue  # skip blank and comment line
+
+        if not info['label']:
+            # match: "LABEL:            IJ02726s8a"
+            match = re.match(r'^LABEL:\s+(\S+)$', line)
+            if match:
+                info['label'] = match.group(1)
+                continue
+
+        if not info['pkg_date']:
+            # match: "PACKAGING DATE:   Mon Oct  9 09:35:09 CDT 2017"
+            match = re.match(r'^PACKAGING\s+DATE:\s+'
+                             r'(\S+\s+\S+\s+\d+\s+\d+:\d+:\d+\s+\S*\s*\S+).*$',
+                             line)
+            if match:
+                info['pkg_date'] = match.group(1)
+                continue
+
+        # match: "   PACKAGE:       devices.vdevice.IBM.vfc-client.rte"
+        match = re.match(r'^\s+PACKAGE:\s+(\S+)\s*?$', line)
+        if match:
+            if match.group(1) not in info['filesets']:
+                info['filesets'].append(match.group(1))
+            continue
+
+        # match: "   LOCATION:      /usr/lib/boot/unix_64"
+        match = re.match(r'^\s+LOCATION:\s+(\S+)\s*?$', line)
+        if match:
+            if match.group(1) not in info['files']:
+                info['files'].append(match.group(1))
+            continue
+
+        # match prerequisite levels
+        # line like: "bos.net.tcp.server 7.1.3.0 7.1.3.49"
+        match = re.match(r'^(\S+)\s+([\d+\.]+)\s+([\d+\.]+)\s*?$', line)
+        if match:
+            info['prereq'].append(list(match.groups()))
+
+    # convert packaging date into time in sec from epoch
+    if info['pkg_date']:
+        (info['sec_from_epoch'], msg) = to_utc_epoch(info['pkg_date'])
+
+    return info
+
+
+class EpkgIndex(object):
+    """
+    Persistent index of efix package metadata.
+
+    The emgr output of each epkg is parsed once and recorded in
+    'cachedir/epkg_index.json' keyed by the sha256 of the epkg file, so
+    the prerequisite and lock checks of every target are in-memory lookups.
+    """
+
+    def __init__(self, module, cachedir):
+        self.module = module
+        self.index_file = os.path.join(cachedir, 'epkg_index.json')
+        self.lock = threading.Lock()
+        self.key_locks = {}
+        self.checksums = {}
+        self.errors = {}
+        self.index = load_json(self.index_file).get('epkgs', {})
+
+    def checksum(self, path):
+        """
+        Return the sha256 of path, computed once per file version
+        """
+        fstat = os.stat(path)
+        with self.lock:
+            cached = self.checksums.get(path)
+        if cached and cached[0] == (fstat.st_mtime, fstat.st_size):
+            return cached[1]
+        sha = file_checksum(path)
+        with self.lock:
+            self.checksums[path] = ((fstat.st_mtime, fstat.st_size), sha)
+        return sha
+
+    def get(self, output, machine, path):
+        """
+        Return the metadata of an efix package, running emgr only if the
+        package has not already been parsed
+        args:
+            output (dict): The result of the execution
+            machine (str): The machine the epkg is checked for, for the logs
+            path    (str): The absolute path of the epkg
+        return:
+            The dictionary built by parse_epkg_info
+        """
+        key = self.checksum(path)
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self.lock:
+                info = self.index.get(key)
+                error = self.errors.get(key)
+            if info is not None:
+                if error:
+                    output['messages'].append(error)
+                return info
+
+            # get efix information
+            cmd = '/usr/sbin/emgr -dXv3 -e {0} | /bin/grep -p -e PREREQ -e PACKAG'.format(path)
+            rc, stdout, stderr = self.module.run_command(cmd, use_unsafe_shell=True)
+            info = parse_epkg_info(stdout)
+            if info['pkg_date'] and info['sec_from_epoch'] == -1:
+                self.module.log('[WARNING] {0}: cannot convert packaging date "{1}" for epkg:{2}'
+                                .format(machine, info['pkg_date'], path))
+
+            with self.lock:
+                self.index[key] = info
+                if rc != 0:
+                    # do not persist, we keep this efix, will try to install it anyway
+                    error = 'Cannot get efix information {0}'.format(path)
+                    self.module.log(error)
+                    self.module.log('cmd:{0} failed rc={1} stdout:{2} stderr:{3}'
+                                    .format(cmd, rc, stdout, stderr))
+                    self.errors[key] = error
+                    output['messages'].append(error)
+                else:
+                    dump_json(self.module, self.index_file,
+                              {'epkgs': dict((k, v) for k, v in self.index.items() if k not in self.errors)})
+        return info
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# HMC information kept across the runs of the VIOS modules.
+#
+# The managed system and VIOS UUIDs discovered through an HMC are cached on
+# disk per HMC and CEC serial number, so that the next health checks do not
+# list them again. The HMC session keys are saved by vioshc.py itself in
+# SESSION_FILE.
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.cache_file import (
+    CACHE_DIR, TtlCache)
+
+UUID_CACHE_FILE = CACHE_DIR + '/hmc_uuids.json'
+SESSION_FILE = CACHE_DIR + '/hmc_sessions.json'
+CACHE_VERSION = 2
+UUID_CACHE_TTL = 86400  # seconds
+
+
+class HmcUuidCache(TtlCache):
+    """
+    On-disk cache of the managed system and VIOS UUIDs of each HMC.
+
+    entries maps '<HMC name>/<CEC serial number>' to the managed system
+    UUID, the VIOS UUIDs indexed by partition ID and the time they were
+    listed. An entry is valid for ttl seconds.
+    """
+
+    def __init__(self, module, cache_file=UUID_CACHE_FILE, ttl=UUID_CACHE_TTL):
+        super(HmcUuidCache, self).__init__(module, cache_file, CACHE_VERSION, ttl, 'HMC UUID cache')
+
+    def get(self, hmc, cec_serial):
+        """
+        Return the UUIDs of the CEC listed through the HMC, None if not valid
+
+        return:
+            dictionary with 'cec_uuid' and 'vios' the VIOS UUIDs by partition ID
+        """
+        return self.get_entry('{0}/{1}'.format(hmc, cec_serial))
+
+    def set(self, hmc, cec_serial, cec_uuid, vios_uuids):
+        """
+        Record the UUIDs of the CEC listed through the HMC
+
+        arguments:
+            hmc         (str): The HMC NIM name
+            cec_serial  (str): The CEC serial number as listed by vioshc.py
+            cec_uuid    (str): The managed system UUID
+            vios_uuids (dict): The VIOS UUIDs indexed by partition ID
+        """
+        self.set_entry('{0}/{1}'.format(hmc, cec_serial), cec_uuid=cec_uuid, vios=vios_uuids)
+
+    def invalidate_cec(self, hmc, cec_serial):
+        """
+        Remove the entry of the CEC, when its UUIDs turn out to be stale
+        """
+        self.invalidate(['{0}/{1}'.format(hmc, cec_serial)])
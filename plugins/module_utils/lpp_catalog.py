@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Catalog of the NIM lpp_source resources by oslevel.
+#
+# The oslevel of each lpp_source is parsed once into a tuple of integers,
+# from its <release>-<TL>-<SP>-<build>-lpp_source name or else from its
+# oslevel_r attribute, and the resources are kept sorted by oslevel. The
+# next or latest TL or SP of an oslevel is then found by bisection, and
+# resolved once for all the clients at this oslevel.
+
+import bisect
+import re
+
+# 7200-05-03-2148-lpp_source
+LPP_SOURCE_NAME = re.compile(r"^([0-9]{4})-([0-9]{2})-([0-9]{2})-([0-9]{4})-lpp_source$")
+# 7200-05-03-2148, 7200-05
+OSLEVEL = re.compile(r"^([0-9]{4})-([0-9]{2})(?:-([0-9]{2})-([0-9]{4}))?$")
+# SP and build of a resource whose oslevel_r only gives the TL
+UNKNOWN = -1
+
+
+def parse_oslevel(oslevel):
+    """
+    Parse an oslevel.
+
+    arguments:
+        oslevel (str): oslevel -s output 7200-05-03-2148 or oslevel -r
+                       output 7200-05
+    return:
+        tuple of integers (release, tl, sp, build), sp and build are
+        UNKNOWN for oslevel -r; None if oslevel cannot be parsed
+    """
+    match_key = OSLEVEL.match((oslevel or '').strip())
+    if not match_key:
+        return None
+    if match_key.group(3) is None:
+        return (int(match_key.group(1)), int(match_key.group(2)), UNKNOWN, UNKNOWN)
+    return tuple(int(field) for field in match_key.groups())
+
+
+def format_oslevel(level):
+    """
+    Format an oslevel tuple as oslevel -s or oslevel -r does
+    """
+    if level[2] == UNKNOWN:
+        return '{0:04d}-{1:02d}'.format(level[0], level[1])
+    return '{0:04d}-{1:02d}-{2:02d}-{3:04d}'.format(*level)
+
+
+def lpp_source_oslevel(name, attrs):
+    """
+    Return the oslevel tuple of an lpp_source, see parse_oslevel.
+
+    arguments:
+        name  (str): lpp_source name
+        attrs (dict): lsnim attributes of the lpp_source
+    return:
+        the oslevel from the name, else from the oslevel_r attribute,
+        None if unknown
+    """
+    match_key = LPP_SOURCE_NAME.match(name)
+    if match_key:
+        return tuple(int(field) for field in match_key.groups())
+    return parse_oslevel((attrs or {}).get('oslevel_r'))
+
+
+class LppCatalog(object):
+    """
+    The lpp_source resources sorted by oslevel.
+    """
+
+    def __init__(self, lpp_sources):
+        """
+        arguments:
+            lpp_sources (dict): lsnim attributes of the lpp_source resources
+                                by name
+        """
+        self.levels = {}
+        for name, attrs in lpp_sources.items():
+            level = lpp_source_oslevel(name, attrs)
+            if level is not None:
+                self.levels[name] = level
+        # sorted (oslevel, name), with the keys in a separate list for bisect
+        self.entries = sorted((level, name) for name, level in self.levels.items())
+        self.keys = [level for level, name in self.entries]
+        self.resolved = {}
+
+    def level(self, name):
+        """
+        Return the oslevel tuple of an lpp_source, None if unknown
+        """
+        return self.levels.get(name)
+
+    def find(self, oslevel, lpp_time, lpp_type):
+        """
+        Find the lpp_source of the next or latest TL or SP of an oslevel.
+
+        The next TL is the lowest oslevel of a higher TL of the same release,
+        the next SP is the lowest oslevel of a higher SP of the same TL; the
+        latest ones are the highest.
+
+        arguments:
+            oslevel  (tuple): current oslevel, see parse_oslevel
+            lpp_time   (str): next or latest
+            lpp_type   (str): tl or sp
+        return:
+            the lpp_source name, None if not found
+        """
+        key = (oslevel[:3], lpp_time, lpp_type)
+        if key not in self.resolved:
+            self.resolved[key] = self._find(oslevel, lpp_time, lpp_type)
+        return self.resolved[key]
+
+    def _find(self, oslevel, lpp_time, lpp_type):
+        release, tl, sp = oslevel[:3]
+        if lpp_type == 'tl':
+            # higher TL of the release, any SP
+            first = bisect.bisect_left(self.keys, (release, tl + 1))
+            end = bisect.bisect_left(self.keys, (release + 1,))
+        else:
+            # higher SP of the TL, the resources without SP sort first
+            first = bisect.bisect_left(self.keys, (release, tl, sp + 1))
+            end = bisect.bisect_left(self.keys, (release, tl + 1))
+        if first >= end:
+            return None
+        if lpp_time == 'next':
+            return self.entries[first][1]
+        return self.entries[end - 1][1]
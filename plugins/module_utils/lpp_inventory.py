@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Installation inventory of NIM clients, cached by client and compared in
+# process.
+#
+# A single command per client, run over c_rsh in a bounded thread pool,
+# computes a fingerprint of the client software from its oslevel, its
+# interim fixes and its software vital product data. The fileset levels are
+# only listed when the fingerprint differs from the cached one, so that the
+# inventory of an unchanged client costs one round trip and no transfer.
+
+import os
+import re
+import time
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.cache_file import (
+    CACHE_DIR, load_cache, save_cache)
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_oslevel import (
+    C_RSH, run_cmd)
+from ansible_collections.ibm.power_aix.plugins.module_utils.pool import run_pool
+
+INVENTORY_DIR = CACHE_DIR + '/lpp_inventory'
+CACHE_VERSION = 1
+TIMEOUT = 600           # seconds, for all the clients
+MAX_WORKERS = 32
+# 1234567890-123456, cksum output
+FINGERPRINT = re.compile(r"^[0-9]+-[0-9]+$")
+CACHED_FINGERPRINT = '@FINGERPRINT@'
+
+# Writes 'oslevel <oslevel>' and 'fingerprint <cksum>-<size>', then either
+# 'unchanged' or an 'efix <label> <state>' line per interim fix and the
+# 'lslpp -Lqc' output prefixed by '| ' followed by 'lslpp <rc>'
+INVENTORY_SCRIPT = (
+    'LC_ALL=C; export LC_ALL; '
+    'oslevel=$(/usr/bin/oslevel -s 2>/dev/null); echo "oslevel $oslevel"; '
+    'efixes=$(/usr/sbin/emgr -l 2>/dev/null); '
+    'fp=$({ echo "$oslevel"; echo "$efixes"; '
+    'cat /usr/lib/objrepos/product /usr/share/lib/objrepos/product /etc/objrepos/product 2>/dev/null; } '
+    '| cksum | awk \'{print $1 "-" $2}\'); '
+    'echo "fingerprint $fp"; '
+    'if [ "$fp" = "' + CACHED_FINGERPRINT + '" ]; then echo unchanged; exit 0; fi; '
+    'echo "$efixes" | awk \'$1 ~ /^[0-9]+$/ {print "efix", $3, $2}\'; '
+    'out=$(/usr/bin/lslpp -Lqc 2>&1); rc=$?; '
+    'echo "$out" | sed "s/^/| /"; echo "lslpp $rc"')
+
+
+def inventory_cmd(machine, fingerprint):
+    """
+    Return the inventory command of the machine, skipping the fileset
+    listing if its fingerprint is the cached one
+    """
+    if not fingerprint or not FINGERPRINT.match(fingerprint):
+        fingerprint = 'none'
+    script = INVENTORY_SCRIPT.replace(CACHED_FINGERPRINT, fingerprint)
+    if machine == 'master':
+        return ['/bin/sh', '-c', script]
+    return [C_RSH, machine, script]
+
+
+def parse_inventory(stdout):
+    """
+    Parse the output of the inventory command.
+
+    arguments:
+        stdout (str): the output of INVENTORY_SCRIPT
+    return:
+        dictionary with the 'oslevel', the 'fingerprint', 'unchanged' True
+        if the filesets have not been listed, else the 'filesets' and
+        'efixes' levels by name and the 'rc' of lslpp; None if the output
+        is incomplete
+    """
+    # #Package Name:Fileset:Level:State:PTF Id:Fix State:Type:Description:...
+    # | bos:bos.rte:7.2.5.0: : :C:F:Base Operating System Runtime:...
+    inventory = {'filesets': {}, 'efixes': {}, 'unchanged': False}
+    for line in stdout.splitlines():
+        if line.startswith('| '):
+            fields = line[2:].split(':')
+            if len(fields) > 2 and not fields[0].startswith('#'):
+                inventory['filesets'][fields[1]] = fields[2]
+            continue
+        fields = line.split()
+        if not fields:
+            continue
+        if fields[0] == 'oslevel':
+            inventory['oslevel'] = fields[1] if len(fields) > 1 else ''
+        elif fields[0] == 'fingerprint' and len(fields) > 1:
+            inventory['fingerprint'] = fields[1]
+        elif fields[0] == 'unchanged':
+            inventory['unchanged'] = True
+        elif fields[0] == 'efix' and len(fields) > 2:
+            inventory['efixes'][fields[1]] = fields[2]
+        elif fields[0] == 'lslpp' and len(fields) > 1 and fields[1].isdigit():
+            inventory['rc'] = int(fields[1])
+    if 'fingerprint' not in inventory:
+        return None
+    if not inventory['unchanged'] and 'rc' not in inventory:
+        return None
+    return inventory
+
+
+class LppInventoryCache(object):
+    """
+    On-disk cache of the installation inventory, one file per client.
+
+    An entry is valid as long as the fingerprint of the client is the same,
+    the client checks it itself.
+    """
+
+    def __init__(self, module, cache_dir=INVENTORY_DIR):
+        self.module = module
+        self.cache_dir = cache_dir
+
+    def _path(self, machine):
+        return os.path.join(self.cache_dir, '{0}.json'.format(machine))
+
+    def get(self, machine):
+        """
+        Return the cached inventory of the machine, None if there is none
+        """
+        data = load_cache(self._path(machine), CACHE_VERSION)
+        if data is None:
+            return None
+        return data.get('inventory')
+
+    def set(self, machine, inventory):
+        """
+        Atomically write the cached inventory of the machine
+        """
+        save_cache(self.module, self._path(machine), CACHE_VERSION, {'inventory': inventory}, 'inventory cache')
+
+
+def get_inventories(module, targets, cache, timeout=TIMEOUT, max_workers=MAX_WORKERS):
+    """
+    Get the installation inventory of the specified targets.
+
+    arguments:
+        module      (dict): The Ansible module
+        targets     (list): The machine names, 'master' for the NIM master
+        cache (LppInventoryCache): The inventory cache
+        timeout      (int): The time limit in seconds for all the targets
+        max_workers  (int): The maximum number of concurrent commands
+    return:
+        (inventories, sources): the inventories by machine, each one a
+        dictionary with the 'oslevel', 'fingerprint', 'filesets' and
+        'efixes', and the machine names by source: 'cached', 'collected'
+        and 'failed'
+    """
+    inventories = {}
+    sources = {'cached': [], 'collected': [], 'failed': []}
+    deadline = time.time() + timeout
+
+    def run_inventory_cmd(machine):
+        """
+        Run the inventory command on target machine.
+        """
+        cached = cache.get(machine)
+        cmd = inventory_cmd(machine, (cached or {}).get('fingerprint'))
+        rc, stdout, stderr = run_cmd(module, cmd, deadline)
+        if rc is None:
+            module.log('[WARNING] {0} not responding, inventory command killed after {1}s'.format(machine, timeout))
+            sources['failed'].append(machine)
+            return
+        inventory = parse_inventory(stdout)
+        if rc == 0 and inventory is not None and inventory.get('rc'):
+            # the lslpp return code
+            rc = inventory['rc']
+        if rc != 0 or inventory is None:
+            msg = 'Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd[:2]), rc)
+            module.log('Failed to get the inventory of {0}: {1} {2}'.format(machine, msg, stderr))
+            sources['failed'].append(machine)
+            return
+
+        if inventory['unchanged'] and cached:
+            inventories[machine] = cached
+            sources['cached'].append(machine)
+            return
+        del inventory['unchanged']
+        del inventory['rc']
+        inventory['time'] = time.time()
+        cache.set(machine, inventory)
+        inventories[machine] = inventory
+        sources['collected'].append(machine)
+
+    not_started, failed = run_pool(module, run_inventory_cmd, targets, max_workers, deadline=deadline)
+    if not_started:
+        module.log('[WARNING] inventory not collected within {0}s for: {1}'.format(timeout, ', '.join(not_started)))
+        sources['failed'].extend(not_started)
+    sources['failed'].extend(failed)
+
+    for machines in sources.values():
+        machines.sort()
+    return inventories, sources
+
+
+def compare_inventories(inventories, machines):
+    """
+    Compare the installation inventory of machines.
+
+    arguments:
+        inventories (dict): The inventories by machine, see get_inventories
+        machines    (list): The machines to compare, in column order
+    return:
+        dictionary with
+            'machines' the machines compared
+            'oslevel'  the list of their oslevels
+            'filesets' the list of their levels by fileset, None where the
+                       fileset is not installed, only for the filesets not
+                       at the same level on all the machines
+            'efixes'   the list of their states by interim fix label, for
+                       the interim fixes not installed on all the machines
+            'common'   the number of filesets at the same level everywhere
+    """
+    machines = [machine for machine in machines if machine in inventories]
+    comparison = {
+        'machines': machines,
+        'oslevel': [inventories[machine].get('oslevel') for machine in machines],
+        'filesets': {},
+        'efixes': {},
+        'common': 0,
+    }
+    for key in ('filesets', 'efixes'):
+        names = set()
+        for machine in machines:
+            names.update(inventories[machine][key])
+        for name in names:
+            levels = [inventories[machine][key].get(name) for machine in machines]
+            if key == 'efixes' and None not in levels:
+                continue
+            if key == 'filesets' and None not in levels and len(set(levels)) == 1:
+                comparison['common'] += 1
+                continue
+            comparison[key][name] = levels
+    return comparison
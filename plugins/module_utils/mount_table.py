@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Filesystem and mount state shared by the filesystem and mount modules.
+#
+# The mounted filesystems are read from the kernel mount table with 'mount',
+# which does not query each filesystem like 'df' does and so does not hang
+# on an unresponsive NFS server. The defined filesystems are read from
+# /etc/filesystems with a single 'lsfs -c'. Both are read once per task and
+# indexed; a filesystem changed by the task is listed again on its own.
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+
+# 'lsfs -c' columns
+LSFS_FIELDS = ['mount_point', 'device', 'vfs', 'node', 'type', 'size', 'options', 'auto_mount', 'acct']
+
+
+def parse_mount(stdout):
+    """
+    Parse the output of 'mount' without argument.
+
+    arguments:
+        stdout (str): mount output, local filesystems have an empty node column
+    return:
+        list of the mounted filesystems, each one a dictionary with 'node',
+        'device', 'mount_point', 'vfs' and 'options'
+    """
+    #   node       mounted        mounted over    vfs       date        options
+    # -------- ---------------  ---------------  ------ ------------ ---------------
+    #          /dev/hd4         /                jfs2   Jun 01 10:00 rw,log=/dev/hd8
+    # nfssrv   /export/home     /home            nfs3   Jun 01 10:02 bg,hard,intr
+    mounts = []
+    for line in stdout.splitlines():
+        fields = line.split()
+        if len(fields) < 3 or line.lstrip().startswith('node') or line.startswith('-'):
+            continue
+        node = ''
+        if not line[0].isspace():
+            node = fields.pop(0)
+        if len(fields) < 3:
+            continue
+        mounts.append({'node': node,
+                       'device': fields[0],
+                       'mount_point': fields[1],
+                       'vfs': fields[2],
+                       'options': fields[-1] if len(fields) > 6 else ''})
+    return mounts
+
+
+def parse_lsfs(stdout):
+    """
+    Parse the output of 'lsfs -c'.
+
+    return:
+        dictionary of the filesystems indexed by mount point, each one a
+        dictionary with the LSFS_FIELDS
+    """
+    # #MountPoint:Device:Vfs:Nodename:Type:Size:Options:AutoMount:Acct
+    # /home:/dev/hd1:jfs2::bootfs:65536:rw:yes:no
+    filesystems = {}
+    for line in stdout.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        values = line.split(':')
+        values += [''] * (len(LSFS_FIELDS) - len(values))
+        fs = dict(zip(LSFS_FIELDS, values))
+        filesystems[fs['mount_point']] = fs
+    return filesystems
+
+
+class MountTable(object):
+    """
+    Defined and mounted filesystems of the host, each listed once per task.
+
+    After a command creating, changing or removing a filesystem, refresh()
+    makes the next lookups of this filesystem list it again without reading
+    the whole inventory; refresh_mounts() is called after a mount or unmount.
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self._filesystems = None
+        self._mounts = None
+        self._mounted = None
+        self._stale = set()
+
+    def _run(self, cmd):
+        """
+        Run a listing command, raise CommandError if it fails
+        """
+        rc, stdout, stderr = self.module.run_command(cmd)
+        if rc != 0:
+            raise CommandError(cmd, rc, stdout, stderr)
+        return stdout
+
+    def filesystems(self):
+        """
+        Return the filesystems defined in /etc/filesystems by mount point
+        """
+        if self._filesystems is None:
+            self._filesystems = parse_lsfs(self._run(['lsfs', '-c']))
+            self._stale.clear()
+        return self._filesystems
+
+    def mounts(self):
+        """
+        Return the list of the mounted filesystems, see parse_mount
+        """
+        if self._mounts is None:
+            self._mounts = parse_mount(self._run(['mount']))
+            self._mounted = set()
+            for entry in self._mounts:
+                self._mounted.add(entry['mount_point'])
+                self._mounted.add(entry['device'])
+                if entry['node']:
+                    # the name df shows for a remote filesystem
+                    self._mounted.add('{0}:{1}'.format(entry['node'], entry['device']))
+        return self._mounts
+
+    def get_fs(self, name):
+        """
+        Return the definition of a filesystem.
+
+        arguments:
+            name (str): mount point, or device of a local filesystem
+        return:
+            dictionary with the LSFS_FIELDS, None if not defined
+        """
+        filesystems = self.filesystems()
+        if name in self._stale:
+            self._stale.discard(name)
+            filesystems.pop(name, None)
+            rc, stdout, stderr = self.module.run_command(['lsfs', '-c', name])
+            if rc == 0:
+                filesystems.update(parse_lsfs(stdout))
+        if name in filesystems:
+            return filesystems[name]
+        for fs in filesystems.values():
+            if fs['device'] == name and not fs['node']:
+                return fs
+        return None
+
+    def is_mounted(self, name):
+        """
+        Check whether a mount point or device is mounted.
+
+        arguments:
+            name (str): mount point, device, or node:device for a remote filesystem
+        """
+        self.mounts()
+        return name in self._mounted
+
+    def refresh(self, name=None):
+        """
+        Forget the definition of a filesystem created, changed or removed
+        by the task, or of all the filesystems if name is None
+        """
+        if name is None:
+            self._filesystems = None
+        else:
+            self._stale.add(name)
+
+    def refresh_mounts(self):
+        """
+        Forget the mount table after a mount or unmount
+        """
+        self._mounts = None
+        self._mounted = None
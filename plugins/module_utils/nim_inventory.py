@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# NIM inventory shared by the nim_* modules.
+#
+# All the NIM objects are listed with a single 'lsnim -l' command, parsed in
+# a single pass and indexed by name and by type. The result is cached on disk
+# and reused as long as the NIM database files are not modified.
+#
+# The nim_node dictionary returned by the nim_* modules is built from this
+# inventory. It can be registered and passed to the next NIM tasks with their
+# nim_node option, it is then reused as long as the NIM database is unchanged.
+
+import os
+import time
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.cache_file import (
+    CACHE_DIR, load_cache, save_cache)
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+
+# The NIM object database, any NIM operation or definition updates it
+NIM_DB_FILES = ['/etc/objrepos/nim_object', '/etc/objrepos/nim_attr']
+CACHE_FILE = CACHE_DIR + '/nim_inventory.json'
+CACHE_VERSION = 1
+NIM_NODE_VERSION = 1
+
+_inventory = None
+
+
+def parse_lsnim(stdout):
+    """
+    Parse the output of 'lsnim -l' in a single pass.
+
+    arguments:
+        stdout (str): output of lsnim -l, objects separated by a line
+                      'name:' followed by lines 'attribute = value'
+    return:
+        dictionary of the objects indexed by name with their attributes
+    """
+    objects = {}
+    attrs = None
+
+    for line in stdout.splitlines():
+        if not line or line.isspace():
+            continue
+        if not line[0].isspace():
+            # "quimby01:" starts a new object
+            name, sep, dummy = line.partition(':')
+            attrs = objects.setdefault(name.strip(), {}) if sep else None
+            continue
+        if attrs is None:
+            continue
+        # "   Cstate        = ready for a NIM operation"
+        key, sep, value = line.partition('=')
+        if sep:
+            attrs[key.strip()] = value.strip()
+
+    return objects
+
+
+def nim_db_key():
+    """
+    Build the key invalidating the cache when the NIM database changes.
+
+    return:
+        list of [file, mtime, size] for each NIM database file,
+        None if a file cannot be accessed
+    """
+    key = []
+    for path in NIM_DB_FILES:
+        try:
+            fstat = os.stat(path)
+        except OSError:
+            return None
+        key.append([path, fstat.st_mtime, fstat.st_size])
+    return key
+
+
+class NimInventory(object):
+    """
+    Indexed view of all the NIM objects defined on the NIM master.
+
+    objects maps each object name to its attributes and types maps each
+    NIM type to the sorted list of its object names.
+    """
+
+    def __init__(self, module, cache_file=CACHE_FILE, use_cache=True):
+        self.module = module
+        self.cache_file = cache_file
+        self.use_cache = use_cache
+        self.objects = {}
+        self.types = {}
+        self.source = None
+        self.timestamp = None
+
+    def load(self, refresh=False):
+        """
+        Load the NIM objects from the cache or from lsnim.
+
+        arguments:
+            refresh (bool): ignore the cache and run lsnim
+        note:
+            Raises CommandError if lsnim fails
+        return:
+            self
+        """
+        key = nim_db_key()
+        if self.use_cache and not refresh and key and self._load_cache(key):
+            return self
+
+        cmd = ['lsnim', '-l']
+        rc, stdout, stderr = self.module.run_command(cmd)
+        if rc != 0:
+            raise CommandError(cmd, rc, stdout, stderr)
+
+        self.timestamp = time.time()
+        self.source = 'lsnim'
+        self._index(parse_lsnim(stdout))
+        self.module.debug('NIM inventory: {0} objects listed by lsnim'.format(len(self.objects)))
+
+        # do not cache if the database changed while listing it, or within
+        # the mtime granularity
+        if self.use_cache and key and key == nim_db_key() \
+           and all(self.timestamp - mtime > 1 for path, mtime, size in key):
+            self._save_cache(key)
+        return self
+
+    def _index(self, objects):
+        """
+        Index the objects by type
+        """
+        self.objects = objects
+        self.types = {}
+        for name, attrs in objects.items():
+            self.types.setdefault(attrs.get('type', ''), []).append(name)
+        for names in self.types.values():
+            names.sort()
+
+    def _load_cache(self, key):
+        """
+        Load the cache file if it matches the NIM database key
+
+        return:
+            True if the cache has been loaded
+            False otherwise
+        """
+        data = load_cache(self.cache_file, CACHE_VERSION)
+        if data is None or data.get('key') != key:
+            return False
+
+        self.objects = data['objects']
+        self.types = data['types']
+        self.timestamp = data['timestamp']
+        self.source = 'cache'
+        self.module.debug('NIM inventory: {0} objects loaded from {1}'.format(len(self.objects), self.cache_file))
+        return True
+
+    def _save_cache(self, key):
+        """
+        Atomically write the cache file
+        """
+        data = {'key': key,
+                'timestamp': self.timestamp,
+                'objects': self.objects,
+                'types': self.types}
+        save_cache(self.module, self.cache_file, CACHE_VERSION, data, 'NIM inventory cache')
+
+    def names(self, obj_type):
+        """
+        Return the sorted list of the names of the objects of type obj_type
+        """
+        return list(self.types.get(obj_type, []))
+
+    def by_type(self, obj_type):
+        """
+        Return a dictionary of the objects of type obj_type with a copy
+        of their attributes, as 'lsnim -t <obj_type> -l' would list them
+        """
+        return dict((name, dict(self.objects[name])) for name in self.types.get(obj_type, []))
+
+    def get(self, name):
+        """
+        Return a copy of the attributes of the object name, None if not defined
+        """
+        if name not in self.objects:
+            return None
+        return dict(self.objects[name])
+
+
+def get_nim_inventory(module, refresh=False):
+    """
+    Return the NIM inventory, loaded once per module execution.
+
+    arguments:
+        module  (dict): The Ansible module
+        refresh (bool): reload the NIM objects, after a NIM operation
+    note:
+        Raises CommandError if lsnim fails
+    return:
+        the loaded NimInventory
+    """
+    global _inventory
+
+    if _inventory is None or refresh:
+        _inventory = NimInventory(module).load(refresh=refresh)
+    return _inventory
+
+
+def nim_node_is_fresh(nim_node):
+    """
+    Check a nim_node built by a previous task can be reused: it has the
+    current schema version and the NIM database has not been modified
+    since its objects were listed.
+
+    arguments:
+        nim_node (dict): nim_node returned by a NIM module
+    return:
+        True if the nim_node is up to date
+        False otherwise
+    """
+    if not nim_node or nim_node.get('version') != NIM_NODE_VERSION:
+        return False
+    try:
+        timestamp = float(nim_node.get('timestamp'))
+    except (TypeError, ValueError):
+        return False
+
+    key = nim_db_key()
+    if key is None:
+        return False
+    # same mtime granularity margin as the inventory cache
+    return all(timestamp - mtime > 1 for path, mtime, size in key)
+
+
+def get_nim_node(module, types, nim_node=None):
+    """
+    Build the nim_node dictionary shared by the NIM modules.
+
+    The nim_node maps each NIM type to the objects of this type indexed by
+    name with their lsnim attributes, 'version' is the schema version and
+    'timestamp' the time the objects were listed. Modules may add their own
+    keys to the objects, they are kept when the objects are refreshed.
+
+    The supplied nim_node is used as is if it is up to date, only the missing
+    types are added. Otherwise all its NIM types are refreshed.
+
+    arguments:
+        module   (dict): The Ansible module
+        types    (list): The NIM types needed by the module
+        nim_node (dict): nim_node returned by a previous NIM task, if any
+    note:
+        Raises CommandError if lsnim fails
+    return:
+        (nim_node, source) where source is
+            'supplied'  if the supplied nim_node has been used as is
+            'completed' if the missing types have been added to it
+            'refreshed' if it has been built from the NIM database
+    """
+    if nim_node is None:
+        nim_node = {}
+
+    if nim_node_is_fresh(nim_node):
+        missing = [obj_type for obj_type in types if obj_type not in nim_node]
+        if not missing:
+            return nim_node, 'supplied'
+        inventory = get_nim_inventory(module)
+        for obj_type in missing:
+            nim_node[obj_type] = inventory.by_type(obj_type)
+        return nim_node, 'completed'
+
+    inventory = get_nim_inventory(module)
+    for obj_type in set(types) | (set(nim_node) & set(inventory.types)):
+        objects = inventory.by_type(obj_type)
+        previous = nim_node.get(obj_type) or {}
+        for name, attrs in objects.items():
+            if isinstance(previous.get(name), dict):
+                previous[name].update(attrs)
+                objects[name] = previous[name]
+        nim_node[obj_type] = objects
+    nim_node['version'] = NIM_NODE_VERSION
+    nim_node['timestamp'] = inventory.timestamp
+    return nim_node, 'refreshed'
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Registry of the asynchronous NIM operations launched by the nim modules.
+#
+# Each asynchronous operation is recorded on the NIM master by target with
+# its resource and start time. The progress of all the tracked targets is
+# then read with a single 'lsnim -a' command, so that a play can poll many
+# asynchronous updates with one cheap task.
+
+import re
+import time
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.cache_file import (
+    CACHE_DIR, load_cache, save_cache)
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_inventory import parse_lsnim
+
+JOBS_FILE = CACHE_DIR + '/nim_jobs.json'
+JOBS_VERSION = 1
+STATUS_ATTRS = ['Cstate', 'info', 'Cstate_result']
+READY = 'ready for a NIM operation'
+# Filesets processed:  12 of 96
+PROGRESS = re.compile(r"(\d+)\s+of\s+(\d+)")
+
+
+def job_status(job, attrs):
+    """
+    Compute the progress of an asynchronous operation.
+
+    arguments:
+        job   (dict): the job as recorded in the registry
+        attrs (dict): the current Cstate, info and Cstate_result of the
+                      target, None if it is not a NIM object anymore
+    return:
+        dictionary with the job, the NIM attributes and
+            'status'   running, success, failure or unknown
+            'progress' percentage of the filesets processed, if known
+            'elapsed'  seconds since the start of the operation
+    """
+    status = dict(job)
+    status['elapsed'] = int(time.time() - job['start'])
+    if attrs is None:
+        status['status'] = 'unknown'
+        return status
+    # only the status attributes, lsnim leaves out the empty ones
+    status.update((attr, attrs.get(attr, '')) for attr in STATUS_ATTRS)
+
+    if status['Cstate'] not in (READY, ''):
+        status['status'] = 'running'
+        match_key = PROGRESS.search(status['info'])
+        if match_key and int(match_key.group(2)):
+            status['progress'] = int(match_key.group(1)) * 100 // int(match_key.group(2))
+    elif job.get('rc'):
+        # the operation did not start
+        status['status'] = 'failure'
+    elif status['Cstate_result'] == 'success':
+        status['status'] = 'success'
+        status['progress'] = 100
+    elif status['Cstate_result']:
+        status['status'] = 'failure'
+    else:
+        status['status'] = 'unknown'
+    return status
+
+
+class NimJobs(object):
+    """
+    Asynchronous NIM operations by target, kept in a file on the NIM master.
+
+    The file is read again before each update so that concurrent tasks
+    tracking different targets do not drop each other's jobs.
+    """
+
+    def __init__(self, module, jobs_file=JOBS_FILE):
+        self.module = module
+        self.jobs_file = jobs_file
+        self.jobs = {}
+
+    def load(self):
+        """
+        Load the jobs file, a missing or unreadable file has no jobs
+
+        return:
+            self
+        """
+        data = load_cache(self.jobs_file, JOBS_VERSION) or {}
+        self.jobs = data.get('jobs', {})
+        return self
+
+    def save(self):
+        """
+        Atomically write the jobs file
+        """
+        save_cache(self.module, self.jobs_file, JOBS_VERSION, {'jobs': self.jobs}, 'NIM jobs file')
+
+    def record(self, targets, operation, resource, rc):
+        """
+        Record an asynchronous operation launched on targets, replacing
+        their previous jobs.
+
+        arguments:
+            targets   (list): The NIM clients
+            operation  (str): The NIM operation, cust for instance
+            resource   (str): The resource applied, the lpp_source for instance
+            rc         (int): The return code of the nim command
+        """
+        self.load()
+        start = time.time()
+        for target in targets:
+            self.jobs[target] = {'operation': operation, 'resource': resource,
+                                 'start': start, 'rc': rc}
+        self.save()
+
+    def status(self, targets=None):
+        """
+        Read the progress of the tracked operations with a single lsnim.
+
+        arguments:
+            targets (list): The NIM clients, None for all the tracked ones
+        note:
+            Raises CommandError if lsnim fails for all the targets
+        return:
+            dictionary of the job_status of the tracked targets
+        """
+        self.load()
+        names = sorted(name for name in self.jobs if targets is None or name in targets)
+        if not names:
+            return {}
+
+        # the stanza form: 'lsnim -Z' leaves out an empty info and splits
+        # the values with a colon
+        cmd = ['lsnim']
+        for attr in STATUS_ATTRS:
+            cmd += ['-a', attr]
+        cmd += names
+        rc, stdout, stderr = self.module.run_command(cmd)
+        objects = parse_lsnim(stdout)
+        # a failing lsnim still lists the valid objects
+        if rc != 0 and not objects:
+            raise CommandError(cmd, rc, stdout, stderr)
+
+        return dict((name, job_status(self.jobs[name], objects.get(name))) for name in names)
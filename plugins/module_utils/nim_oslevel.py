@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Collection of the oslevel of NIM clients.
+#
+# The oslevel commands run over c_rsh in a bounded thread pool with a single
+# deadline for all the clients; a command still running at the deadline is
+# killed. The oslevels are cached on disk for a short time, each entry keyed
+# by the client and its NIM state, so that successive tasks do not query the
+# same clients again.
+
+import os
+import re
+import subprocess
+import tempfile
+import time
+
+from ansible.module_utils._text import to_text
+from ansible_collections.ibm.power_aix.plugins.module_utils.cache_file import (
+    CACHE_DIR, TtlCache)
+from ansible_collections.ibm.power_aix.plugins.module_utils.pool import run_pool
+
+C_RSH = '/usr/lpp/bos.sysmgt/nim/methods/c_rsh'
+CACHE_FILE = CACHE_DIR + '/nim_oslevel.json'
+CACHE_VERSION = 1
+CACHE_TTL = 600         # seconds
+TIMEOUT = 300           # seconds, for all the clients
+MAX_WORKERS = 32
+TIMEDOUT = 'timedout'
+
+
+def oslevel_cmd(machine):
+    """
+    Return the command getting the oslevel of the machine
+    """
+    if machine == 'master':
+        return ['/usr/bin/oslevel', '-s']
+    return [C_RSH, machine, '"/usr/bin/oslevel -s; echo rc=$?"']
+
+
+def run_cmd(module, cmd, deadline):
+    """
+    Run a command, killing it if it is still running at the deadline.
+
+    arguments:
+        module   (dict): The Ansible module
+        cmd      (list): The command to run
+        deadline (float): time.time() at which the command is killed
+    return:
+        (rc, stdout, stderr), rc is None if the command has been killed
+    """
+    env = dict(os.environ)
+    env.update(getattr(module, 'run_command_environ_update', None) or {})
+
+    with open(os.devnull, 'rb') as devnull, tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        try:
+            proc = subprocess.Popen(cmd, stdin=devnull, stdout=out, stderr=err, env=env, close_fds=True)
+        except OSError as exc:
+            return 127, '', to_text(str(exc))
+
+        delay = 0.05
+        while proc.poll() is None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                proc.kill()
+                proc.wait()
+                return None, '', ''
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 1)
+
+        out.seek(0)
+        err.seek(0)
+        return proc.returncode, to_text(out.read()), to_text(err.read())
+
+
+class OslevelCache(TtlCache):
+    """
+    Short-lived on-disk cache of the oslevel of the NIM clients.
+
+    An entry is valid for ttl seconds, and only as long as the NIM state of
+    the client is the same as when the oslevel was collected.
+    """
+
+    def __init__(self, module, cache_file=CACHE_FILE, ttl=CACHE_TTL):
+        super(OslevelCache, self).__init__(module, cache_file, CACHE_VERSION, ttl, 'oslevel cache')
+
+    def get(self, machine, state):
+        """
+        Return the cached oslevel of the machine, None if not valid
+        """
+        entry = self.get_entry(machine)
+        if not entry or state is None or entry['state'] != state:
+            return None
+        return entry['oslevel']
+
+    def set(self, machine, state, oslevel):
+        """
+        Record the oslevel of the machine
+        """
+        if state is None:
+            return
+        self.set_entry(machine, state=state, oslevel=oslevel)
+
+
+def nim_state(attrs):
+    """
+    Build the NIM state key of a client from its lsnim attributes
+
+    return:
+        the state string, None if the client has no Cstate
+    """
+    if not attrs or 'Cstate' not in attrs:
+        return None
+    return '{0}|{1}|{2}'.format(attrs['Cstate'], attrs.get('Cstate_result', ''), attrs.get('prev_state', ''))
+
+
+def get_oslevels(module, targets, states=None, timeout=TIMEOUT, max_workers=MAX_WORKERS, cache=None):
+    """
+    Get the oslevel of the specified targets.
+
+    arguments:
+        module      (dict): The Ansible module
+        targets     (list): The machine names, 'master' for the NIM master
+        states      (dict): The NIM state of the machines (see nim_state),
+                            machines without state are not cached
+        timeout      (int): The time limit in seconds for all the targets
+        max_workers  (int): The maximum number of concurrent commands
+        cache (OslevelCache): The oslevel cache, None to disable it
+    return:
+        dictionary of the oslevels, TIMEDOUT for the machines whose
+        oslevel cannot be retrieved
+    """
+    states = states or {}
+    oslevels = {}
+    todo = []
+    for machine in targets:
+        oslevel = cache.get(machine, states.get(machine)) if cache else None
+        if oslevel:
+            oslevels[machine] = oslevel
+        else:
+            oslevels[machine] = TIMEDOUT
+            todo.append(machine)
+    if len(todo) < len(oslevels):
+        module.debug('oslevel cache hit for {0} machine(s)'.format(len(oslevels) - len(todo)))
+
+    deadline = time.time() + timeout
+
+    def run_oslevel_cmd(machine):
+        """
+        Run the oslevel command on target machine.
+        """
+        cmd = oslevel_cmd(machine)
+        rc, stdout, stderr = run_cmd(module, cmd, deadline)
+        if rc is None:
+            module.log('[WARNING] {0} not responding, oslevel command killed after {1}s'.format(machine, timeout))
+            return
+        if rc != 0:
+            msg = 'Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), rc)
+            module.log('Failed to get oslevel for {0}: {1}'.format(machine, msg))
+            return
+
+        module.debug('{0} oslevel stdout: "{1}"'.format(machine, stdout))
+        if stderr.rstrip():
+            module.log('[WARNING] "{0}" command stderr: {1}'.format(' '.join(cmd), stderr))
+
+        # remove the rc of c_rsh with echo $?
+        if machine != 'master':
+            match = re.search(r'rc=([-\d]+)\n?$', stdout)
+            if match and match.group(1) != '0':
+                module.log('Failed to get oslevel for {0}: oslevel returned {1}'.format(machine, match.group(1)))
+                return
+            stdout = re.sub(r'rc=[-\d]+\n?$', '', stdout)
+
+        # return stdout only ... stripped!
+        oslevel = stdout.rstrip()
+        if not oslevel:
+            return
+        oslevels[machine] = oslevel
+        if cache:
+            cache.set(machine, states.get(machine), oslevel)
+
+    not_started, failed = run_pool(module, run_oslevel_cmd, todo, max_workers, deadline=deadline)
+    if not_started:
+        module.log('[WARNING] oslevel not collected within {0}s for: {1}'.format(timeout, ', '.join(not_started)))
+
+    if cache:
+        cache.save()
+    return oslevels
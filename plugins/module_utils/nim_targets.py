@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# NIM target patterns shared by the nim_* modules.
+#
+# The NIM clients are indexed once: a set for the exact names and a sorted
+# list searched by bisection for the names starting with the literal prefix
+# of a glob or range, so that a pattern only looks at the names it can match
+# instead of matching a regular expression against every client.
+
+import bisect
+import fnmatch
+import re
+
+# quimby[7:12]
+RANGE_PATTERN = re.compile(r"^(\w+)\[(\d+):(\d+)\]$")
+GLOB_CHARS = re.compile(r"[*?[]")
+# member1 = quimby01
+MEMBER_ATTR = re.compile(r"^member(\d+)$")
+
+
+def group_members(attrs):
+    """
+    Return the members of a NIM machine group.
+
+    arguments:
+        attrs (dict): lsnim attributes of the mac_group, the members are
+                      the values of the 'member<n>' attributes
+    return:
+        list of the member names, in member number order
+    """
+    members = []
+    for key, value in attrs.items():
+        match_key = MEMBER_ATTR.match(key)
+        if match_key and value.split():
+            members.append((int(match_key.group(1)), value.split()[0]))
+    return [name for number, name in sorted(members)]
+
+
+class NimTargets(object):
+    """
+    Resolve target patterns against the NIM clients.
+
+    A target pattern can be of the following form:
+        target*       all the clients whose names start with 'target',
+                      other globs with *, ? and [...] are supported
+        target[n1:n2] where n1 and n2 are numeric: target<n1> to target<n2>
+        * or ALL      all the clients
+        vios          all the clients of type vios, same for any client
+        standalone    type, unless a client has this name
+        group_name    the members of the NIM machine group 'group_name'
+        client_name   the client named 'client_name'
+        master        the NIM master, if allowed
+        !pattern      removes the clients matching pattern from the
+                      clients matched by the other patterns
+    """
+
+    def __init__(self, clients, groups=None, master=False):
+        """
+        arguments:
+            clients (dict): the client names by NIM type
+            groups  (dict): the NIM machine groups by name with their
+                            lsnim attributes
+            master  (bool): 'master' is a valid target even if not a client
+        """
+        self.types = dict((obj_type, set(names)) for obj_type, names in clients.items())
+        self.known = set()
+        for names in self.types.values():
+            self.known.update(names)
+        self.names = sorted(self.known)
+        self.groups = dict((name, group_members(attrs)) for name, attrs in (groups or {}).items())
+        self.master = master
+
+    def _bounds(self, prefix):
+        """
+        Return the slice of the sorted names starting with prefix
+        """
+        start = bisect.bisect_left(self.names, prefix)
+        if not prefix:
+            return start, len(self.names)
+        # first name after all the names starting with prefix
+        after = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return start, bisect.bisect_left(self.names, after, start)
+
+    def _prefixed(self, prefix):
+        """
+        Return the client names starting with prefix, in sorted order
+        """
+        start, end = self._bounds(prefix)
+        return self.names[start:end]
+
+    def match(self, target):
+        """
+        Return the set of the client names matching a target pattern
+        """
+        if target.upper() == 'ALL' or target == '*':
+            return set(self.known)
+
+        if target in self.known:
+            return set([target])
+
+        if target.lower() in self.types:
+            return set(self.types[target.lower()])
+
+        if target in self.groups:
+            return set(name for name in self.groups[target] if name in self.known)
+
+        if target == 'master':
+            return set([target]) if self.master else set()
+
+        # quimby[7:12] is quimby7 to quimby12
+        rmatch = RANGE_PATTERN.match(target)
+        if rmatch:
+            prefix = rmatch.group(1)
+            start = int(rmatch.group(2))
+            end = int(rmatch.group(3))
+            first, last = self._bounds(prefix)
+            if end - start < last - first:
+                # fewer numbers in the range than names with the prefix
+                return set(name for name in (prefix + str(i) for i in range(start, end + 1)) if name in self.known)
+            clients = set()
+            for name in self.names[first:last]:
+                suffix = name[len(prefix):]
+                if suffix.isdigit() and suffix == str(int(suffix)) and start <= int(suffix) <= end:
+                    clients.add(name)
+            return clients
+
+        glob = GLOB_CHARS.search(target)
+        if glob:
+            prefix = target[:glob.start()]
+            if target == prefix + '*':
+                return set(self._prefixed(prefix))
+            return set(name for name in self._prefixed(prefix) if fnmatch.fnmatchcase(name, target))
+
+        return set()
+
+    def expand(self, targets):
+        """
+        Expand the list of target patterns.
+
+        arguments:
+            targets (list): The list of target patterns
+        return:
+            the sorted list of the clients matching the target patterns
+        """
+        clients = set()
+        excluded = set()
+        for target in targets:
+            if target.startswith('!'):
+                excluded.update(self.match(target[1:]))
+            elif len(clients) < len(self.known) or target == 'master':
+                clients.update(self.match(target))
+        return sorted(clients - excluded)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Watcher of the NIM operations in progress.
+#
+# A single polling thread lists the states of all the watched NIM objects
+# with one lsnim command per tick, whatever the number of operations being
+# waited for. The polling interval is reset when a state changes and
+# doubled up to a maximum while nothing progresses.
+#
+# The state of an object is only considered once the operation had time to
+# start, so that the state before the operation is not taken for its end.
+
+import threading
+import time
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_inventory import parse_lsnim
+
+WATCHED_ATTRS = ['Cstate', 'info', 'Cstate_result', 'Mstate', 'prev_state']
+MIN_INTERVAL = 5        # seconds
+MAX_INTERVAL = 60       # seconds
+
+_watcher = None
+
+
+class NimWatcher(object):
+    """
+    Multiplex the NIM state polling of the operations in progress.
+
+    Each thread waiting for an operation registers its NIM object with
+    wait(), the polling thread runs while at least one object is watched.
+    """
+
+    def __init__(self, module, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+        self.module = module
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.cond = threading.Condition()
+        self.wakeup = threading.Event()
+        self.watched = {}
+        self.states = {}
+        self.errors = {}
+        self.ticks = 0
+        self.tick_time = 0
+        self.thread = None
+
+    def _poll(self):
+        """
+        Polling thread: list the states of the watched objects at each tick
+        """
+        interval = self.min_interval
+        # the operations registering the objects have just been started
+        time.sleep(self.min_interval)
+        while True:
+            with self.cond:
+                names = sorted(self.watched)
+                if not names:
+                    self.thread = None
+                    return
+                tick_time = time.time()
+
+            cmd = ['lsnim']
+            for attr in WATCHED_ATTRS:
+                cmd += ['-a', attr]
+            cmd += names
+            rc, stdout, stderr = self.module.run_command(cmd)
+            objects = parse_lsnim(stdout)
+
+            changed = False
+            with self.cond:
+                self.ticks += 1
+                self.tick_time = tick_time
+                for name in names:
+                    if name not in objects:
+                        # a failing lsnim still lists the valid objects
+                        self.errors[name] = 'Command \'{0}\' failed with return code {1}: {2}'\
+                                            .format(' '.join(cmd), rc, stderr.strip())
+                        continue
+                    self.errors.pop(name, None)
+                    if self.states.get(name) != objects[name]:
+                        self.states[name] = objects[name]
+                        changed = True
+                self.cond.notify_all()
+
+            interval = self.min_interval if changed else min(interval * 2, self.max_interval)
+            if self.wakeup.wait(interval):
+                # new operations: batch their registration in the next tick
+                self.wakeup.clear()
+                interval = self.min_interval
+                time.sleep(self.min_interval)
+
+    def wait(self, name, done, stall_timeout, on_progress=None, stop=None, delay=None):
+        """
+        Wait for the NIM operation on an object to end.
+
+        arguments:
+            name         (str): The NIM object name
+            done    (function): Called with the NIM attributes of the object
+                                at each change, returns True when the
+                                operation has ended
+            stall_timeout (int): Seconds without any state change after
+                                 which the operation is considered blocked
+            on_progress (function): Called with the NIM attributes of the
+                                    object at each change
+            stop       (Event): Stop waiting when this event is set
+            delay        (int): Seconds after the call before the state of
+                                the object is considered, min_interval if
+                                None, so that the operation has started
+        return:
+            (status, state) where status is
+                'done'    the operation ended, state holds the NIM attributes
+                'stalled' no progress for stall_timeout seconds
+                'stopped' the stop event has been set
+                'error'   the NIM state cannot be listed, state holds the error
+        """
+        if delay is None:
+            delay = self.min_interval
+        registered = time.time()
+        with self.cond:
+            self.watched[name] = self.watched.get(name, 0) + 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._poll)
+                self.thread.daemon = True
+                self.thread.start()
+            else:
+                # do not wait for the backed off interval
+                self.wakeup.set()
+
+            try:
+                seen = self.ticks
+                state = None
+                last_change = time.time()
+                while True:
+                    if self.ticks > seen and self.tick_time - registered >= delay:
+                        seen = self.ticks
+                        if name in self.errors:
+                            return 'error', self.errors[name]
+                        if self.states.get(name) != state:
+                            state = self.states[name]
+                            last_change = time.time()
+                            if on_progress:
+                                on_progress(dict(state))
+                            if done(state):
+                                return 'done', dict(state)
+                    if stop is not None and stop.is_set():
+                        return 'stopped', state
+                    if time.time() - last_change > stall_timeout:
+                        return 'stalled', state
+                    self.cond.wait(1)
+            finally:
+                self.watched[name] -= 1
+                if not self.watched[name]:
+                    del self.watched[name]
+                    self.states.pop(name, None)
+                    self.errors.pop(name, None)
+
+
+def get_nim_watcher(module):
+    """
+    Return the NIM watcher shared by all the threads of the module
+    """
+    global _watcher
+
+    if _watcher is None:
+        _watcher = NimWatcher(module)
+    return _watcher
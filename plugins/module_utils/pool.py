@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Bounded thread pool shared by the modules running operations on many
+# NIM clients in parallel.
+#
+# Worker threads pop items from a shared work list, so at most max_workers
+# operations run at the same time whatever the number of items. The caller
+# can add its own limits with the can_start and release functions, such as
+# a number of operations per HMC or domains updated by one item at a time.
+
+import threading
+import time
+
+# time given to the running items to honor the deadline
+DEADLINE_GRACE = 2
+
+# seconds between the checks of the deadline and stop event by the worker
+# threads waiting for an item that can start
+WAIT_INTERVAL = 1
+
+
+def run_pool(module, func, items, max_workers, deadline=None, stop=None, can_start=None, release=None):
+    """
+    Run func on each item with a bounded number of worker threads.
+
+    arguments:
+        module      (dict): The Ansible module
+        func    (function): The function to call with the item as argument
+        items       (list): The list of items to process
+        max_workers  (int): The maximum number of concurrent threads
+        deadline   (float): time.time() after which no item is started and
+                            the pool stops waiting for running items
+        stop       (Event): no item is started once this event is set
+        can_start (function): called with the pending items in order, the
+                            first one it returns True for is started, so it
+                            can reserve what the item uses
+        release (function): called with each item once func returns, to free
+                            what can_start reserved for it
+    note:
+        func is expected to honor the deadline itself; the worker threads
+        are daemon threads so a hung item cannot block the module exit.
+        can_start and release are called with the pool lock held. When no
+        item runs and can_start rejects all the pending items, they are
+        not started.
+        An exception raised by func for an item, including the SystemExit
+        of fail_json, is logged and the pool goes on with the other items.
+    return:
+        the list of the items that have not been started
+        the list of the items for which func raised an exception
+    """
+    work = list(items)
+    failed = []
+    cond = threading.Condition()
+    running = [0]
+
+    def next_item():
+        """
+        Returns the first pending item that can start, None when there is
+        no item to start, waiting for the running items otherwise
+        """
+        while work:
+            if (stop is not None and stop.is_set()) \
+               or (deadline is not None and time.time() >= deadline):
+                return None
+            for item in work:
+                if can_start is None or can_start(item):
+                    work.remove(item)
+                    return item
+            if not running[0]:
+                return None
+            if deadline is None and stop is None:
+                cond.wait()
+            else:
+                cond.wait(WAIT_INTERVAL)
+        return None
+
+    def worker():
+        """
+        Pop items from the shared work list until none can start
+        """
+        while True:
+            with cond:
+                item = next_item()
+                if item is None:
+                    return
+                running[0] += 1
+            module.debug('Start {0} for {1}'.format(func.__name__, item))
+            try:
+                func(item)
+            except BaseException as exc:
+                module.log('[WARNING] {0} failed for {1}: {2!r}'.format(func.__name__, item, exc))
+                with cond:
+                    failed.append(item)
+            finally:
+                with cond:
+                    running[0] -= 1
+                    if release is not None:
+                        release(item)
+                    cond.notify_all()
+
+    thds = []
+    for i in range(min(max_workers, len(work))):
+        thd = threading.Thread(target=worker)
+        thd.daemon = True
+        thd.start()
+        thds.append(thd)
+    for thd in thds:
+        if deadline is None:
+            thd.join()
+        else:
+            thd.join(max(deadline - time.time(), 0) + DEADLINE_GRACE)
+            if thd.is_alive():
+                module.log('[WARNING] {0} still running at the deadline'.format(thd.name))
+
+    with cond:
+        not_started = list(work)
+        del work[:]
+        failed = list(failed)
+    return not_started, failed
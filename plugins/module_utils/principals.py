@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# User and group inventory shared by the user and group modules.
+#
+# The attributes of all the users or groups are read with a single
+# 'lsuser -c ALL' or 'lsgroup -c ALL' and indexed by name, so that a task
+# handling many principals compares the requested attributes with the
+# current ones and runs mk/ch/rm commands only for what differs.
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+
+# Attributes whose value is an unordered comma separated list
+LIST_ATTRIBUTES = ['groups', 'admgroups', 'sugroups', 'roles', 'default_roles',
+                   'auditclasses', 'ttys', 'users', 'adms']
+
+# Pseudo attribute selecting the registry, it is not listed by lsuser/lsgroup
+LOAD_MODULE = 'load_module'
+
+# lsuser/lsgroup -c write a colon in a value as '#!:'
+ESCAPED_COLON = '#!:'
+
+
+def parse_colon_records(stdout):
+    """
+    Parse the output of 'lsuser -c' or 'lsgroup -c'.
+
+    arguments:
+        stdout (str): each principal is a '#name:attr...' header line
+                      followed by its values line
+    return:
+        dictionary of the attributes indexed by principal name
+    """
+    # #name:id:pgrp:groups:home:shell
+    # root:0:system:system,bin,sys:/:/usr/bin/ksh
+    principals = {}
+    header = None
+    for line in stdout.splitlines():
+        if not line:
+            continue
+        fields = [field.replace('\0', ':') for field in line.replace(ESCAPED_COLON, '\0').split(':')]
+        if line.startswith('#'):
+            header = fields
+            header[0] = header[0][1:]
+            continue
+        if header is None:
+            continue
+        attrs = dict(zip(header, fields))
+        principals[attrs.pop('name', fields[0])] = attrs
+    return principals
+
+
+def format_value(value):
+    """
+    Convert a requested attribute value to the lsuser/lsgroup format
+    """
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (list, tuple)):
+        return ','.join(str(item) for item in value)
+    return str(value)
+
+
+def same_value(attr, requested, current):
+    """
+    Check whether a requested attribute value is the current one
+    """
+    if current is None:
+        return False
+    if attr in LIST_ATTRIBUTES:
+        return set(filter(None, requested.split(','))) == set(filter(None, current.split(',')))
+    return requested == current
+
+
+def diff_attributes(requested, current):
+    """
+    Compare the requested attributes of a principal with its current ones.
+
+    arguments:
+        requested (dict): attributes to set, load_module is ignored
+        current   (dict): attributes listed, None if the principal does not exist
+    return:
+        dictionary of the attributes to change, each one a dictionary with
+        the 'before' and 'after' values
+    """
+    changes = {}
+    current = current or {}
+    for attr, value in (requested or {}).items():
+        if attr == LOAD_MODULE:
+            continue
+        value = format_value(value)
+        if not same_value(attr, value, current.get(attr)):
+            changes[attr] = {'before': current.get(attr), 'after': value}
+    return changes
+
+
+class PrincipalInventory(object):
+    """
+    Users or groups of a registry, each listed once per task.
+
+    The task keeps the inventory up to date with added(), changed() and
+    removed() after a successful mk/ch/rm command.
+    """
+
+    def __init__(self, module, list_cmd):
+        """
+        arguments:
+            module  (dict): The Ansible module
+            list_cmd (str): lsuser or lsgroup
+        """
+        self.module = module
+        self.list_cmd = list_cmd
+        self.principals = {}
+        self.complete = set()
+
+    def _cmd(self, names, load_module):
+        cmd = [self.list_cmd]
+        if load_module:
+            cmd += ['-R', load_module]
+        return cmd + ['-c', names]
+
+    def load(self, load_module=None):
+        """
+        List all the principals of the registry at once.
+
+        raise: CommandError if they cannot be listed
+        """
+        if load_module in self.complete:
+            return
+        cmd = self._cmd('ALL', load_module)
+        rc, stdout, stderr = self.module.run_command(cmd)
+        if rc != 0:
+            raise CommandError(cmd, rc, stdout, stderr)
+        self.principals[load_module] = parse_colon_records(stdout)
+        self.complete.add(load_module)
+
+    def get(self, name, load_module=None):
+        """
+        Return the attributes of a principal, None if it does not exist.
+        Only this principal is listed if the whole registry is not loaded.
+        """
+        principals = self.principals.setdefault(load_module, {})
+        if load_module not in self.complete and name not in principals:
+            rc, stdout, stderr = self.module.run_command(self._cmd(name, load_module))
+            if rc != 0:
+                return None
+            principals.update(parse_colon_records(stdout))
+        return principals.get(name)
+
+    def added(self, name, attrs, load_module=None):
+        """
+        Record a principal created by the task with the requested attributes
+        """
+        self.principals.setdefault(load_module, {})[name] = dict((attr, format_value(value))
+                                                                 for attr, value in attrs.items()
+                                                                 if attr != LOAD_MODULE)
+
+    def changed(self, name, changes, load_module=None):
+        """
+        Record the attributes changed by the task, see diff_attributes
+        """
+        attrs = self.principals.setdefault(load_module, {}).setdefault(name, {})
+        for attr, change in changes.items():
+            attrs[attr] = change['after']
+
+    def removed(self, name, load_module=None):
+        """
+        Record a principal removed by the task
+        """
+        self.principals.setdefault(load_module, {}).pop(name, None)
@@ -218,7 +218,14 @@ options:
     description:
     - Allows to pass along NIM node info from a task to another so that it
       discovers NIM info only one time for all tasks.
+    - It is used as is if its C(version) is supported and the NIM database has not been modified since its C(timestamp),
+      otherwise it is refreshed.
     type: dict
+  stall_timeout:
+    description:
+    - Time in minutes after which a migration whose NIM state shows no progress is considered blocked.
+    type: int
+    default: 180
 notes:
   - Debug on NIM master could be done using the following command
     B(nim -o showlog -a full_log=yes -a log_type=script vios_target)
@@ -290,12 +297,22 @@ nim_node:
     returned: always
     type: dict
     contains:
+        version:
+            description: Schema version of the NIM node info.
+            returned: always
+            type: int
+        timestamp:
+            description: Time the NIM objects were listed, in seconds since the Epoch.
+            returned: always
+            type: float
         vios:
             description: List of VIOS NIM resources.
             returned: always
             type: dict
     sample:
         "nim_node": {
+            "version": 1,
+            "timestamp": 1602155234.52,
             "vios": {
                 "vios1": {
                     "Cstate": "ready for a NIM operation",
@@ -330,6 +347,15 @@ nim_node:
                 }
             }
         }
+nim_node_source:
+    description:
+    - How the NIM node info has been built.
+    - C(supplied) if the I(nim_node) option has been used as is.
+    - C(completed) if the NIM types missing from the I(nim_node) option have been added.
+    - C(refreshed) if it has been built from the NIM database.
+    returned: always
+    type: str
+    sample: supplied
 meta:
     description: Detailed information on the module execution.
     returned: always
@@ -376,6 +402,10 @@ import threading
 
 # Ansible module 'boilerplate'
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_inventory import (
+    get_nim_node)
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_watcher import get_nim_watcher
 
 # TODO check and add SSP support
 # TODO add mirrored rootvg support
@@ -384,6 +414,7 @@ from ansible.module_utils.basic import AnsibleModule
 def refresh_nim_node(module, type):
     """
     Get nim client information of provided type and update nim_node dictionary.
+    The nim_node passed as option is used if it is up to date.
 
     arguments:
         module  (dict): The Ansible module
@@ -395,76 +426,17 @@ def refresh_nim_node(module, type):
     """
     global results
 
-    if module.params['nim_node']:
-        results['nim_node'] = module.params['nim_node']
-
-    nim_info = get_nim_type_info(module, type)
-
-    if type not in results['nim_node']:
-        results['nim_node'].update({type: nim_info})
-    else:
-        for elem in nim_info.keys():
-            if elem in results['nim_node']:
-                results['nim_node'][type][elem].update(nim_info[elem])
-            else:
-                results['nim_node'][type][elem] = nim_info[elem]
-    module.debug("results['nim_node'][{0}]: {1}".format(type, results['nim_node'][type]))
-
-
-def get_nim_type_info(module, type):
-    """
-    Build the hash of nim client of type=lpar_type defined on the
-    nim master and their associated key = value information.
-
-    arguments:
-        module      (dict): The Ansible module
-        type     (str): type of the nim object to get information
-    note:
-        Exits with fail_json in case of error
-    return:
-        info_hash   (dict): information from the nim clients
-    """
-    global results
-
-    cmd = ['lsnim', '-t', type, '-l']
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
-        msg = 'Cannot get NIM Client information. Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), rc)
+    try:
+        results['nim_node'], results['nim_node_source'] = \
+            get_nim_node(module, [type], module.params['nim_node'])
+    except CommandError as exc:
+        msg = 'Cannot get NIM Client information. {0}'.format(exc)
         module.log(msg)
         results['msg'] = msg
-        results['stdout'] = stdout
-        results['stderr'] = stderr
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
         module.fail_json(**results)
-
-    info_hash = build_dict(module, stdout)
-
-    return info_hash
-
-
-def build_dict(module, stdout):
-    """
-    Build dictionary with the stdout info
-
-    arguments:
-        module  (dict): The Ansible module
-        stdout   (str): stdout of the command to parse
-    returns:
-        info    (dict): NIM info dictionary
-    """
-    info = {}
-
-    for line in stdout.rstrip().splitlines():
-        line = line.rstrip()
-        match_key = re.match(r"^(\S+):", line)
-        if match_key:
-            obj_key = match_key.group(1)
-            info[obj_key] = {}
-            continue
-        rmatch_attr = re.match(r"^\s+(\S+)\s+=\s+(.*)$", line)
-        if rmatch_attr:
-            info[obj_key][rmatch_attr.group(1)] = rmatch_attr.group(2)
-            continue
-    return info
+    module.debug("results['nim_node'][{0}]: {1}".format(type, results['nim_node'][type]))
 
 
 def check_vios_targets(module, targets):
@@ -908,101 +880,55 @@ def nim_wait_migvios(module, vios_key, vios):
     module.log('Waiting completion of migvios on {0}...'
                .format(vios))
 
-    cmd = ['lsnim', '-a', 'info', '-a', 'Cstate', '-a', 'Cstate_result', '-a', 'Mstate', '-a', 'prev_state', vios]
-
-    # TODO: can we reduce the timeout (3 hours without states change)?
-    # Time out if nim states do not change for more than 3 hours
-    # check every 30 seconds
-    # log debug every state change or every 5 minutes
-    # (360 * 30s = 180 min)
-    _TIMEOUT_NIMSTATE = 360 * 30
-    wait_time = _TIMEOUT_NIMSTATE
-    prev_states = {}
-    curr_states = {}
-    while wait_time >= 0:
-        time.sleep(30)
-        wait_time -= 30
-
-        # TODO: remove time_limit for wait migvios? no limit there.
-        #           only timeout when no nim states progress for a long time
-        # if time_limit is not None and time.localtime(time.time()) >= time_limit:
-        #     msg = 'Time limit {0} reached, no further operation'\
-        #           .format(time_limit_str)
-        #     module.log(msg)
-        #     results['meta'][vios_key]['messages'].append(msg)
-        #     return -1
-
-        rc, stdout, stderr = module.run_command(cmd)
-        if rc != 0:
-            msg = 'Failed to get the NIM state for {0}, rc: {1}'.format(vios, rc)
-            module.log(msg)
-            module.log('cmd {0}, stdout: {1}, stderr:{2}'.format(' '.join(cmd), stdout, stderr))
-            results['meta'][vios_key]['messages'].append(msg)
-            results['meta'][vios_key][vios]['cmd'] = ' '.join(cmd)
-            results['meta'][vios_key][vios]['stdout'] = stdout
-            results['meta'][vios_key][vios]['stderr'] = stderr
-            return 2
-
-        if len(curr_states) >= 0:
-            prev_states = curr_states.copy()
-            curr_states = {}
-
-        # TODO Should we also get NIM 'info' state to trace migvios progress in NIM?
-        # Retrieve the NIM states
-        # <vios>:
-        #    Cstate = ready for a NIM operation
-        #    prev_state = customization is being performed
-        #    Mstate = ready for use
-        #    Cstate_result = success
-        curr_states = build_dict(module, stdout)
-
-        if len(curr_states) <= 0:
-            msg = 'Failed to retrieve NIM states for {0} from lsnim output: unexpected format.'.format(vios)
-            module.log(msg)
-            module.log('cmd {0} stdout: {1}'.format(' '.join(cmd), stdout))
-            results['meta'][vios_key]['messages'].append(msg)
-            results['meta'][vios_key][vios]['stdout'] = stdout
-            results['meta'][vios_key][vios]['stderr'] = stderr
-            return 2
-        elif curr_states == prev_states:
-            if wait_time % 300 == 0:
-                # log only every 5 minutes
-                msg = 'VIOS {0}, waiting for migvios completion... {1} minute(s)'.format(vios, wait_time / 60)
-                module.log(msg)
-            continue
-
-        # NIM states have changed
-        wait_time = _TIMEOUT_NIMSTATE
-        module.debug('VIOS {0}, NIM states: {1}'.format(vios, stdout))
+    def progress(state):
+        """
+        Log every NIM states change
+        """
+        module.debug('VIOS {0}, NIM states: {1}'.format(vios, state))
 
+    def migvios_ended(state):
+        """
+        Check if it's the end of the operation
+        """
         # TODO can migvios be ongoing if Cstate_result != 'success'? should we wait?
-        if curr_states[vios]['Cstate_result'] != 'success':
-            msg = 'VIOS {0} migration failed, NIM states:'.format(vios)
-            module.log(msg)
-            module.log(curr_states)
-            results['meta'][vios_key]['messages'].append(msg)
-            results['meta'][vios_key]['messages'].append(stdout.split('\n'))
-            return 1
-
-        # Check if it's the end of the operation
-        if curr_states[vios]['Mstate'] != 'ready for use' and \
-           curr_states[vios]['Cstate'] != 'ready for a NIM operation' and \
-           curr_states[vios]['prev_state'] != 'customization is being performed':
-            prev_states = curr_states.copy()
-            continue
+        return state.get('Cstate_result') != 'success' \
+            or state.get('Mstate') == 'ready for use' \
+            or state.get('Cstate') == 'ready for a NIM operation' \
+            or state.get('prev_state') == 'customization is being performed'
+
+    # Time out if nim states do not change for more than stall_timeout minutes
+    stall_timeout = module.params['stall_timeout']
+    # the migration takes a while to change the NIM states
+    status, state = get_nim_watcher(module).wait(vios, migvios_ended, stall_timeout * 60,
+                                                 on_progress=progress, delay=30)
+
+    if status == 'error':
+        msg = 'Failed to get the NIM state for {0}: {1}'.format(vios, state)
+        module.log(msg)
+        results['meta'][vios_key]['messages'].append(msg)
+        return 2
 
-        msg = 'VIOS {0} successfully upgraded'.format(vios)
+    if status != 'done':
+        msg = 'Migration operation on {0} has shown no progress for {1} minutes, NIM state:'\
+              .format(vios, stall_timeout)
         module.log(msg)
         results['meta'][vios_key]['messages'].append(msg)
-        results['changed'] = True
-        return 0
+        results['meta'][vios_key]['messages'].append(state)
+        return -1
+
+    if state.get('Cstate_result') != 'success':
+        msg = 'VIOS {0} migration failed, NIM states:'.format(vios)
+        module.log(msg)
+        module.log(state)
+        results['meta'][vios_key]['messages'].append(msg)
+        results['meta'][vios_key]['messages'].append(state)
+        return 1
 
-    msg = 'Migration operation on {0} has shown no progress for {1} hours, NIM state:'\
-          .format(vios, _TIMEOUT_NIMSTATE % 3600)
+    msg = 'VIOS {0} successfully upgraded'.format(vios)
     module.log(msg)
     results['meta'][vios_key]['messages'].append(msg)
-    results['meta'][vios_key]['messages'].append(stdout.split('\n'))
-    return -1
+    results['changed'] = True
+    return 0
 
 
 ###################################################################################
@@ -1018,6 +944,7 @@ def main():
             time_limit=dict(required=False, type='str'),
             vios_status=dict(required=False, type='dict'),
             nim_node=dict(required=False, type='dict'),
+            stall_timeout=dict(required=False, type='int', default=180),
 
             # migrate operation
             mksysb_name=dict(type='str'),
@@ -1072,6 +999,7 @@ def main():
         #   }
         # }
         nim_node={},
+        nim_node_source='',
         status={},
     )
     module.run_command_environ_update = dict(LANG='C', LC_ALL='C', LC_MESSAGES='C', LC_CTYPE='C')
@@ -124,6 +124,11 @@ import os.path
 import re
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.disk_inventory import (
+    DiskInventory, collect_local_disks)
+
+DISKS = None
 
 
 def get_pvs(module):
@@ -134,25 +139,14 @@ def get_pvs(module):
     """
     global results
 
-    cmd = ['lspv']
-    ret, stdout, stderr = module.run_command(cmd)
-    if ret != 0:
-        results['stdout'] = stdout
-        results['stderr'] = stderr
-        results['msg'] = 'Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), ret)
+    try:
+        pvs = DISKS.get()['pvs']
+    except CommandError as exc:
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
+        results['msg'] = str(exc)
         return None
 
-    # hdisk0           000018fa3b12f5cb                     rootvg           active
-    pvs = {}
-    for line in stdout.split('\n'):
-        line = line.rstrip()
-        match_key = re.match(r"^(hdisk\S+)\s+(\S+)\s+(\S+)\s*(\S*)", line)
-        if match_key:
-            pvs[match_key.group(1)] = {}
-            pvs[match_key.group(1)]['pvid'] = match_key.group(2)
-            pvs[match_key.group(1)]['vg'] = match_key.group(3)
-            pvs[match_key.group(1)]['status'] = match_key.group(4)
-
     module.debug('List of PVs:')
     for key in pvs.keys():
         module.debug('    pvs[{0}]: {1}'.format(key, pvs[key]))
@@ -162,49 +156,21 @@ def get_pvs(module):
 
 def get_free_pvs(module):
     """
-    Get the list of free PVs.
+    Get the list of free PVs: the disks with no volume group, an LVM
+    signature and a known size.
 
     return: dictionary with free PVs information
     """
     global results
 
-    cmd = ['lspv']
-    ret, stdout, stderr = module.run_command(cmd)
-    if ret != 0:
-        results['stdout'] = stdout
-        results['stderr'] = stderr
-        results['msg'] = 'Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), ret)
+    try:
+        free_pvs = DISKS.get()['free_pvs']
+    except CommandError as exc:
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
+        results['msg'] = str(exc)
         return None
 
-    # hdisk0           000018fa3b12f5cb                     rootvg           active
-    free_pvs = {}
-    for line in stdout.split('\n'):
-        line = line.rstrip()
-        match_key = re.match(r"^(hdisk\S+)\s+(\S+)\s+(\S+)\s*(\S*)", line)
-        # Only match disks that have no volume groups
-        if match_key and match_key.group(3) == 'None':
-            hdisk = match_key.group(1)
-            # Check if the disk has an _LVM signature using lquerypv
-            cmd = ['lquerypv', '-V', hdisk]
-            ret, stdout, stderr = module.run_command(cmd)
-            if ret != 0:
-                module.log('[WARN] could not query pv {0}'.format(hdisk))
-                continue
-            if stdout.strip() != "1":
-                continue
-
-            # Retrieve disk size using getconf (bootinfo -s is deprecated)
-            cmd = ['getconf', 'DISK_SIZE', '/dev/' + hdisk]
-            ret, stdout, stderr = module.run_command(cmd)
-            if ret != 0:
-                module.log('[WARN] could not retrieve {0} size'.format(hdisk))
-                continue
-            size = stdout.strip()
-
-            free_pvs[hdisk] = {}
-            free_pvs[hdisk]['pvid'] = match_key.group(2)
-            free_pvs[hdisk]['size'] = int(size)
-
     module.debug('List of available PVs:')
     for key in free_pvs.keys():
         module.debug('    free_pvs[{0}]: {1}'.format(key, free_pvs[key]))
@@ -253,6 +219,7 @@ def find_valid_altdisk(module, hdisks, rootvg_info, disk_size_policy, force):
             module.fail_json(**results)
 
         results['changed'] = True
+        DISKS.invalidate()
 
         for pv in pvs:
             if pvs[pv]['vg'] == 'altinst_rootvg':
@@ -463,6 +430,7 @@ def alt_disk_copy(module, params, hdisks):
         cmd += ['-R', params['resolvconf']]
 
     ret, stdout, stderr = module.run_command(cmd)
+    DISKS.invalidate()
     results['stdout'] = stdout
     results['stderr'] = stderr
 
@@ -508,6 +476,7 @@ def alt_disk_clean(module, hdisks):
 
     cmd = ['/usr/sbin/alt_rootvg_op', '-X', 'altinst_rootvg']
     ret, stdout, stderr = module.run_command(cmd)
+    DISKS.invalidate()
 
     results['stdout'] = stdout
     results['stderr'] = stderr
@@ -532,6 +501,7 @@ def alt_disk_clean(module, hdisks):
 
 def main():
     global results
+    global DISKS
 
     module = AnsibleModule(
         argument_spec=dict(
@@ -568,6 +538,7 @@ def main():
 
     action = module.params['action']
     targets = module.params['targets']
+    DISKS = DiskInventory(module, collect_local_disks)
 
     if action == 'copy':
         alt_disk_copy(module, module.params, targets)
@@ -27,8 +27,70 @@ options:
   filesystem:
     description:
     - Specifies the mount point that is the directory where the file system will be mounted.
+    - Required unless I(filesystems) is specified.
     type: str
-    required: true
+  filesystems:
+    description:
+    - Specifies several filesystems to reconcile in a single task, the defined and mounted
+      filesystems being listed only once.
+    - Each element accepts the I(filesystem) option and the options of a single filesystem.
+      The options not specified in an element take the value of the corresponding module option.
+    - Mutually exclusive with I(filesystem).
+    type: list
+    elements: dict
+    suboptions:
+      filesystem:
+        description:
+        - Specifies the mount point of the filesystem.
+        type: str
+        required: true
+      state:
+        description:
+        - Specifies the action to be performed on the filesystem, see I(state).
+        type: str
+        choices: [ present, absent ]
+      rm_mount_point:
+        description:
+        - See I(rm_mount_point).
+        type: bool
+      attributes:
+        description:
+        - See I(attributes).
+        type: list
+        elements: str
+      device:
+        description:
+        - See I(device).
+        type: str
+      vg:
+        description:
+        - See I(vg).
+        type: str
+      account_subsystem:
+        description:
+        - See I(account_subsystem).
+        type: bool
+      fs_type:
+        description:
+        - See I(fs_type).
+        type: str
+      auto_mount:
+        description:
+        - See I(auto_mount).
+        type: bool
+      permissions:
+        description:
+        - See I(permissions).
+        type: str
+        choices: [ ro, rw ]
+      mount_group:
+        description:
+        - See I(mount_group).
+        type: str
+      nfs_server:
+        description:
+        - See I(nfs_server).
+        type: str
   state:
     description:
     - Specifies the action to be performed on the filesystem.
@@ -92,6 +154,10 @@ options:
     description:
     - Specifies a Network File System (NFS) server for NFS filesystem.
     type: str
+notes:
+  - The filesystem state is read from C(/etc/filesystems) with C(lsfs -c) and from the kernel mount table
+    with C(mount), once per task. Unlike C(df), this does not query the mounted filesystems and does not
+    hang on an unresponsive NFS server.
 '''
 
 EXAMPLES = r'''
@@ -113,6 +179,17 @@ EXAMPLES = r'''
     filesystem: /mnt
     state: absent
     rm_mount_point: true
+- name: Reconcile several filesystems
+  ibm.power_aix.filesystem:
+    vg: datavg
+    filesystems:
+    - filesystem: /data1
+      attributes: size=1G
+    - filesystem: /data2
+      attributes: size=2G
+      mount_group: data
+    - filesystem: /old
+      state: absent
 '''
 
 RETURN = r'''
@@ -132,9 +209,34 @@ stderr:
     description: The standard error.
     returned: If the command failed.
     type: str
+filesystems:
+    description:
+    - The result of each filesystem of the I(filesystems) option.
+    - When a filesystem fails, the result of the filesystems processed before it.
+    returned: When I(filesystems) is specified.
+    type: list
+    elements: dict
+    contains:
+        filesystem:
+            description: The mount point of the filesystem.
+            type: str
+        changed:
+            description: Whether the filesystem has been modified.
+            type: bool
+        msg:
+            description: The execution message.
+            type: str
 '''
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.bulk import (
+    bulk_entries, bulk_exit, bulk_fail)
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.mount_table import (
+    MountTable)
+
+# Defined and mounted filesystems, listed once for the task
+MOUNTS = None
 
 
 def is_nfs(module, filesystem):
@@ -144,15 +246,11 @@ def is_nfs(module, filesystem):
     param filesystem: filesystem name.
     return: True - filesystem is NFS type / False - filesystem is not NFS type
     """
-    cmd = "lsfs -l %s" % filesystem
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
+    fs = MOUNTS.get_fs(filesystem)
+    if fs is None:
         return None
 
-    ln = stdout.splitlines()[1:][0]
-    type = ln.split()[3]
-
-    if type == "nfs":
+    if fs['vfs'] == "nfs":
         return True
     else:
         return False
@@ -167,41 +265,28 @@ def fs_state(module, filesystem):
              None - filesystem does not exist
     """
 
-    cmd = "lsfs -l %s" % filesystem
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
+    if MOUNTS.get_fs(filesystem) is None:
         return None
 
-    cmd = "df"
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
-        module.fail_json("Command '%s' failed." % cmd)
-
-    if stdout:
-        mdirs = []
-        for ln in stdout.splitlines()[1:]:
-            mdirs.append(ln.split()[6])
-        if filesystem in mdirs:
-            return True
-
-    return False
+    return MOUNTS.is_mounted(filesystem)
 
 
-def chfs(module, filesystem):
+def chfs(module, filesystem, params):
     """
     Changes the attributes of the filesystem.
     param module: Ansible module argument spec.
     param device: Filesystem name.
+    param params: options of the filesystem.
     return: changed - True/False(filesystem state modified or not),
             msg - message
     """
-    attrs = module.params["attributes"]
-    acct_sub_sys = module.params["account_subsystem"]
-    amount = module.params["auto_mount"]
-    device = module.params["device"]
-    perms = module.params["permissions"]
-    mgroup = module.params["mount_group"]
-    nfs_server = module.params["nfs_server"]
+    attrs = params["attributes"]
+    acct_sub_sys = params["account_subsystem"]
+    amount = params["auto_mount"]
+    device = params["device"]
+    perms = params["permissions"]
+    mgroup = params["mount_group"]
+    nfs_server = params["nfs_server"]
 
     opts = ""
 
@@ -252,32 +337,34 @@ def chfs(module, filesystem):
         cmd = "chfs %s %s" % (opts, filesystem)
 
     rc, stdout, stderr = module.run_command(cmd)
+    MOUNTS.refresh(filesystem)
     if rc != 0:
         msg = "Modification of filesystem '%s' failed. cmd - '%s'" % (filesystem, cmd)
-        module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
+        raise CommandError(cmd, rc, stdout, stderr, msg)
 
     msg = "Modification of Filesystem '%s' completed" % filesystem
     return True, msg
 
 
-def mkfs(module, filesystem):
+def mkfs(module, filesystem, params):
     """
     Create filesystem.
     param module: Ansible module argument spec.
     param filesystem: filesystem name.
+    param params: options of the filesystem.
     return: changed - True/False(filesystem state created or not),
             msg - message
     """
-    device = module.params['device']
+    device = params['device']
     if device:
         device = "-d %s " % device
     else:
         device = ""
 
-    mgroup = module.params['mount_group']
-    auto_mount = module.params['auto_mount']
-    nfs_server = module.params['nfs_server']
-    perm = module.params['permissions']
+    mgroup = params['mount_group']
+    auto_mount = params['auto_mount']
+    nfs_server = params['nfs_server']
+    perm = params['permissions']
     if perm is None:
         perm = "rw"
 
@@ -294,14 +381,15 @@ def mkfs(module, filesystem):
 
         cmd = "mknfsmnt -f '%s' %s -h '%s' -t %s %s -w bg %s " % (filesystem, device, nfs_server, perm, mgroup, auto_mount)
         rc, stdout, stderr = module.run_command(cmd)
+        MOUNTS.refresh(filesystem)
         if rc != 0:
             msg = "Creation of NFS filesystem %s failed. cmd - '%s'" % (filesystem, cmd)
-            module.fail_json(msg=msg, stdout=stdout, stderr=stderr)
+            raise CommandError(cmd, rc, stdout, stderr, msg)
         else:
             msg = "Creation of NFS filesystem '%s' succeeded" % filesystem
     else:
         # Create a local filesystem
-        attrs = module.params['attributes']
+        attrs = params['attributes']
         if attrs:
             attr_str = "-a " + ' -a '.join(attrs)
         else:
@@ -312,10 +400,10 @@ def mkfs(module, filesystem):
             True: '-t yes ',
             False: '-t no '
         }
-        acct_sub_sys = module.params['account_subsystem']
+        acct_sub_sys = params['account_subsystem']
         acct_sub_sys = acct_sub_sys_opt[acct_sub_sys]
 
-        vg = module.params['vg']
+        vg = params['vg']
         if vg:
             vg = "-g %s " % vg
         else:
@@ -331,28 +419,30 @@ def mkfs(module, filesystem):
         else:
             mgroup = ""
 
-        fs_type = "-v %s " % module.params['fs_type']
+        fs_type = "-v %s " % params['fs_type']
 
         cmd = "crfs %s%s%s-m %s %s%s-p %s %s%s" % (fs_type, vg, device, filesystem, mgroup, auto_mount, perm, acct_sub_sys, attr_str)
         rc, stdout, stderr = module.run_command(cmd)
+        MOUNTS.refresh(filesystem)
         if rc != 0:
             msg = "Creation of filesystem %s failed. cmd - '%s'" % (filesystem, cmd)
-            module.fail_json(msg=msg, stdout=stdout, stderr=stderr)
+            raise CommandError(cmd, rc, stdout, stderr, msg)
         else:
             msg = "Creation of filesystem '%s' succeeded" % filesystem
 
     return True, msg
 
 
-def rmfs(module, filesystem):
+def rmfs(module, filesystem, params):
     """
     Remove the filesystem
     param module: Ansible module argument spec.
     param filesystem: filesystem name.
+    param params: options of the filesystem.
     return: changed - True/False(filesystem state modified or not),
             msg - message
     """
-    rm_mount_point = module.params["rm_mount_point"]
+    rm_mount_point = params["rm_mount_point"]
     fs_type = is_nfs(module, filesystem)
 
     if fs_type:
@@ -368,15 +458,59 @@ def rmfs(module, filesystem):
 
     cmd += filesystem
     rc, stdout, stderr = module.run_command(cmd)
+    MOUNTS.refresh(filesystem)
     if rc != 0:
         msg = "Filesystem Removal for '%s' failed. cmd - '%s'" % (filesystem, cmd)
-        module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
+        raise CommandError(cmd, rc, stdout, stderr, msg)
 
     msg = "Filesystem '%s' has been removed." % filesystem
     return True, msg
 
 
+def reconcile(module, filesystem, params):
+    """
+    Bring the filesystem to the requested state.
+    param module: Ansible module argument spec.
+    param filesystem: filesystem name.
+    param params: options of the filesystem.
+    return: changed - True/False(filesystem state modified or not),
+            msg - message
+    """
+    state = params['state']
+
+    if state == 'present':
+        # Create/Modify filesystem
+        if fs_state(module, filesystem) is None:
+            changed, msg = mkfs(module, filesystem, params)
+        else:
+            changed, msg = chfs(module, filesystem, params)
+    elif state == 'absent':
+        # Remove filesystem
+        changed, msg = rmfs(module, filesystem, params)
+    else:
+        changed = False
+        msg = "Invalid state '%s'" % state
+
+    return changed, msg
+
+
 def main():
+    global MOUNTS
+
+    fs_options = dict(
+        attributes=dict(type='list', elements='str'),
+        account_subsystem=dict(type='bool'),
+        auto_mount=dict(type='bool'),
+        device=dict(type='str'),
+        vg=dict(type='str'),
+        fs_type=dict(type='str'),
+        permissions=dict(type='str', choices=['rw', 'ro']),
+        mount_group=dict(type='str'),
+        nfs_server=dict(type='str'),
+        state=dict(type='str', choices=['absent', 'present']),
+        rm_mount_point=dict(type='bool'),
+        filesystem=dict(type='str', required=True),
+    )
     module = AnsibleModule(
         supports_check_mode=False,
         argument_spec=dict(
@@ -391,27 +525,23 @@ def main():
             nfs_server=dict(type='str'),
             state=dict(type='str', default='present', choices=['absent', 'present']),
             rm_mount_point=dict(type='bool', default='false'),
-            filesystem=dict(type='str', required=True),
+            filesystem=dict(type='str'),
+            filesystems=dict(type='list', elements='dict', options=fs_options),
         ),
+        required_one_of=[['filesystem', 'filesystems']],
+        mutually_exclusive=[['filesystem', 'filesystems']],
     )
 
-    state = module.params['state']
-    filesystem = module.params['filesystem']
-
-    if state == 'present':
-        # Create/Modify filesystem
-        if fs_state(module, filesystem) is None:
-            changed, msg = mkfs(module, filesystem)
-        else:
-            changed, msg = chfs(module, filesystem)
-    elif state == 'absent':
-        # Remove filesystem
-        changed, msg = rmfs(module, filesystem)
-    else:
-        changed = False
-        msg = "Invalid state '%s'" % state
+    MOUNTS = MountTable(module)
+    results = []
+    try:
+        for params in bulk_entries(module, 'filesystems'):
+            changed, msg = reconcile(module, params['filesystem'], params)
+            results.append(dict(filesystem=params['filesystem'], changed=changed, msg=msg))
+    except CommandError as exc:
+        bulk_fail(module, 'filesystems', results, exc)
 
-    module.exit_json(changed=changed, msg=msg)
+    bulk_exit(module, 'filesystems', 'filesystem', results)
 
 
 if __name__ == '__main__':
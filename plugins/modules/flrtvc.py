@@ -46,7 +46,17 @@ options:
     - Path to a APAR CSV file containing the description of the C(sec) and C(hiper) fixes.
     - This file is usually transferred from the fix server; this rather big transfer
       can be avoided by specifying an already transferred file.
+    - When not set, the file is downloaded once into 'I(path)/work/tools' and
+      reused until it is older than I(csv_ttl).
     type: str
+  csv_ttl:
+    description:
+    - Specifies the number of hours the cached APAR CSV file is reused before
+      being downloaded again from the fix server.
+    - C(0) forces the download.
+    - Ignored if I(csv) is set.
+    type: int
+    default: 24
   path:
     description:
     - Specifies the directory to save the FLRTVC report. All temporary files such as
@@ -92,6 +102,13 @@ options:
     - If set a filesystem of the host could have increased even if it returns I(changed=False).
     type: bool
     default: yes
+  flrtvc_zip:
+    description:
+    - Path to a local copy of the FLRTVC zip file to install the FLRTVC script from.
+    - When not set, the zip file is cached in 'I(path)/work/tools' and only downloaded
+      again from the fix server when a newer version is available.
+    - Allows to run without access to the fix server.
+    type: str
 '''
 
 EXAMPLES = r'''
@@ -128,6 +145,34 @@ meta:
             type: list
             elements: str
             sample: see below
+        apar_csv:
+            description: Origin of the APAR CSV file given to the FLRTVC script and time spent to get it.
+            returned: if I(csv) is not set
+            type: dict
+            contains:
+                path:
+                    description: Path of the APAR CSV file, null if the FLRTVC script downloads it itself.
+                    returned: always
+                    type: str
+                source:
+                    description: C(cache), C(download) or C(flrtvc) if the file could not be obtained.
+                    returned: always
+                    type: str
+                age:
+                    description: Age in seconds of the cached file.
+                    returned: always
+                    type: int
+                time:
+                    description: Time in seconds spent to get the file.
+                    returned: always
+                    type: float
+            sample:
+                "apar_csv": {
+                    "path": "/var/adm/ansible/work/tools/apar.csv",
+                    "source": "cache",
+                    "age": 5230,
+                    "time": 0.012
+                }
         0.report:
             description: Output of the FLRTVC script, report or details on flrtvc error if any.
             returned: if the FLRTVC script run succeeds
@@ -230,18 +275,17 @@ import csv
 import threading
 import shutil
 import tarfile
-import zipfile
-import stat
-import time
-import calendar
 
-from collections import OrderedDict
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.urls import open_url
+from ansible_collections.ibm.power_aix.plugins.module_utils.flrtvc_cache import (
+    EpkgIndex, get_apar_csv, increase_fs, install_flrtvc)
 
 module = None
 results = None
 workdir = ""
+epkg_index = None
+
 
 # Threading
 THRDS = []
@@ -293,32 +337,6 @@ def wait_all():
     """
 
 
-def increase_fs(dest):
-    """
-    Increase filesystem by 100Mb
-    args:
-        dst (str): The absolute filename
-    return:
-        True if increase succeeded
-        False otherwise
-    """
-    cmd = ['/bin/df', '-c', dest]
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc == 0:
-        mount_point = stdout.splitlines()[1].split(':')[6]
-        cmd = ['chfs', '-a', 'size=+100M', mount_point]
-        rc, stdout, stderr = module.run_command(cmd)
-        if rc == 0:
-            module.debug('{0}: increased 100Mb: {1}'.format(mount_point, stdout))
-            return True
-
-    module.log('[WARNING] {0}: cmd:{1} failed rc={2} stdout:{3} stderr:{4}'
-               .format(mount_point, cmd, rc, stdout, stderr))
-    msg = 'Cannot increase filesystem for {0}.'.format(dest)
-    results['meta']['messages'].append(msg)
-    return False
-
-
 def download(src, dst, resize_fs=True):
     """
     Download efix from url to directory
@@ -338,7 +356,7 @@ def download(src, dst, resize_fs=True):
             cmd = [wget, '--no-check-certificate', src, '-P', os.path.dirname(dst)]
             rc, stdout, stderr = module.run_command(cmd)
             if rc == 3:
-                if resize_fs and increase_fs(dst):
+                if resize_fs and increase_fs(module, results['meta'], dst):
                     os.remove(dst)
                     return download(src, dst, resize_fs)
             elif rc != 0:
@@ -358,32 +376,6 @@ def download(src, dst, resize_fs=True):
     return res
 
 
-def unzip(src, dst, resize_fs=True):
-    """
-    Unzip source into the destination directory
-    args:
-        src       (str): The url to unzip
-        dst       (str): The absolute destination path
-        resize_fs (bool): Increase the filesystem size if needed
-    return:
-        True if unzip succeeded
-        False otherwise
-    """
-    try:
-        zfile = zipfile.ZipFile(src)
-        zfile.extractall(dst)
-    except (zipfile.BadZipfile, zipfile.LargeZipFile, RuntimeError) as exc:
-        if resize_fs and increase_fs(dst):
-            return unzip(src, dst, resize_fs)
-        else:
-            msg = 'Cannot unzip {0}'.format(src)
-            module.log(msg)
-            module.log('EXCEPTION {0}'.format(exc))
-            results['meta']['messages'].append(msg)
-            return False
-    return True
-
-
 def remove_efix():
     """
     Remove efix matching the given label
@@ -441,65 +433,11 @@ def remove_efix():
     return res
 
 
-def to_utc_epoch(date):
-    """
-    Return the time (UTC time zone) in second from unix epoch (int)
-
-    args:
-        date (str) : time to convert in sec from epoch with the format:
-                     'Mon Oct 9 23:35:09 CDT 2017'
-    returns: (epoch, msg)
-        The value in sec from epoch , ''
-        -1,  'error message in case of error'
-    """
-
-    TZ = 'UTC'
-    msg = ''
-    sec_from_epoch = -1
-    # supported TZ translation
-    shift = {'CDT': -5, 'CEST': 2, 'CET': 1, 'CST': -6, 'CT': -6,
-             'EDT': -4, 'EET': 2, 'EST': -5, 'ET': -5,
-             'IST': 5.5,
-             'JST': 9,
-             'MSK': 3, 'MT': 2,
-             'NZST': 12,
-             'PDT': -7, 'PST': -8,
-             'SAST': 2,
-             'UTC': 0,
-             'WEST': 1, 'WET': 0}
-
-    # if no time zone, consider it's UTC
-    match = re.match(r'^(\S+\s+\S+\s+\d+\s+\d+:\d+:\d+)\s+(\d{4})$', date)
-    if match:
-        date = '{0} UTC {1}'.format(match.group(1), match.group(2))
-    else:
-        match = re.match(r'^(\S+\s+\S+\s+\d+\s+\d+:\d+:\d+)\s+(\S+)\s+(\d{4})$', date)
-        if match:
-            date = '{0} UTC {1}'.format(match.group(1), match.group(3))
-            TZ = match.group(2)
-        else:  # should not happen
-            return (-1, 'bad packaging date format')
-
-    try:
-        datet = time.strptime(date, "%a %b %d %H:%M:%S %Z %Y")
-        sec_from_epoch = calendar.timegm(datet)
-    except ValueError:
-        return (-1, 'EXCEPTION: cannot parse packaging date')
-
-    if TZ not in shift:
-        msg = 'Unsuported Time Zone: "TZ", using "UTC"'
-        TZ = 'UTC'
-
-    sec_from_epoch = sec_from_epoch - (shift[TZ] * 3600)
-
-    return (sec_from_epoch, msg)
-
-
 def check_epkgs(epkg_list, lpps, efixes):
     """
-    For each epkg get the label, packaging date, filset and check prerequisites
-    based on fileset current level and build a list ordered by packaging date
-    that should not be locked at its installation.
+    For each epkg get the label, packaging date, filset from the epkg index
+    and check prerequisites based on fileset current level and build a list
+    ordered by packaging date that should not be locked at its installation.
 
     Note: in case of parsing error, keep the epkg (best effort)
 
@@ -526,80 +464,26 @@ def check_epkgs(epkg_list, lpps, efixes):
 
     # Get information on efix we want to install and check it can be installed
     for epkg_path in epkg_list:
+        info = epkg_index.get(results['meta'], 'localhost', epkg_path)
         epkg = {'path': epkg_path,
-                'label': '',
-                'pkg_date': None,
-                'sec_from_epoch': -1,
-                'filesets': [],
-                'files': [],
+                'label': info['label'],
+                'pkg_date': info['pkg_date'],
+                'sec_from_epoch': info['sec_from_epoch'],
+                'filesets': info['filesets'],
+                'files': info['files'],
                 'prereq': {},
                 'reject': False}
 
-        # get efix information
-        cmd = '/usr/sbin/emgr -dXv3 -e {0} | /bin/grep -p -e PREREQ -e PACKAG'.format(epkg['path'])
-        rc, stdout, stderr = module.run_command(cmd, use_unsafe_shell=True)
-        if rc != 0:
-            msg = 'Cannot get efix information {0}'.format(epkg['path'])
-            module.log(msg)
-            module.log('cmd:{0} failed rc={1} stdout:{2} stderr:{3}'
-                       .format(cmd, rc, stdout, stderr))
-            results['meta']['messages'].append(msg)
-            # do not break or continue, we keep this efix, will try to install it anyway
-
-        # ordered parsing: expecting the following line order:
-        # LABEL, PACKAGING DATE, then PACKAGE, then prerequisites levels
-        for line in stdout.splitlines():
-            # skip comments and empty lines
-            line = line.rstrip()
-            if not line or line.startswith('+'):
-                continue  # skip blank and comment line
-
-            if not epkg['label']:
-                # match: "LABEL:            IJ02726s8a"
-                match = re.match(r'^LABEL:\s+(\S+)$', line)
-                if match:
-                    epkg['label'] = match.group(1)
-                    continue
-
-            if not epkg['pkg_date']:
-                # match: "PACKAGING DATE:   Mon Oct  9 09:35:09 CDT 2017"
-                match = re.match(r'^PACKAGING\s+DATE:\s+'
-                                 r'(\S+\s+\S+\s+\d+\s+\d+:\d+:\d+\s+\S*\s*\S+).*$',
-                                 line)
-                if match:
-                    epkg['pkg_date'] = match.group(1)
-                    continue
-
-            # match: "   PACKAGE:       devices.vdevice.IBM.vfc-client.rte"
-            match = re.match(r'^\s+PACKAGE:\s+(\S+)\s*?$', line)
-            if match:
-                if match.group(1) not in epkg['filesets']:
-                    epkg['filesets'].append(match.group(1))
-                continue
-
-            # match: "   LOCATION:      /usr/lib/boot/unix_64"
-            match = re.match(r'^\s+LOCATION:\s+(\S+)\s*?$', line)
-            if match:
-                if match.group(1) not in epkg['files']:
-                    epkg['files'].append(match.group(1))
-                continue
-
-            # match and convert prerequisite levels
-            # line like: "bos.net.tcp.server 7.1.3.0 7.1.3.49"
-            match = re.match(r'^(\S+)\s+([\d+\.]+)\s+([\d+\.]+)\s*?$', line)
-            if match is None:
-                continue
-            (prereq, minlvl, maxlvl) = match.groups()
+        for (prereq, minlvl, maxlvl) in info['prereq']:
             epkg['prereq'][prereq] = {}
             epkg['prereq'][prereq]['minlvl'] = minlvl
             epkg['prereq'][prereq]['maxlvl'] = maxlvl
 
-            # parsing done
             # check filseset prerequisite is present
             if prereq not in lpps:
                 epkg['reject'] = '{0}: prerequisite missing: {1}'.format(os.path.basename(epkg['path']), prereq)
                 module.log('reject {0}'.format(epkg['reject']))
-                break  # stop parsing
+                break
 
             # check filseset prerequisite is present
             minlvl_i = list(map(int, epkg['prereq'][prereq]['minlvl'].split('.')))
@@ -628,49 +512,41 @@ def check_epkgs(epkg_list, lpps, efixes):
                                  .format(os.path.basename(epkg['path']), locked_files[file], file)
                 module.log('reject {0}'.format(epkg['reject']))
                 epkgs_reject.append(epkg['reject'])
-                continue
+                break
         if epkg['reject']:
             continue
 
-        # convert packaging date into time in sec from epoch
-
-        if epkg['pkg_date']:
-            (sec_from_epoch, msg) = to_utc_epoch(epkg['pkg_date'])
-            if sec_from_epoch == -1:
-                module.log('{0}: "{1}" for epkg:{2}'.format(msg, epkg['pkg_date'], epkg))
-            epkg['sec_from_epoch'] = sec_from_epoch
+        epkgs_info[epkg['path']] = epkg
 
-        epkgs_info[epkg['path']] = epkg.copy()
+    # sort the epkg by packaging date (sec from epoch), most recent first,
+    # equal dates are ordered by path to keep the result deterministic
+    sorted_epkgs = sorted(epkgs_info, key=lambda path: (-epkgs_info[path]['sec_from_epoch'], path))
 
-    # sort the epkg by packing date (sec from epoch)
-    sorted_epkgs = OrderedDict(sorted(epkgs_info.items(),
-                                      key=lambda t: t[1]['sec_from_epoch'],
-                                      reverse=True)).keys()
-
-    # exclude epkg that will be interlocked
-    global_file_locks = []
-    removed_epkg = []
+    # exclude epkg that will be interlocked: file_owner indexes each file
+    # locked by an epkg kept for installation
+    file_owner = {}
+    kept_epkgs = []
     for epkg in sorted_epkgs:
-        if set(epkgs_info[epkg]['files']).isdisjoint(set(global_file_locks)):
-            global_file_locks.extend(epkgs_info[epkg]['files'])
-            module.log('keep {0}, files: {1}'
-                       .format(os.path.basename(epkgs_info[epkg]['path']), epkgs_info[epkg]['files']))
+        files = epkgs_info[epkg]['files']
+        owner = next((file_owner[file] for file in files if file in file_owner), None)
+        if owner is None:
+            for file in files:
+                file_owner[file] = epkg
+            kept_epkgs.append(epkg)
+            module.log('keep {0}, files: {1}'.format(os.path.basename(epkg), files))
         else:
             results['meta']['messages'].append('a previous efix to install will lock a file of {0} '
                                                'preventing its installation, install it manually or '
                                                'run the task again.'
-                                               .format(os.path.basename(epkgs_info[epkg]['path'])))
+                                               .format(os.path.basename(epkg)))
             epkgs_info[epkg]['reject'] = '{0}: locked by previous efix to install'\
-                                         .format(os.path.basename(epkgs_info[epkg]['path']))
-            module.log('reject {0}'.format(epkgs_info[epkg]['reject']))
+                                         .format(os.path.basename(epkg))
+            module.log('reject {0}, {1} kept first'.format(epkgs_info[epkg]['reject'], os.path.basename(owner)))
             epkgs_reject.append(epkgs_info[epkg]['reject'])
-            removed_epkg.append(epkg)
-    for epkg in removed_epkg:
-        sorted_epkgs.remove(epkg)
 
     epkgs_reject = sorted(epkgs_reject)  # order the reject list by label
 
-    return (sorted_epkgs, epkgs_reject)
+    return (kept_epkgs, epkgs_reject)
 
 
 def parse_lpps_info():
@@ -994,7 +870,7 @@ def run_downloader(urls, dst_path, resize_fs=True):
                             tar.extract(epkg, tar_dir)
                         except (OSError, IOError, tarfile.TarError) as exc:
                             if resize_fs:
-                                increase_fs(tar_dir)
+                                increase_fs(module, results['meta'], tar_dir)
                             else:
                                 msg = 'Cannot extract tar file {0} to {1}'.format(epkg, tar_dir)
                                 module.log(msg)
@@ -1074,7 +950,7 @@ def run_installer(epkgs, dst_path, resize_fs=True):
                 shutil.copy(epkg, destpath)
             except (IOError, shutil.Error) as exc:
                 if resize_fs:
-                    increase_fs(destpath)
+                    increase_fs(module, results['meta'], destpath)
                 else:
                     msg = 'Cannot copy file {0} to {1}'.format(epkg, destpath)
                     module.log(msg)
@@ -1122,6 +998,7 @@ def main():
     global module
     global results
     global workdir
+    global epkg_index
 
     module = AnsibleModule(
         argument_spec=dict(
@@ -1136,6 +1013,8 @@ def main():
             check_only=dict(required=False, type='bool', default=False),
             download_only=dict(required=False, type='bool', default=False),
             extend_fs=dict(required=False, type='bool', default=True),
+            flrtvc_zip=dict(required=False, type='str'),
+            csv_ttl=dict(required=False, type='int', default=24),
         ),
         supports_check_mode=True
     )
@@ -1180,39 +1059,26 @@ def main():
     workdir = os.path.abspath(os.path.join(flrtvc_params['dst_path'], 'work'))
     if not os.path.exists(workdir):
         os.makedirs(workdir, mode=0o744)
+    epkg_index = EpkgIndex(module, os.path.join(workdir, 'cache'))
 
     # ===========================================
     # Install flrtvc script
     # ===========================================
     module.debug('*** INSTALL ***')
-    flrtvc_dir = os.path.abspath(os.path.join('usr', 'bin'))
+    flrtvc_dir = os.path.abspath(os.path.join(os.sep, 'usr', 'bin'))
     flrtvc_path = os.path.abspath(os.path.join(flrtvc_dir, 'flrtvc.ksh'))
 
-    if os.path.exists(flrtvc_path):
-        try:
-            os.remove(flrtvc_path)
-        except OSError as exc:
-            msg = 'Exception removing {0}, exception={1}'.format(flrtvc_path, exc)
-            module.log(msg)
-            results['meta']['messages'].append(msg)
-
-    flrtvc_dst = os.path.abspath(os.path.join(workdir, 'FLRTVC-latest.zip'))
-    if not download('https://www-304.ibm.com/webapp/set2/sas/f/flrt3/FLRTVC-latest.zip',
-                    flrtvc_dst, resize_fs):
-        if clean and os.path.exists(workdir):
-            shutil.rmtree(workdir, ignore_errors=True)
-        results['msg'] = 'Failed to download FLRTVC-latest.zip'
-        module.fail_json(**results)
-
-    if not unzip(flrtvc_dst, flrtvc_dir, resize_fs):
+    if not install_flrtvc(module, results['meta'], os.path.join(workdir, 'tools'),
+                          flrtvc_path, module.params['flrtvc_zip'], resize_fs):
         if clean and os.path.exists(workdir):
             shutil.rmtree(workdir, ignore_errors=True)
-        results['msg'] = 'Failed to unzip FLRTVC-latest.zip'
+        results['msg'] = 'Failed to install the FLRTVC script'
         module.fail_json(**results)
 
-    flrtvc_stat = os.stat(flrtvc_path)
-    if not flrtvc_stat.st_mode & stat.S_IEXEC:
-        os.chmod(flrtvc_path, flrtvc_stat.st_mode | stat.S_IEXEC)
+    if not flrtvc_params['apar_csv']:
+        flrtvc_params['apar_csv'], results['meta']['apar_csv'] = \
+            get_apar_csv(module, results['meta'], os.path.join(workdir, 'tools'),
+                         module.params['csv_ttl'])
 
     # ===========================================
     # Run flrtvc script
@@ -56,9 +56,43 @@ options:
     name:
         description:
         - Group name should be specified for which the action is to taken
+        - Required unless I(groups) is specified.
         type: str
         aliases: [ group ]
-        required: true
+    groups:
+        description:
+        - Specifies several groups to reconcile in a single task, all the groups being listed only once.
+        - Each element accepts the I(name) option and the options of a single group. The options not
+          specified in an element take the value of the corresponding module option.
+        - Mutually exclusive with I(name).
+        type: list
+        elements: dict
+        suboptions:
+            name:
+                description: Specifies the group name.
+                type: str
+                required: true
+            state:
+                description: Specifies the action to be performed for the group, see I(state).
+                type: str
+                choices: [ present, absent, modify ]
+            group_attributes:
+                description: See I(group_attributes).
+                type: dict
+            user_list_action:
+                description: See I(user_list_action).
+                type: str
+                choices: [ add, remove ]
+            user_list_type:
+                description: See I(user_list_type).
+                type: str
+                choices: [ members, admins ]
+            users_list:
+                description: See I(users_list).
+                type: str
+            remove_keystore:
+                description: See I(remove_keystore).
+                type: bool
     users_list:
         description:
         - Name of the users separated by commas to be added/removed as members/admins of the group.
@@ -70,6 +104,10 @@ options:
           the delete operation on group.
         type: bool
         default: true
+notes:
+  - The provided attributes and members are compared with the ones listed by C(lsgroup -c), only
+    the attributes that differ are changed and only the missing or present users are added or removed.
+  - With I(groups), all the groups are listed at once with C(lsgroup -c ALL).
 """
 
 EXAMPLES = r'''
@@ -80,6 +118,20 @@ EXAMPLES = r'''
     user_list_action: 'add'
     user_list_type: 'member'
     users_list: 'test1'
+- name: Reconcile several groups
+  ibm.power_aix.group:
+    state: modify
+    groups:
+    - name: dba
+      state: present
+      group_attributes:
+        adms: oracle
+    - name: staff
+      user_list_action: add
+      user_list_type: members
+      users_list: 'test1,test2'
+    - name: oldgroup
+      state: absent
 '''
 
 RETURN = r'''
@@ -99,212 +151,325 @@ stderr':
     description: The standard error.
     returned: If the command failed.
     type: str
+changes:
+    description:
+    - The attributes and member lists set for the group, with their value before and after the change.
+    returned: If I(name) is specified.
+    type: dict
+    sample: {'users': {'before': 'test1', 'after': 'test1,test2'}}
+groups:
+    description:
+    - The result of each group of the I(groups) option.
+    - When a group fails, the result of the groups processed before it.
+    returned: If I(groups) is specified.
+    type: list
+    elements: dict
+    contains:
+        name:
+            description: The group name.
+            type: str
+        changed:
+            description: Whether the group has been modified.
+            type: bool
+        msg:
+            description: The execution message.
+            type: str
+        changes:
+            description: The attributes set for the group, see I(changes).
+            type: dict
 '''
 
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.bulk import (
+    bulk_entries, bulk_exit, bulk_fail)
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.principals import (
+    PrincipalInventory, diff_attributes, LOAD_MODULE)
+
+# Groups of the system, listed once for the task
+GROUPS = None
+
+
+def registry_opts(attributes):
+    """
+    Returns the options selecting the registry of the load_module attribute.
+    """
+    load_module = (attributes or {}).get(LOAD_MODULE)
+    if load_module:
+        return ['-R', load_module]
+    return []
 
 
-def modify_group(module):
+def change_members(module, params, current):
     """
-    Modify the attributes of the user.
+    Add or remove the members or admins of the group that are not
+    already added or removed, with a single chgrpmem command.
     arguments:
         module  (dict): The Ansible module
+        params  (dict): The options of the group
+        current (dict): The current attributes of the group
     note:
-        Exits with fail_json in case of error
+        Raises CommandError in case of error
     return:
         msg      (srt): success or error message.
+        changes (dict): the changed member list, see diff_attributes
     """
-
-    group_attributes = module.params['group_attributes']
-    user_list_action = module.params['user_list_action']
-    opts = ""
-    load_module_opts = None
+    name = params['name']
+    user_list_action = params['user_list_action']
     msg = ""
 
-    if group_attributes is not None:
-        for attr, val in group_attributes.items():
-            if attr == 'load_module':
-                load_module_opts = "-R %s " % val
-            else:
-                opts += "%s=%s " % (attr, val)
-        if load_module_opts is not None:
-            opts = load_module_opts + opts
-        cmd = "chgroup %s %s" % (opts, module.params['name'])
-        rc, stdout, stderr = module.run_command(cmd)
-
-        if rc != 0:
-            msg = "\nFailed to modify attributes for the group: %s" % module.params['name']
-            module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
-        else:
-            msg = "\nAll provided attributes for the group: %s is set SUCCESSFULLY" % module.params['name']
-
-    if user_list_action is not None:
-        cmd = "chgrpmem "
-
-        if module.params['user_list_type'] is None:
-            msg += "\nPlease provide the choice of members or admins type."
-            module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
+    if params['user_list_type'] == 'members':
+        attr = 'users'
+        opts = ['-m']
+    else:
+        attr = 'adms'
+        opts = ['-a']
+
+    before = [user for user in current.get(attr, '').split(',') if user]
+    requested = [user.strip() for user in params['users_list'].split(',') if user.strip()]
+    if user_list_action == 'add':
+        users = [user for user in requested if user not in before]
+        after = before + users
+        opts.append('+')
+    else:
+        users = [user for user in requested if user in before]
+        after = [user for user in before if user not in users]
+        opts.append('-')
 
-        if module.params['users_list'] is None:
-            msg += "\nPlease provide the list of users to %s" % module.params['user_list_action']
-            module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
+    if not users:
+        return msg, {}
 
-        if module.params['user_list_type'] == 'members':
-            cmd += "-m "
+    cmd = ['chgrpmem'] + opts + [','.join(users), name]
+    rc, stdout, stderr = module.run_command(cmd)
 
-        if module.params['user_list_type'] == 'admins':
-            cmd += "-a "
+    if rc != 0:
+        msg += "\nFailed to modify member/admin list for the group: %s" % name
+        raise CommandError(cmd, rc, stdout, stderr, msg)
+    else:
+        msg += "\nMember/Admin list modified for the group %s SUCCESSFULLY" % name
 
-        if module.params['user_list_action'] == 'add':
-            cmd += "+ "
+    changes = {attr: {'before': ','.join(before), 'after': ','.join(after)}}
+    GROUPS.changed(name, changes, (params['group_attributes'] or {}).get(LOAD_MODULE))
+    return msg, changes
 
-        if module.params['user_list_action'] == 'remove':
-            cmd += "- "
 
-        cmd += module.params['users_list']
-        cmd = cmd + " " + module.params['name']
+def modify_group(module, params, current):
+    """
+    Modify the attributes of the group that differ from the provided ones
+    with a single chgroup command, then its members or admins.
+    arguments:
+        module  (dict): The Ansible module
+        params  (dict): The options of the group
+        current (dict): The current attributes of the group
+    note:
+        Raises CommandError in case of error
+    return:
+        msg      (srt): success or error message.
+        changes (dict): the changed attributes, see diff_attributes
+    """
+    name = params['name']
+    group_attributes = params['group_attributes']
+    changes = diff_attributes(group_attributes, current)
+    msg = ""
 
+    if changes:
+        cmd = ['chgroup'] + registry_opts(group_attributes)
+        for attr in sorted(changes):
+            cmd.append("%s=%s" % (attr, changes[attr]['after']))
+        cmd.append(name)
         rc, stdout, stderr = module.run_command(cmd)
 
         if rc != 0:
-            msg += "\nFailed to modify member/admin list for the group: %s" % module.params['name']
-            module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
+            msg = "\nFailed to modify attributes for the group: %s" % name
+            raise CommandError(cmd, rc, stdout, stderr, msg)
         else:
-            msg += "\nMember/Admin list modified for the group %s SUCCESSFULLY" % module.params['name']
+            GROUPS.changed(name, changes, group_attributes.get(LOAD_MODULE))
+            msg = "\nAll provided attributes for the group: %s is set SUCCESSFULLY" % name
 
-    return msg
+    if params['user_list_action'] is not None:
+        member_msg, member_changes = change_members(module, params, current)
+        msg += member_msg
+        changes.update(member_changes)
+
+    return msg, changes
 
 
-def create_group(module):
+def create_group(module, params):
     """
     Creates the group with the attributes provided in the
-    attribiutes field.
+    attribiutes field with a single mkgroup command.
     arguments:
         module  (dict): The Ansible module
+        params  (dict): The options of the group
     note:
-        Exits with fail_json in case of error
+        Raises CommandError in case of error
     return:
         msg      (srt): success or error message.
+        changes (dict): the attributes set, see diff_attributes
     """
-
-    group_attributes = module.params['group_attributes']
-    user_list_action = module.params['user_list_action']
+    name = params['name']
+    group_attributes = params['group_attributes'] or {}
+    changes = diff_attributes(group_attributes, None)
     msg = ""
 
-    cmd = ['mkgroup']
-
-    cmd.append(module.params['name'])
+    cmd = ['mkgroup'] + registry_opts(group_attributes)
+    for attr in sorted(changes):
+        cmd.append("%s=%s" % (attr, changes[attr]['after']))
+    cmd.append(name)
 
     rc, stdout, stderr = module.run_command(cmd)
 
     if rc != 0:
-        msg += "\nFailed to create group: %s" % module.params['name']
-        module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
+        msg += "\nFailed to create group: %s" % name
+        raise CommandError(cmd, rc, stdout, stderr, msg)
     else:
-        msg += "\nGroup is created SUCCESSFULLY: %s" % module.params['name']
+        GROUPS.added(name, group_attributes, group_attributes.get(LOAD_MODULE))
+        msg += "\nGroup is created SUCCESSFULLY: %s" % name
 
-    if group_attributes is not None or user_list_action is not None:
-        msg_attr = modify_group(module)
-        msg += msg_attr
+    if params['user_list_action'] is not None:
+        current = GROUPS.get(name, group_attributes.get(LOAD_MODULE))
+        member_msg, member_changes = change_members(module, params, current)
+        msg += member_msg
+        changes.update(member_changes)
 
-    return msg
+    return msg, changes
 
 
-def remove_group(module):
+def remove_group(module, params):
     """
     Remove the user from the group.
     arguments:
         module  (dict): The Ansible module
+        params  (dict): The options of the group
     note:
-        Exits with fail_json in case of error
+        Raises CommandError in case of error
     return:
         msg      (srt): success or error message.
     """
-    cmd = ['rmgroup']
+    name = params['name']
+    group_attributes = params['group_attributes'] or {}
+    cmd = ['rmgroup'] + registry_opts(group_attributes)
 
-    if module.params['remove_keystore']:
+    if params['remove_keystore']:
         cmd.append('-p')
-    cmd.append(module.params['name'])
+    cmd.append(name)
 
     rc, stdout, stderr = module.run_command(cmd)
 
     if rc != 0:
-        msg = "Unable to remove the group: %s" % module.params['name']
-        module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
+        msg = "Unable to remove the group: %s" % name
+        raise CommandError(cmd, rc, stdout, stderr, msg)
     else:
-        msg = "Group is REMOVED SUCCESSFULLY: %s" % module.params['name']
+        GROUPS.removed(name, group_attributes.get(LOAD_MODULE))
+        msg = "Group is REMOVED SUCCESSFULLY: %s" % name
 
     return msg
 
 
-def group_exists(module):
+def reconcile_group(module, params):
     """
-    Checks if the specified user exists in the system or not.
+    Brings the group to the requested state, running a command only for
+    what differs from its current state.
     arguments:
-        module      (dict): The Ansible module
+        module  (dict): The Ansible module
+        params  (dict): The options of the group
+    note:
+        Raises CommandError in case of error
     return:
-        true if exists
-        false otherwise
+        dictionary with the group 'name', 'changed', 'msg' and 'changes'
+        the changed attributes, see diff_attributes
     """
-    cmd = ["lsgroup"]
-    cmd.append(module.params['name'])
-
-    rc, out, err = module.run_command(cmd)
+    name = params['name']
+    state = params['state']
+    group_attributes = params['group_attributes']
+    current = GROUPS.get(name, (group_attributes or {}).get(LOAD_MODULE))
+    changes = {}
+    changed = False
 
-    if (rc == 0):
-        return True
+    if state == 'absent':
+        if current is not None:
+            msg = remove_group(module, params)
+            changed = True
+        else:
+            msg = "Group name is NOT FOUND : %s" % name
+    elif state == 'present':
+        if current is None:
+            msg, changes = create_group(module, params)
+            changed = True
+        else:
+            msg = "Group %s already exists." % name
+    elif state == 'modify':
+        if group_attributes is None and params['user_list_action'] is None:
+            msg = "Please provide the attributes to be set or action to be taken for the group."
+        elif current is None:
+            msg = "No group found in the system to modify the attributes: %s" % name
+        else:
+            msg, changes = modify_group(module, params, current)
+            changed = bool(changes)
+            if not changed:
+                msg = "All provided attributes and members for the group: %s are already set" % name
     else:
-        return False
+        msg = "Invalid state. The state provided is not supported: %s" % state
+
+    return dict(name=name, changed=changed, msg=msg, changes=changes)
 
 
 def main():
     """
     Main function
     """
+    global GROUPS
+
+    group_options = dict(
+        name=dict(type='str', required=True),
+        state=dict(type='str', choices=['present', 'absent', 'modify']),
+        group_attributes=dict(type='dict'),
+        user_list_action=dict(type='str', choices=['add', 'remove']),
+        user_list_type=dict(type='str', choices=['members', 'admins']),
+        users_list=dict(type='str'),
+        remove_keystore=dict(type='bool'),
+    )
     module = AnsibleModule(
         argument_spec=dict(
             state=dict(type='str', required=True, choices=['present', 'absent', 'modify']),
-            name=dict(type='str', required=True, aliases=['group']),
+            name=dict(type='str', aliases=['group']),
+            groups=dict(type='list', elements='dict', options=group_options),
             group_attributes=dict(type='dict'),
             user_list_action=dict(type='str', choices=['add', 'remove']),
             user_list_type=dict(type='str', choices=['members', 'admins']),
             users_list=dict(type='str'),
             remove_keystore=dict(type='bool', default=True),
         ),
+        required_one_of=[['name', 'groups']],
+        mutually_exclusive=[['name', 'groups']],
         supports_check_mode=False
     )
 
-    msg = ""
-    group_attributes = module.params['group_attributes']
-    user_list_action = module.params['user_list_action']
-    changed = False
-
-    if module.params['state'] == 'absent':
-        if group_exists(module):
-            msg = remove_group(module)
-            changed = True
-        else:
-            msg = "Group name is NOT FOUND : %s" % module.params['name']
-    elif module.params['state'] == 'present':
-        if not group_exists(module):
-            msg = create_group(module)
-            changed = True
-        else:
-            msg = "Group %s already exists." % module.params['name']
-    elif module.params['state'] == 'modify':
-        if group_attributes is None and user_list_action is None:
-            msg = "Please provide the attributes to be set or action to be taken for the group."
-        else:
-            if group_exists(module):
-                msg = modify_group(module)
-                changed = True
-            else:
-                msg = "No group found in the system to modify the attributes: %s" % module.params['name']
-    else:
-        msg = "Invalid state. The state provided is not supported: %s" % module.params['state']
-
-    module.exit_json(changed=changed, msg=msg)
+    GROUPS = PrincipalInventory(module, 'lsgroup')
+    entries = bulk_entries(module, 'groups')
+
+    # checked for all the groups before changing any of them
+    for params in entries:
+        if params['user_list_action'] is None or params['state'] == 'absent':
+            continue
+        if params['user_list_type'] is None:
+            module.fail_json(msg="\nPlease provide the choice of members or admins type.")
+        if params['users_list'] is None:
+            module.fail_json(msg="\nPlease provide the list of users to %s" % params['user_list_action'])
+
+    results = []
+    try:
+        if module.params['groups']:
+            # a single listing of the groups of each registry
+            for load_module in set((params['group_attributes'] or {}).get(LOAD_MODULE) for params in entries):
+                GROUPS.load(load_module)
+        for params in entries:
+            results.append(reconcile_group(module, params))
+    except CommandError as exc:
+        bulk_fail(module, 'groups', results, exc)
+
+    bulk_exit(module, 'groups', 'group', results)
 
 
 if __name__ == '__main__':
@@ -127,6 +127,12 @@ stderr:
 '''
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.mount_table import (
+    MountTable)
+
+# Defined and mounted filesystems, listed once for the task
+MOUNTS = None
 
 
 def is_fspath_mounted(module, mount, mount_dir, mount_over_dir):
@@ -140,27 +146,21 @@ def is_fspath_mounted(module, mount, mount_dir, mount_over_dir):
             None - if not FS
     """
 
-    cmd = "lsfs -l %s" % mount_dir
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc == 0:
+    try:
+        fs = MOUNTS.get_fs(mount_dir)
+        if fs is None:
+            return None
         # Get the fs_name of the Filesystem
-        # check if it is listed in the first column of df command
-        ln = stdout.splitlines()[1]
-        fs_name = ln.split()[0]
-        cmd = "df"
-        rc, stdout, stderr = module.run_command(cmd)
-        if rc != 0:
-            module.fail_json("Command '%s' failed." % cmd)
-
-        if stdout:
-            fdirs = []
-        for ln in stdout.splitlines()[1:]:
-            fdirs.append(ln.split()[0])
-        if fs_name in fdirs:
+        # check if it is in the mount table
+        fs_name = fs['device']
+        if fs['node']:
+            fs_name = "%s:%s" % (fs['node'], fs['device'])
+        if MOUNTS.is_mounted(fs_name):
             if mount is False or fs_name == mount_dir or mount_over_dir is None:
                 return True
         return False
-    return None
+    except CommandError as exc:
+        module.fail_json(msg=str(exc), rc=exc.rc, stdout=exc.stdout, stderr=exc.stderr)
 
 
 def mount(module):
@@ -204,6 +204,7 @@ def mount(module):
         cmd += "%s %s" % (mount_dir, mount_over_dir)
 
     rc, stdout, stderr = module.run_command(cmd)
+    MOUNTS.refresh_mounts()
     if rc != 0:
         msg = "Mount failed. Command '%s' failed with return code '%s'." % (cmd, rc)
         module.fail_json(msg=msg, stdout=stdout, stderr=stderr)
@@ -244,6 +245,7 @@ def umount(module):
         cmd += mount_dir
 
     rc, stdout, stderr = module.run_command(cmd)
+    MOUNTS.refresh_mounts()
     if rc != 0:
         msg = "Unmount failed. Command '%s' failed with return code '%s'." % (cmd, rc)
         module.fail_json(msg=msg, stdout=stdout, stderr=stderr)
@@ -253,6 +255,8 @@ def umount(module):
 
 
 def main():
+    global MOUNTS
+
     module = AnsibleModule(
         supports_check_mode=False,
         argument_spec=dict(
@@ -275,6 +279,7 @@ def main():
         ]
     )
 
+    MOUNTS = MountTable(module)
     state = module.params['state']
 
     if state == 'mount':
@@ -30,7 +30,9 @@ options:
     - C(update) to update NIM clients with a specified C(lpp_source).
     - C(master_setup) to setup a NIM master.
     - C(check) to retrieve the C(Cstate) of each NIM client.
-    - C(compare) to compare installation inventories of the NIM clients.
+    - C(compare) to compare installation inventories of the NIM clients. The inventory of each NIM client is cached
+      on the NIM master in C(/var/adm/ansible/cache/lpp_inventory) and only listed again when the oslevel, the
+      interim fixes or the software vital product data of the client have changed.
     - C(script) to apply a script to customize NIM clients.
     - C(allocate) to allocate a resource to specified NIM clients.
     - C(deallocate) to deallocate a resource for specified NIM clients.
@@ -40,8 +42,10 @@ options:
     - C(reset) to reset the C(Cstate) of a NIM client.
     - C(reboot) to reboot the given NIM clients if they are running.
     - C(maintenance) to perform a maintenance operation on NIM clients.
+    - C(status) to retrieve the progress of the asynchronous updates of the NIM clients.
     type: str
-    choices: [ update, master_setup, check, compare, script, allocate, deallocate, bos_inst, define_script, remove, reset, reboot, maintenance ]
+    choices: [ update, master_setup, check, compare, script, allocate, deallocate, bos_inst, define_script, remove, reset, reboot, maintenance,
+               status ]
     required: true
   lpp_source:
     description:
@@ -49,6 +53,9 @@ options:
     - C(latest_tl), C(latest_sp), C(next_tl) and C(next_sp) can be specified;
       based on the NIM server resources, nim will determine
       the actual oslevel necessary to update the targets.
+    - The oslevel of an lpp_source is taken from its name when it is of the form
+      C(<release>-<TL>-<SP>-<build>-lpp_source), for instance C(7200-05-03-2148-lpp_source),
+      otherwise from its C(oslevel_r) NIM attribute, which only gives the TL.
     type: str
   targets:
     description:
@@ -56,12 +63,16 @@ options:
     - C(foo*) designates all the NIM clients with name starting by C(foo).
     - C(foo[2:4]) designates the NIM clients among foo2, foo3 and foo4.
     - C(*) or C(ALL) designates all the NIM clients.
+    - If I(action=status), defaults to all the NIM clients with an asynchronous update.
     type: list
     elements: str
   asynchronous:
     description:
     - If set to C(no), NIM client will be completely installed before starting
       the installation of another NIM client.
+    - If set to C(yes), the update of each NIM client is recorded on the NIM master
+      in C(/var/adm/ansible/cache/nim_jobs.json), so that its progress can be retrieved
+      with I(action=status).
     type: bool
     default: no
   device:
@@ -87,8 +98,24 @@ options:
   force:
     description:
     - Forces action.
+    - If I(action=update), all the interim fixes of the targets are removed before the update, with a single
+      command per target.
     type: bool
     default: no
+  parallel:
+    description:
+    - Maximum number of NIM clients updated at the same time if I(action=update) and I(asynchronous=no).
+    - The NIM clients are updated in batches, one per lpp_source.
+    - Also the maximum number of NIM clients whose interim fixes are removed at the same time if I(action=update)
+      and I(force=yes).
+    type: int
+    default: 1
+  max_failures:
+    description:
+    - Maximum number of failed updates tolerated if I(action=update) and I(asynchronous=no). Once exceeded, no new
+      update is started and the module fails.
+    - By default all the updates are attempted.
+    type: int
   operation:
     description:
     - NIM maintenance operation.
@@ -97,6 +124,16 @@ options:
     description:
     - Describes the NIM operation (informational only).
     type: str
+  nim_node:
+    description:
+    - Allows to pass along NIM node info from a task to another so that it
+      discovers NIM info only one time for all tasks.
+    - It is used as is if its C(version) is supported and the NIM database has not been modified since its C(timestamp),
+      otherwise it is refreshed.
+    type: dict
+notes:
+  - The oslevel of the NIM clients is collected in parallel within a 5 minutes time limit. It is cached
+    for 10 minutes in /var/adm/ansible/cache/nim_oslevel.json, as long as the NIM state of the client is unchanged.
 '''
 
 EXAMPLES = r'''
@@ -122,6 +159,21 @@ EXAMPLES = r'''
     script: myscript
     asynchronous: no
     targets: all
+
+- name: Update all NIM clients asynchronously to the latest SP
+  nim:
+    action: update
+    lpp_source: latest_sp
+    asynchronous: yes
+    targets: all
+
+- name: Wait for the end of the asynchronous updates
+  nim:
+    action: status
+  register: result
+  until: result.pending == 0
+  retries: 60
+  delay: 60
 '''
 
 RETURN = r'''
@@ -134,16 +186,24 @@ nim_output:
     returned: always
     type: str
 nim_node:
-    description: NIM node info.
+    description: NIM node info. It can contains more information if passed as option I(nim_node).
     returned: always
     type: dict
     contains:
+        version:
+            description: Schema version of the NIM node info.
+            returned: always
+            type: int
+        timestamp:
+            description: Time the NIM objects were listed, in seconds since the Epoch.
+            returned: always
+            type: float
         lpp_source:
-            description: List of lpp sources.
+            description: Location of each lpp source by name.
             returned: always
             type: dict
         master:
-            description: NIM master.
+            description: NIM master attributes, with its C(type), C(cstate) and, once collected, C(oslevel).
             returned: always
             type: dict
         standalone:
@@ -156,72 +216,164 @@ nim_node:
             type: dict
     sample:
         "nim_node": {
+            "version": 1,
+            "timestamp": 1602155234.52,
             "lpp_source": {
                 "723lpp_res": "/export/nim/lpp_source/723lpp_res"
             },
             "master": {
+                "Cstate": "ready for a NIM operation",
+                "class": "machines",
                 "cstate": "ready for a NIM operation",
                 "type": "master"
             },
             "standalone": {
                 "nimclient01": {
+                    "Cstate": "ready for a NIM operation",
+                    "class": "machines",
                     "cstate": "ready for a NIM operation",
+                    "if1": "master_net nimclient01.mydomain.com 0",
                     "ip": "nimclient01.mydomain.com",
                     "type": "standalone"
                 },
                 "nimclient02": {
+                    "Cstate": "ready for a NIM operation",
+                    "class": "machines",
                     "cstate": "ready for a NIM operation",
+                    "if1": "master_net nimclient02.mydomain.com 0",
                     "ip": "nimclient02.mydomain.com",
                     "type": "standalone"
                 }
             },
             "vios": {}
         }
+fix_removal:
+    description:
+    - Interim fixes removed from each target if I(action=update) and I(force=yes).
+    - C(rc) is 0 if all the interim fixes of the target have been removed.
+    returned: If I(action=update) and I(force=yes).
+    type: dict
+    sample:
+        "fix_removal": {
+            "nimclient01": {
+                "rc": 0,
+                "fixes": [
+                    {"label": "IJ12345s1", "rc": 0}
+                ]
+            }
+        }
+compare:
+    description:
+    - Comparison of the installation inventory of the NIM clients if I(action=compare).
+    - C(machines) lists the NIM clients compared. The other lists give a value for each of them, in the same order.
+    - C(oslevel) lists the oslevel of each NIM client.
+    - C(filesets) gives the level of each NIM client for the filesets not at the same level on all of them,
+      C(null) where the fileset is not installed.
+    - C(efixes) gives the state of each NIM client for the interim fixes not installed on all of them,
+      C(null) where the interim fix is not installed.
+    - C(common) is the number of filesets at the same level on all the NIM clients.
+    - C(failed) lists the NIM clients whose inventory cannot be retrieved, they are not compared.
+    returned: If I(action=compare).
+    type: dict
+    sample:
+        "compare": {
+            "machines": ["nimclient01", "nimclient02"],
+            "oslevel": ["7200-05-03-2148", "7200-05-01-2038"],
+            "filesets": {
+                "bos.rte": ["7.2.5.101", "7.2.5.0"],
+                "bos.adt.prof": ["7.2.5.100", null]
+            },
+            "efixes": {
+                "IJ12345s1": ["S", null]
+            },
+            "common": 1243,
+            "failed": []
+        }
+failed_targets:
+    description:
+    - NIM clients whose synchronous update failed if I(action=update) and I(asynchronous=no).
+    - The module fails if there are more than I(max_failures) of them.
+    returned: If I(action=update) and I(asynchronous=no).
+    type: list
+    elements: str
+    sample: ["nimclient02"]
+jobs:
+    description:
+    - Progress of the asynchronous update of each NIM client if I(action=status).
+    - C(status) is C(running), C(success), C(failure), or C(unknown) if the client is not a NIM object anymore or
+      its result cannot be determined.
+    - C(progress) is the percentage of the filesets processed, when it is known.
+    - C(rc) is the return code of the nim command that started the update.
+    - C(start) is the time the update started, in seconds since the Epoch, and C(elapsed) the seconds since then.
+    - C(Cstate), C(info) and C(Cstate_result) are the current NIM attributes of the client.
+    returned: If I(action=status).
+    type: dict
+    sample:
+        "jobs": {
+            "nimclient01": {
+                "operation": "cust",
+                "resource": "7200-05-03-2148-lpp_source",
+                "rc": 0,
+                "start": 1602155234.52,
+                "elapsed": 754,
+                "Cstate": "customization is being performed",
+                "info": "Filesets processed: 12 of 96",
+                "Cstate_result": "success",
+                "status": "running",
+                "progress": 12
+            }
+        }
+pending:
+    description: Number of asynchronous updates still running if I(action=status).
+    returned: If I(action=status).
+    type: int
+    sample: 1
+nim_node_source:
+    description:
+    - How the NIM node info has been built.
+    - C(supplied) if the I(nim_node) option has been used as is.
+    - C(completed) if the NIM types missing from the I(nim_node) option have been added.
+    - C(refreshed) if it has been built from the NIM database.
+    returned: always
+    type: str
+    sample: supplied
 '''
 
 import re
 import threading
+import time
 # pylint: disable=wildcard-import,unused-wildcard-import,redefined-builtin
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_inventory import (
+    get_nim_node)
+from ansible_collections.ibm.power_aix.plugins.module_utils.lpp_catalog import (
+    LppCatalog, parse_oslevel, format_oslevel)
+from ansible_collections.ibm.power_aix.plugins.module_utils.lpp_inventory import (
+    LppInventoryCache, get_inventories, compare_inventories)
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_targets import (
+    NimTargets)
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_jobs import (
+    NimJobs)
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_oslevel import (
+    get_oslevels as collect_oslevels, nim_state, OslevelCache, TIMEDOUT)
+from ansible_collections.ibm.power_aix.plugins.module_utils.pool import run_pool
+
+# Lists and removes all the interim fixes, writes 'list <rc>' then
+# 'remove <label> <rc>' for each fix, the emgr output prefixed by '| '
+EFIX_REMOVE_SCRIPT = (
+    'LC_ALL=C; export LC_ALL; '
+    'fixes=$(/usr/sbin/emgr -l 2>&1); echo "list $?"; '
+    'echo "$fixes" | sed "s/^/| /"; '
+    'for label in $(echo "$fixes" | awk \'$1 ~ /^[0-9]+$/ {print $3}\'); do '
+    'out=$(/usr/sbin/emgr -r -L $label 2>&1); rc=$?; '
+    'echo "$out" | sed "s/^/| /"; echo "remove $label $rc"; '
+    'done')
 
 nim_node = {}
-
-
-def run_oslevel_cmd(module, machine, result):
-    """
-    Run the oslevel command on target machine.
-
-    Stores the output in the dedicated slot of the result dictionary.
-
-    arguments:
-        machine (str): The machine name
-        result  (dict): The result of the oslevel command
-    """
-
-    result[machine] = 'timedout'
-
-    if machine == 'master':
-        cmd = ['oslevel', '-s']
-    else:
-        cmd = ['/usr/lpp/bos.sysmgt/nim/methods/c_rsh',
-               machine,
-               '"/usr/bin/oslevel -s; echo rc=$?"']
-
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc == 0:
-        module.debug('{0} oslevel stdout: "{1}"'.format(machine, stdout))
-        if stderr.rstrip():
-            module.log('"{0}" command stderr: {1}'.format(' '.join(cmd), stderr))
-
-        # remove the rc of c_rsh with echo $?
-        if machine != 'master':
-            stdout = re.sub(r'rc=[-\d]+\n$', '', stdout)
-
-        # return stdout only ... stripped!
-        result[machine] = stdout.rstrip()
-    else:
-        msg = 'Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), rc)
-        module.log('Failed to get oslevel for {0}: {1}'.format(machine, msg))
+oslevel_cache = None
+lpp_catalog = None
+output_lock = threading.Lock()
 
 
 def get_nim_clients_info(module, lpar_type):
@@ -229,168 +381,145 @@ def get_nim_clients_info(module, lpar_type):
     Return the list of nim lpar_type objects defined on the
            nim master and their associated Cstate value.
     """
-    global results
-
-    cmd = ['lsnim', '-t', lpar_type, '-l']
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
-        results['stdout'] = stdout
-        results['stderr'] = stderr
-        results['msg'] = 'Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), rc)
-        module.fail_json(**results)
+    global nim_node
 
     # client name and associated Cstate
     info_hash = {}
-    for line in stdout.rstrip().split('\n'):
-        match_key = re.match(r"^(\S+):", line)
-        if match_key:
-            obj_key = match_key.group(1)
-            info_hash[obj_key] = {}
-            info_hash[obj_key]['type'] = lpar_type
-            continue
+    for obj_key, attrs in nim_node[lpar_type].items():
+        info_hash[obj_key] = {}
+        info_hash[obj_key]['type'] = lpar_type
 
-        match_cstate = re.match(r"^\s+Cstate\s+=\s+(.*)$", line)
-        if match_cstate:
-            cstate = match_cstate.group(1)
-            info_hash[obj_key]['cstate'] = cstate
-            continue
+        if 'Cstate' in attrs:
+            info_hash[obj_key]['cstate'] = attrs['Cstate']
 
-        match_mgmtprof = re.match(r"^\s+mgmt_profile1\s+=\s+(.*)$", line)
-        if match_mgmtprof:
-            mgmt_elts = match_mgmtprof.group(1).split()
+        if 'mgmt_profile1' in attrs:
+            mgmt_elts = attrs['mgmt_profile1'].split()
             if len(mgmt_elts) >= 3:
                 info_hash[obj_key]['mgmt_hmc_id'] = mgmt_elts[0]
                 info_hash[obj_key]['mgmt_id'] = mgmt_elts[1]
                 info_hash[obj_key]['mgmt_cec_serial'] = mgmt_elts[2]
             else:
                 module.log('[WARNING] {0} management profile does not have 3 elements: {1}'
-                           .format(obj_key, match_mgmtprof.group(1)))
-            continue
+                           .format(obj_key, attrs['mgmt_profile1']))
 
-        match_if = re.match(r"^\s+if1\s+=\s+\S+\s+(\S+)\s+.*$", line)
+        match_if = re.match(r"^\S+\s+(\S+)\s+.*$", attrs.get('if1', ''))
         if match_if:
             info_hash[obj_key]['ip'] = match_if.group(1)
-            continue
 
     return info_hash
 
 
-def get_nim_master_info(module):
-    """
-    Get the Cstate of the nim master.
-    """
-    global results
-
-    cmd = ['lsnim', '-l', 'master']
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
-        results['stdout'] = stdout
-        results['stderr'] = stderr
-        results['msg'] = 'Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), rc)
-        module.fail_json(**results)
-
-    # Retrieve associated Cstate
-    cstate = ''
-    for line in stdout.rstrip().split('\n'):
-        match_cstate = re.match(r"^\s+Cstate\s+=\s+(.*)$", line)
-        if match_cstate:
-            cstate = match_cstate.group(1)
-
-    return cstate
-
-
 def get_oslevels(module, targets):
     """
     Get the oslevel of the specified targets.
 
+    The oslevels are collected in parallel within a single time limit,
+    cached oslevels are used for the targets whose NIM state is unchanged.
+
     return a dictionary of the oslevels
     """
+    global nim_node
+    global oslevel_cache
 
-    # =========================================================================
-    # Launch threads to collect information on targets
-    # =========================================================================
-    threads = []
-    oslevels = {}
+    if oslevel_cache is None:
+        oslevel_cache = OslevelCache(module)
 
+    states = {}
     for machine in targets:
-        process = threading.Thread(target=run_oslevel_cmd,
-                                   args=(module, machine, oslevels))
-        process.start()
-        threads.append(process)
-
-    for process in threads:
-        process.join(300)  # wait 5 min for c_rsh to timeout
-        if process.is_alive():
-            module.log('[WARNING] {0} Not responding'.format(process))
+        for lpar_type in ['standalone', 'vios', 'master']:
+            if machine in nim_node.get(lpar_type, {}):
+                states[machine] = nim_state(nim_node[lpar_type][machine])
+                break
 
-    return oslevels
+    return collect_oslevels(module, targets, states=states, cache=oslevel_cache)
 
 
-def get_nim_lpp_source(module):
+def invalidate_oslevels(module, targets):
     """
-    Get the list of lpp_source defined on the nim master.
+    Remove the cached oslevel of targets after an operation updating them.
     """
+    global oslevel_cache
 
-    global results
+    if oslevel_cache is None:
+        oslevel_cache = OslevelCache(module)
+    oslevel_cache.invalidate(targets)
+    oslevel_cache.save()
 
-    cmd = ['lsnim', '-t', 'lpp_source', '-l']
-    ret, stdout, stderr = module.run_command(cmd)
-    if ret != 0:
-        module.log('NIM - Error getting the lpp_source list - rc:{0}, error:{1}'
-                   .format(ret, stderr))
-        results['stdout'] = stdout
-        results['stderr'] = stderr
-        results['msg'] = 'Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), ret)
-        module.fail_json(**results)
 
-    # lpp_source list
-    lpp_source_list = {}
-    for line in stdout.rstrip().split('\n'):
-        match_key = re.match(r"^(\S+):", line)
-        if match_key:
-            obj_key = match_key.group(1)
-        else:
-            match_loc = re.match(r"^\s+location\s+=\s+(\S+)$", line)
-            if match_loc:
-                loc = match_loc.group(1)
-                lpp_source_list[obj_key] = loc
+def shared_nim_node(node):
+    """
+    Convert a nim_node returned by this module to the layout shared by the
+    NIM modules, see legacy_nim_node. The lpp_source and master entries are
+    dropped so that they are listed again.
 
-    return lpp_source_list
+    arguments:
+        node (dict): nim_node passed as option, None if not set
+    return:
+        the nim_node to pass to get_nim_node
+    """
+    if not node:
+        return node
+    node = dict(node)
+    if any(not isinstance(attrs, dict) for attrs in (node.get('lpp_source') or {}).values()):
+        node.pop('lpp_source')
+    if 'master' in node and not isinstance(node['master'].get('master'), dict):
+        node.pop('master')
+    return node
+
+
+def legacy_nim_node(node):
+    """
+    Return the nim_node in the layout this module has always returned: the
+    location of each lpp_source by name, and the master attributes with its
+    'type', 'cstate' and 'oslevel' directly under 'master'.
+
+    arguments:
+        node (dict): nim_node in the layout shared by the NIM modules
+    return:
+        a copy of the nim_node with the lpp_source and master entries converted
+    """
+    node = dict(node)
+    node['lpp_source'] = dict((name, attrs['location'])
+                              for name, attrs in node.get('lpp_source', {}).items() if 'location' in attrs)
+    node['master'] = dict(node.get('master', {}).get('master') or {'type': 'master'})
+    return node
 
 
 def build_nim_node(module):
     """
     Build nim_node dictionary containing nim clients info and lpp sources info.
+    The nim_node passed as option is used if it is up to date.
     """
 
     global nim_node
+    global results
 
-    # =========================================================================
-    # Build nim lpp_source list
-    # =========================================================================
-    nim_lpp_sources = get_nim_lpp_source(module)
-    nim_node['lpp_source'] = nim_lpp_sources
-    module.debug('lpp source list: {0}'.format(nim_lpp_sources))
+    try:
+        nim_node, results['nim_node_source'] = \
+            get_nim_node(module, ['lpp_source', 'standalone', 'vios', 'master', 'mac_group'],
+                         shared_nim_node(module.params['nim_node']))
+    except CommandError as exc:
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
+        results['msg'] = str(exc)
+        module.fail_json(**results)
+    module.debug('lpp source list: {0}'.format(list(nim_node['lpp_source'])))
 
     # =========================================================================
-    # Build nim clients info
+    # Complete nim clients info
     # =========================================================================
-    standalones = get_nim_clients_info(module, 'standalone')
-    nim_node['standalone'] = standalones
-    module.debug('NIM Clients: {0}'.format(standalones))
-
-    vioses = get_nim_clients_info(module, 'vios')
-    nim_node['vios'] = vioses
-    module.debug('NIM VIOS Clients: {0}'.format(vioses))
+    for lpar_type in ['standalone', 'vios']:
+        for name, info in get_nim_clients_info(module, lpar_type).items():
+            nim_node[lpar_type][name].update(info)
+    module.debug('NIM Clients: {0}'.format(list(nim_node['standalone'])))
+    module.debug('NIM VIOS Clients: {0}'.format(list(nim_node['vios'])))
 
     # =========================================================================
-    # Build master info
+    # Complete master info
     # =========================================================================
-    cstate = get_nim_master_info(module)
-    nim_node['master'] = {}
-    nim_node['master']['type'] = 'master'
-    nim_node['master']['cstate'] = cstate
-    module.debug('NIM master: Cstate = {0}'.format(cstate))
+    master = nim_node['master'].setdefault('master', {'type': 'master'})
+    master['cstate'] = master.get('Cstate', '')
+    module.debug('NIM master: Cstate = {0}'.format(master['cstate']))
 
 
 def expand_targets(targets):
@@ -402,8 +531,11 @@ def expand_targets(targets):
                           with 'target'
         target[n1:n2] where n1 and n2 are numeric: target<n1> to target<n2>
         * or ALL      all the nim client machines
+        group_name    the nim clients of the machine group 'group_name'
         client_name   the nim client named 'client_name'
         master        the nim master
+        !pattern      excludes the machines matching pattern
+    See NimTargets for the details.
 
     arguments:
         targets (list): The list of target patterns
@@ -412,63 +544,15 @@ def expand_targets(targets):
     """
     global nim_node
 
-    # ===========================================
-    # Build clients list
-    # ===========================================
-    clients = []
-    for target in targets:
-
-        # -----------------------------------------------------------
-        # Build target(s) from: range i.e. quimby[7:12]
-        # -----------------------------------------------------------
-        rmatch = re.match(r"(\w+)\[(\d+):(\d+)\]", target)
-        if rmatch:
-            name = rmatch.group(1)
-            start = rmatch.group(2)
-            end = rmatch.group(3)
-
-            for i in range(int(start), int(end) + 1):
-                # target_results.append('{0}{1:02}'.format(name, i))
-                curr_name = name + str(i)
-                if curr_name in nim_node['standalone']:
-                    clients.append(curr_name)
-
-            continue
-
-        # -----------------------------------------------------------
-        # Build target(s) from: val*. i.e. quimby*
-        # -----------------------------------------------------------
-        rmatch = re.match(r"(\w+)\*$", target)
-        if rmatch:
-
-            name = rmatch.group(1)
-
-            for curr_name in nim_node['standalone']:
-                if re.match(r"^%s\.*" % name, curr_name):
-                    clients.append(curr_name)
-
-            continue
-
-        # -----------------------------------------------------------
-        # Build target(s) from: all or *
-        # -----------------------------------------------------------
-        if target.upper() == 'ALL' or target == '*':
-            clients = list(nim_node['standalone'])
-            continue
-
-        # -----------------------------------------------------------
-        # Build target(s) from: quimby05 quimby08 quimby12
-        # -----------------------------------------------------------
-        if (target in nim_node['standalone']) or (target == 'master'):
-            clients.append(target)
-
-    return list(set(clients))
+    return NimTargets({'standalone': nim_node['standalone']},
+                      groups=nim_node.get('mac_group'), master=True).expand(targets)
 
 
 def perform_async_customization(module, lpp_source, targets):
     """
     Perform an asynchronous customization of the given target clients,
-    applying the given lpp_source.
+    applying the given lpp_source, and record it in the NIM jobs file for
+    the status action.
 
     return: the return code of the command.
     """
@@ -514,6 +598,8 @@ def perform_async_customization(module, lpp_source, targets):
         results['nim_output'].append('NIM - Error: Command {0} returns above error!'
                                      .format(cmd))
 
+    NimJobs(module).record(targets, 'cust', lpp_source, ret)
+
     module.log("Done nim customize operation {0}".format(cmd))
 
     return ret
@@ -524,6 +610,9 @@ def perform_sync_customization(module, lpp_source, target):
     Perform a synchronous customization of the given target client,
     applying the given lpp_source.
 
+    Can run in parallel for several targets: the output is added to
+    nim_output in one block, with the start and end time of the update.
+
     return: the return code of the command.
     """
 
@@ -541,28 +630,31 @@ def perform_sync_customization(module, lpp_source, target):
            target]
 
     module.debug('NIM - Command:{0}'.format(cmd))
-    results['nim_output'].append('NIM - Command:{0}'.format(' '.join(cmd)))
-    results['nim_output'].append('Start updating machine(s) {0} to {1}'
-                                 .format(target, lpp_source))
+    output = []
+    output.append('NIM - Command:{0}'.format(' '.join(cmd)))
+    start = time.time()
+    output.append('Start updating machine(s) {0} to {1} at {2}'
+                  .format(target, lpp_source, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start))))
 
     do_not_error = False
 
     ret, stdout, stderr = module.run_command(cmd)
+    end = time.time()
 
     module.log("[RC] {0}".format(ret))
     module.log("[STDOUT] {0}".format(stdout))
     module.log("[STDERR] {0}".format(stderr))
 
     for line in stdout.rstrip().split('\n'):
-        results['nim_output'].append('{0}'.format(line))
+        output.append('{0}'.format(line))
         line = line.rstrip()
         matched = re.match(r"^Filesets processed:.*?[0-9]+ of [0-9]+", line)
         if matched:
-            results['nim_output'].append('\033[2K\r{0}'.format(line))
+            output.append('\033[2K\r{0}'.format(line))
             continue
         matched = re.match(r"^Finished processing all filesets.", line)
         if matched:
-            results['nim_output'].append('\033[2K\r{0}'.format(line))
+            output.append('\033[2K\r{0}'.format(line))
             continue
 
     for line in stderr.rstrip().split('\n'):
@@ -572,86 +664,112 @@ def perform_sync_customization(module, lpp_source, target):
         if matched:
             do_not_error = True
 
-    results['nim_output'].append('NIM - Finish updating {0} synchronously.'.format(target))
+    output.append('NIM - Finish updating {0} synchronously at {1} ({2}s).'
+                  .format(target, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(end)), int(end - start)))
     if ret != 0 or do_not_error:
         module.log("Error: NIM Command: {0} failed with return code {1}"
                    .format(cmd, ret))
-        results['nim_output'].append('NIM - Error: Command {0} returns above error!'
-                                     .format(cmd))
+        output.append('NIM - Error: Command {0} returns above error!'
+                      .format(cmd))
+
+    with output_lock:
+        results['nim_output'].extend(output)
 
     module.log("Done nim customize operation {0}".format(cmd))
 
     return ret
 
 
-def list_fixes(target, module):
+def perform_sync_updates(module, updates, parallel, max_failures):
     """
-    Get the list of interim fixes for a specified nim client.
+    Perform the synchronous customizations of several targets in parallel.
+
+    The targets are grouped by lpp_source and at most parallel targets are
+    updated at the same time. Once more than max_failures updates failed,
+    no new update is started.
 
-    return: a return code (0 if OK)
-            the list of fixes
+    arguments:
+        updates      (list): (target, lpp_source) of each update
+        parallel      (int): maximum number of concurrent updates
+        max_failures  (int): failed updates tolerated, None for no limit
+    return: the list of the failed targets
+            the list of the targets not updated because of the failures
     """
 
     global results
 
-    fixes = []
-    if target == 'master':
-        cmd = ['emgr', '-l']
-    else:
-        cmd = ['/usr/lpp/bos.sysmgt/nim/methods/c_rsh',
-               target,
-               '"LC_ALL=C /usr/sbin/emgr -l; echo rc=$?"']
-
-    module.debug('EMGR list - Command:{0}'.format(cmd))
-
-    ret, stdout, stderr = module.run_command(cmd)
-
-    module.log("[STDOUT] {0}".format(stdout))
-    module.log("[STDERR] {0}".format(stderr))
-
-    # remove the rc of c_rsh with echo $?
-    if target != 'master':
-        s = re.search(r'rc=([-\d]+)$', stdout)
-        if s:
-            if ret == 0:
-                ret = int(s.group(1))
-            stdout = re.sub(r'rc=[-\d]+\n$', '', stdout)
+    batches = {}
+    for target, lpp_source in updates:
+        batches.setdefault(lpp_source, []).append(target)
+
+    work = []
+    for lpp_source in sorted(batches):
+        results['nim_output'].append('NIM - Update batch {0}: {1}'
+                                     .format(lpp_source, ' '.join(batches[lpp_source])))
+        work.extend((target, lpp_source) for target in batches[lpp_source])
+
+    failures = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def update_target(update):
+        """
+        Update one target, stop the scheduling when the failure budget is exceeded
+        """
+        target, lpp_source = update
+        ret = perform_sync_customization(module, lpp_source, target)
+        if ret != 0:
+            with lock:
+                failures.append(target)
+                if max_failures is not None and len(failures) > max_failures:
+                    stop.set()
 
-    for line in stdout.rstrip().split('\n'):
-        line = line.rstrip()
-        line_array = line.split(' ')
-        matched = re.match(r"[0-9]", line_array[0])
-        if matched:
-            module.debug('EMGR list - adding fix {0} to fixes list'
-                         .format(line_array[2]))
-            fixes.append(line_array[2])
+    not_started, failed = run_pool(module, update_target, work, parallel, stop=stop)
+    failures.extend(target for target, lpp_source in failed)
+    return failures, [target for target, lpp_source in not_started]
 
-    results['nim_output'].append('{0}'.format(stderr))
 
-    if ret != 0:
-        module.log("Error: Command: {0} failed with return code {1}"
-                   .format(cmd, ret))
-        results['nim_output'].append('EMGR list - Error: Command {0} returns above error!'
-                                     .format(cmd))
+def parse_fix_removal(stdout):
+    """
+    Parse the output of EFIX_REMOVE_SCRIPT.
 
-    return(ret, fixes)
+    return: the return code of emgr -l, None if it did not run
+            the list of the interim fixes with their 'label' and the
+            'rc' of their removal
+            the output of the emgr commands
+    """
+    list_rc = None
+    fixes = []
+    output = []
+    for line in stdout.splitlines():
+        if line.startswith('| '):
+            output.append(line[2:])
+            continue
+        fields = line.split()
+        if len(fields) == 2 and fields[0] == 'list' and fields[1].isdigit():
+            list_rc = int(fields[1])
+        elif len(fields) == 3 and fields[0] == 'remove' and fields[2].isdigit():
+            fixes.append({'label': fields[1], 'rc': int(fields[2])})
+    return list_rc, fixes, output
 
 
-def remove_fix(target, fix, module):
+def remove_fixes(module, target):
     """
-    Remove an interim fix for a specified nim client.
+    List and remove all the interim fixes of a nim client with a single
+    command, run through c_rsh for a client.
 
-    return: the return code of the command.
+    Can run in parallel for several targets: the output is added to
+    nim_output in one block.
+
+    return: the return code, 0 if all the fixes have been removed
     """
 
     global results
 
     if target == 'master':
-        cmd = ['emgr', '-r', '-L', fix]
+        cmd = ['/bin/sh', '-c', EFIX_REMOVE_SCRIPT]
     else:
-        cmd = ['/usr/lpp/bos.sysmgt/nim/methods/c_rsh',
-               target,
-               '"/usr/sbin/emgr -r -L {0}; echo rc=$?"'.format(fix)]
+        cmd = ['/usr/lpp/bos.sysmgt/nim/methods/c_rsh', target, EFIX_REMOVE_SCRIPT]
 
     module.debug('EMGR remove - Command:{0}'.format(cmd))
 
@@ -660,69 +778,64 @@ def remove_fix(target, fix, module):
     module.log("[STDOUT] {0}".format(stdout))
     module.log("[STDERR] {0}".format(stderr))
 
-    # remove the rc of c_rsh with echo $?
-    if target != 'master':
-        s = re.search(r'rc=([-\d]+)$', stdout)
-        if s:
-            if ret == 0:
-                ret = int(s.group(1))
-            stdout = re.sub(r'rc=[-\d]+\n$', '', stdout)
+    list_rc, fixes, output = parse_fix_removal(stdout)
+    output.append('{0}'.format(stderr))
+
+    if list_rc is None:
+        ret = ret or 1
+        module.log("Error: cannot list the interim fixes of {0}, command {1} returned {2}"
+                   .format(target, cmd, ret))
+        output.append('EMGR list - Error: Command {0} returns above error!'.format(cmd))
+    elif list_rc != 0:
+        ret = list_rc
+        module.log("Error: emgr -l failed on {0} with return code {1}".format(target, list_rc))
+        output.append('EMGR list - Error: emgr -l returns above error on {0}!'.format(target))
+    else:
+        ret = 0
 
-    results['nim_output'].append('{0}'.format(stderr))
+    for fix in fixes:
+        if fix['rc'] == 0:
+            module.log("[WARNING] Interim fix {0} has been automatically removed from {1}"
+                       .format(fix['label'], target))
+        else:
+            ret = ret or fix['rc']
+            module.log("Error: emgr -r -L {0} failed on {1} with return code {2}"
+                       .format(fix['label'], target, fix['rc']))
+            output.append('EMGR remove - Error: emgr -r -L {0} returns above error on {1}!'
+                          .format(fix['label'], target))
 
-    if ret != 0:
-        module.log("Error: Command: {0} failed with return code {1}"
-                   .format(cmd, ret))
-        results['nim_output'].append('EMGR remove - Error: Command {0} returns above error!'
-                                     .format(cmd))
+    with output_lock:
+        results['nim_output'].extend(output)
+        results['fix_removal'][target] = {'rc': ret, 'fixes': fixes}
 
     return ret
 
 
-def find_resource_by_client(module, lpp_type, lpp_time, oslevel_elts):
+def find_resource_by_client(module, lpp_type, lpp_time, oslevel):
     """
     Retrieve the good SP or TL resource to associate to the nim client oslevel.
+    The lpp_source catalog is built once, the resource found is shared by the
+    clients at the same oslevel.
 
     parameters: lpp_type   SP or TL
                 lpp_time   next or latest
+                oslevel    client oslevel tuple, see parse_oslevel
 
-    return: the lpp_source found or the current oslevel if not found
+    return: the lpp_source found, None if not found
     """
     global nim_node
+    global lpp_catalog
 
     module.debug('NIM - find resource: {0} {1}'.format(lpp_time, lpp_type))
 
-    lpp_source = ''
-    lpp_source_list = sorted(nim_node['lpp_source'].keys())
-
-    if lpp_type == 'tl':
-        # reading lpp_source table until we have found the good tl
-        for lpp in lpp_source_list:
-            lpp_elts = lpp.split('-')
-            if lpp_elts[0] != oslevel_elts[0] or lpp_elts[1] <= oslevel_elts[1]:
-                continue
-            lpp_source = lpp
-            if lpp_time == 'next':
-                break
+    if lpp_catalog is None:
+        lpp_catalog = LppCatalog(nim_node['lpp_source'])
 
-    if lpp_type == 'sp':
-        # reading lpp_source table until we have found the good sp
-        for lpp in lpp_source_list:
-            lpp_elts = lpp.split('-')
-            if lpp_elts[0] != oslevel_elts[0] \
-               or lpp_elts[1] != oslevel_elts[1] \
-               or lpp_elts[2] <= oslevel_elts[2]:
-                continue
-            lpp_source = lpp
-            if lpp_time == 'next':
-                break
+    lpp_source = lpp_catalog.find(oslevel, lpp_time, lpp_type)
 
-    if (lpp_source is None) or (not lpp_source.strip()):
-        # setting lpp_source to current oslevel if not found
-        lpp_source = '{0}-{1}-{2}-{3}-lpp_source'.format(oslevel_elts[0], oslevel_elts[1],
-                                                         oslevel_elts[2], oslevel_elts[3])
+    if lpp_source is None:
         module.debug('NIM - find resource: server already to the {0} {1}, or no lpp_source were '
-                     'found, {2} will be utilized'.format(lpp_time, lpp_type, lpp_source))
+                     'found for {2}'.format(lpp_time, lpp_type, format_oslevel(oslevel)))
     else:
         module.debug('NIM - find resource: found the {0} lpp_source, {1} will be utilized'
                      .format(lpp_time, lpp_source))
@@ -740,6 +853,7 @@ def nim_update(module, params):
 
     global results
     global nim_node
+    global lpp_catalog
 
     lpp_source = params['lpp_source']
 
@@ -767,23 +881,27 @@ def nim_update(module, params):
 
     module.debug('NIM - Target list: {0}'.format(target_list))
 
-    # force interim fixes automatic removal
+    # force interim fixes automatic removal, one command per target
     if params['force']:
-        for target in target_list:
-            (ret, fixes) = list_fixes(target, module)
-            if ret != 0:
-                module.log("Continue to remove as many interim fixes we can")
-            for fix in fixes:
-                remove_fix(target, fix, module)
-                module.log("[WARNING] Interim fix {0} has been automatically removed from {1}"
-                           .format(fix, target))
+        results['fix_removal'] = {}
+
+        def remove_target_fixes(target):
+            """
+            Remove the interim fixes of a target
+            """
+            remove_fixes(module, target)
+
+        not_started, failed = run_pool(module, remove_target_fixes, target_list, params['parallel'])
+        for target in failed:
+            results['nim_output'].append('EMGR remove - Error: unexpected error on {0}!'.format(target))
+            results['fix_removal'][target] = {'rc': 1, 'fixes': []}
 
     if async_update == 'yes':   # async update
         if lpp_source not in nim_node['lpp_source']:
             module.log('NIM - Error: cannot find lpp_source {0}'
                        .format(lpp_source))
             results['msg'] = 'NIM - Error: cannot find lpp_source {0}'\
-                             .format(nim_node['lpp_source'])
+                             .format(lpp_source)
             module.fail_json(**results)
         else:
             module.log('NIM - perform asynchronous software customization for client(s) {0} '
@@ -798,20 +916,24 @@ def nim_update(module, params):
             if k != 'master':
                 nim_node['standalone'][k]['oslevel'] = val
             else:
-                nim_node['master']['oslevel'] = val
+                nim_node['master']['master']['oslevel'] = val
 
+        updates = []
         for target in target_list:
             # get current oslevel
             cur_oslevel = ''
             if target == 'master':
-                cur_oslevel = nim_node['master']['oslevel']
+                cur_oslevel = nim_node['master']['master']['oslevel']
             else:
                 cur_oslevel = nim_node['standalone'][target]['oslevel']
             module.debug('NIM - current oslevel: {0}'.format(cur_oslevel))
-            if (cur_oslevel is None) or (not cur_oslevel.strip()):
+            if (cur_oslevel is None) or (not cur_oslevel.strip()) or cur_oslevel == TIMEDOUT:
                 module.log('[WARNING] Cannot get oslevel for machine {0}'.format(target))
                 continue
-            cur_oslevel_elts = cur_oslevel.split('-')
+            cur_level = parse_oslevel(cur_oslevel)
+            if cur_level is None:
+                module.log('[WARNING] Cannot parse oslevel {0} of machine {1}'.format(cur_oslevel, target))
+                continue
 
             # get lpp source
             new_lpp_source = ''
@@ -822,45 +944,59 @@ def nim_update(module, params):
                 lpp_type = lpp_source_array[1]
                 new_lpp_source = find_resource_by_client(module,
                                                          lpp_type, lpp_time,
-                                                         cur_oslevel_elts)
+                                                         cur_level)
                 module.debug('NIM - new_lpp_source: {0}'.format(new_lpp_source))
+                if new_lpp_source is None:
+                    module.log('[WARNING] Machine {0} is already at the {1} {2} or no lpp_source was found'
+                               .format(target, lpp_time, lpp_type))
+                    continue
             else:
                 if lpp_source not in nim_node['lpp_source']:
                     module.log('NIM - Error: cannot find lpp_source {0}'
                                .format(lpp_source))
                     results['msg'] = 'NIM - Error: cannot find lpp_source {0}'\
-                                     .format(nim_node['lpp_source'])
+                                     .format(lpp_source)
                     module.fail_json(**results)
                 else:
                     new_lpp_source = lpp_source
 
-            # extract oslevel from lpp source
-            oslevel_elts = []
-            matched = re.match(r"^([0-9]{4}-[0-9]{2}-[0-9]{2}-[0-9]{4})-lpp_source$",
-                               new_lpp_source)
-            if matched:
-                oslevel_elts = matched.group(1).split('-')
-            else:
-                module.log('[WARNING] Cannot get oslevel from lpp source name {0}'
+            # oslevel of the lpp source, from its name or its oslevel_r
+            if lpp_catalog is None:
+                lpp_catalog = LppCatalog(nim_node['lpp_source'])
+            new_level = lpp_catalog.level(new_lpp_source)
+            if new_level is None:
+                module.log('[WARNING] Cannot get oslevel from lpp source {0}'
                            .format(new_lpp_source))
                 continue
 
-            if cur_oslevel_elts[0] != oslevel_elts[0]:
+            if cur_level[0] != new_level[0]:
                 module.log('[WARNING] Machine {0} has different release than {1}'
-                           .format(target, oslevel_elts[0]))
+                           .format(target, new_level[0]))
                 continue
-            if (cur_oslevel_elts[1] > oslevel_elts[1] or cur_oslevel_elts[1] == oslevel_elts[1] and cur_oslevel_elts[2] >= oslevel_elts[2]):
+            if cur_level[1:3] >= new_level[1:3]:
                 module.log('[WARNING] Machine {0} is already at same or higher level than {1}'
-                           .format(target, '-'.join(oslevel_elts)))
+                           .format(target, format_oslevel(new_level)))
                 continue
 
             module.log('Machine {0} needs upgrade from {1} to {2}'
-                       .format(target, cur_oslevel, '-'.join(oslevel_elts)))
-
-            module.log('NIM - perform synchronous software customization for client(s) {0} '
-                       'with resource {1}'.format(target, new_lpp_source))
-            perform_sync_customization(module, new_lpp_source, target)
+                       .format(target, cur_oslevel, format_oslevel(new_level)))
+
+            updates.append((target, new_lpp_source))
+
+        module.log('NIM - perform synchronous software customization for client(s) {0}, {1} at a time'
+                   .format(' '.join(target for target, new_lpp_source in updates), params['parallel']))
+        failures, skipped = perform_sync_updates(module, updates, params['parallel'], params['max_failures'])
+        results['failed_targets'] = sorted(failures)
+        if failures:
+            results['nim_output'].append('NIM - Update failed for {0}'.format(' '.join(sorted(failures))))
+        if params['max_failures'] is not None and len(failures) > params['max_failures']:
+            invalidate_oslevels(module, target_list)
+            results['changed'] = True
+            results['msg'] = 'NIM - Error: update failed for {0}, not started for {1}'\
+                             .format(', '.join(sorted(failures)), ', '.join(skipped) or 'none')
+            module.fail_json(**results)
 
+    invalidate_oslevels(module, target_list)
     results['changed'] = True
 
 
@@ -923,6 +1059,8 @@ def nim_maintenance(module, params):
             module.log("nim maintenance operation: {0} done".format(cmd))
             results['changed'] = True
 
+    invalidate_oslevels(module, target_list)
+
 
 def nim_master_setup(module, params):
     """
@@ -981,7 +1119,7 @@ def nim_check(module, params):
             nim_node['vios'][k]['oslevel'] = val
 
         oslevels = get_oslevels(module, ['master'])
-        nim_node['master']['oslevel'] = oslevels['master']
+        nim_node['master']['master']['oslevel'] = oslevels['master']
     else:
         # Get the oslevel for specified targets only
 
@@ -991,12 +1129,46 @@ def nim_check(module, params):
             if k != 'master':
                 nim_node['standalone'][k]['oslevel'] = val
             else:
-                nim_node['master']['oslevel'] = val
+                nim_node['master']['master']['oslevel'] = val
+
+
+def nim_status(module, params):
+    """
+    Retrieve the progress of the asynchronous updates of the nim clients,
+    with a single lsnim for all of them.
+    """
+
+    global results
+
+    module.log('NIM - status operation')
+
+    target_list = None
+    if params['targets'] is not None:
+        target_list = expand_targets(params['targets'])
+
+    try:
+        jobs = NimJobs(module).status(target_list)
+    except CommandError as exc:
+        results['msg'] = str(exc)
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
+        module.fail_json(**results)
+
+    results['jobs'] = jobs
+    results['pending'] = len([job for job in jobs.values() if job['status'] == 'running'])
+    for status in ('running', 'success', 'failure', 'unknown'):
+        names = sorted(name for name, job in jobs.items() if job['status'] == status)
+        if names:
+            results['nim_output'].append('NIM - {0} update(s) {1}: {2}'
+                                         .format(len(names), status, ' '.join(names)))
 
 
 def nim_compare(module, params):
     """
     Compare installation inventory of the nim clients.
+
+    The inventory of each client is collected in parallel and cached, it is
+    only listed again when the fingerprint of the client has changed.
     """
 
     global results
@@ -1011,26 +1183,21 @@ def nim_compare(module, params):
 
     module.debug('NIM - Target list: {0}'.format(target_list))
 
-    cmd = ['niminv', '-o', 'invcmp',
-           '-a', 'targets=' + ','.join(target_list),
-           '-a', 'base=any']
-
-    module.debug('NIM - Command:{0}'.format(cmd))
-
-    ret, stdout, stderr = module.run_command(cmd)
-
-    module.log("[RC] {0}".format(ret))
-    module.log("[STDOUT] {0}".format(stdout))
-    module.log("[STDERR] {0}".format(stderr))
-    results['stdout'] = stdout
-    results['stderr'] = stderr
+    inventories, sources = get_inventories(module, target_list, LppInventoryCache(module))
 
-    if ret != 0:
-        module.log("Error: NIM Command: {0} failed with return code {1}"
-                   .format(cmd, ret))
-        results['msg'] = 'Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), ret)
+    results['nim_output'].append('NIM - Inventory of {0} target(s): {1} cached, {2} collected, {3} failed'
+                                 .format(len(target_list), len(sources['cached']),
+                                         len(sources['collected']), len(sources['failed'])))
+    if sources['failed']:
+        results['nim_output'].append('NIM - Error: cannot get the inventory of {0}'
+                                     .format(', '.join(sources['failed'])))
+    if not inventories:
+        results['msg'] = 'Cannot get the installation inventory of {0}.'.format(', '.join(target_list))
         module.fail_json(**results)
 
+    results['compare'] = compare_inventories(inventories, target_list)
+    results['compare']['failed'] = sources['failed']
+
 
 def nim_script(module, params):
     """
@@ -1203,6 +1370,7 @@ def nim_bos_inst(module, params):
         results['msg'] = 'Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), ret)
         module.fail_json(**results)
 
+    invalidate_oslevels(module, target_list)
     results['changed'] = True
 
 
@@ -1388,9 +1556,12 @@ def main():
                         choices=['update', 'master_setup', 'check', 'compare',
                                  'script', 'allocate', 'deallocate',
                                  'bos_inst', 'define_script', 'remove',
-                                 'reset', 'reboot', 'maintenance']),
+                                 'reset', 'reboot', 'maintenance', 'status']),
             description=dict(type='str'),
+            nim_node=dict(type='dict'),
             lpp_source=dict(type='str'),
+            parallel=dict(type='int', default=1),
+            max_failures=dict(type='int'),
             targets=dict(type='list', elements='str'),
             asynchronous=dict(type='bool', default=False),
             device=dict(type='str'),
@@ -1423,6 +1594,7 @@ def main():
         stdout='',
         stderr='',
         nim_output=[],
+        nim_node_source='',
     )
 
     module.debug('*** START ***')
@@ -1459,6 +1631,11 @@ def main():
         params['lpp_source'] = lpp_source
         params['asynchronous'] = asynchronous
         params['force'] = force
+        params['parallel'] = module.params['parallel']
+        params['max_failures'] = module.params['max_failures']
+        if params['parallel'] < 1 or (params['max_failures'] is not None and params['max_failures'] < 0):
+            results['msg'] = 'NIM - Error: parallel must be at least 1 and max_failures cannot be negative.'
+            module.fail_json(**results)
         nim_update(module, params)
 
     elif action == 'maintenance':
@@ -1478,6 +1655,10 @@ def main():
         params['targets'] = targets
         nim_compare(module, params)
 
+    elif action == 'status':
+        params['targets'] = targets
+        nim_status(module, params)
+
     elif action == 'script':
         params['targets'] = targets
         params['script'] = script
@@ -1522,7 +1703,7 @@ def main():
         results['msg'] = 'NIM - Error: Unknown action {0}'.format(action)
         module.fail_json(**results)
 
-    results['nim_node'] = nim_node
+    results['nim_node'] = legacy_nim_node(nim_node)
     results['msg'] = 'NIM {0} completed successfully'.format(action)
     module.exit_json(**results)
 
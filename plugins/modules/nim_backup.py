@@ -63,6 +63,8 @@ options:
   nim_node:
     description:
     - Allows to pass along NIM node info from a task to another so that it discovers NIM info only one time for all tasks.
+    - It is used as is if its C(version) is supported and the NIM database has not been modified since its C(timestamp),
+      otherwise it is refreshed.
     type: dict
   location:
     description:
@@ -337,6 +339,14 @@ nim_node:
     returned: always
     type: dict
     contains:
+        version:
+            description: Schema version of the NIM node info.
+            returned: always
+            type: int
+        timestamp:
+            description: Time the NIM objects were listed, in seconds since the Epoch.
+            returned: always
+            type: float
         standalone:
             description: List of standalone NIM resources.
             returned: always
@@ -347,6 +357,8 @@ nim_node:
             type: dict
     sample:
         "nim_node": {
+            "version": 1,
+            "timestamp": 1602155234.52,
             "standalone": {
                 "nimclient01": {
                     "Cstate": "ready for a NIM operation",
@@ -382,6 +394,15 @@ nim_node:
                 }
             }
         }
+nim_node_source:
+    description:
+    - How the NIM node info has been built.
+    - C(supplied) if the I(nim_node) option has been used as is.
+    - C(completed) if the NIM types missing from the I(nim_node) option have been added.
+    - C(refreshed) if it has been built from the NIM database.
+    returned: always
+    type: str
+    sample: supplied
 meta:
     description: Detailed information on the module execution.
     returned: always
@@ -425,6 +446,11 @@ import re
 import threading
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_inventory import (
+    get_nim_inventory, get_nim_node)
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_targets import (
+    NimTargets)
 
 module = None
 results = None
@@ -510,16 +536,21 @@ def param_one_of(one_of_list, required=True, exclusive=True):
 def build_nim_node(module):
     """
     Build nim_node dictionary containing nim clients info.
+    The nim_node passed as option is used if it is up to date.
 
     arguments:
         module      (dict): The Ansible module
     """
     global results
 
-    types = ['standalone', 'vios']
-    for type in types:
-        if type not in results['nim_node']:
-            results['nim_node'].update({type: get_nim_type_info(module, type)})
+    try:
+        results['nim_node'], results['nim_node_source'] = \
+            get_nim_node(module, ['standalone', 'vios', 'mac_group'], module.params['nim_node'])
+    except CommandError as exc:
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
+        results['msg'] = 'Cannot get NIM information. {0}'.format(exc)
+        module.fail_json(**results)
 
 
 def get_nim_type_info(module, type):
@@ -534,17 +565,14 @@ def get_nim_type_info(module, type):
     """
     global results
 
-    cmd = ['lsnim', '-t', type, '-l']
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
-        results['stdout'] = stdout
-        results['stderr'] = stderr
-        results['msg'] = 'Cannot get NIM information for {0}. Command \'{1}\' failed with return code {2}.'\
-                         .format(type, ' '.join(cmd), rc)
+    try:
+        info_hash = get_nim_inventory(module).by_type(type)
+    except CommandError as exc:
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
+        results['msg'] = 'Cannot get NIM information for {0}. {1}'.format(type, exc)
         module.fail_json(**results)
 
-    info_hash = build_dict(module, stdout)
-
     return info_hash
 
 
@@ -585,8 +613,10 @@ def expand_targets(targets):
         * or ALL      all the nim clients
         vios          all the nim clients type=vios
         standalone    all the nim clients type=standalone
+        group_name    the nim clients of the machine group 'group_name'
         client_name   the nim client named 'client_name'
-        master        the nim master
+        !pattern      excludes the machines matching pattern
+    See NimTargets for the details.
 
     arguments:
         targets (list): The list of target patterns
@@ -595,49 +625,9 @@ def expand_targets(targets):
     """
     global results
 
-    clients = []
-    for target in targets:
-        # Build target(s) from keywords: all or *
-        if target.upper() == 'ALL' or target == '*':
-            clients = list(results['nim_node']['standalone'])
-            clients.extend(list(results['nim_node']['vios']))
-            break
-
-        # Build target(s) from keywords: standalone or vios
-        if target.lower() == 'standalone' or target.lower() == 'vios':
-            clients.extend(list(results['nim_node'][target.lower()]))
-            continue
-
-        # Build target(s) from: range i.e. quimby[7:12]
-        rmatch = re.match(r"(\w+)\[(\d+):(\d+)\]", target)
-        if rmatch:
-            name = rmatch.group(1)
-            start = rmatch.group(2)
-            end = rmatch.group(3)
-            for i in range(int(start), int(end) + 1):
-                # target_results.append('{0}{1:02}'.format(name, i))
-                curr_name = name + str(i)
-                if curr_name in results['nim_node']['standalone'] or curr_name in results['nim_node']['vios']:
-                    clients.append(curr_name)
-            continue
-
-        # Build target(s) from: val*. i.e. quimby*
-        rmatch = re.match(r"(\w+)\*$", target)
-        if rmatch:
-            name = rmatch.group(1)
-            for curr_name in results['nim_node']['standalone']:
-                if re.match(r"^%s\.*" % name, curr_name):
-                    clients.append(curr_name)
-            for curr_name in results['nim_node']['vios']:
-                if re.match(r"^%s\.*" % name, curr_name):
-                    clients.append(curr_name)
-            continue
-
-        # Build target(s) from: quimby05 quimby08 quimby12
-        if target in results['nim_node']['standalone'] or target in results['nim_node']['vios']:
-            clients.append(target)
-
-    return list(set(clients))
+    nim_node = results['nim_node']
+    return NimTargets({'standalone': nim_node['standalone'], 'vios': nim_node['vios']},
+                      groups=nim_node.get('mac_group')).expand(targets)
 
 
 def build_name(target, name, prefix, postfix):
@@ -1227,6 +1217,7 @@ def main():
         #   }
         # }
         nim_node={},
+        nim_node_source='',
         status={},
     )
 
@@ -1235,8 +1226,6 @@ def main():
     module.run_command_environ_update = dict(LANG='C', LC_ALL='C', LC_MESSAGES='C', LC_CTYPE='C')
 
     # Build nim node info
-    if module.params['nim_node']:
-        results['nim_node'] = module.params['nim_node']
     build_nim_node(module)
 
     # check targets are valid NIM clients
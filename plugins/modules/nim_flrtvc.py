@@ -56,7 +56,17 @@ options:
     - Path to a APAR CSV file containing the description of the C(sec) and C(hiper) fixes.
     - This file is usually transferred from the fix server; this rather big transfer
       can be avoided by specifying an already transferred file.
+    - When not set, the file is downloaded once into 'I(path)/work/tools' and
+      reused until it is older than I(csv_ttl).
     type: str
+  csv_ttl:
+    description:
+    - Specifies the number of hours the cached APAR CSV file is reused before
+      being downloaded again from the fix server.
+    - C(0) forces the download.
+    - Ignored if I(csv) is set.
+    type: int
+    default: 24
   path:
     description:
     - Specifies the directory to save the FLRTVC report. All temporary files such as
@@ -102,6 +112,28 @@ options:
     - If set a filesystem of the host could have increased even if it returns I(changed=False).
     type: bool
     default: yes
+  max_workers:
+    description:
+    - Specifies the maximum number of targets processed in parallel.
+    - Each target goes through the report, parse, download, check and install
+      steps on its own, without waiting for the other targets.
+    type: int
+    default: 8
+  cache_size:
+    description:
+    - Specifies the maximum size in MB of the download cache located in 'I(path)/work/cache'.
+    - Downloaded fixes are kept in this cache across runs and shared by all the targets.
+      The least recently used entries are removed when the cache exceeds this size.
+    - C(0) means no size limit.
+    type: int
+    default: 2048
+  flrtvc_zip:
+    description:
+    - Path to a local copy of the FLRTVC zip file to install the FLRTVC script from.
+    - When not set, the zip file is cached in 'I(path)/work/tools' and only downloaded
+      again from the fix server when a newer version is available.
+    - Allows to run without access to the fix server.
+    type: str
 '''
 
 EXAMPLES = r'''
@@ -148,6 +180,51 @@ meta:
             type: list
             elements: str
             sample: see below
+        apar_csv:
+            description: Origin of the APAR CSV file given to the FLRTVC script and time spent to get it.
+            returned: if I(csv) is not set
+            type: dict
+            contains:
+                path:
+                    description: Path of the APAR CSV file, null if the FLRTVC script downloads it itself.
+                    returned: always
+                    type: str
+                source:
+                    description: C(cache), C(download) or C(flrtvc) if the file could not be obtained.
+                    returned: always
+                    type: str
+                age:
+                    description: Age in seconds of the cached file.
+                    returned: always
+                    type: int
+                time:
+                    description: Time in seconds spent to get the file.
+                    returned: always
+                    type: float
+            sample:
+                "apar_csv": {
+                    "path": "/var/adm/ansible/work/tools/apar.csv",
+                    "source": "cache",
+                    "age": 5230,
+                    "time": 0.012
+                }
+        cache:
+            description: Statistics of the download cache for this run.
+            returned: if targets are processed
+            type: dict
+            contains:
+                hits:
+                    description: Number of downloads served from the cache.
+                    returned: always
+                    type: int
+                misses:
+                    description: Number of files actually downloaded.
+                    returned: always
+                    type: int
+                evictions:
+                    description: Number of cache entries removed to honor I(cache_size).
+                    returned: always
+                    type: int
         <target>:
             description: Detailed information on the execution on the <target>.
             returned: when target is actually a NIM client or master
@@ -207,6 +284,11 @@ meta:
                 "Exception removing /usr/bin/flrtvc.ksh, exception=Access is denied",
                 ...,
             ],
+            "cache": {
+                "hits": 38,
+                "misses": 2,
+                "evictions": 0
+            },
             "nimclient01": {
                 "0.report": [
                     "Fileset|Current Version|Type|EFix Installed|Abstract|Unsafe Versions|APARs|Bulletin URL|Download URL|CVSS Base Score|Reboot Required|
@@ -230,11 +312,11 @@ meta:
                     ...,
                 ],
                 "3.download": [
-                    "/usr/sys/inst.images/tardir/ntp_fix12/IJ17059m9b.190719.epkg.Z",
-                    "/usr/sys/inst.images/tardir/ntp_fix12/IJ17060m9a.190628.epkg.Z",
+                    "/usr/sys/inst.images/work/cache/<sha256 of url>/tardir/ntp_fix12/IJ17059m9b.190719.epkg.Z",
+                    "/usr/sys/inst.images/work/cache/<sha256 of url>/tardir/ntp_fix12/IJ17060m9a.190628.epkg.Z",
                     ...,
-                    "/usr/sys/inst.images/tardir/tcpdump_fix4/IJ12978s9a.190215.epkg.Z",
-                    "/usr/sys/inst.images/tardir/tcpdump_fix4/IJ12978sBa.190215.epkg.Z",
+                    "/usr/sys/inst.images/work/cache/<sha256 of url>/tardir/tcpdump_fix4/IJ12978s9a.190215.epkg.Z",
+                    "/usr/sys/inst.images/work/cache/<sha256 of url>/tardir/tcpdump_fix4/IJ12978sBa.190215.epkg.Z",
                     ...,
                 ],
                 "4.1.reject": [
@@ -246,11 +328,11 @@ meta:
                     ...,
                 ],
                 "4.2.check": [
-                    "/usr/sys/inst.images/tardir/tcpdump_fix5/IJ20785s2a.191119.epkg.Z",
+                    "/usr/sys/inst.images/work/cache/<sha256 of url>/tardir/tcpdump_fix5/IJ20785s2a.191119.epkg.Z",
                     ...,
                 ],
                 "5.install": [
-                    "/usr/sys/inst.images/tardir/tcpdump_fix5/IJ20785s2a.191119.epkg.Z",
+                    "/usr/sys/inst.images/work/cache/<sha256 of url>/tardir/tcpdump_fix5/IJ20785s2a.191119.epkg.Z",
                     ...,
                 ],
                 "messages": [
@@ -267,69 +349,28 @@ meta:
 import os
 import re
 import csv
+import hashlib
 import threading
 import shutil
 import tarfile
-import zipfile
-import stat
 import time
-import calendar
-from collections import OrderedDict
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.flrtvc_cache import (
+    EpkgIndex, dump_json, file_checksum, get_apar_csv, increase_fs, install_flrtvc,
+    load_json)
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_inventory import (
+    get_nim_inventory)
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_targets import (
+    NimTargets)
+from ansible_collections.ibm.power_aix.plugins.module_utils.pool import run_pool
 from ansible.module_utils.urls import open_url
 
 module = None
 results = None
 workdir = ''
-
-# Threading
-THRDS = []
-
-
-def start_threaded(thds):
-    """
-    Decorator for thread start
-    """
-    def start_threaded_wrapper(func):
-        """
-        Decorator wrapper for thread start
-        """
-        def start_threaded_inner_wrapper(*args):
-            """
-            Decorator inner wrapper for thread start
-            """
-            thd = threading.Thread(target=func, args=(args))
-            module.debug('Start thread {0}'.format(func.__name__))
-            thd.start()
-            thds.append(thd)
-        return start_threaded_inner_wrapper
-    return start_threaded_wrapper
-
-
-def wait_threaded(thds):
-    """
-    Decorator for thread join
-    """
-    def wait_threaded_wrapper(func):
-        """
-        Decorator wrapper for thread join
-        """
-        def wait_threaded_inner_wrapper(*args):
-            """
-            Decorator inner wrapper for thread join
-            """
-            func(*args)
-            for thd in thds:
-                thd.join()
-        return wait_threaded_inner_wrapper
-    return wait_threaded_wrapper
-
-
-@wait_threaded(THRDS)
-def wait_all():
-    """
-    Do nothing
-    """
+download_cache = None
+epkg_index = None
 
 
 def compute_c_rsh_rc(machine, rc, stdout):
@@ -356,34 +397,6 @@ def compute_c_rsh_rc(machine, rc, stdout):
     return rc, stdout
 
 
-def increase_fs(module, output, dest):
-    """
-    Increase filesystem by 100Mb
-    args:
-        module  (dict): The Ansible module
-        output (dict): The result of the execution for the target host
-        dst      (str): The absolute filename
-    return:
-        True if increase succeeded
-        False otherwise
-    """
-    cmd = ['/bin/df', '-c', dest]
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc == 0:
-        mount_point = stdout.splitlines()[1].split(':')[6]
-        cmd = ['chfs', '-a', 'size=+100M', mount_point]
-        rc, stdout, stderr = module.run_command(cmd)
-        if rc == 0:
-            module.debug('{0}: increased 100Mb: {1}'.format(mount_point, stdout))
-            return True
-
-    module.log('[WARNING] {0}: cmd:{1} failed rc={2} stdout:{3} stderr:{4}'
-               .format(mount_point, cmd, rc, stdout, stderr))
-    msg = 'Cannot increase filesystem: {0}.'.format(mount_point)
-    output['messages'].append(msg)
-    return False
-
-
 def download(module, output, src, dst, resize_fs=True):
     """
     Download efix from url to directory
@@ -425,27 +438,180 @@ def download(module, output, src, dst, resize_fs=True):
     return res
 
 
-def unzip(module, output, src, dst, resize_fs=True):
+class DownloadCache(object):
     """
-    Unzip source into the destination directory
-    args:
-        module (dict): The Ansible module
-        output (dict): The result of the execution for the target host
-        src     (str): The url to unzip
-        dst     (str): The absolute destination path
+    Persistent download cache shared by all the targets.
+
+    Each URL is stored in 'cachedir/<sha256 of url>/<file name>' and recorded
+    in 'cachedir/index.json' with the checksum of its content, its size and
+    its last access time. The checksum is verified once per run before an
+    entry is reused. Concurrent fetches of the same URL wait for a single
+    download. When the cache exceeds max_size, the least recently used
+    entries not needed by the current run are evicted.
     """
-    try:
-        zfile = zipfile.ZipFile(src)
-        zfile.extractall(dst)
-    except (zipfile.BadZipfile, zipfile.LargeZipFile, RuntimeError) as exc:
-        if resize_fs and increase_fs(module, output, dst):
-            return unzip(module, output, src, dst, resize_fs)
-        else:
-            msg = 'Cannot unzip {0}, exception:{1}'.format(src, exc)
-            module.log(msg)
-            output['messages'].append(msg)
-            return False
-    return True
+
+    def __init__(self, module, cachedir, max_size):
+        self.module = module
+        self.cachedir = cachedir
+        self.max_size = max_size
+        self.index_file = os.path.join(cachedir, 'index.json')
+        self.lock = threading.Lock()
+        self.url_locks = {}
+        self.verified = set()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+        if not os.path.exists(cachedir):
+            os.makedirs(cachedir)
+        self.index = load_json(self.index_file).get('entries', {})
+
+    def url_lock(self, url):
+        """
+        Return the lock serializing the fetches of url
+        """
+        with self.lock:
+            return self.url_locks.setdefault(url, threading.Lock())
+
+    def save_index(self):
+        """
+        Write the cache index, must be called with self.lock held
+        """
+        dump_json(self.module, self.index_file, {'entries': self.index})
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits in max_size,
+        must be called with self.lock held
+        """
+        if not self.max_size:
+            return
+        total = sum(entry['size'] for entry in self.index.values())
+        for key, entry in sorted(self.index.items(), key=lambda t: t[1]['atime']):
+            if total <= self.max_size:
+                break
+            if key in self.verified:
+                continue  # used by the current run
+            shutil.rmtree(os.path.join(self.cachedir, key), ignore_errors=True)
+            total -= entry['size']
+            del self.index[key]
+            self.stats['evictions'] += 1
+            self.module.debug('download cache: evict {0}'.format(entry['url']))
+
+    def entry_size(self, key):
+        """
+        Return the disk usage of the entry directory
+        """
+        size = 0
+        for root, dirs, files in os.walk(os.path.join(self.cachedir, key)):
+            size += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return size
+
+    def fetch(self, output, url, resize_fs=True):
+        """
+        Return the local path of url, downloading it if not already cached
+        args:
+            output    (dict): The result of the execution for the target host
+            url        (str): The url to download
+            resize_fs (bool): Increase the filesystem size if needed
+        return:
+            The absolute path of the cached file
+            None if the download failed
+        """
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        entry_dir = os.path.join(self.cachedir, key)
+        path = os.path.join(entry_dir, url.rstrip('/').split('/')[-1])
+
+        with self.url_lock(url):
+            with self.lock:
+                entry = self.index.get(key)
+                verified = key in self.verified
+            if entry and os.path.isfile(path):
+                if verified or file_checksum(path) == entry['sha256']:
+                    with self.lock:
+                        entry['atime'] = time.time()
+                        self.verified.add(key)
+                        self.stats['hits'] += 1
+                    self.module.debug('download cache: hit {0}'.format(url))
+                    return path
+                self.module.log('[WARNING] download cache: checksum mismatch for {0}, download it again'
+                                .format(path))
+
+            # stale or missing entry
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.makedirs(entry_dir)
+            if not download(self.module, output, url, path, resize_fs) or not os.path.isfile(path):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                with self.lock:
+                    self.index.pop(key, None)
+                return None
+
+            with self.lock:
+                self.index[key] = {'url': url,
+                                   'sha256': file_checksum(path),
+                                   'size': self.entry_size(key),
+                                   'atime': time.time()}
+                self.verified.add(key)
+                self.stats['misses'] += 1
+                self.evict()
+                self.save_index()
+            self.module.debug('download cache: miss {0}'.format(url))
+        return path
+
+    def extract_epkgs(self, output, machine, url, tar_path, resize_fs=True):
+        """
+        Extract the epkg files of a cached tar file next to it, only once
+        args:
+            output    (dict): The result of the execution for the target host
+            machine    (str): The remote machine name
+            url        (str): The url of the tar file
+            tar_path   (str): The absolute path of the cached tar file
+            resize_fs (bool): Increase the filesystem size if needed
+        return:
+            The list of epkgs found in the tar file
+            The list of absolute paths of the extracted epkgs
+        """
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        tar_dir = os.path.join(self.cachedir, key, 'tardir')
+
+        with self.url_lock(url):
+            with self.lock:
+                members = self.index[key].get('epkgs')
+            if members is not None and all(os.path.isfile(os.path.join(tar_dir, m)) for m in members):
+                return members, [os.path.abspath(os.path.join(tar_dir, m)) for m in members]
+
+            tar = tarfile.open(tar_path, 'r')
+            epkgs = [epkg for epkg in tar.getnames() if re.search(r'(\b[\w.-]+.epkg.Z\b)$', epkg)]
+            self.module.debug('{0}: found {1} epkg.Z file in tar file'.format(machine, len(epkgs)))
+
+            extracted = []
+            for epkg in epkgs:
+                for attempt in range(3):
+                    try:
+                        tar.extract(epkg, tar_dir)
+                    except (OSError, IOError, tarfile.TarError) as exc:
+                        if resize_fs:
+                            increase_fs(self.module, output, tar_dir)
+                        else:
+                            msg = 'Cannot extract tar file {0} to {1}: {2}'.format(epkg, tar_dir, exc)
+                            self.module.log('[WARNING] {0}: {1}'.format(machine, msg))
+                            output['messages'].append(msg)
+                            break
+                    else:
+                        break
+                else:
+                    msg = 'Cannot extract tar file {0} to {1}'.format(epkg, tar_dir)
+                    self.module.log('[WARNING] {0}: {1}'.format(machine, msg))
+                    output['messages'].append(msg)
+                    continue
+                extracted.append(epkg)
+            tar.close()
+
+            with self.lock:
+                if len(extracted) == len(epkgs):
+                    self.index[key]['epkgs'] = epkgs
+                self.index[key]['size'] = self.entry_size(key)
+                self.save_index()
+
+        return epkgs, [os.path.abspath(os.path.join(tar_dir, epkg)) for epkg in extracted]
 
 
 def remove_efix(module, output, machine):
@@ -500,65 +666,11 @@ def remove_efix(module, output, machine):
     return failed_rm or rc
 
 
-def to_utc_epoch(date):
-    """
-    Return the time (UTC time zone) in second from unix epoch (int)
-
-    args:
-        date (str) : time to convert in sec from epoch with the format:
-                     'Mon Oct 9 23:35:09 CDT 2017'
-    returns: (epoch, msg)
-        The value in sec from epoch , ''
-        -1,  'error message in case of error'
-    """
-
-    TZ = 'UTC'
-    msg = ''
-    sec_from_epoch = -1
-    # supported TZ translation
-    shift = {'CDT': -5, 'CEST': 2, 'CET': 1, 'CST': -6, 'CT': -6,
-             'EDT': -4, 'EET': 2, 'EST': -5, 'ET': -5,
-             'IST': 5.5,
-             'JST': 9,
-             'MSK': 3, 'MT': 2,
-             'NZST': 12,
-             'PDT': -7, 'PST': -8,
-             'SAST': 2,
-             'UTC': 0,
-             'WEST': 1, 'WET': 0}
-
-    # if no time zone, consider it's UTC
-    match = re.match(r'^(\S+\s+\S+\s+\d+\s+\d+:\d+:\d+)\s+(\d{4})$', date)
-    if match:
-        date = '{0} UTC {1}'.format(match.group(1), match.group(2))
-    else:
-        match = re.match(r'^(\S+\s+\S+\s+\d+\s+\d+:\d+:\d+)\s+(\S+)\s+(\d{4})$', date)
-        if match:
-            date = '{0} UTC {1}'.format(match.group(1), match.group(3))
-            TZ = match.group(2)
-        else:  # should not happen
-            return (-1, 'bad packaging date format')
-
-    try:
-        datet = time.strptime(date, "%a %b %d %H:%M:%S %Z %Y")
-        sec_from_epoch = calendar.timegm(datet)
-    except ValueError:
-        return (-1, 'EXCEPTION: cannot parse packaging date')
-
-    if TZ not in shift:
-        msg = 'Unsuported Time Zone: "TZ", using "UTC"'
-        TZ = 'UTC'
-
-    sec_from_epoch = sec_from_epoch - (shift[TZ] * 3600)
-
-    return (sec_from_epoch, msg)
-
-
 def check_epkgs(module, output, machine, epkg_list, lpps, efixes):
     """
-    For each epkg get the label, packaging date, filset and check prerequisites
-    based on fileset current level and build a list ordered by packaging date
-    that should not be locked at its installation.
+    For each epkg get the label, packaging date, filset from the epkg index
+    and check prerequisites based on fileset current level and build a list
+    ordered by packaging date that should not be locked at its installation.
 
     Note: in case of parsing error, keep the epkg (best effort)
 
@@ -589,80 +701,26 @@ def check_epkgs(module, output, machine, epkg_list, lpps, efixes):
     # Get information on efix we want to install
     # and check it could be installed
     for epkg_path in epkg_list:
+        info = epkg_index.get(output, machine, epkg_path)
         epkg = {'path': epkg_path,
-                'label': '',
-                'pkg_date': None,
-                'sec_from_epoch': -1,
-                'filesets': [],
-                'files': [],
+                'label': info['label'],
+                'pkg_date': info['pkg_date'],
+                'sec_from_epoch': info['sec_from_epoch'],
+                'filesets': info['filesets'],
+                'files': info['files'],
                 'prereq': {},
                 'reject': False}
 
-        # get efix information
-        cmd = '/usr/sbin/emgr -dXv3 -e {0} | /bin/grep -p -e PREREQ -e PACKAG'.format(epkg['path'])
-        rc, stdout, stderr = module.run_command(cmd, use_unsafe_shell=True)
-        if rc != 0:
-            msg = 'Cannot get efix information {0}'.format(epkg['path'])
-            module.log(msg)
-            module.log('cmd:{0} failed rc={1} stdout:{2} stderr:{3}'
-                       .format(cmd, rc, stdout, stderr))
-            output['messages'].append(msg)
-            # do not break or continue, we keep this efix, will try to install it anyway
-
-        # ordered parsing: expecting the following line order:
-        # LABEL, PACKAGING DATE, then PACKAGE, then prerequisites levels
-        for line in stdout.splitlines():
-            # skip comments and empty lines
-            line = line.rstrip()
-            if not line or line.startswith('+'):
-                continue  # skip blank and comment line
-
-            if not epkg['label']:
-                # match: "LABEL:            IJ02726s8a"
-                match = re.match(r'^LABEL:\s+(\S+)$', line)
-                if match:
-                    epkg['label'] = match.group(1)
-                    continue
-
-            if not epkg['pkg_date']:
-                # match: "PACKAGING DATE:   Mon Oct  9 09:35:09 CDT 2017"
-                match = re.match(r'^PACKAGING\s+DATE:\s+'
-                                 r'(\S+\s+\S+\s+\d+\s+\d+:\d+:\d+\s+\S*\s*\S+).*$',
-                                 line)
-                if match:
-                    epkg['pkg_date'] = match.group(1)
-                    continue
-
-            # match: "   PACKAGE:       devices.vdevice.IBM.vfc-client.rte"
-            match = re.match(r'^\s+PACKAGE:\s+(\S+)\s*?$', line)
-            if match:
-                if match.group(1) not in epkg['filesets']:
-                    epkg['filesets'].append(match.group(1))
-                continue
-
-            # match: "   LOCATION:      /usr/lib/boot/unix_64"
-            match = re.match(r'^\s+LOCATION:\s+(\S+)\s*?$', line)
-            if match:
-                if match.group(1) not in epkg['files']:
-                    epkg['files'].append(match.group(1))
-                continue
-
-            # match and convert prerequisite levels
-            # line like: "bos.net.tcp.server 7.1.3.0 7.1.3.49"
-            match = re.match(r'^(\S+)\s+([\d+\.]+)\s+([\d+\.]+)\s*?$', line)
-            if match is None:
-                continue
-            (prereq, minlvl, maxlvl) = match.groups()
+        for (prereq, minlvl, maxlvl) in info['prereq']:
             epkg['prereq'][prereq] = {}
             epkg['prereq'][prereq]['minlvl'] = minlvl
             epkg['prereq'][prereq]['maxlvl'] = maxlvl
 
-            # parsing done
             # check filseset prerequisite is present
             if prereq not in lpps:
                 epkg['reject'] = '{0}: prerequisite missing: {1}'.format(os.path.basename(epkg['path']), prereq)
                 module.log('{0}: reject {1}'.format(machine, epkg['reject']))
-                break  # stop parsing
+                break
 
             # check filseset prerequisite is present
             minlvl_i = list(map(int, epkg['prereq'][prereq]['minlvl'].split('.')))
@@ -691,48 +749,41 @@ def check_epkgs(module, output, machine, epkg_list, lpps, efixes):
                                  .format(os.path.basename(epkg['path']), locked_files[file], file)
                 module.log('{0}: reject {1}'.format(machine, epkg['reject']))
                 epkgs_reject.append(epkg['reject'])
-                continue
+                break
         if epkg['reject']:
             continue
 
-        # convert packaging date into time in sec from epoch
-        if epkg['pkg_date']:
-            (sec_from_epoch, msg) = to_utc_epoch(epkg['pkg_date'])
-            if sec_from_epoch == -1:
-                module.log('[WARNING] {0}: {1}: "{2}" for epkg:{3} '.format(machine, msg, epkg['pkg_date'], epkg))
-            epkg['sec_flogepoch'] = sec_from_epoch
-
-        epkgs_info[epkg['path']] = epkg.copy()
+        epkgs_info[epkg['path']] = epkg
 
-    # sort the epkg by packing date (sec from epoch)
-    sorted_epkgs = OrderedDict(sorted(epkgs_info.items(),
-                                      key=lambda t: t[1]['sec_from_epoch'],
-                                      reverse=True)).keys()
+    # sort the epkg by packaging date (sec from epoch), most recent first,
+    # equal dates are ordered by path to keep the result deterministic
+    sorted_epkgs = sorted(epkgs_info, key=lambda path: (-epkgs_info[path]['sec_from_epoch'], path))
 
-    # exclude epkg that will be interlocked
-    global_file_locks = []
-    removed_epkg = []
+    # exclude epkg that will be interlocked: file_owner indexes each file
+    # locked by an epkg kept for installation
+    file_owner = {}
+    kept_epkgs = []
     for epkg in sorted_epkgs:
-        if set(epkgs_info[epkg]['files']).isdisjoint(set(global_file_locks)):
-            global_file_locks.extend(epkgs_info[epkg]['files'])
-            module.log('{0}: keep {1}, files: {2}'
-                       .format(machine, os.path.basename(epkgs_info[epkg]['path']), epkgs_info[epkg]['files']))
+        files = epkgs_info[epkg]['files']
+        owner = next((file_owner[file] for file in files if file in file_owner), None)
+        if owner is None:
+            for file in files:
+                file_owner[file] = epkg
+            kept_epkgs.append(epkg)
+            module.log('{0}: keep {1}, files: {2}'.format(machine, os.path.basename(epkg), files))
         else:
             output['messages'].append('a previous efix to install will lock a file of {0} '
                                       'preventing its installation, install it manually or '
                                       'run the task again.'
-                                      .format(os.path.basename(epkgs_info[epkg]['path'])))
+                                      .format(os.path.basename(epkg)))
             epkgs_info[epkg]['reject'] = '{0}: locked by previous efix to install'\
-                                         .format(os.path.basename(epkgs_info[epkg]['path']))
-            module.log('{0}: reject {1}'.format(machine, epkgs_info[epkg]['reject']))
+                                         .format(os.path.basename(epkg))
+            module.log('{0}: reject {1}, {2} kept first'.format(machine, epkgs_info[epkg]['reject'], os.path.basename(owner)))
             epkgs_reject.append(epkgs_info[epkg]['reject'])
-            removed_epkg.append(epkg)
-    for epkg in removed_epkg:
-        sorted_epkgs.remove(epkg)
 
     epkgs_reject = sorted(epkgs_reject)  # order the reject list by label
 
-    return (sorted_epkgs, epkgs_reject)
+    return (kept_epkgs, epkgs_reject)
 
 
 def parse_lpps_info(module, output, machine):
@@ -777,7 +828,6 @@ def parse_lpps_info(module, output, machine):
     return lpps_lvl
 
 
-@start_threaded(THRDS)
 def run_lslpp(module, output, machine, filename):
     """
     Use lslpp on a target system to list filesets and write into provided file.
@@ -868,7 +918,6 @@ def parse_emgr(machine):
     return efixes
 
 
-@start_threaded(THRDS)
 def run_emgr(module, output, machine, f_efix):
     """
     Use the interim fix manager to list detailed information of
@@ -939,9 +988,6 @@ def run_flrtvc(module, output, machine, flrtvc_path, params, force):
         os.remove(emgr_file)
     run_emgr(module, output, machine, emgr_file)
 
-    # Wait threads to finish
-    wait_all()
-
     if not os.path.exists(lslpp_file) or not os.path.exists(emgr_file):
         if not os.path.exists(lslpp_file):
             output['messages'].append('Failed to list filsets (lslpp), {0} does not exist'
@@ -1020,7 +1066,6 @@ def run_parser(module, machine, output, report):
     output.update({'1.parse': rows})
 
 
-@start_threaded(THRDS)
 def run_downloader(module, machine, output, urls, resize_fs=True):
     """
     Download URLs and check efixes
@@ -1038,7 +1083,7 @@ def run_downloader(module, machine, output, urls, resize_fs=True):
             output['4.2.check']
         for the provided machine.
     """
-    global workdir
+    global download_cache
 
     out = {'messages': output['messages'],
            '2.discover': [],
@@ -1055,47 +1100,19 @@ def run_downloader(module, machine, output, urls, resize_fs=True):
             out['2.discover'].append(name)
 
             # download epkg file
-            epkg = os.path.abspath(os.path.join(workdir, name))
-            if download(module, out, url, epkg, resize_fs):
+            epkg = download_cache.fetch(out, url, resize_fs)
+            if epkg:
                 out['3.download'].append(epkg)
 
         elif '.tar' in name:  # URL as a tar file
             module.debug('{0}: treat url as a tar file'.format(machine))
-            dst = os.path.abspath(os.path.join(workdir, name))
-
-            # download and open tar file
-            if download(module, out, url, dst, resize_fs):
-                tar = tarfile.open(dst, 'r')
 
-                # find all epkg in tar file
-                epkgs = [epkg for epkg in tar.getnames() if re.search(r'(\b[\w.-]+.epkg.Z\b)$', epkg)]
+            # download tar file and extract epkgs
+            dst = download_cache.fetch(out, url, resize_fs)
+            if dst:
+                epkgs, paths = download_cache.extract_epkgs(out, machine, url, dst, resize_fs)
                 out['2.discover'].extend(epkgs)
-                module.debug('{0}: found {1} epkg.Z file in tar file'.format(machine, len(epkgs)))
-
-                # extract epkg
-                tar_dir = os.path.join(workdir, 'tardir')
-                if not os.path.exists(tar_dir):
-                    os.makedirs(tar_dir)
-                for epkg in epkgs:
-                    for attempt in range(3):
-                        try:
-                            tar.extract(epkg, tar_dir)
-                        except (OSError, IOError, tarfile.TarError) as exc:
-                            if resize_fs:
-                                increase_fs(module, out, tar_dir)
-                            else:
-                                msg = 'Cannot extract tar file {0} to {1}: {2}'.format(epkg, tar_dir, exc)
-                                module.log('[WARNING] {0}: {1}'.format(machine, msg))
-                                out['messages'].append(msg)
-                                break
-                        else:
-                            break
-                    else:
-                        msg = 'Cannot extract tar file {0} to {1}'.format(epkg, tar_dir)
-                        module.log('[WARNING] {0}: {1}'.format(machine, msg))
-                        out['messages'].append(msg)
-                        continue
-                    out['3.download'].append(os.path.abspath(os.path.join(tar_dir, epkg)))
+                out['3.download'].extend(paths)
 
         else:  # URL as a Directory
             module.debug('{0}: treat url as a directory'.format(machine))
@@ -1111,10 +1128,10 @@ def run_downloader(module, machine, output, urls, resize_fs=True):
             module.debug('{0}: found {1} epkg.Z file in html body'.format(machine, len(epkgs)))
 
             # download epkg
-            epkgs = [os.path.abspath(os.path.join(workdir, epkg)) for epkg in epkgs
-                     if download(module, out, os.path.join(url, epkg),
-                                 os.path.abspath(os.path.join(workdir, epkg)), resize_fs)]
-            out['3.download'].extend(epkgs)
+            for epkg in epkgs:
+                path = download_cache.fetch(out, os.path.join(url, epkg), resize_fs)
+                if path:
+                    out['3.download'].append(path)
 
     # Get installed filesets' levels
     lpps_lvl = parse_lpps_info(module, output, machine)
@@ -1129,7 +1146,6 @@ def run_downloader(module, machine, output, urls, resize_fs=True):
     output.update(out)
 
 
-@start_threaded(THRDS)
 def run_installer(module, machine, output, epkgs, resize_fs=True):
     """
     Install epkgs efixes
@@ -1152,7 +1168,7 @@ def run_installer(module, machine, output, epkgs, resize_fs=True):
 
     if not epkgs:
         msg = 'Nothing to install'
-        results['satus'][machine] = 'SUCCESS'
+        results['status'][machine] = 'SUCCESS'
         output['messages'].append(msg)
         return True
 
@@ -1188,7 +1204,7 @@ def run_installer(module, machine, output, epkgs, resize_fs=True):
     if not epkgs_base:
         msg = 'Nothing to install, see syslog for details'
         output['messages'].append(msg)
-        results['satus'][machine] = 'FAILURE'
+        results['status'][machine] = 'FAILURE'
         return False
 
     efixes = ' '.join(epkgs_base)
@@ -1206,7 +1222,7 @@ def run_installer(module, machine, output, epkgs, resize_fs=True):
             msg = 'Cannot define NIM lpp_source resource {0} for location \'{1}\''.format(lpp_source, destpath)
             module.log('[WARNING] {0}: {1}'.format(machine, msg))
             output['messages'].append(msg)
-            results['satus'][machine] = 'FAILURE'
+            results['status'][machine] = 'FAILURE'
             return False
 
     # perform customization
@@ -1228,7 +1244,7 @@ def run_installer(module, machine, output, epkgs, resize_fs=True):
             install_ok = True
 
         output.update({'5.install': stdout.splitlines()})
-        results['satus'][machine] = 'SUCCESS'
+        results['status'][machine] = 'SUCCESS'
         results['changed'] = True
     else:
         msg = 'Cannot list NIM resource for \'{0}\''.format(machine)
@@ -1236,7 +1252,7 @@ def run_installer(module, machine, output, epkgs, resize_fs=True):
         module.log('[WARNING] cmd:{0} failed rc={1} stdout:{2} stderr:{3}'
                    .format(cmd, rc, stdout, stderr))
         output['messages'].append(msg)
-        results['satus'][machine] = 'FAILURE'
+        results['status'][machine] = 'FAILURE'
 
     # remove lpp source
     cmd = ['/usr/sbin/lsnim', '-l', lpp_source]
@@ -1256,7 +1272,7 @@ def run_installer(module, machine, output, epkgs, resize_fs=True):
 def get_nim_clients_info(module):
     """
     Build client list (standalone and vios) with
-    all NIM info from lsnim -c machines -l command
+    all NIM info of the objects of the machines class
     args:
         module  (dict): The Ansible module
     note:
@@ -1265,27 +1281,18 @@ def get_nim_clients_info(module):
         NIM client dictionary
 
     """
-    info = {}
-
-    cmd = ['lsnim', '-c', 'machines', '-l']
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
-        results['stdout'] = stdout
-        results['stderr'] = stderr
-        results['msg'] = 'Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), rc)
+    try:
+        inventory = get_nim_inventory(module)
+    except CommandError as exc:
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
+        results['msg'] = str(exc)
         module.fail_json(**results)
 
-    for line in stdout.rstrip().splitlines():
-        line = line.rstrip()
-        match_key = re.match(r"^(\S+):", line)
-        if match_key:
-            obj_key = match_key.group(1)
-            info[obj_key] = {}
-            continue
-        rmatch_attr = re.match(r"^\s+(\S+)\s+=\s+(.*)$", line)
-        if rmatch_attr:
-            info[obj_key][rmatch_attr.group(1)] = rmatch_attr.group(2)
-            continue
+    info = {}
+    for name, attrs in inventory.objects.items():
+        if attrs.get('class') == 'machines':
+            info[name] = dict(attrs)
     info['master'] = {}
 
     return info
@@ -1300,56 +1307,36 @@ def expand_targets(module, targets, nim_clients):
                           with 'target'
         target[n1:n2] where n1 and n2 are numeric: target<n1> to target<n2>
         * or ALL      all the nim client machines
+        vios          all the nim client machines type=vios
+        standalone    all the nim client machines type=standalone
+        group_name    the nim clients of the machine group 'group_name'
         client_name   the nim client named 'client_name'
         master        the nim master
+        !pattern      excludes the machines matching pattern
 
-        sample:  target[1:5] target12 other_target*
+        sample:  target[1:5] target12 other_target* !target3
+    See NimTargets for the details.
 
     arguments:
         module       (dict): The Ansible module
         targets      (list): List of requested target partterns
-        nim_clients  (list): List of NIM clients
+        nim_clients  (dict): NIM clients info, see get_nim_clients_info
 
     return: the list of the existing NIM client matching the target list
     """
-    clients = []
-
-    for target in targets:
-
-        # Build target(s) from: range i.e. quimby[7:12]
-        rmatch = re.match(r"(\w+)\[(\d+):(\d+)\]", target)
-        if rmatch:
-            name = rmatch.group(1)
-            start = rmatch.group(2)
-            end = rmatch.group(3)
-
-            for i in range(int(start), int(end) + 1):
-                # target_results.append('{0}{1:02}'.format(name, i))
-                curr_name = name + str(i)
-                if curr_name in nim_clients:
-                    clients.append(curr_name)
-            continue
-
-        # Build target(s) from: val*. i.e. quimby*
-        rmatch = re.match(r"(\w+)\*$", target)
-        if rmatch:
-            name = rmatch.group(1)
-
-            for curr_name in nim_clients:
-                if re.match(r"^%s\.*" % name, curr_name):
-                    clients.append(curr_name)
-            continue
-
-        # Build target(s) from: all or *
-        if target.upper() == 'ALL' or target == '*':
-            clients = nim_clients
-            continue
+    try:
+        groups = get_nim_inventory(module).by_type('mac_group')
+    except CommandError as exc:
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
+        results['msg'] = str(exc)
+        module.fail_json(**results)
 
-        # Build target(s) from: quimby05 quimby08 quimby12
-        if (target in nim_clients) or (target == 'master'):
-            clients.append(target)
+    clients = {}
+    for name, attrs in nim_clients.items():
+        clients.setdefault(attrs.get('type', name), []).append(name)
 
-    return list(set(clients))
+    return NimTargets(clients, groups=groups).expand(targets)
 
 
 def check_targets(module, output, targets, nim_clients):
@@ -1395,6 +1382,57 @@ def check_targets(module, output, targets, nim_clients):
     return list(set(targets_ok))
 
 
+def run_pipeline(module, machine, output, flrtvc_path, params, force,
+                 check_only=False, download_only=False, resize_fs=True):
+    """
+    Run the whole FLRTVC flow on a target: report, parse, download,
+    check and install. Each target flows through these steps on its
+    own without waiting for the other targets.
+    args:
+        module        (dict): The Ansible module
+        machine        (str): The remote machine name
+        output        (dict): The result of the execution for the target host
+        flrtvc_path    (str): The path to the flrtvc script to run
+        params        (dict): The parameters to pass to flrtvc command
+        force         (bool): The flag to automatically remove efixes
+        check_only    (bool): Stop after the report
+        download_only (bool): Stop after the download and check
+        resize_fs     (bool): Increase the filesystem size if needed
+    note:
+        Set results['status'][machine] accordingly.
+    """
+    global results
+
+    try:
+        if not run_flrtvc(module, output, machine, flrtvc_path, params, force):
+            msg = 'Failed to get vulnerabilities report, {0} will not be updated'.format(machine)
+            module.log('[WARNING] ' + msg)
+            output['messages'].append(msg)
+            results['status'][machine] = 'FAILURE'
+            return
+        if check_only:
+            results['status'][machine] = 'SUCCESS'
+            return
+
+        run_parser(module, machine, output, output['0.report'])
+
+        run_downloader(module, machine, output, output['1.parse'], resize_fs)
+        if '4.2.check' not in output:
+            msg = 'Error downloading some fixes, {0} will not be updated'.format(machine)
+            output['messages'].append(msg)
+            results['status'][machine] = 'FAILURE'
+            return
+        if download_only:
+            return
+
+        run_installer(module, machine, output, output['4.2.check'], resize_fs)
+    except Exception as exc:
+        msg = 'Unexpected error processing {0}: {1}'.format(machine, exc)
+        module.log('[WARNING] ' + msg)
+        output['messages'].append(msg)
+        results['status'][machine] = 'FAILURE'
+
+
 ###################################################################################################
 
 
@@ -1402,6 +1440,8 @@ def main():
     global module
     global results
     global workdir
+    global download_cache
+    global epkg_index
 
     module = AnsibleModule(
         argument_spec=dict(
@@ -1417,6 +1457,10 @@ def main():
             check_only=dict(required=False, type='bool', default=False),
             download_only=dict(required=False, type='bool', default=False),
             extend_fs=dict(required=False, type='bool', default=True),
+            max_workers=dict(required=False, type='int', default=8),
+            cache_size=dict(required=False, type='int', default=2048),
+            flrtvc_zip=dict(required=False, type='str'),
+            csv_ttl=dict(required=False, type='int', default=24),
         ),
         supports_check_mode=True
     )
@@ -1464,10 +1508,17 @@ def main():
     check_only = module.params['check_only']
     download_only = module.params['download_only']
     resize_fs = module.params['extend_fs']
+    max_workers = module.params['max_workers']
+    if max_workers < 1:
+        results['msg'] = 'Invalid max_workers value {0}, it must be a positive integer.'.format(max_workers)
+        module.fail_json(**results)
 
     workdir = os.path.abspath(os.path.join(flrtvc_params['dst_path'], 'work'))
     if not os.path.exists(workdir):
         os.makedirs(workdir, mode=0o744)
+    download_cache = DownloadCache(module, os.path.join(workdir, 'cache'),
+                                   max(module.params['cache_size'], 0) * 1024 * 1024)
+    epkg_index = EpkgIndex(module, os.path.join(workdir, 'cache'))
 
     # ===========================================
     # Compute targets
@@ -1477,7 +1528,7 @@ def main():
     module.debug('requested targets are: "{0}"'.format(targets))
     nim_clients = get_nim_clients_info(module)
     module.debug('Nim clients are: {0}'.format(nim_clients))
-    targets = expand_targets(module, targets, nim_clients.keys())
+    targets = expand_targets(module, targets, nim_clients)
     module.debug('Nim client targets are:{0}'.format(targets))
 
     # Init metadata dictionary
@@ -1501,92 +1552,45 @@ def main():
     flrtvc_dir = os.path.abspath(os.path.join(os.sep, 'usr', 'bin'))
     flrtvc_path = os.path.abspath(os.path.join(flrtvc_dir, 'flrtvc.ksh'))
 
-    # remove previous version if any
-    if os.path.exists(flrtvc_path):
-        try:
-            os.remove(flrtvc_path)
-        except OSError as exc:
-            msg = 'Cannot remove {0}, exception:{1}'.format(flrtvc_path, exc)
-            module.log('[WARNING] ' + msg)
-            results['meta']['messages'].append(msg)
-
-    flrtvc_dst = os.path.abspath(os.path.join(workdir, 'FLRTVC-latest.zip'))
-    if not download(module, results['meta'],
-                    'https://www-304.ibm.com/webapp/set2/sas/f/flrt3/FLRTVC-latest.zip',
-                    flrtvc_dst, resize_fs):
+    if not install_flrtvc(module, results['meta'], os.path.join(workdir, 'tools'), flrtvc_path,
+                          module.params['flrtvc_zip'], resize_fs):
         if clean and os.path.exists(workdir):
             shutil.rmtree(workdir, ignore_errors=True)
-        results['msg'] = 'Failed to download FLRTVC-latest.zip'
+        results['msg'] = 'Failed to install the FLRTVC script'
         module.fail_json(**results)
 
-    if not unzip(module, results['meta'], flrtvc_dst,
-                 os.path.abspath(os.path.join(os.sep, 'usr', 'bin')), resize_fs):
-        if clean and os.path.exists(workdir):
-            shutil.rmtree(workdir, ignore_errors=True)
-        results['msg'] = 'Failed to unzip FLRTVC-latest.zip'
-        module.fail_json(**results)
-
-    flrtvc_stat = os.stat(flrtvc_path)
-    if not flrtvc_stat.st_mode & stat.S_IEXEC:
-        os.chmod(flrtvc_path, flrtvc_stat.st_mode | stat.S_IEXEC)
+    if not flrtvc_params['apar_csv'] and targets:
+        flrtvc_params['apar_csv'], results['meta']['apar_csv'] = \
+            get_apar_csv(module, results['meta'], os.path.join(workdir, 'tools'), module.params['csv_ttl'])
 
     # ===========================================
-    # Run flrtvc script
+    # Run the report, parse, download, check and
+    # install pipeline of each target
     # ===========================================
-    module.debug('*** REPORT ***')
-    wrong_targets = []
-    for machine in targets:
-        if not run_flrtvc(module, results['meta'][machine], machine, flrtvc_path, flrtvc_params, force):
-            wrong_targets.append(machine)
-    for machine in wrong_targets:
-        msg = 'Failed to get vulnerabilities report, {0} will not be updated'.format(machine)
-        module.log('[WARNING] ' + msg)
-        results['meta'][machine]['messages'].append(msg)
+    module.debug('*** PIPELINE ***')
+
+    def run_target(machine):
+        run_pipeline(module, machine, results['meta'][machine], flrtvc_path, flrtvc_params,
+                     force, check_only, download_only, resize_fs)
+
+    not_started, failed = run_pool(module, run_target, targets, max_workers)
+    for machine in failed:
+        results['meta'][machine]['messages'].append('Unexpected error processing {0}'.format(machine))
         results['status'][machine] = 'FAILURE'
-        targets.remove(machine)
+    results['meta']['cache'] = download_cache.stats
+
     if check_only:
         if clean and os.path.exists(workdir):
             shutil.rmtree(workdir, ignore_errors=True)
         results['msg'] = 'exit on check only'
-        for machine in targets:
-            results['status'][machine] = 'SUCCESS'
         module.exit_json(**results)
 
-    # ===========================================
-    # Parse flrtvc report
-    # ===========================================
-    module.debug('*** PARSE ***')
-    for machine in targets:
-        run_parser(module, machine, results['meta'][machine], results['meta'][machine]['0.report'])
-    wait_all()
-
-    # ===========================================
-    # Download and check efixes
-    # ===========================================
-    module.debug('*** DOWNLOAD ***')
-    for machine in targets:
-        run_downloader(module, machine, results['meta'][machine], results['meta'][machine]['1.parse'], resize_fs)
-        if '4.2.check' not in results['meta'][machine]:
-            msg = 'Error downloading some fixes, {0} will not be updated'.format(machine)
-            results['meta'][machine]['messages'].append(msg)
-            results['status'][machine] = 'FAILURE'
-    wait_all()
-
     if download_only:
         if clean and os.path.exists(workdir):
             shutil.rmtree(workdir, ignore_errors=True)
         results['msg'] = 'exit on download only'
         module.exit_json(**results)
 
-    # ===========================================
-    # Install efixes
-    # ===========================================
-    module.debug('*** UPDATE ***')
-    for machine in targets:
-        if '4.2.check' in results['meta'][machine]:
-            run_installer(module, machine, results['meta'][machine], results['meta'][machine]['4.2.check'], resize_fs)
-    wait_all()
-
     if clean and os.path.exists(workdir):
         shutil.rmtree(workdir, ignore_errors=True)
 
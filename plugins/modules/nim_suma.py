@@ -89,6 +89,9 @@ options:
     - Can be used if I(action=download) or I(action=preview) when I(oslevel) is not exact, for example I(oslevel=Latest).
     type: path
     default: /var/adm/ansible/metadata
+notes:
+  - The oslevel of the NIM clients is collected in parallel within a 5 minutes time limit. It is cached
+    for 10 minutes in /var/adm/ansible/cache/nim_oslevel.json, as long as the NIM state of the client is unchanged.
 '''
 
 EXAMPLES = r'''
@@ -142,9 +145,15 @@ import os
 import re
 import glob
 import shutil
-import threading
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_inventory import (
+    get_nim_inventory)
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_targets import (
+    NimTargets)
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_oslevel import (
+    get_oslevels as collect_oslevels, nim_state, OslevelCache, TIMEDOUT)
 
 results = None
 
@@ -185,43 +194,6 @@ def max_oslevel(dic):
     return oslevel_max
 
 
-def run_oslevel_cmd(module, machine, oslevels):
-    """
-    Run the oslevel command on target machine.
-
-    Stores the output in the dedicated slot of the oslevels dictionary.
-
-    arguments:
-        module      (dict): The Ansible module
-        machine      (str): The name machine
-        oslevels    (dict): The results of the command
-    """
-    oslevels[machine] = 'timedout'
-
-    if machine == 'master':
-        cmd = ['/usr/bin/oslevel', '-s']
-    else:
-        cmd = ['/usr/lpp/bos.sysmgt/nim/methods/c_rsh',
-               machine,
-               '"/usr/bin/oslevel -s; echo rc=$?"']
-
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc == 0:
-        module.debug('{0} oslevel stdout: "{1}"'.format(machine, stdout))
-        if stderr.rstrip():
-            module.log('[WARNING] "{0}" command stderr: {1}'.format(' '.join(cmd), stderr))
-
-        # remove the rc of c_rsh with echo $?
-        if machine != 'master':
-            stdout = re.sub(r'rc=[-\d]+\n$', '', stdout)
-
-        # return stdout only ... stripped!
-        oslevels[machine] = stdout.rstrip()
-    else:
-        msg = 'Command: \'{0}\' failed with return code {1}.'.format(' '.join(cmd), rc)
-        module.log('Failed to get oslevel for {0}: {1}'.format(machine, msg))
-
-
 def expand_targets(module, targets, nim_clients):
     """
     Expand the list of target patterns.
@@ -231,10 +203,13 @@ def expand_targets(module, targets, nim_clients):
                           with 'target'
         target[n1:n2] where n1 and n2 are numeric: target<n1> to target<n2>
         * or ALL      all the NIM client machines
+        group_name    the NIM clients of the machine group 'group_name'
         client_name   the NIM client named 'client_name'
         master        the NIM master
+        !pattern      excludes the machines matching pattern
 
-        example:  target[1:5] target12 other_target*
+        example:  target[1:5] target12 other_target* !target3
+    See NimTargets for the details.
 
     arguments:
         module      (dict): The Ansible module
@@ -243,45 +218,24 @@ def expand_targets(module, targets, nim_clients):
 
     return: clients: the list of the existing machines matching the target list
     """
-    clients = []
-    if len(targets) == 0:
-        return clients
-
-    for target in targets:
-
-        # Build target(s) from: range i.e. quimby[7:12]
-        rmatch = re.match(r"(\w+)\[(\d+):(\d+)\]", target)
-        if rmatch:
-            name = rmatch.group(1)
-            start = rmatch.group(2)
-            end = rmatch.group(3)
-
-            for i in range(int(start), int(end) + 1):
-                curr_name = name + str(i)
-                if curr_name in nim_clients:
-                    clients.append(curr_name)
-            continue
-
-        # Build target(s) from: val*. i.e. quimby*
-        rmatch = re.match(r"(\w+)\*$", target)
-        if rmatch:
-            name = rmatch.group(1)
-
-            for curr_name in nim_clients:
-                if re.match(r"^%s\.*" % name, curr_name):
-                    clients.append(curr_name)
-            continue
+    global results
 
-        # Build target(s) from: all or *
-        if target.upper() == 'ALL' or target == '*':
-            clients = nim_clients
-            continue
+    if len(targets) == 0:
+        return []
+
+    try:
+        groups = get_nim_inventory(module).by_type('mac_group')
+    except CommandError as exc:
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
+        results['msg'] = str(exc)
+        module.fail_json(**results)
 
-        # Build target(s) from full name: quimby05
-        if (target in nim_clients) or (target == 'master'):
-            clients.append(target)
+    clients = {}
+    for name in nim_clients:
+        clients.setdefault('master' if name == 'master' else 'standalone', []).append(name)
 
-    return list(set(clients))
+    return NimTargets(clients, groups=groups).expand(targets)
 
 
 def get_nim_clients(module):
@@ -297,19 +251,14 @@ def get_nim_clients(module):
     """
     global results
 
-    clients_list = []
-
-    cmd = ['lsnim', '-t', 'standalone']
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
-        results['stdout'] = stdout
-        results['stderr'] = stderr
-        results['msg'] = 'Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), rc)
+    try:
+        clients_list = get_nim_inventory(module).names('standalone')
+    except CommandError as exc:
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
+        results['msg'] = str(exc)
         module.fail_json(**results)
 
-    for line in stdout.rstrip().splitlines():
-        clients_list.append(line.strip().split()[0])
-
     return clients_list
 
 
@@ -317,27 +266,27 @@ def get_oslevels(module, targets):
     """
     Get the oslevel of the specified targets.
 
+    The oslevels are collected in parallel within a single time limit,
+    cached oslevels are used for the targets whose NIM state is unchanged.
+
     arguments:
         module  (dict): The Ansible module
     return a dictionary of the oslevels
     """
+    global results
 
-    # Launch threads to collect information on targets
-    threads = []
-    oslevels = {}
-
+    states = {}
+    try:
+        inventory = get_nim_inventory(module)
+    except CommandError as exc:
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
+        results['msg'] = str(exc)
+        module.fail_json(**results)
     for machine in targets:
-        process = threading.Thread(target=run_oslevel_cmd,
-                                   args=(module, machine, oslevels))
-        process.start()
-        threads.append(process)
-
-    for process in threads:
-        process.join(300)  # wait 5 min for c_rsh to timeout
-        if process.is_alive():
-            module.log('[WARNING] {0} Not responding'.format(process))
+        states[machine] = nim_state(inventory.get(machine))
 
-    return oslevels
+    return collect_oslevels(module, targets, states=states, cache=OslevelCache(module))
 
 
 def get_nim_lpp_source(module):
@@ -357,26 +306,19 @@ def get_nim_lpp_source(module):
 
     lpp_source_list = {}
 
-    cmd = ['lsnim', '-t', 'lpp_source', '-l']
-
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
-        msg = "Cannot get the list of lpp source, command '{0}' failed with return code {1}".format(cmd, rc)
+    try:
+        lpp_sources = get_nim_inventory(module).by_type('lpp_source')
+    except CommandError as exc:
+        msg = "Cannot get the list of lpp source, command '{0}' failed with return code {1}".format(exc.cmd, exc.rc)
         module.log(msg)
         results['msg'] = msg
-        results['stdout'] = stdout
-        results['stderr'] = stderr
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
         module.fail_json(**results)
 
-    for line in stdout.rstrip().split('\n'):
-        match_key = re.match(r"^(\S+):", line)
-        if match_key:
-            obj_key = match_key.group(1)
-        else:
-            match_loc = re.match(r"^\s+location\s+=\s+(\S+)$", line)
-            if match_loc:
-                loc = match_loc.group(1)
-                lpp_source_list[obj_key] = loc
+    for obj_key, attrs in lpp_sources.items():
+        if 'location' in attrs:
+            lpp_source_list[obj_key] = attrs['location']
 
     return lpp_source_list
 
@@ -776,7 +718,7 @@ def suma_download(module, suma_params):
 
     # Delete clients with no oslevel value
     removed_oslevel = []
-    for key in [k for (k, v) in clients_oslevel.items() if not v]:
+    for key in [k for (k, v) in clients_oslevel.items() if not v or v == TIMEDOUT]:
         removed_oslevel.append(key)
         del clients_oslevel[key]
 
@@ -74,9 +74,9 @@ options:
     default: True
   time_limit:
     description:
-    - Before starting the action on a VIOS tuple, the actual date is compared to this parameter value; if it is greater then the task is stopped.
+    - Before starting the action on a VIOS tuple, the actual date is compared to this parameter value; if it is greater then the tuple is skipped.
     - The format is C(mm/dd/yyyy hh:mm).
-    - The resulting status for tuples in this case will be I(SKIPPED-TIMEOUT).
+    - The resulting status for the tuples not started in time will be I(SKIPPED-TIMEOUT).
     type: str
   vios_status:
     description:
@@ -88,7 +88,17 @@ options:
     description:
     - Allows to pass along NIM node info from a task to another so that it
       discovers NIM info only one time for all tasks.
+    - It is used as is if its C(version) is supported and the NIM database has not been modified since its C(timestamp),
+      otherwise it is refreshed.
     type: dict
+  parallel:
+    description:
+    - Maximum number of VIOS tuples updated at the same time.
+    - Tuples sharing a CEC are never updated at the same time, and the VIOSes of a tuple are always updated one after the other.
+    - If I(manage_cluster=yes), tuples of the same Shared Storage Pool cluster are never updated at the same time,
+      and a tuple whose cluster cannot be found is not updated, its status is I(FAILURE-CLUSTER).
+    type: int
+    default: 1
 '''
 
 EXAMPLES = r'''
@@ -167,12 +177,22 @@ nim_node:
     returned: always
     type: dict
     contains:
+        version:
+            description: Schema version of the NIM node info.
+            returned: always
+            type: int
+        timestamp:
+            description: Time the NIM objects were listed, in seconds since the Epoch.
+            returned: always
+            type: float
         vios:
             description: List of VIOS NIM resources.
             returned: always
             type: dict
     sample:
         "nim_node": {
+            "version": 1,
+            "timestamp": 1602155234.52,
             "vios": {
                 "vios1": {
                     "Cstate": "ready for a NIM operation",
@@ -207,6 +227,15 @@ nim_node:
                 }
             }
         }
+nim_node_source:
+    description:
+    - How the NIM node info has been built.
+    - C(supplied) if the I(nim_node) option has been used as is.
+    - C(completed) if the NIM types missing from the I(nim_node) option have been added.
+    - C(refreshed) if it has been built from the NIM database.
+    returned: always
+    type: str
+    sample: supplied
 meta:
     description: Detailed information on the module execution.
     returned: always
@@ -228,6 +257,11 @@ meta:
                     returned: always
                     type: list
                     elements: str
+                timing:
+                    description: Start and end dates and duration in seconds of the tuple update.
+                    returned: when the tuple has been processed.
+                    type: dict
+                    sample: {"start": "2020-07-21 17:02:10", "end": "2020-07-21 17:25:41", "duration": 1411.2}
                 <vios>:
                     description: updateios information for a specific vios.
                     returned: when target is actually a NIM client.
@@ -251,6 +285,10 @@ import re
 import time
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_inventory import (
+    get_nim_node)
+from ansible_collections.ibm.power_aix.plugins.module_utils.pool import run_pool
 
 module = None
 results = None
@@ -321,6 +359,7 @@ def nim_exec(module, node, command):
 def refresh_nim_node(module, type):
     """
     Get nim client information of provided type and update nim_node dictionary.
+    The nim_node passed as option is used if it is up to date.
 
     arguments:
         module  (dict): The Ansible module
@@ -332,76 +371,17 @@ def refresh_nim_node(module, type):
     """
     global results
 
-    if module.params['nim_node']:
-        results['nim_node'] = module.params['nim_node']
-
-    nim_info = get_nim_type_info(module, type)
-
-    if type not in results['nim_node']:
-        results['nim_node'].update({type: nim_info})
-    else:
-        for elem in nim_info.keys():
-            if elem in results['nim_node']:
-                results['nim_node'][type][elem].update(nim_info[elem])
-            else:
-                results['nim_node'][type][elem] = nim_info[elem]
-    module.debug("results['nim_node'][{0}]: {1}".format(type, results['nim_node'][type]))
-
-
-def get_nim_type_info(module, type):
-    """
-    Build the hash of nim client of type=lpar_type defined on the
-    nim master and their associated key = value information.
-
-    arguments:
-        module  (dict): The Ansible module
-        type     (str): type of the nim object to get information
-    note:
-        Exits with fail_json in case of error
-    return:
-        info_hash   (dict): information from the nim clients
-    """
-    global results
-
-    cmd = ['lsnim', '-t', type, '-l']
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
-        msg = 'Cannot get NIM Client information. Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), rc)
+    try:
+        results['nim_node'], results['nim_node_source'] = \
+            get_nim_node(module, [type], module.params['nim_node'])
+    except CommandError as exc:
+        msg = 'Cannot get NIM Client information. {0}'.format(exc)
         module.log(msg)
         results['msg'] = msg
-        results['stdout'] = stdout
-        results['stderr'] = stderr
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
         module.fail_json(**results)
-
-    info_hash = build_dict(module, stdout)
-
-    return info_hash
-
-
-def build_dict(module, stdout):
-    """
-    Build dictionary with the stdout info
-
-    arguments:
-        module  (dict): The Ansible module
-        stdout   (str): stdout of the command to parse
-    returns:
-        info    (dict): NIM info dictionary
-    """
-    info = {}
-
-    for line in stdout.rstrip().splitlines():
-        line = line.rstrip()
-        match_key = re.match(r"^(\S+):", line)
-        if match_key:
-            obj_key = match_key.group(1)
-            info[obj_key] = {}
-            continue
-        rmatch_attr = re.match(r"^\s+(\S+)\s+=\s+(.*)$", line)
-        if rmatch_attr:
-            info[obj_key][rmatch_attr.group(1)] = rmatch_attr.group(2)
-            continue
-    return info
+    module.debug("results['nim_node'][{0}]: {1}".format(type, results['nim_node'][type]))
 
 
 def check_lpp_source(module, lpp_source):
@@ -554,6 +534,67 @@ def tuple_str(tuple_list):
     return tuple_str
 
 
+def get_vios_cluster(module, vios):
+    """
+    Get the cluster status of a VIOS in results['nim_node']['vios'][vios]['cluster'].
+
+    arguments:
+        module          (dict): The Ansible module
+        vios             (str): The VIOS NIM name
+    return:
+        None if the cluster status is known, even if there is no cluster,
+        (msg, stdout, stderr) of the failing command otherwise
+    """
+    global results
+
+    results['nim_node']['vios'][vios]['cluster'] = {}
+
+    cmd = ['/usr/ios/cli/ioscli cluster -list && /usr/ios/cli/ioscli cluster -status -fmt :']
+    rc, stdout, stderr = nim_exec(module, results['nim_node']['vios'][vios]['hostname'], cmd)
+    if rc != 0:
+        # Check a cluster is configured
+        stdout = stdout.rstrip()
+        if stdout.find('Cluster does not exist') != -1:
+            msg = 'There is no cluster on vios {0}'.format(vios)
+            module.log(msg)
+            return None
+        # the command failed and stdout contains command's stderr
+        msg = 'Cannot get cluster status on {0}: command \'{1}\', rc:{2}, stderr:{3}'.format(vios, ' '.join(cmd), rc, stdout)
+        module.log('[WARNING] ' + msg)
+        return msg, stdout, stderr
+
+    # stdout is like:
+    # CLUSTER_NAME:    porthos_cl1
+    # CLUSTER_ID:      adf01bd81de611ea8012be6aa4a49d02
+    #
+    # porthos_cl1:OK:porthos-vios1:8286-42A02103341V:2:OK:OK
+    # porthos_cl1:OK:porthos-vios2:8286-42A02103341V:3:OK:OK
+    #
+    # with the following:
+    # Cluster Name:Cluster State:Node Name:Node MTM:Node Partition Num:Node State:Node Repos State
+    # Let's remove the first 3 lines
+    lines = stdout.rstrip().splitlines()[3:]
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        fields = line.split(':')
+        if len(fields) != 7:
+            msg = 'Expecting 7 fields for cluster status, got {0}.'.format(len(line))
+            module.log('[WARNING] ' + msg)
+            results['meta']['messages'].append(msg)
+            continue
+        if 'name' not in results['nim_node']['vios'][vios]['cluster']:
+            results['nim_node']['vios'][vios]['cluster']['name'] = fields[0]
+            results['nim_node']['vios'][vios]['cluster']['state'] = fields[1]
+            results['nim_node']['vios'][vios]['cluster']['nodes'] = []
+        results['nim_node']['vios'][vios]['cluster']['nodes'].append(fields[2])
+        results['nim_node']['vios'][vios]['cluster'][fields[2]] = {}
+        results['nim_node']['vios'][vios]['cluster'][fields[2]]['state'] = fields[5]
+        results['nim_node']['vios'][vios]['cluster'][fields[2]]['repos_state'] = fields[6]
+    return None
+
+
 def check_vios_cluster_status(module, target_tuple):
     """
     Check the cluster status of the VIOS tuple.
@@ -573,58 +614,16 @@ def check_vios_cluster_status(module, target_tuple):
     vios_key = tuple_str(target_tuple)
     tuple_len = len(target_tuple)
 
-    for vios in target_tuple:
-        results['nim_node']['vios'][vios]['cluster'] = {}
-
     # get the cluster status
     for vios in target_tuple:
-        cmd = ['/usr/ios/cli/ioscli cluster -list && /usr/ios/cli/ioscli cluster -status -fmt :']
-        rc, stdout, stderr = nim_exec(module, results['nim_node']['vios'][vios]['hostname'], cmd)
-        if rc != 0:
-            # Check a cluster is configured
-            stdout = stdout.rstrip()
-            if stdout.find('Cluster does not exist') != -1:
-                msg = 'There is no cluster on vios {0}'.format(vios)
-                module.log(msg)
-                continue
-            # the command failed and stdout contains command's stderr
-            msg = 'Cannot get cluster status on {0}: command \'{1}\', rc:{2}, stderr:{3}'.format(vios, ' '.join(cmd), rc, stdout)
-            module.log('[WARNING] ' + msg)
+        error = get_vios_cluster(module, vios)
+        if error is not None:
+            msg, stdout, stderr = error
             results['meta']['messages'].append(msg)
             results['meta'][vios_key][vios]['stdout'] = stdout
             results['meta'][vios_key][vios]['stderr'] = stderr
             return False
 
-        # stdout is like:
-        # CLUSTER_NAME:    porthos_cl1
-        # CLUSTER_ID:      adf01bd81de611ea8012be6aa4a49d02
-        #
-        # porthos_cl1:OK:porthos-vios1:8286-42A02103341V:2:OK:OK
-        # porthos_cl1:OK:porthos-vios2:8286-42A02103341V:3:OK:OK
-        #
-        # with the following:
-        # Cluster Name:Cluster State:Node Name:Node MTM:Node Partition Num:Node State:Node Repos State
-        # Let's remove the first 3 lines
-        lines = stdout.rstrip().splitlines()[3:]
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            fields = line.split(':')
-            if len(fields) != 7:
-                msg = 'Expecting 7 fields for cluster status, got {0}.'.format(len(line))
-                module.log('[WARNING] ' + msg)
-                results['meta']['messages'].append(msg)
-                continue
-            if 'name' not in results['nim_node']['vios'][vios]['cluster']:
-                results['nim_node']['vios'][vios]['cluster']['name'] = fields[0]
-                results['nim_node']['vios'][vios]['cluster']['state'] = fields[1]
-                results['nim_node']['vios'][vios]['cluster']['nodes'] = []
-            results['nim_node']['vios'][vios]['cluster']['nodes'].append(fields[2])
-            results['nim_node']['vios'][vios]['cluster'][fields[2]] = {}
-            results['nim_node']['vios'][vios]['cluster'][fields[2]]['state'] = fields[5]
-            results['nim_node']['vios'][vios]['cluster'][fields[2]]['repos_state'] = fields[6]
-
     # TODO Improvement: cluster_name is a short hostname. But hostname here after is from 'if1' definition and can
     # be an IP address. Moreover tuple is NIM client name can differ from hostname. We could get the actual hostname.
 
@@ -765,10 +764,142 @@ def get_updateios_cmd(module):
     return cmd
 
 
+def tuple_domains(target_tuple):
+    """
+    Return the resources a tuple update must not share with another one:
+    its VIOSes, the CECs they are running on and their Shared Storage Pool
+    cluster, so that a single node of a cluster is stopped at a time.
+
+    arguments:
+        target_tuple    (list): Target tuple of VIOS
+    return:
+        set of the VIOS, CEC and cluster names
+    """
+    global results
+
+    domains = set()
+    for vios in target_tuple:
+        domains.add(vios)
+        vios_info = results['nim_node']['vios'].get(vios, {})
+        # mgmt_profile1 = "<hmc> <lpar id> <cec>"
+        mgmt_elts = vios_info.get('mgmt_profile1', '').split()
+        if len(mgmt_elts) >= 3:
+            domains.add('cec:' + mgmt_elts[2])
+        # set by get_vios_cluster
+        cluster = vios_info.get('cluster') or {}
+        if cluster.get('name'):
+            domains.add('cluster:' + cluster['name'])
+    return domains
+
+
+class TupleDomains(object):
+    """
+    Domains of the tuples being updated, see tuple_domains. Its can_start
+    and release methods are the run_pool hooks holding back the tuples
+    sharing a domain with a tuple being updated.
+    """
+
+    def __init__(self):
+        self.busy = set()
+        self.reserved = {}
+
+    def can_start(self, target_tuple):
+        """
+        Reserve the VIOSes, CECs and clusters of the tuple if none of them
+        is used by the tuples being updated
+        """
+        domains = tuple_domains(target_tuple)
+        if domains & self.busy:
+            return False
+        self.busy.update(domains)
+        self.reserved[tuple_str(target_tuple)] = domains
+        return True
+
+    def release(self, target_tuple):
+        """
+        Release the VIOSes, CECs and clusters reserved for the tuple, even
+        if its cluster has been refreshed during the update
+        """
+        self.busy.difference_update(self.reserved.pop(tuple_str(target_tuple)))
+
+
 def nim_updateios(module, targets_list, vios_status, time_limit):
     """
-    Execute the updateios command
-    For each VIOS tuple,
+    Execute the updateios command on the VIOS tuples.
+
+    Tuples running on different CECs and in different clusters are updated
+    in parallel, up to the parallel parameter. The VIOSes of a tuple are still updated one after
+    the other so both are never down together.
+
+    arguments:
+        module          (dict): The Ansible module
+        targets_list    (list): Target tuple list of VIOS
+        vios_status     (dict): provided previous status for each tuple
+        time_limit       (str): Date and time to perform tuple update
+    note:
+        Set the update status in results['status'][vios_key] and the
+        tuple timing in results['meta'][vios_key]['timing'].
+    return:
+        none
+    """
+    global results
+
+    # build the updateios command from the playbook parameters
+    updateios_cmd = get_updateios_cmd(module)
+
+    if module.params['parallel'] > 1 and module.params['action'] in ['install', 'cleanup'] \
+       and module.params['manage_cluster']:
+        # the cluster of each VIOS is needed to schedule the tuples, it is
+        # checked again when the update of its tuple starts
+        scheduled = []
+        for target_tuple in targets_list:
+            for vios in target_tuple:
+                error = get_vios_cluster(module, vios)
+                if error is not None:
+                    # without its cluster, the tuple could be updated with
+                    # another node of the same cluster
+                    vios_key = tuple_str(target_tuple)
+                    msg = '{0} VIOSes skipped (cannot get the cluster of {1})'.format(vios_key, vios)
+                    module.log('[WARNING] ' + msg)
+                    results['meta'][vios_key]['messages'].append(msg)
+                    results['meta'][vios_key]['messages'].append(error[0])
+                    results['status'][vios_key] = 'FAILURE-CLUSTER'
+                    break
+            else:
+                scheduled.append(target_tuple)
+        targets_list = scheduled
+
+    domains = TupleDomains()
+
+    def update_tuple(target_tuple):
+        """
+        Update a VIOS tuple and record its timing
+        """
+        vios_key = tuple_str(target_tuple)
+        start = time.time()
+        try:
+            nim_updateios_tuple(module, target_tuple, vios_status, time_limit, updateios_cmd)
+        finally:
+            end = time.time()
+            results['meta'][vios_key]['timing'] = {
+                'start': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start)),
+                'end': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(end)),
+                'duration': round(end - start, 1),
+            }
+
+    not_started, failed = run_pool(module, update_tuple, targets_list, module.params['parallel'],
+                                   can_start=domains.can_start, release=domains.release)
+    for target_tuple in not_started + failed:
+        vios_key = tuple_str(target_tuple)
+        msg = 'Unexpected error updating {0}'.format(vios_key)
+        results['meta'][vios_key]['messages'].append(msg)
+        if 'FAILURE' not in results['status'][vios_key]:
+            results['status'][vios_key] = 'FAILURE-UPDT1'
+
+
+def nim_updateios_tuple(module, target_tuple, vios_status, time_limit, updateios_cmd):
+    """
+    Execute the updateios command on a VIOS tuple
     - retrieve the previous status if any (looking for SUCCESS-HC and SUCCESS-UPDT)
     - for each VIOS of the tuple, check the cluster name and node status
     - stop the cluster if necessary
@@ -778,9 +909,10 @@ def nim_updateios(module, targets_list, vios_status, time_limit):
 
     arguments:
         module          (dict): The Ansible module
-        targets_list    (list): Target tuple list of VIOS
+        target_tuple    (list): Target tuple of VIOS
         vios_status     (dict): provided previous status for each tuple
         time_limit       (str): Date and time to perform tuple update
+        updateios_cmd   (list): The updateios command without the target
     note:
         Set the update status in results['status'][vios_key].
     return:
@@ -788,114 +920,108 @@ def nim_updateios(module, targets_list, vios_status, time_limit):
     """
     global results
 
-    # build the updateios command from the playbook parameters
-    updateios_cmd = get_updateios_cmd(module)
+    module.debug('Processing target_tuple: {0}'.format(target_tuple))
 
-    got_cluster_status = False
-    for target_tuple in targets_list:
-        module.debug('Processing target_tuple: {0}'.format(target_tuple))
-
-        tuple_len = len(target_tuple)
-        vios_key = tuple_str(target_tuple)
+    tuple_len = len(target_tuple)
+    vios_key = tuple_str(target_tuple)
 
-        # if previous status (health check) is known, check the vios tuple has passed
-        if vios_status is not None:
-            if vios_key not in vios_status:
-                msg = '{0} VIOSes skipped (no previous status found)'.format(vios_key)
-                module.log('[WARNING] ' + msg)
-                results['meta'][vios_key]['messages'].append(msg)
-                results['status'][vios_key] = "SKIPPED-NO-PREV-STATUS"
-                continue
+    # if previous status (health check) is known, check the vios tuple has passed
+    if vios_status is not None:
+        if vios_key not in vios_status:
+            msg = '{0} VIOSes skipped (no previous status found)'.format(vios_key)
+            module.log('[WARNING] ' + msg)
+            results['meta'][vios_key]['messages'].append(msg)
+            results['status'][vios_key] = "SKIPPED-NO-PREV-STATUS"
+            return
 
-            if 'SUCCESS' not in vios_status[vios_key]:
-                msg = '{0} tuple skipped (vios_status: {1})'.format(vios_key, vios_status[vios_key])
-                module.log('[WARNING] ' + msg)
-                results['status'][vios_key] = vios_status[vios_key]
-                results['meta'][vios_key]['messages'].append(msg)
-                results['status'][vios_key] = vios_status[vios_key]
-                continue
+        if 'SUCCESS' not in vios_status[vios_key]:
+            msg = '{0} tuple skipped (vios_status: {1})'.format(vios_key, vios_status[vios_key])
+            module.log('[WARNING] ' + msg)
+            results['status'][vios_key] = vios_status[vios_key]
+            results['meta'][vios_key]['messages'].append(msg)
+            results['status'][vios_key] = vios_status[vios_key]
+            return
 
-        # check if there is time to handle this tuple
-        if time_limit is not None and time.localtime(time.time()) >= time_limit:
-            time_limit_str = time.strftime("%m/%d/%Y %H:%M", time_limit)
-            msg = 'Time limit {0} reached, no further operation'.format(time_limit_str)
+    # check if there is time to handle this tuple
+    if time_limit is not None and time.localtime(time.time()) >= time_limit:
+        time_limit_str = time.strftime("%m/%d/%Y %H:%M", time_limit)
+        msg = 'Time limit {0} reached, no further operation'.format(time_limit_str)
+        module.log('[WARNING] ' + msg)
+        results['meta'][vios_key]['messages'].append(msg)
+        results['status'][vios_key] = "SKIPPED-TIMEOUT"
+        return
+
+    if module.params['action'] in ['install', 'cleanup'] and module.params['manage_cluster']:
+        # check if cluster is defined for this VIOSes tuple.
+        cluster_ok = check_vios_cluster_status(module, target_tuple)
+        if not cluster_ok:
+            msg = "{0} VIOSes skipped (bad cluster status)".format(vios_key)
             module.log('[WARNING] ' + msg)
             results['meta'][vios_key]['messages'].append(msg)
-            results['status'][vios_key] = "SKIPPED-TIMEOUT"
+            msg = 'Update operation can only be done when both VIOSes belong to the'\
+                  ' same cluster and their node state is OK, or for a single VIOS,'\
+                  ' when the cluster status is inactive.'
+            module.log(msg)
+            results['meta'][vios_key]['messages'].append(msg)
+            results['status'][vios_key] = 'FAILURE-CLUSTER'
             return
 
-        if module.params['action'] in ['install', 'cleanup'] and module.params['manage_cluster'] and not got_cluster_status:
-            # check if cluster is defined for this VIOSes tuple.
-            cluster_ok = check_vios_cluster_status(module, target_tuple)
-            if not cluster_ok:
-                msg = "{0} VIOSes skipped (bad cluster status)".format(vios_key)
-                module.log('[WARNING] ' + msg)
-                results['meta'][vios_key]['messages'].append(msg)
-                msg = 'Update operation can only be done when both VIOSes belong to the'\
-                      ' same cluster and their node state is OK, or for a single VIOS,'\
-                      ' when the cluster status is inactive.'
-                module.log(msg)
-                results['meta'][vios_key]['messages'].append(msg)
-                results['status'][vios_key] = 'FAILURE-CLUSTER'
-                continue
-            got_cluster_status = True
-
-        results['status'][vios_key] = "SUCCESS-UPDT"
-        # DEBUG-Begin : Uncomment for testing without effective update operation
-        # results['meta'][vios_key]['messages'].append('Warning: testing without effective update operation')
-        # results['meta'][vios_key]['messages'].append('NIM Command: {0} '.format(updateios_cmd))
-        # rc = 0
-        # stdout = 'NIM Command: {0} '.format(updateios_cmd)
-        # continue
-        # DEBUG-End
-
-        for vios in target_tuple:
-            module.log('Updating VIOS: {0}'.format(vios))
-
-            # set the error label to be used in sub routines
-            if vios == target_tuple[0]:
-                err_label = "FAILURE-UPDT1"
-            else:
-                err_label = "FAILURE-UPDT2"
-
-            # if needed stop the cluster for the VIOS
-            restart_needed = False
-            if tuple_len == 2 and module.params['action'] in ['install', 'cleanup'] and module.params['manage_cluster']:
-                if not cluster_stop_start(module, target_tuple, vios_key, vios, 'stop'):
-                    results['status'][vios_key] = err_label
-                    break  # cannot continue
-                restart_needed = True
-
-            # Perform the updateios operation
-            cmd = updateios_cmd + [vios]
-            rc, stdout, stderr = module.run_command(cmd)
-            results['meta'][vios_key][vios]['cmd'] = ' '.join(cmd)
-            results['meta'][vios_key][vios]['stdout'] = stdout
-            results['meta'][vios_key][vios]['stderr'] = stderr
-            skip_next_target = False
-            if rc != 0:
-                msg = 'Failed to perform {0} updateios operation on {1}, cmd:\'{2}\', rc:{3}'\
-                      .format(module.params['action'], vios, ' '.join(cmd), rc)
-                module.log(msg + ', stdout: {0}'.format(stdout) + ', stderr: {0}'.format(stderr))
-                results['meta'][vios_key]['messages'].append(msg)
+    results['status'][vios_key] = "SUCCESS-UPDT"
+    # DEBUG-Begin : Uncomment for testing without effective update operation
+    # results['meta'][vios_key]['messages'].append('Warning: testing without effective update operation')
+    # results['meta'][vios_key]['messages'].append('NIM Command: {0} '.format(updateios_cmd))
+    # rc = 0
+    # stdout = 'NIM Command: {0} '.format(updateios_cmd)
+    # return
+    # DEBUG-End
+
+    for vios in target_tuple:
+        module.log('Updating VIOS: {0}'.format(vios))
+
+        # set the error label to be used in sub routines
+        if vios == target_tuple[0]:
+            err_label = "FAILURE-UPDT1"
+        else:
+            err_label = "FAILURE-UPDT2"
+
+        # if needed stop the cluster for the VIOS
+        restart_needed = False
+        if tuple_len == 2 and module.params['action'] in ['install', 'cleanup'] and module.params['manage_cluster']:
+            if not cluster_stop_start(module, target_tuple, vios_key, vios, 'stop'):
                 results['status'][vios_key] = err_label
-                # in case of failure try to restart the cluster if needed
-                skip_next_target = True
-            else:
-                msg = 'VIOS {0} updateios {1} successfull'.format(vios, module.params['action'])
-                module.log(msg)
-                results['meta'][vios_key]['messages'].append(msg)
-                results['changed'] = True
+                break  # cannot continue
+            restart_needed = True
+
+        # Perform the updateios operation
+        cmd = updateios_cmd + [vios]
+        rc, stdout, stderr = module.run_command(cmd)
+        results['meta'][vios_key][vios]['cmd'] = ' '.join(cmd)
+        results['meta'][vios_key][vios]['stdout'] = stdout
+        results['meta'][vios_key][vios]['stderr'] = stderr
+        skip_next_target = False
+        if rc != 0:
+            msg = 'Failed to perform {0} updateios operation on {1}, cmd:\'{2}\', rc:{3}'\
+                  .format(module.params['action'], vios, ' '.join(cmd), rc)
+            module.log(msg + ', stdout: {0}'.format(stdout) + ', stderr: {0}'.format(stderr))
+            results['meta'][vios_key]['messages'].append(msg)
+            results['status'][vios_key] = err_label
+            # in case of failure try to restart the cluster if needed
+            skip_next_target = True
+        else:
+            msg = 'VIOS {0} updateios {1} successfull'.format(vios, module.params['action'])
+            module.log(msg)
+            results['meta'][vios_key]['messages'].append(msg)
+            results['changed'] = True
 
-            # if needed restart the cluster for the VIOS
-            # TODO check if updateios returns before it finishes
-            if restart_needed:
-                if not cluster_stop_start(module, target_tuple, vios_key, vios, 'start'):
-                    results['status'][vios_key] = err_label
-                    break  # cannot continue
+        # if needed restart the cluster for the VIOS
+        # TODO check if updateios returns before it finishes
+        if restart_needed:
+            if not cluster_stop_start(module, target_tuple, vios_key, vios, 'start'):
+                results['status'][vios_key] = err_label
+                break  # cannot continue
 
-            if skip_next_target:
-                break
+        if skip_next_target:
+            break
 
 
 def main():
@@ -914,7 +1040,8 @@ def main():
             preview=dict(type='bool', default=True),
             time_limit=dict(type='str'),
             vios_status=dict(type='dict'),
-            nim_node=dict(type='dict')
+            nim_node=dict(type='dict'),
+            parallel=dict(type='int', default=1),
         ),
         required_if=[
             ['action', 'install', ['lpp_source']],
@@ -943,6 +1070,7 @@ def main():
         #   }
         # }
         nim_node={},
+        nim_node_source='',
         status={},
     )
 
@@ -975,6 +1103,10 @@ def main():
             results['msg'] = 'Malformed time limit "{0}", please use mm/dd/yyyy hh:mm format.'.format(module.params['time_limit'])
             module.fail_json(**results)
 
+    if module.params['parallel'] < 1:
+        results['msg'] = 'Invalid parallel value {0}, must be at least 1.'.format(module.params['parallel'])
+        module.fail_json(**results)
+
     module.debug('*** START UPDATEIOS OPERATION ***')
 
     # build_nim_node
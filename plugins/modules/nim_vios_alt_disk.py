@@ -57,6 +57,8 @@ options:
     description:
     - Allows to pass along NIM node info from a task to another so that it
       discovers NIM info only one time for all tasks.
+    - It is used as is if its C(version) is supported and the NIM database has not been modified since its C(timestamp),
+      otherwise it is refreshed.
     type: dict
   disk_size_policy:
     description:
@@ -74,6 +76,11 @@ options:
     - Stops any active rootvg mirroring during the alternate disk copy.
     type: bool
     default: no
+  stall_timeout:
+    description:
+    - Time in minutes after which an alternate disk copy whose NIM state shows no progress is considered blocked.
+    type: int
+    default: 30
 notes:
   - C(alt_disk_copy) only backs up mounted file systems. Mount all file
     systems that you want to back up.
@@ -110,9 +117,43 @@ msg:
     returned: always
     type: str
 nim_node:
-    description: NIM node info.
+    description: NIM node info. It can contains more information if passed as option I(nim_node).
     returned: always
     type: dict
+    contains:
+        version:
+            description: Schema version of the NIM node info.
+            returned: always
+            type: int
+        timestamp:
+            description: Time the NIM objects were listed, in seconds since the Epoch.
+            returned: always
+            type: float
+        hmc:
+            description: List of HMC NIM objects.
+            returned: always
+            type: dict
+        vios:
+            description: List of VIOS NIM resources.
+            returned: always
+            type: dict
+        nim_hmc:
+            description: HMC info used by the module, built from C(hmc).
+            returned: always
+            type: dict
+        nim_vios:
+            description: VIOS info used by the module, built from C(vios).
+            returned: always
+            type: dict
+nim_node_source:
+    description:
+    - How the NIM node info has been built.
+    - C(supplied) if the I(nim_node) option has been used as is.
+    - C(completed) if the NIM types missing from the I(nim_node) option have been added.
+    - C(refreshed) if it has been built from the NIM database.
+    returned: always
+    type: str
+    sample: supplied
 status:
     description: Status for each VIOS tuples (dictionary key).
     returned: always
@@ -121,13 +162,19 @@ status:
 
 import re
 import time
-import string
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_inventory import (
+    get_nim_node)
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_watcher import get_nim_watcher
+from ansible_collections.ibm.power_aix.plugins.module_utils.disk_inventory import (
+    DiskInventory, vios_disk_collector)
 
 OUTPUT = []
 PARAMS = {}
 NIM_NODE = {}
+DISKS = None
 
 
 def nim_exec(module, node, command):
@@ -166,46 +213,20 @@ def get_hmc_info(module):
 
     return a dictionary with hmc info
     """
-    info_hash = {}
-
-    cmd = ['lsnim', '-t', 'hmc', '-l']
-    ret, stdout, stderr = module.run_command(cmd)
-    if ret != 0:
-        msg = 'Failed to get HMC NIM info, lsnim returned {0}: {1}'.format(ret, stderr)
-        module.log(msg)
-        OUTPUT.append(msg)
-        return info_hash
-
-    obj_key = ''
-    for line in stdout.split('\n'):
-        line = line.rstrip()
-        match_key = re.match(r"^(\S+):", line)
-        # HMC name
-        if match_key:
-            obj_key = match_key.group(1)
-            info_hash[obj_key] = {}
-            continue
-
-        match_cstate = re.match(r"^\s+Cstate\s+=\s+(.*)$", line)
-        if match_cstate:
-            cstate = match_cstate.group(1)
-            info_hash[obj_key]['cstate'] = cstate
-            continue
-
-        match_key = re.match(r"^\s+passwd_file\s+=\s+(.*)$", line)
-        if match_key:
-            info_hash[obj_key]['passwd_file'] = match_key.group(1)
-            continue
+    global NIM_NODE
 
-        match_key = re.match(r"^\s+login\s+=\s+(.*)$", line)
-        if match_key:
-            info_hash[obj_key]['login'] = match_key.group(1)
-            continue
+    info_hash = {}
 
-        match_key = re.match(r"^\s+if1\s*=\s*\S+\s*(\S*)\s*.*$", line)
-        if match_key:
-            info_hash[obj_key]['ip'] = match_key.group(1)
-            continue
+    # HMC name
+    for obj_key, attrs in NIM_NODE['hmc'].items():
+        info_hash[obj_key] = {}
+        for attr, key in (('Cstate', 'cstate'), ('passwd_file', 'passwd_file'), ('login', 'login')):
+            if attr in attrs:
+                info_hash[obj_key][key] = attrs[attr]
+        if 'if1' in attrs:
+            match_key = re.match(r"^\S+\s*(\S*)\s*.*$", attrs['if1'])
+            if match_key:
+                info_hash[obj_key]['ip'] = match_key.group(1)
 
     return info_hash
 
@@ -218,42 +239,25 @@ def get_nim_clients_info(module, lpar_type):
     return a dictionary of the lpar objects defined on the
            nim master and their associated cstate value
     """
-    info_hash = {}
+    global NIM_NODE
 
-    cmd = ['lsnim', '-t', lpar_type, '-l']
-    ret, stdout, stderr = module.run_command(cmd)
-    if ret != 0:
-        msg = 'Failed to get NIM clients info, lsnim returned: {0}'.format(stderr)
-        module.log(msg)
-        OUTPUT.append(msg)
-        return info_hash
+    info_hash = {}
 
     # lpar name and associated Cstate
-    obj_key = ""
-    for line in stdout.split('\n'):
-        line = line.rstrip()
-        match_key = re.match(r"^(\S+):", line)
-        if match_key:
-            obj_key = match_key.group(1)
-            info_hash[obj_key] = {}
-            continue
-
-        match_cstate = re.match(r"^\s+Cstate\s+=\s+(.*)$", line)
-        if match_cstate:
-            info_hash[obj_key]['cstate'] = match_cstate.group(1)
-            continue
+    for obj_key, attrs in NIM_NODE[lpar_type].items():
+        info_hash[obj_key] = {}
+        if 'Cstate' in attrs:
+            info_hash[obj_key]['cstate'] = attrs['Cstate']
 
         # For VIOS store the management profile
         if lpar_type == 'vios':
-            match_mgmtprof = re.match(r"^\s+mgmt_profile1\s+=\s+(.*)$", line)
-            if match_mgmtprof:
-                mgmt_elts = match_mgmtprof.group(1).split()
-                if len(mgmt_elts) >= 3:
-                    info_hash[obj_key]['mgmt_hmc_id'] = mgmt_elts[0]
-                    info_hash[obj_key]['mgmt_vios_id'] = mgmt_elts[1]
-                    info_hash[obj_key]['mgmt_cec'] = mgmt_elts[2]
-
-            match_if = re.match(r"^\s+if1\s+=\s+\S+\s+(\S+)\s+.*$", line)
+            mgmt_elts = attrs.get('mgmt_profile1', '').split()
+            if len(mgmt_elts) >= 3:
+                info_hash[obj_key]['mgmt_hmc_id'] = mgmt_elts[0]
+                info_hash[obj_key]['mgmt_vios_id'] = mgmt_elts[1]
+                info_hash[obj_key]['mgmt_cec'] = mgmt_elts[2]
+
+            match_if = re.match(r"^\S+\s+(\S+)\s+.*$", attrs.get('if1', ''))
             if match_if:
                 info_hash[obj_key]['vios_ip'] = match_if.group(1)
 
@@ -263,9 +267,22 @@ def get_nim_clients_info(module, lpar_type):
 def build_nim_node(module):
     """
     Build the nim node containing the nim vios and hmc info.
+    The nim_node passed as option is used if it is up to date.
     """
 
     global NIM_NODE
+    global results
+
+    try:
+        NIM_NODE, results['nim_node_source'] = \
+            get_nim_node(module, ['hmc', 'vios'], module.params['nim_node'])
+    except CommandError as exc:
+        msg = 'Failed to get NIM info, lsnim returned {0}: {1}'.format(exc.rc, exc.stderr)
+        module.log(msg)
+        OUTPUT.append(msg)
+        results['output'] = OUTPUT
+        results['msg'] = msg
+        module.fail_json(**results)
 
     # =========================================================================
     # Build hmc info list
@@ -342,27 +359,15 @@ def get_pvs(module, vios):
 
     module.debug('vios: {0}'.format(vios))
 
-    cmd = ['/usr/ios/cli/ioscli', 'lspv']
-    ret, stdout, stderr = nim_exec(module, NIM_NODE['nim_vios'][vios]['vios_ip'], cmd)
-    if ret != 0:
+    try:
+        pvs = DISKS.get(NIM_NODE['nim_vios'][vios]['vios_ip'])['pvs']
+    except CommandError as exc:
         OUTPUT.append('    Failed to get the PV list on {0}, lspv returned: {1}'
-                      .format(vios, stderr))
-        module.log('Failed to get the PV list on {0}, lspv returned: {1} {2}'
-                   .format(vios, ret, stderr))
+                      .format(vios, exc.stderr))
+        module.log('Failed to get the PV list on {0}, {1} returned: {2} {3}'
+                   .format(vios, ' '.join(exc.cmd), exc.rc, exc.stderr))
         return None
 
-    # NAME             PVID                                 VG               STATUS
-    # hdisk0           000018fa3b12f5cb                     rootvg           active
-    pvs = {}
-    for line in stdout.split('\n'):
-        line = line.rstrip()
-        match_key = re.match(r"^(hdisk\S+)\s+(\S+)\s+(\S+)\s*(\S*)", line)
-        if match_key:
-            pvs[match_key.group(1)] = {}
-            pvs[match_key.group(1)]['pvid'] = match_key.group(2)
-            pvs[match_key.group(1)]['vg'] = match_key.group(3)
-            pvs[match_key.group(1)]['status'] = match_key.group(4)
-
     module.debug('List of PVs:')
     for key in pvs.keys():
         module.debug('    pvs[{0}]: {1}'.format(key, pvs[key]))
@@ -381,26 +386,15 @@ def get_free_pvs(module, vios):
 
     module.debug('vios: {0}'.format(vios))
 
-    cmd = ['/usr/ios/cli/ioscli', 'lspv', '-free']
-    ret, stdout, stderr = nim_exec(module, NIM_NODE['nim_vios'][vios]['vios_ip'], cmd)
-    if ret != 0:
+    try:
+        free_pvs = DISKS.get(NIM_NODE['nim_vios'][vios]['vios_ip'])['free_pvs']
+    except CommandError as exc:
         OUTPUT.append('    Failed to get the list of free PV on {0}: {1}'
-                      .format(vios, stderr))
-        module.log('Failed to get the list of free PVs on {0}, lspv returned: {1} {2}'
-                   .format(vios, ret, stderr))
+                      .format(vios, exc.stderr))
+        module.log('Failed to get the list of free PVs on {0}, {1} returned: {2} {3}'
+                   .format(vios, ' '.join(exc.cmd), exc.rc, exc.stderr))
         return None
 
-    # NAME            PVID                                SIZE(megabytes)
-    # hdiskX          none                                572325
-    free_pvs = {}
-    for line in stdout.split('\n'):
-        line = line.rstrip()
-        match_key = re.match(r"^(hdisk\S+)\s+(\S+)\s+(\S+)", line)
-        if match_key:
-            free_pvs[match_key.group(1)] = {}
-            free_pvs[match_key.group(1)]['pvid'] = match_key.group(2)
-            free_pvs[match_key.group(1)]['size'] = int(match_key.group(3))
-
     module.debug('List of available PVs:')
     for key in free_pvs.keys():
         module.debug('    free_pvs[{0}]: {1}'.format(key, free_pvs[key]))
@@ -461,6 +455,7 @@ def find_valid_altdisk(module, action, vios_dict, vios_key, rootvg_info, altdisk
 
             cmd = ['/usr/sbin/alt_rootvg_op', '-X', 'altinst_rootvg']
             ret, stdout, stderr = nim_exec(module, vios_ip, cmd)
+            DISKS.invalidate(vios_ip)
             if ret != 0:
                 altdisk_op_tab[vios_key] = "{0} to remove altinst_rootvg on {1}"\
                                            .format(err_label, vios)
@@ -898,69 +893,48 @@ def wait_altdisk_install(module, vios, hdisks, vios_key, altdisk_op_tab, err_lab
     """
     global OUTPUT
 
+    global PARAMS
+
     module.debug('vios: {0}, hdisks: {1}, vios_key: {2}'
                  .format(vios, hdisks, vios_key))
     module.log('Waiting completion of alt_disk copy {0} on {1}...'
                .format(hdisks, vios))
 
-    # if there is no progress in nim operation "info" attribute for more than
-    # 30 minutes we time out: 180 * 10s = 30 min
-    wait_time = 0
-    check_count = 0
-    nim_info_prev = "___"   # this info should not appear in nim info attribute
-    while check_count <= 180:
-        time.sleep(10)
-        wait_time += 10
-
-        cmd = ['lsnim', '-Z', '-a', 'Cstate', '-a', 'info', '-a', 'Cstate_result', vios]
-        ret, stdout, stderr = module.run_command(cmd)
-        if ret != 0:
-            altdisk_op_tab[vios_key] = "{0} to get the NIM state for {1}".format(err_label, vios)
-            OUTPUT.append('    Failed to get the NIM state for {0}, lsnim returned: {1}'
-                          .format(vios, stderr))
-            module.log('Failed to get the NIM state for {0}, lsnim returned: {1} {2}'
-                       .format(vios, ret, stderr))
-            break
-
-        # info attribute (that appears in 3rd possition) can be empty. So stdout looks like:
-        # #name:Cstate:info:Cstate_result:
-        # <viosName>:ready for a NIM operation:success
-        # <viosName>:alt_disk_install operation is being performed:
-        #                 Creating logical volume alt_hd2.:success:
-        # <viosName>:ready for a NIM operation:0505-126 alt_disk_install- target disk hdisk2 has
-        #                 a volume group assigned to it.:failure:
-        nim_status = stdout.split('\n')[1].rstrip().split(':')
-        nim_Cstate = nim_status[1]
-        if len(nim_status) == 4 and (string.lower(nim_status[2]) == "success"
-                                     or string.lower(nim_status[2].lower()) == "failure"):
-            nim_result = string.lower(nim_status[2])
-        else:
-            nim_info = nim_status[2]
-            nim_result = string.lower(nim_status[3])
-
-        if nim_Cstate == "ready for a NIM operation":
-            module.log('alt_disk copy operation on {0} ended with nim_result: {1}'
-                       .format(vios, nim_result))
-            if nim_result != "success":
-                altdisk_op_tab[vios_key] = "{0} to perform alt_disk copy on {1} {2}"\
-                                           .format(err_label, vios, nim_info)
-                OUTPUT.append('    Failed to perform alt_disk copy on {0}: {1}'
-                              .format(vios, nim_info))
-                module.log('Failed to perform alt_disk copy on {0}: {1}'
-                           .format(vios, nim_info))
-                return 1
-            else:
-                return 0
-        else:
-            if nim_info_prev == nim_info:
-                check_count += 1
-            else:
-                nim_info_prev = nim_info
-                check_count = 0
-
-        if wait_time % 60 == 0:
-            module.log('Waiting completion of alt_disk copy {0} on {1}... {2} minute(s)'
-                       .format(hdisks, vios, wait_time / 60))
+    def progress(state):
+        """
+        Log the progress of the alt_disk_install operation
+        """
+        module.debug('alt_disk copy {0} on {1}: {2}'
+                     .format(hdisks, vios, state.get('info', state.get('Cstate', ''))))
+
+    # if there is no progress in nim operation state for more than
+    # stall_timeout minutes we time out
+    status, state = get_nim_watcher(module).wait(
+        vios, lambda state: state.get('Cstate') == 'ready for a NIM operation',
+        PARAMS['stall_timeout'] * 60, on_progress=progress, delay=10)
+
+    if status == 'error':
+        altdisk_op_tab[vios_key] = "{0} to get the NIM state for {1}".format(err_label, vios)
+        OUTPUT.append('    Failed to get the NIM state for {0}: {1}'
+                      .format(vios, state))
+        module.log('Failed to get the NIM state for {0}: {1}'
+                   .format(vios, state))
+        return -1
+
+    nim_info = state.get('info', '') if state else ''
+    if status == 'done':
+        nim_result = state.get('Cstate_result', '').lower()
+        module.log('alt_disk copy operation on {0} ended with nim_result: {1}'
+                   .format(vios, nim_result))
+        if nim_result != "success":
+            altdisk_op_tab[vios_key] = "{0} to perform alt_disk copy on {1} {2}"\
+                                       .format(err_label, vios, nim_info)
+            OUTPUT.append('    Failed to perform alt_disk copy on {0}: {1}'
+                          .format(vios, nim_info))
+            module.log('Failed to perform alt_disk copy on {0}: {1}'
+                       .format(vios, nim_info))
+            return 1
+        return 0
 
     # timed out before the end of alt_disk_install
     altdisk_op_tab[vios_key] = "{0} alternate disk copy of {1} blocked on {2}: NIM operation blocked"\
@@ -1124,6 +1098,7 @@ def alt_disk_action(module, action, targets, vios_status, time_limit):
                        '-a', 'boot_client=no',
                        vios]
                 ret_altdc, stdout, stderr = module.run_command(cmd)
+                DISKS.invalidate(vios_ip)
                 if ret_altdc != 0:
                     altdisk_op_tab[vios_key] = "{0} to copy {1} on {2}"\
                                                .format(err_label, hdisks, vios)
@@ -1195,6 +1170,7 @@ def alt_disk_action(module, action, targets, vios_status, time_limit):
 
                 cmd = ['/usr/sbin/alt_rootvg_op', '-X', 'altinst_rootvg']
                 ret, stdout, stderr = nim_exec(module, vios_ip, cmd)
+                DISKS.invalidate(vios_ip)
                 if ret != 0:
                     altdisk_op_tab[vios_key] = "{0} to remove altinst_rootvg on {1}"\
                                                .format(err_label, vios)
@@ -1233,6 +1209,7 @@ def main():
     global OUTPUT
     global PARAMS
     global NIM_NODE
+    global DISKS
     global results
 
     module = AnsibleModule(
@@ -1248,6 +1225,7 @@ def main():
                                   choices=['minimize', 'upper', 'lower', 'nearest'],
                                   default='nearest'),
             force=dict(type='bool', default=False),
+            stall_timeout=dict(type='int', default=30),
         )
     )
 
@@ -1256,6 +1234,7 @@ def main():
         msg='',
         stdout='',
         stderr='',
+        nim_node_source='',
     )
 
     # =========================================================================
@@ -1263,11 +1242,13 @@ def main():
     # =========================================================================
     action = module.params['action']
     targets = module.params['targets']
+    DISKS = DiskInventory(module, vios_disk_collector(nim_exec))
 
     PARAMS['action'] = action
     PARAMS['targets'] = targets
     PARAMS['disk_size_policy'] = module.params['disk_size_policy']
     PARAMS['force'] = module.params['force']
+    PARAMS['stall_timeout'] = module.params['stall_timeout']
 
     OUTPUT.append('VIOS Alternate disk operation for {0}'.format(targets))
 
@@ -1277,10 +1258,7 @@ def main():
     # =========================================================================
     # Build nim node info
     # =========================================================================
-    if module.params['nim_node']:
-        NIM_NODE = module.params['nim_node']
-    else:
-        build_nim_node(module)
+    build_nim_node(module)
 
     if module.params['vios_status']:
         vios_status = module.params['vios_status']
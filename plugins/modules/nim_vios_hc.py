@@ -43,8 +43,40 @@ options:
     description:
     - Specifies additional parameters.
     type: dict
+  nim_node:
+    description:
+    - Allows to pass along NIM node info from a task to another so that it
+      discovers NIM info only one time for all tasks.
+    - It is used as is if its C(version) is supported and the NIM database has not been modified since its C(timestamp),
+      otherwise it is refreshed.
+    type: dict
+  hmc_cache:
+    description:
+    - Reuse the HMC session keys and the managed system and VIOS UUIDs saved by the previous runs.
+    - The UUIDs are saved for a day per HMC and CEC serial number in C(/var/adm/ansible/cache/hmc_uuids.json),
+      the session keys for an hour in C(/var/adm/ansible/cache/hmc_sessions.json), readable by root only.
+    - A session key rejected by the HMC is renewed, the UUIDs of a tuple failing the health check are discovered again next time.
+    type: bool
+    default: true
+  parallel:
+    description:
+    - Maximum number of VIOS tuples checked at the same time.
+    type: int
+    default: 1
+  max_per_hmc:
+    description:
+    - Maximum number of VIOS tuples checked at the same time through the same HMC.
+    - Each check opens its own connections to the HMC of the tuple.
+    type: int
+    default: 2
 notes:
   - Use the C(power_aix_vioshc) role to install the required C(vioshc.py) script on the NIM master.
+  - C(vioshc.py) is loaded in the module process so that the NIM and HMC info, credentials and session keys are
+    collected once for all the VIOS tuples. It is run as a command if it cannot be loaded, e.g. if it predates this
+    version or if C(pycurl) is not available to the Python interpreter of the module.
+  - C(vioshc.py) is not part of the collection module_utils, it is the script installed by the C(power_aix_vioshc)
+    role. The module only loads a script providing the library interface version it was written for (C(API_VERSION)
+    in the script). Update the script with the role of the same collection version as the module.
 '''
 
 EXAMPLES = r'''
@@ -67,9 +99,47 @@ targets:
     type: list
     elements: str
 nim_node:
-    description: NIM node info.
+    description: NIM node info. It can contains more information if passed as option I(nim_node).
     returned: always
     type: dict
+    contains:
+        version:
+            description: Schema version of the NIM node info.
+            returned: always
+            type: int
+        timestamp:
+            description: Time the NIM objects were listed, in seconds since the Epoch.
+            returned: always
+            type: float
+        cec:
+            description: List of CEC NIM objects.
+            returned: always
+            type: dict
+        hmc:
+            description: List of HMC NIM objects.
+            returned: always
+            type: dict
+        vios:
+            description: List of VIOS NIM resources.
+            returned: always
+            type: dict
+        nim_hmc:
+            description: HMC info used by the module, built from C(hmc).
+            returned: always
+            type: dict
+        nim_vios:
+            description: VIOS info used by the module, built from C(vios) and C(cec).
+            returned: always
+            type: dict
+nim_node_source:
+    description:
+    - How the NIM node info has been built.
+    - C(supplied) if the I(nim_node) option has been used as is.
+    - C(completed) if the NIM types missing from the I(nim_node) option have been added.
+    - C(refreshed) if it has been built from the NIM database.
+    returned: always
+    type: str
+    sample: supplied
 status:
     description: Status for each VIOS (dictionary key).
     returned: always
@@ -77,11 +147,23 @@ status:
 '''
 
 import re
+import sys
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_inventory import (
+    get_nim_node)
+from ansible_collections.ibm.power_aix.plugins.module_utils.hmc_cache import (
+    HmcUuidCache, SESSION_FILE)
+from ansible_collections.ibm.power_aix.plugins.module_utils.pool import run_pool
 
 OUTPUT = []
 NIM_NODE = {}
+UUID_CACHE = None
+VIOSHC = None
+# version of the vioshc.py library interface used by this module, must be
+# the API_VERSION of the script installed by the power_aix_vioshc role
+VIOSHC_API_VERSION = 1
 
 
 def get_hmc_info(module):
@@ -90,46 +172,20 @@ def get_hmc_info(module):
 
     return a dictionary with hmc info
     """
-    info_hash = {}
-
-    cmd = ['lsnim', '-t', 'hmc', '-l']
-    ret, stdout, stderr = module.run_command(cmd)
-    if ret != 0:
-        msg = 'Failed to get HMC NIM info, lsnim returned {0}: {1}'.format(ret, stderr)
-        module.log(msg)
-        OUTPUT.append(msg)
-        return info_hash
-
-    obj_key = ''
-    for line in stdout.split('\n'):
-        line = line.rstrip()
-        match_key = re.match(r"^(\S+):", line)
-        # HMC name
-        if match_key:
-            obj_key = match_key.group(1)
-            info_hash[obj_key] = {}
-            continue
-
-        match_cstate = re.match(r"^\s+Cstate\s+=\s+(.*)$", line)
-        if match_cstate:
-            cstate = match_cstate.group(1)
-            info_hash[obj_key]['cstate'] = cstate
-            continue
-
-        match_key = re.match(r"^\s+passwd_file\s+=\s+(.*)$", line)
-        if match_key:
-            info_hash[obj_key]['passwd_file'] = match_key.group(1)
-            continue
+    global NIM_NODE
 
-        match_key = re.match(r"^\s+login\s+=\s+(.*)$", line)
-        if match_key:
-            info_hash[obj_key]['login'] = match_key.group(1)
-            continue
+    info_hash = {}
 
-        match_key = re.match(r"^\s+if1\s*=\s*\S+\s*(\S*)\s*.*$", line)
-        if match_key:
-            info_hash[obj_key]['ip'] = match_key.group(1)
-            continue
+    # HMC name
+    for obj_key, attrs in NIM_NODE['hmc'].items():
+        info_hash[obj_key] = {}
+        for attr, key in (('Cstate', 'cstate'), ('passwd_file', 'passwd_file'), ('login', 'login')):
+            if attr in attrs:
+                info_hash[obj_key][key] = attrs[attr]
+        if 'if1' in attrs:
+            match_key = re.match(r"^\S+\s*(\S*)\s*.*$", attrs['if1'])
+            if match_key:
+                info_hash[obj_key]['ip'] = match_key.group(1)
 
     return info_hash
 
@@ -142,30 +198,15 @@ def get_nim_cecs_info(module):
     return a dictionary of the cec objects defined on the
            nim master and their associated serial number value
     """
-    info_hash = {}
+    global NIM_NODE
 
-    cmd = ['lsnim', '-t', 'cec', '-l']
-    ret, stdout, stderr = module.run_command(cmd)
-    if ret != 0:
-        msg = 'Failed to get CEC NIM info, lsnim returned {0}: {1}'.format(ret, stderr)
-        module.log(msg)
-        OUTPUT.append(msg)
-        return info_hash
+    info_hash = {}
 
     # cec name and associated serial
-    obj_key = ""
-    for line in stdout.split('\n'):
-        line = line.rstrip()
-        match_key = re.match(r"^(\S+):", line)
-        if match_key:
-            obj_key = match_key.group(1)
-            info_hash[obj_key] = {}
-            continue
-
-        match_serial = re.match(r"^\s+serial\s+=\s+(.*)$", line)
-        if match_serial:
-            info_hash[obj_key]['serial'] = match_serial.group(1)
-            continue
+    for obj_key, attrs in NIM_NODE['cec'].items():
+        info_hash[obj_key] = {}
+        if 'serial' in attrs:
+            info_hash[obj_key]['serial'] = attrs['serial']
 
     return info_hash
 
@@ -178,42 +219,25 @@ def get_nim_clients_info(module, lpar_type):
     return a dictionary of the lpar objects defined on the
            nim master and their associated cstate value
     """
-    info_hash = {}
+    global NIM_NODE
 
-    cmd = ['lsnim', '-t', lpar_type, '-l']
-    ret, stdout, stderr = module.run_command(cmd)
-    if ret != 0:
-        msg = 'Failed to get NIM clients info, lsnim returned: {0}'.format(stderr)
-        module.log(msg)
-        OUTPUT.append(msg)
-        return info_hash
+    info_hash = {}
 
     # lpar name and associated Cstate
-    obj_key = ""
-    for line in stdout.split('\n'):
-        line = line.rstrip()
-        match_key = re.match(r"^(\S+):", line)
-        if match_key:
-            obj_key = match_key.group(1)
-            info_hash[obj_key] = {}
-            continue
-
-        match_cstate = re.match(r"^\s+Cstate\s+=\s+(.*)$", line)
-        if match_cstate:
-            info_hash[obj_key]['cstate'] = match_cstate.group(1)
-            continue
+    for obj_key, attrs in NIM_NODE[lpar_type].items():
+        info_hash[obj_key] = {}
+        if 'Cstate' in attrs:
+            info_hash[obj_key]['cstate'] = attrs['Cstate']
 
         # For VIOS store the management profile
         if lpar_type == 'vios':
-            match_mgmtprof = re.match(r"^\s+mgmt_profile1\s+=\s+(.*)$", line)
-            if match_mgmtprof:
-                mgmt_elts = match_mgmtprof.group(1).split()
-                if len(mgmt_elts) >= 3:
-                    info_hash[obj_key]['mgmt_hmc_id'] = mgmt_elts[0]
-                    info_hash[obj_key]['mgmt_vios_id'] = mgmt_elts[1]
-                    info_hash[obj_key]['mgmt_cec'] = mgmt_elts[2]
-
-            match_if = re.match(r"^\s+if1\s+=\s+\S+\s+(\S+)\s+.*$", line)
+            mgmt_elts = attrs.get('mgmt_profile1', '').split()
+            if len(mgmt_elts) >= 3:
+                info_hash[obj_key]['mgmt_hmc_id'] = mgmt_elts[0]
+                info_hash[obj_key]['mgmt_vios_id'] = mgmt_elts[1]
+                info_hash[obj_key]['mgmt_cec'] = mgmt_elts[2]
+
+            match_if = re.match(r"^\S+\s+(\S+)\s+.*$", attrs.get('if1', ''))
             if match_if:
                 info_hash[obj_key]['vios_ip'] = match_if.group(1)
 
@@ -223,9 +247,22 @@ def get_nim_clients_info(module, lpar_type):
 def build_nim_node(module):
     """
     Build the nim node containing the nim vios and hmc info.
+    The nim_node passed as option is used if it is up to date.
     """
 
     global NIM_NODE
+    global results
+
+    try:
+        NIM_NODE, results['nim_node_source'] = \
+            get_nim_node(module, ['hmc', 'cec', 'vios'], module.params['nim_node'])
+    except CommandError as exc:
+        msg = 'Failed to get NIM info, lsnim returned {0}: {1}'.format(exc.rc, exc.stderr)
+        module.log(msg)
+        OUTPUT.append(msg)
+        results['output'] = OUTPUT
+        results['msg'] = msg
+        module.fail_json(**results)
 
     # =========================================================================
     # Build hmc info list
@@ -362,23 +399,114 @@ def check_vios_targets(module, targets):
     return vios_list_tuples_res
 
 
-def vios_health(module, mgmt_sys_uuid, hmc_ip, vios_uuids):
+def load_vioshc(module, vioshc_cmd):
+    """
+    Load the vioshc.py script as a library, so that the NIM and HMC info
+    is shared by all the health checks of the module.
+
+    The script is the file installed on the NIM master by the
+    power_aix_vioshc role, it is not shipped in module_utils. It is loaded
+    only if it provides the library interface the module was written for:
+    API_VERSION equal to VIOSHC_API_VERSION, health_check(), list_uuids()
+    and VioshcError. The version is read from the source first, because
+    loading an older script would run its health check.
+
+    arguments:
+        vioshc_cmd (str): path of the vioshc.py script
+    return: the vioshc library,
+            None if it cannot be loaded and must be run as a command
+    """
+    try:
+        with open(vioshc_cmd, 'r') as script:
+            source = script.read()
+    except (IOError, OSError) as exc:
+        module.log('[WARNING] Cannot read {0}: {1}'.format(vioshc_cmd, exc))
+        return None
+    match = re.search(r'^API_VERSION\s*=\s*(\d+)', source, re.MULTILINE)
+    if not match or int(match.group(1)) != VIOSHC_API_VERSION:
+        module.log('[WARNING] {0} API version {1} is not {2}, running it as a command, '
+                   'update it with the power_aix_vioshc role'
+                   .format(vioshc_cmd, match.group(1) if match else 'none', VIOSHC_API_VERSION))
+        return None
+
+    dont_write_bytecode = sys.dont_write_bytecode
+    sys.dont_write_bytecode = True
+    try:
+        if sys.version_info[0] < 3:
+            import imp
+            vioshc = imp.load_source('vioshc', vioshc_cmd)
+        else:
+            import importlib.machinery
+            import importlib.util
+            loader = importlib.machinery.SourceFileLoader('vioshc', vioshc_cmd)
+            spec = importlib.util.spec_from_file_location('vioshc', vioshc_cmd, loader=loader)
+            vioshc = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(vioshc)
+    except Exception as exc:
+        # e.g. pycurl is not available to the module interpreter
+        module.log('[WARNING] Cannot load {0}, running it as a command: {1}'.format(vioshc_cmd, exc))
+        return None
+    finally:
+        sys.dont_write_bytecode = dont_write_bytecode
+
+    missing = [name for name in ('API_VERSION', 'health_check', 'list_uuids', 'VioshcError')
+               if not hasattr(vioshc, name)]
+    if missing or vioshc.API_VERSION != VIOSHC_API_VERSION:
+        module.log('[WARNING] {0} does not provide the version {1} library interface, running it as a command'
+                   .format(vioshc_cmd, VIOSHC_API_VERSION))
+        return None
+
+    module.debug('Loaded {0} API version {1}'.format(vioshc_cmd, vioshc.API_VERSION))
+    return vioshc
+
+
+def vios_health(module, mgmt_sys_uuid, hmc_ip, vios_uuids, output):
     """
     Check the health of the given VIOS or pair of VIOSes from a rolling
     update point of view.
 
-    This operation uses the vioshc.py script to evaluate the capacity of
-    the pair of VIOSes to support the rolling update operation.
+    This operation uses the vioshc.py library, or script if it cannot be
+    loaded, to evaluate the capacity of the pair of VIOSes to support the
+    rolling update operation.
+    The messages are added to the output list of the tuple.
 
     return: 0 if ok,
             1 otherwise
     """
     module.debug('hmc_ip: {0} vios_uuids: {1}'.format(hmc_ip, vios_uuids))
 
+    if VIOSHC is not None:
+        try:
+            res = VIOSHC.health_check(hmc_ip, mgmt_sys_uuid, vios_uuids,
+                                      session_file=SESSION_FILE if module.params['hmc_cache'] else '',
+                                      verbose=module._verbosity,
+                                      debug=module._verbosity >= 3)
+        except Exception as exc:
+            msg = exc.msg if isinstance(exc, VIOSHC.VioshcError) else repr(exc)
+            output.append('    VIOS Health check failed, vioshc returned: {0}'.format(msg))
+            module.log('VIOS Health check failed, vioshc returned: {0}'.format(msg))
+            output.append('    VIOS can NOT be updated')
+            module.log('vioses {0} can NOT be updated'.format(vios_uuids))
+            return 1
+
+        module.debug('vioshc log file: {0}'.format(res['log_file']))
+        if res['rc'] == 0 and res['pass_pct'] == 100:
+            output.append('    VIOS Health check passed')
+            module.log('vioses {0} can be updated'.format(vios_uuids))
+            return 0
+        for check in res['checks']:
+            if check['status'] != 'PASS':
+                output.append('    {0}'.format(check['msg']))
+        output.append('    VIOS can NOT be updated')
+        module.log('vioses {0} can NOT be updated'.format(vios_uuids))
+        return 1
+
     # Build the vioshc cmd
     cmd = [vioshc_cmd, '-i', hmc_ip, '-m', mgmt_sys_uuid]
     for uuid in vios_uuids:
         cmd.extend(['-U', uuid])
+    if module.params['hmc_cache']:
+        cmd.extend(['-S', SESSION_FILE])
     if module._verbosity > 0:
         cmd.extend(['-' + 'v' * module._verbosity])
         if module._verbosity >= 3:
@@ -386,19 +514,19 @@ def vios_health(module, mgmt_sys_uuid, hmc_ip, vios_uuids):
 
     ret, stdout, stderr = module.run_command(cmd)
     if ret != 0:
-        OUTPUT.append('    VIOS Health check failed, vioshc returned: {0}'
+        output.append('    VIOS Health check failed, vioshc returned: {0}'
                       .format(stderr))
         module.log('VIOS Health check failed, vioshc returned: {0} {1}'
                    .format(ret, stderr))
-        OUTPUT.append('    VIOS can NOT be updated')
+        output.append('    VIOS can NOT be updated')
         module.log('vioses {0} can NOT be updated'.format(vios_uuids))
         ret = 1
     elif re.search(r'Pass rate of 100%', stdout, re.M):
-        OUTPUT.append('    VIOS Health check passed')
+        output.append('    VIOS Health check passed')
         module.log('vioses {0} can be updated'.format(vios_uuids))
         ret = 0
     else:
-        OUTPUT.append('    VIOS can NOT be updated')
+        output.append('    VIOS can NOT be updated')
         module.log('vioses {0} can NOT be updated'.format(vios_uuids))
         ret = 1
 
@@ -407,19 +535,80 @@ def vios_health(module, mgmt_sys_uuid, hmc_ip, vios_uuids):
 
 def vios_health_init(module, hmc_id, hmc_ip):
     """
-    Collect CEC and VIOS UUIDs using vioshc.py script for a given HMC.
+    Collect CEC and VIOS UUIDs using vioshc.py for a given HMC
+    and save them in the UUID cache.
 
-    return: True if ok,
-            False otherwise
+    return: 0 if ok,
+            fail_json otherwise
     """
     global NIM_NODE
     global results
     global OUTPUT
+    global UUID_CACHE
 
     module.debug('hmc_id: {0}, hmc_ip: {1}'.format(hmc_id, hmc_ip))
 
+    if VIOSHC is not None:
+        cec_uuids = list_vios_uuids(module, hmc_id, hmc_ip)
+    else:
+        cec_uuids = run_vioshc_list(module, hmc_id, hmc_ip)
+
+    if UUID_CACHE is not None:
+        for cec_serial, entry in cec_uuids.items():
+            UUID_CACHE.set(hmc_id, cec_serial, entry['cec_uuid'], entry['vios'])
+    set_vios_uuids(cec_uuids)
+    return 0
+
+
+def list_vios_uuids(module, hmc_id, hmc_ip):
+    """
+    Collect CEC and VIOS UUIDs of the HMC with the vioshc.py library.
+
+    return: per CEC serial, the CEC UUID and the VIOS UUIDs indexed by
+            partition ID,
+            fail_json upon error
+    """
+    global results
+    global OUTPUT
+
+    try:
+        systems = VIOSHC.list_uuids(hmc_ip,
+                                    session_file=SESSION_FILE if module.params['hmc_cache'] else '',
+                                    verbose=module._verbosity,
+                                    debug=module._verbosity >= 3)
+    except Exception as exc:
+        msg = exc.msg if isinstance(exc, VIOSHC.VioshcError) else repr(exc)
+        OUTPUT.append('    Failed to get the VIOS information, vioshc returned: {0}'.format(msg))
+        module.log('Failed to get the VIOS information, vioshc returned: {0}'.format(msg))
+        results['msg'] = 'Failed to get the VIOS information, vioshc returned: {0}'.format(msg)
+        module.fail_json(**results)
+
+    cec_uuids = {}
+    for cec_uuid, system in systems.items():
+        cec_uuids[system['serial']] = {'cec_uuid': cec_uuid, 'vios': {}}
+        for vios in system['vios']:
+            # skip vios where lparid is not found
+            if vios['id'] != 'none':
+                cec_uuids[system['serial']]['vios'][vios['id']] = vios['uuid']
+    module.debug('vioshc UUIDs of {0}: {1}'.format(hmc_id, cec_uuids))
+    return cec_uuids
+
+
+def run_vioshc_list(module, hmc_id, hmc_ip):
+    """
+    Collect CEC and VIOS UUIDs of the HMC with the vioshc.py command.
+
+    return: per CEC serial, the CEC UUID and the VIOS UUIDs indexed by
+            partition ID,
+            fail_json upon error
+    """
+    global results
+    global OUTPUT
+
     # Call the vioshc.py script a first time to collect UUIDs
     cmd = [vioshc_cmd, '-i', hmc_ip, '-l', 'a']
+    if module.params['hmc_cache']:
+        cmd.extend(['-S', SESSION_FILE])
     if module._verbosity > 0:
         cmd.extend(['-' + 'v' * module._verbosity])
         if module._verbosity >= 3:
@@ -441,6 +630,7 @@ def vios_health_init(module, hmc_id, hmc_ip):
     vios_section = 0
     cec_uuid = ''
     cec_serial = ''
+    cec_uuids = {}
     for line in stdout.split('\n'):
         line = line.rstrip()
         # TBC - remove?
@@ -459,6 +649,7 @@ def vios_health_init(module, hmc_id, hmc_ip):
             if match_key:
                 cec_uuid = match_key.group(1)
                 cec_serial = match_key.group(2)
+                cec_uuids[cec_serial] = {'cec_uuid': cec_uuid, 'vios': {}}
 
                 module.debug('New managed system section:{0},{1}'
                              .format(cec_uuid, cec_serial))
@@ -481,14 +672,7 @@ def vios_health_init(module, hmc_id, hmc_ip):
             module.debug('new vios partitionsection:{0},{1}'
                          .format(vios_uuid, vios_part_id))
 
-            # retrieve the vios with the vios_part_id and the cec_serial value
-            # and store the UUIDs in the dictionaries
-            for vios_key in NIM_NODE['nim_vios']:
-                if NIM_NODE['nim_vios'][vios_key]['mgmt_vios_id'] == vios_part_id \
-                   and NIM_NODE['nim_vios'][vios_key]['mgmt_cec_serial'] == cec_serial:
-                    NIM_NODE['nim_vios'][vios_key]['vios_uuid'] = vios_uuid
-                    NIM_NODE['nim_vios'][vios_key]['cec_uuid'] = cec_uuid
-                    break
+            cec_uuids[cec_serial]['vios'][vios_part_id] = vios_uuid
             continue
 
         # skip vios line where lparid is not found.
@@ -509,7 +693,52 @@ def vios_health_init(module, hmc_id, hmc_ip):
         module.fail_json(**results)
 
     module.debug('vioshc output: {0}'.format(line))
-    return ret
+    return cec_uuids
+
+
+def set_vios_uuids(cec_uuids):
+    """
+    Store the UUIDs of the VIOSes found with their partition ID and CEC
+    serial in the nim_vios dictionary.
+
+    arguments:
+        cec_uuids (dict): per CEC serial, the CEC UUID and the VIOS UUIDs
+                          indexed by partition ID
+    """
+    global NIM_NODE
+
+    for vios in NIM_NODE['nim_vios'].values():
+        entry = cec_uuids.get(vios.get('mgmt_cec_serial'))
+        if entry and vios.get('mgmt_vios_id') in entry['vios']:
+            vios['vios_uuid'] = entry['vios'][vios['mgmt_vios_id']]
+            vios['cec_uuid'] = entry['cec_uuid']
+
+
+def get_cached_uuids(module, hmc_id, target_tuple):
+    """
+    Get the UUIDs of the VIOS tuple from the UUID cache.
+
+    return: True if the UUIDs of all the VIOSes have been found,
+            False otherwise
+    """
+    global NIM_NODE
+    global UUID_CACHE
+
+    if UUID_CACHE is None:
+        return False
+
+    cec_uuids = {}
+    for vios in target_tuple:
+        cec_serial = NIM_NODE['nim_vios'][vios].get('mgmt_cec_serial')
+        entry = UUID_CACHE.get(hmc_id, cec_serial) if cec_serial else None
+        if entry is None:
+            return False
+        cec_uuids[cec_serial] = entry
+    set_vios_uuids(cec_uuids)
+
+    found = all('vios_uuid' in NIM_NODE['nim_vios'][vios] for vios in target_tuple)
+    module.debug('UUIDs of {0} {1}found in the cache'.format(target_tuple, '' if found else 'not '))
+    return found
 
 
 def health_check(module, targets):
@@ -518,21 +747,25 @@ def health_check(module, targets):
     a rolling update operation.
 
     For each VIOS tuple:
-    - call vioshc.py a first time to collect the VIOS UUIDs
-    - call vioshc.py a second time to check the healthiness
+    - get the VIOS UUIDs from the UUID cache, or list them with vioshc.py
+    - check the healthiness with vioshc.py
+
+    The health checks of the tuples run in parallel, up to the parallel
+    parameter overall and the max_per_hmc parameter for each HMC.
 
     return: a dictionary with the state of each VIOS tuple
     """
     global NIM_NODE
+    global OUTPUT
+    global UUID_CACHE
 
     module.debug('targets: {0}'.format(targets))
 
     health_tab = {}
+    outputs = {}
+    checks = []
     vios_key = []
     for target_tuple in targets:
-        OUTPUT.append('Checking: {0}'.format(target_tuple))
-        module.debug('target_tuple: {0}'.format(target_tuple))
-
         tup_len = len(target_tuple)
         vios1 = target_tuple[0]
         if tup_len == 2:
@@ -541,12 +774,17 @@ def health_check(module, targets):
         else:
             vios_key = vios1
 
+        # output of the tuple, merged in the targets order once checked
+        output = outputs[vios_key] = []
+        output.append('Checking: {0}'.format(target_tuple))
+        module.debug('target_tuple: {0}'.format(target_tuple))
+
         module.debug('vios1: {0}'.format(vios1))
         # cec_serial = NIM_NODE['nim_vios'][vios1]['mgmt_cec_serial']
         hmc_id = NIM_NODE['nim_vios'][vios1]['mgmt_hmc_id']
 
         if hmc_id not in NIM_NODE['nim_hmc']:
-            OUTPUT.append('    VIOS {0} refers to an inexistant hmc {1}'
+            output.append('    VIOS {0} refers to an inexistant hmc {1}'
                           .format(vios1, hmc_id))
             module.log("[WARNING] VIOS {0} refers to an inexistant hmc {1}"
                        .format(vios1, hmc_id))
@@ -556,15 +794,20 @@ def health_check(module, targets):
         hmc_ip = NIM_NODE['nim_hmc'][hmc_id]['ip']
 
         vios_uuid = []
+        cached = False
+
+        # if needed get the UUIDs value from the cache or call vios_health_init
+        if 'vios_uuid' not in NIM_NODE['nim_vios'][vios1] \
+           or tup_len == 2 and 'vios_uuid' not in NIM_NODE['nim_vios'][vios2]:
+            cached = get_cached_uuids(module, hmc_id, target_tuple)
 
-        # if needed call vios_health_init to get the UUIDs value
         if 'vios_uuid' not in NIM_NODE['nim_vios'][vios1] \
            or tup_len == 2 and 'vios_uuid' not in NIM_NODE['nim_vios'][vios2]:
-            OUTPUT.append('    Getting VIOS UUID')
+            output.append('    Getting VIOS UUID')
 
             ret = vios_health_init(module, hmc_id, hmc_ip)
             if ret != 0:
-                OUTPUT.append('    Unable to get UUIDs of {0} and {1}, ret: {2}'
+                output.append('    Unable to get UUIDs of {0} and {1}, ret: {2}'
                               .format(vios1, vios2, ret))
                 module.log("[WARNING] Unable to get UUIDs of {0} and {1}, ret: {2}"
                            .format(vios1, vios2, ret))
@@ -574,38 +817,105 @@ def health_check(module, targets):
         if 'vios_uuid' not in NIM_NODE['nim_vios'][vios1] \
            or tup_len == 2 and 'vios_uuid' not in NIM_NODE['nim_vios'][vios2]:
             # vios uuid's not found
-            OUTPUT.append('    One VIOS UUID not found')
+            output.append('    One VIOS UUID not found')
             module.log("[WARNING] Unable to find one vios_uuid in NIM_NODE")
             health_tab[vios_key] = 'FAILURE-HC'
+            continue
 
-        else:
-            # run the vios_health check for the vios tuple
-            vios_uuid.append(NIM_NODE['nim_vios'][vios1]['vios_uuid'])
-            if tup_len == 2:
-                vios_uuid.append(NIM_NODE['nim_vios'][vios2]['vios_uuid'])
-
-            mgmt_uuid = NIM_NODE['nim_vios'][vios1]['cec_uuid']
-
-            OUTPUT.append('    Checking if we can update the VIOS')
-            ret = vios_health(module, mgmt_uuid, hmc_ip, vios_uuid)
-
-            if ret == 0:
-                OUTPUT.append('    Health check succeeded')
-                module.log("Health check succeeded for {0}".format(vios_key))
-                health_tab[vios_key] = 'SUCCESS-HC'
-            else:
-                OUTPUT.append('    Health check failed')
-                module.log("Health check failed for {0}".format(vios_key))
-                health_tab[vios_key] = 'FAILURE-HC'
+        vios_uuid.append(NIM_NODE['nim_vios'][vios1]['vios_uuid'])
+        if tup_len == 2:
+            vios_uuid.append(NIM_NODE['nim_vios'][vios2]['vios_uuid'])
+
+        # until checked, in case the check does not complete
+        health_tab[vios_key] = 'FAILURE-HC'
+        checks.append({'vios_key': vios_key,
+                       'target_tuple': target_tuple,
+                       'hmc_id': hmc_id,
+                       'hmc_ip': hmc_ip,
+                       'mgmt_uuid': NIM_NODE['nim_vios'][vios1]['cec_uuid'],
+                       'vios_uuid': vios_uuid,
+                       'cached': cached})
+
+    run_health_checks(module, checks, outputs, health_tab)
+
+    for check in checks:
+        if check['cached'] and health_tab[check['vios_key']] != 'SUCCESS-HC':
+            # the cached UUIDs may be stale, discover them next time
+            for vios in check['target_tuple']:
+                UUID_CACHE.invalidate_cec(check['hmc_id'], NIM_NODE['nim_vios'][vios]['mgmt_cec_serial'])
+
+    if UUID_CACHE is not None:
+        UUID_CACHE.save()
+
+    # merge the outputs in the targets order whatever the checks order
+    for target_tuple in targets:
+        OUTPUT.extend(outputs['-'.join(target_tuple)])
 
     module.debug('health_tab: {0}'. format(health_tab))
     return health_tab
 
 
+def run_health_checks(module, checks, outputs, health_tab):
+    """
+    Run the vioshc.py health checks of the VIOS tuples in parallel.
+
+    At most the parallel parameter checks run at the same time, and at most
+    max_per_hmc of them through the same HMC.
+
+    arguments:
+        checks     (list): the checks to run, each one a dictionary with
+                           the tuple, its HMC and its UUIDs
+        outputs    (dict): the output of each tuple
+        health_tab (dict): the state of each tuple to set
+    """
+    running = {}
+    max_per_hmc = module.params['max_per_hmc']
+
+    def can_start(check):
+        """
+        Reserve a check of the HMC of the check if it is not at its limit
+        """
+        if running.get(check['hmc_id'], 0) >= max_per_hmc:
+            return False
+        running[check['hmc_id']] = running.get(check['hmc_id'], 0) + 1
+        return True
+
+    def release(check):
+        """
+        Release the check of the HMC of the check
+        """
+        running[check['hmc_id']] -= 1
+
+    def run_check(check):
+        """
+        Run the health check of a VIOS tuple
+        """
+        vios_key = check['vios_key']
+        output = outputs[vios_key]
+        output.append('    Checking if we can update the VIOS')
+        ret = vios_health(module, check['mgmt_uuid'], check['hmc_ip'], check['vios_uuid'], output)
+        if ret == 0:
+            output.append('    Health check succeeded')
+            module.log("Health check succeeded for {0}".format(vios_key))
+            health_tab[vios_key] = 'SUCCESS-HC'
+        else:
+            output.append('    Health check failed')
+            module.log("Health check failed for {0}".format(vios_key))
+            health_tab[vios_key] = 'FAILURE-HC'
+
+    not_started, failed = run_pool(module, run_check, checks, module.params['parallel'],
+                                   can_start=can_start, release=release)
+    for check in not_started + failed:
+        # health_tab is already FAILURE-HC
+        outputs[check['vios_key']].append('    Health check failed, unexpected error')
+
+
 def main():
     global results
     global OUTPUT
     global NIM_NODE
+    global UUID_CACHE
+    global VIOSHC
     global vioshc_cmd
 
     module = AnsibleModule(
@@ -613,6 +923,10 @@ def main():
             targets=dict(required=True, type='list', elements='str'),
             action=dict(required=True, choices=['health_check'], type='str'),
             vars=dict(type='dict'),
+            nim_node=dict(type='dict'),
+            hmc_cache=dict(type='bool', default=True),
+            parallel=dict(type='int', default=1),
+            max_per_hmc=dict(type='int', default=2),
         )
     )
 
@@ -621,12 +935,19 @@ def main():
         msg='',
         stdout='',
         stderr='',
+        nim_node_source='',
     )
 
     # =========================================================================
     # Get module params
     # =========================================================================
     targets = module.params['targets']
+    if module.params['hmc_cache']:
+        UUID_CACHE = HmcUuidCache(module)
+    for param in ['parallel', 'max_per_hmc']:
+        if module.params[param] < 1:
+            results['msg'] = 'Invalid {0} value {1}, must be at least 1.'.format(param, module.params[param])
+            module.fail_json(**results)
 
     OUTPUT.append('VIOS Health Check operation for {0}'.format(targets))
 
@@ -650,6 +971,7 @@ def main():
         # Check vioshc script is present, fail_json if not
         vioshc_cmd = module.get_bin_path('vioshc.py', required=True)
         module.debug('Using vioshc.py script at {0}'.format(vioshc_cmd))
+        VIOSHC = load_vioshc(module, vioshc_cmd)
 
         targets_health_status = health_check(module, target_list)
 
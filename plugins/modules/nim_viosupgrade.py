@@ -114,6 +114,8 @@ options:
     description:
     - Allows to pass along NIM node info from a task to another so that it discovers NIM info only
       one time for all tasks.
+    - It is used as is if its C(version) is supported and the NIM database has not been modified since its C(timestamp),
+      otherwise it is refreshed.
     type: dict
 notes:
   - See IBM documentation about requirements for the viosupgrade command.
@@ -225,12 +227,22 @@ nim_node:
     returned: always
     type: dict
     contains:
+        version:
+            description: Schema version of the NIM node info.
+            returned: always
+            type: int
+        timestamp:
+            description: Time the NIM objects were listed, in seconds since the Epoch.
+            returned: always
+            type: float
         vios:
             description: List of VIOS NIM resources.
             returned: always
             type: dict
     sample:
         "nim_node": {
+            "version": 1,
+            "timestamp": 1602155234.52,
             "vios": {
                 "vios1": {
                     "Cstate": "ready for a NIM operation",
@@ -248,6 +260,15 @@ nim_node:
                 }
             }
         }
+nim_node_source:
+    description:
+    - How the NIM node info has been built.
+    - C(supplied) if the I(nim_node) option has been used as is.
+    - C(completed) if the NIM types missing from the I(nim_node) option have been added.
+    - C(refreshed) if it has been built from the NIM database.
+    returned: always
+    type: str
+    sample: supplied
 meta:
     description: Detailed information on the module execution.
     returned: always
@@ -288,6 +309,9 @@ import socket
 
 # Ansible module 'boilerplate'
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_inventory import (
+    get_nim_node)
 
 
 def param_one_of(one_of_list, required=True, exclusive=True):
@@ -323,6 +347,7 @@ def param_one_of(one_of_list, required=True, exclusive=True):
 def refresh_nim_node(module, type):
     """
     Get nim client information of provided type and update nim_node dictionary.
+    The nim_node passed as option is used if it is up to date.
 
     arguments:
         module  (dict): The Ansible module
@@ -334,50 +359,17 @@ def refresh_nim_node(module, type):
     """
     global results
 
-    if module.params['nim_node']:
-        results['nim_node'] = module.params['nim_node']
-
-    nim_info = get_nim_type_info(module, type)
-
-    if type not in results['nim_node']:
-        results['nim_node'].update({type: nim_info})
-    else:
-        for elem in nim_info.keys():
-            if elem in results['nim_node']:
-                results['nim_node'][type][elem].update(nim_info[elem])
-            else:
-                results['nim_node'][type][elem] = nim_info[elem]
-    module.debug("results['nim_node'][{0}]: {1}".format(type, results['nim_node'][type]))
-
-
-def get_nim_type_info(module, type):
-    """
-    Build the hash of nim client of type=lpar_type defined on the
-    nim master and their associated key = value information.
-
-    arguments:
-        module      (dict): The Ansible module
-        type     (str): type of the nim object to get information
-    note:
-        Exits with fail_json in case of error
-    return:
-        info_hash   (dict): information from the nim clients
-    """
-    global results
-
-    cmd = ['lsnim', '-t', type, '-l']
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
-        msg = 'Cannot get NIM Client information. Command \'{0}\' failed with return code {1}.'.format(' '.join(cmd), rc)
+    try:
+        results['nim_node'], results['nim_node_source'] = \
+            get_nim_node(module, [type], module.params['nim_node'])
+    except CommandError as exc:
+        msg = 'Cannot get NIM Client information. {0}'.format(exc)
         module.log(msg)
         results['msg'] = msg
-        results['stdout'] = stdout
-        results['stderr'] = stderr
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
         module.fail_json(**results)
-
-    info_hash = build_dict(module, stdout)
-
-    return info_hash
+    module.debug("results['nim_node'][{0}]: {1}".format(type, results['nim_node'][type]))
 
 
 def build_dict(module, stdout):
@@ -758,6 +750,7 @@ def main():
         #   }
         # }
         nim_node={},
+        nim_node_source='',
         status={},
     )
 
@@ -36,10 +36,40 @@ options:
     choices: [ present, absent, modify ]
     required: true
   name:
-    description: Specifies the user name for which the action is to be taken.
+    description:
+    - Specifies the user name for which the action is to be taken.
+    - Required unless I(users) is specified.
     type: str
     aliases: [ user ]
-    required: true
+  users:
+    description:
+    - Specifies several users to reconcile in a single task, all the users being listed only once.
+    - Each element accepts the I(name) option and the options of a single user. The options not
+      specified in an element take the value of the corresponding module option.
+    - Mutually exclusive with I(name).
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description: Specifies the user name.
+        type: str
+        required: true
+      state:
+        description: Specifies the action to be performed for the user, see I(state).
+        type: str
+        choices: [ present, absent, modify ]
+      attributes:
+        description: See I(attributes).
+        type: dict
+      remove_password:
+        description: See I(remove_password).
+        type: bool
+      change_passwd_on_login:
+        description: See I(change_passwd_on_login).
+        type: bool
+      password:
+        description: See I(password).
+        type: str
   attributes:
     description: Specifies the attributes to be changed or created for the user.
     type: dict
@@ -58,6 +88,12 @@ options:
   password:
     description: Specifies the encrypted string for the password to create or change the password.
     type: str
+notes:
+  - The provided attributes are compared with the ones listed by C(lsuser -c), only the
+    attributes that differ are changed. The password cannot be compared, a user whose I(password)
+    is provided is always reported as changed.
+  - With I(users), all the users are listed at once with C(lsuser -c ALL) and the passwords are
+    set with a single C(chpasswd) command.
 '''
 
 EXAMPLES = r'''
@@ -70,6 +106,19 @@ EXAMPLES = r'''
     attributes:
       home: /home/test/aixguest1010
       data: 1272
+- name: Reconcile several users
+  ibm.power_aix.user:
+    state: modify
+    users:
+    - name: aixguest1010
+      attributes:
+        shell: /usr/bin/ksh
+    - name: aixguest1011
+      state: present
+      attributes:
+        home: /home/test/aixguest1011
+    - name: aixguest1012
+      state: absent
 '''
 
 RETURN = r'''
@@ -90,212 +139,300 @@ stderr:
     description: The standard error.
     returned: If the command failed.
     type: str
+changes:
+    description:
+    - The attributes set for the user, with their value before and after the change.
+    returned: If I(name) is specified.
+    type: dict
+    sample: {'shell': {'before': '/usr/bin/sh', 'after': '/usr/bin/ksh'}}
+users:
+    description:
+    - The result of each user of the I(users) option.
+    - When a user fails, the result of the users processed before it.
+    returned: If I(users) is specified.
+    type: list
+    elements: dict
+    contains:
+        name:
+            description: The user name.
+            type: str
+        changed:
+            description: Whether the user has been modified.
+            type: bool
+        msg:
+            description: The execution message.
+            type: str
+        changes:
+            description: The attributes set for the user, see I(changes).
+            type: dict
 '''
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.bulk import (
+    bulk_entries, bulk_exit, bulk_fail)
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.principals import (
+    PrincipalInventory, diff_attributes, LOAD_MODULE)
+
+# Users of the system, listed once for the task
+USERS = None
+
+
+def registry_opts(attributes):
+    '''
+    Returns the options selecting the registry of the load_module attribute.
+    '''
+    load_module = (attributes or {}).get(LOAD_MODULE)
+    if load_module:
+        return ['-R', load_module]
+    return []
 
 
-def modify_user(module):
+def modify_user(module, params, changes):
     '''
-    Modify_user function modifies the attributes of the user and returns
-    output, return code and error of chuser command, if any.
+    Modify_user function changes the attributes of the user that differ
+    from the provided ones with a single chuser command.
 
     arguments:
         module  (dict): The Ansible module
+        params  (dict): The options of the user
+        changes (dict): The attributes to change, see diff_attributes
     note:
-        Exits with fail_json in case of error
+        Raises CommandError in case of error
     return:
         Message for successfull command
     '''
-    attributes = module.params['attributes']
-    opts = ""
-    load_module_opts = None
-    msg = None
-
-    if attributes is not None:
-        for attr, val in attributes.items():
-            if attr == 'load_module':
-                load_module_opts = "-R %s " % val
-            else:
-                opts += "%s=%s " % (attr, val)
-        if load_module_opts is not None:
-            opts = load_module_opts + opts
-        cmd = "chuser %s %s" % (opts, module.params['name'])
+    name = params['name']
+    attributes = params['attributes']
+    msg = ""
+
+    if changes:
+        cmd = ['chuser'] + registry_opts(attributes)
+        for attr in sorted(changes):
+            cmd.append("%s=%s" % (attr, changes[attr]['after']))
+        cmd.append(name)
 
         rc, stdout, stderr = module.run_command(cmd)
 
         if rc != 0:
-            msg = "\nFailed to modify attributes for the user: %s" % module.params['name']
-            module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
-        else:
-            msg = "\nAll provided attributes for the user: %s is set SUCCESSFULLY" % module.params['name']
-
-    if module.params['password'] is not None:
-        pass_msg = change_password(module)
-        if msg is not None:
-            msg += pass_msg
+            msg = "\nFailed to modify attributes for the user: %s" % name
+            raise CommandError(cmd, rc, stdout, stderr, msg)
         else:
-            msg = pass_msg
+            USERS.changed(name, changes, attributes.get(LOAD_MODULE))
+            msg = "\nAll provided attributes for the user: %s is set SUCCESSFULLY" % name
 
     return msg
 
 
-def create_user(module):
+def create_user(module, params):
     '''
     Create_user function creates the user with the attributes provided in the
-    attribiutes field. It returns the standard output, return code and error
-    for mkuser command, if any.
+    attribiutes field with a single mkuser command.
 
     arguments:
         module  (dict): The Ansible module
+        params  (dict): The options of the user
     note:
-        Exits with fail_json in case of error
+        Raises CommandError in case of error
     return:
         Message for successfull command
     '''
-    attributes = module.params['attributes']
+    name = params['name']
+    attributes = params['attributes'] or {}
 
-    cmd = ['mkuser']
-    cmd.append(module.params['name'])
+    cmd = ['mkuser'] + registry_opts(attributes)
+    for attr, change in sorted(diff_attributes(attributes, None).items()):
+        cmd.append("%s=%s" % (attr, change['after']))
+    cmd.append(name)
 
     rc, stdout, stderr = module.run_command(cmd)
 
     if rc != 0:
-        msg = "Failed to create user: %s" % module.params['name']
-        module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
+        msg = "Failed to create user: %s" % name
+        raise CommandError(cmd, rc, stdout, stderr, msg)
     else:
-        msg = "Username is created SUCCESSFULLY: %s" % module.params['name']
-
-    if attributes is not None or module.params['password'] is not None:
-        msg_attr = modify_user(module)
-        msg += msg_attr
+        USERS.added(name, attributes, attributes.get(LOAD_MODULE))
+        msg = "Username is created SUCCESSFULLY: %s" % name
 
     return msg
 
 
-def remove_user(module):
+def remove_user(module, params):
     '''
     Remove_user function removes the user from the system.It returns the standard output,
     return code and error for mkuser command, if any.
 
     arguments:
         module  (dict): The Ansible module
+        params  (dict): The options of the user
     note:
-        Exits with fail_json in case of error
+        Raises CommandError in case of error
     return:
         Message for successfull command
     '''
-    cmd = ['rmuser']
+    name = params['name']
+    attributes = params['attributes'] or {}
+    cmd = ['rmuser'] + registry_opts(attributes)
 
-    if module.params['remove_password']:
+    if params['remove_password']:
         cmd.append('-p')
 
-    cmd.append(module.params['name'])
+    cmd.append(name)
 
     rc, stdout, stderr = module.run_command(cmd)
 
     if rc != 0:
-        msg = "Unable to remove the user name: %s" % module.params['name']
-        module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
+        msg = "Unable to remove the user name: %s" % name
+        raise CommandError(cmd, rc, stdout, stderr, msg)
     else:
-        msg = "User name is REMOVED SUCCESSFULLY: %s" % module.params['name']
+        USERS.removed(name, attributes.get(LOAD_MODULE))
+        msg = "User name is REMOVED SUCCESSFULLY: %s" % name
 
     return msg
 
 
-def user_exists(module):
+def change_password(module, users):
     '''
-    Checks if the specified user exists in the system or not.
+    Changes the password of the specified users, with one chpasswd command
+    for the users changing it at first login and one for the others. Clears
+    all the default flags set by system if first time login password change
+    is not required
 
     arguments:
         module  (dict): The Ansible module
+        users   (list): The options of the users whose password is set
+    note:
+        Raises CommandError in case of error
     return:
-        True if the user exists
-        False if the user does not exist
+        Message for successfull command by user name
     '''
-    cmd = ["lsuser"]
-    cmd.append(module.params['name'])
+    msgs = {}
 
-    rc, out, err = module.run_command(cmd)
-    if (rc == 0):
-        return True
-    else:
-        return False
+    for change_passwd_on_login in (True, False):
+        batch = [params for params in users if bool(params['change_passwd_on_login']) is change_passwd_on_login]
+        if not batch:
+            continue
+        names = ', '.join(params['name'] for params in batch)
+
+        cmd = ['chpasswd', '-e' if change_passwd_on_login else '-ec']
+        data = '\n'.join('{user}:{password}'.format(user=params['name'], password=params['password'])
+                         for params in batch)
+        pass_rc, pass_out, pass_err = module.run_command(cmd, data=data)
+        if pass_rc != 0:
+            msg = "\nFailed to set password for the user: %s" % names
+            raise CommandError(cmd, pass_rc, pass_out, pass_err, msg)
+
+        for params in batch:
+            msgs[params['name']] = "\nPassword is set successfully for the user: %s" % params['name']
 
+    return msgs
 
-def change_password(module):
+
+def reconcile_user(module, params, passwords):
     '''
-    Changes the password of the specified user. Clears all the default
-    flags set by system if first time login password change is not required
+    Brings the user to the requested state, running a command only for
+    what differs from its current state. The password cannot be compared,
+    the user is added to the passwords list to set it afterwards.
 
     arguments:
-        module  (dict): The Ansible module
+        module    (dict): The Ansible module
+        params    (dict): The options of the user
+        passwords (list): The options of the users whose password is set
     note:
-        Exits with fail_json in case of error
+        Raises CommandError in case of error
     return:
-        Message for successfull command
+        dictionary with the user 'name', 'changed', 'msg' and 'changes'
+        the changed attributes, see diff_attributes
     '''
-    name = module.params['name']
-    passwd = module.params['password']
-    change_passwd_on_login = module.params['change_passwd_on_login']
-
-    if change_passwd_on_login:
-        cmd = "echo \'{user}:{password}\' | chpasswd -e".format(user=name, password=passwd)
-    else:
-        cmd = "echo \'{user}:{password}\' | chpasswd -ec".format(user=name, password=passwd)
+    name = params['name']
+    state = params['state']
+    attributes = params['attributes']
+    current = USERS.get(name, (attributes or {}).get(LOAD_MODULE))
+    changes = {}
+    changed = False
 
-    pass_rc, pass_out, pass_err = module.run_command(cmd, use_unsafe_shell=True)
-    if pass_rc != 0:
-        msg = "\nFailed to set password for the user: %s" % module.params['name']
-        module.fail_json(msg=msg, rc=pass_rc, stdout=pass_out, stderr=pass_err)
+    if state == 'absent':
+        if current is not None:
+            msg = remove_user(module, params)
+            changed = True
+        else:
+            msg = "User name is NOT FOUND : %s" % name
+    elif state == 'present':
+        if current is None:
+            changes = diff_attributes(attributes, None)
+            msg = create_user(module, params)
+            changed = True
+            if params['password'] is not None:
+                passwords.append(params)
+        else:
+            msg = "User %s already exists." % name
+    elif state == 'modify':
+        if attributes is None and params['password'] is None:
+            msg = "Please provide the attributes to be changed for the user: %s" % name
+        elif current is None:
+            msg = "No user found in the system to modify the attributes: %s" % name
+        else:
+            changes = diff_attributes(attributes, current)
+            msg = modify_user(module, params, changes)
+            changed = bool(changes)
+            if params['password'] is not None:
+                passwords.append(params)
+                changed = True
+            elif not changed:
+                msg = "All provided attributes for the user: %s are already set" % name
     else:
-        msg = "\nPassword is set successfully for the user: %s" % module.params['name']
+        msg = "Invalid state. The state provided is not supported: %s" % state
 
-    return msg
+    return dict(name=name, changed=changed, msg=msg, changes=changes)
 
 
 def main():
+    global USERS
+
+    user_options = dict(
+        name=dict(type='str', required=True),
+        state=dict(type='str', choices=['present', 'absent', 'modify']),
+        attributes=dict(type='dict'),
+        remove_password=dict(type='bool', no_log=False),
+        change_passwd_on_login=dict(type='bool', no_log=False),
+        password=dict(type='str', no_log=True),
+    )
     module = AnsibleModule(
         argument_spec=dict(
             state=dict(type='str', required=True, choices=['present', 'absent', 'modify']),
-            name=dict(type='str', required=True, aliases=['user']),
+            name=dict(type='str', aliases=['user']),
+            users=dict(type='list', elements='dict', options=user_options),
             attributes=dict(type='dict'),
             remove_password=dict(type='bool', default=True, no_log=False),
             change_passwd_on_login=dict(type='bool', default=False, no_log=False),
             password=dict(type='str', no_log=True),
         ),
+        required_one_of=[['name', 'users']],
+        mutually_exclusive=[['name', 'users']],
         supports_check_mode=False
     )
 
-    msg = ""
-    attributes = module.params['attributes']
-    changed = False
+    USERS = PrincipalInventory(module, 'lsuser')
+    entries = bulk_entries(module, 'users')
+    passwords = []
 
-    if module.params['state'] == 'absent':
-        if user_exists(module):
-            msg = remove_user(module)
-            changed = True
-        else:
-            msg = "User name is NOT FOUND : %s" % module.params['name']
-    elif module.params['state'] == 'present':
-        if not user_exists(module):
-            msg = create_user(module)
-            changed = True
-        else:
-            msg = "User %s already exists." % module.params['name']
-    elif module.params['state'] == 'modify':
-        if attributes is None and module.params['password'] is None:
-            msg = "Please provide the attributes to be changed for the user: %s" % module.params['name']
-        else:
-            if user_exists(module):
-                msg = modify_user(module)
-                changed = True
-            else:
-                msg = "No user found in the system to modify the attributes: %s" % module.params['name']
-    else:
-        msg = "Invalid state. The state provided is not supported: %s" % module.params['state']
+    results = []
+    try:
+        if module.params['users']:
+            # a single listing of the users of each registry
+            for load_module in set((params['attributes'] or {}).get(LOAD_MODULE) for params in entries):
+                USERS.load(load_module)
+        for params in entries:
+            results.append(reconcile_user(module, params, passwords))
+
+        pass_msgs = change_password(module, passwords)
+    except CommandError as exc:
+        bulk_fail(module, 'users', results, exc)
+
+    for result in results:
+        result['msg'] += pass_msgs.get(result['name'], '')
 
-    module.exit_json(changed=changed, msg=msg)
+    bulk_exit(module, 'users', 'user', results)
 
 
 if __name__ == '__main__':
@@ -17,1342 +17,2301 @@
 ###############################################################################
 
 from datetime import datetime
+import errno
 import os
 import sys
 import getopt
+import json
 import subprocess
 import threading
+import time
 import re
 import pycurl
-import xml.etree.cElementTree as ET
+try:
+    import xml.etree.cElementTree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
 import socket
-import cStringIO
+from io import BytesIO
 import shutil
+try:
+    # the worker pool of the collection, when loaded by nim_vios_hc
+    from ansible_collections.ibm.power_aix.plugins.module_utils.pool import run_pool
+except ImportError:
+    def run_pool(module, func, items, max_workers):
+        """
+        Run func on each item with a bounded number of worker threads, as
+        the run_pool of the collection that is not installed when vioshc.py
+        runs as a command
+
+        Input: (Vioshc) run state to log the traces
+        Input: (function) function to call with the item as argument
+        Input: (list) items to process
+        Input: (int) maximum number of concurrent threads
+        Output:(list) items not started, always empty
+        Output:(list) items for which func raised an exception
+        """
+        work = list(items)
+        failed = []
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                with lock:
+                    if not work:
+                        return
+                    item = work.pop(0)
+                module.debug('Start {0} for {1}'.format(func.__name__, item))
+                try:
+                    func(item)
+                except BaseException as exc:
+                    module.log('{0} failed for {1}: {2!r}\n'.format(func.__name__, item, exc))
+                    with lock:
+                        failed.append(item)
+
+        threads = []
+        for i in range(min(max_workers, len(work))):
+            th = threading.Thread(target=worker)
+            th.start()
+            threads.append(th)
+        for th in threads:
+            th.join()
+        return [], failed
 
 # TODO: Use Standard logger instead of log routine
 
+# vioshc is a command (see USAGE) and a library: health_check() and
+# list_uuids() return their results as dictionaries instead of printing
+# them. The state of a run is kept in a Vioshc object, the state of an HMC
+# (NIM info, credentials, session key, managed systems and VIOSes) in an
+# Hmc object shared by all the runs done through this HMC in the process.
+
 ###############################################################################
 # Initialize variables
 ###############################################################################
 # Constants
-LOG_DIR = "/tmp"
+API_VERSION = 1             # version of the library interface, checked by nim_vios_hc
+LOG_DIR = "/tmp/vios_maint"
 C_RSH = "/usr/lpp/bos.sysmgt/nim/methods/c_rsh"
+HMC_PORT = 12443
+HMC_MAX_CONNECTIONS = 8     # concurrent requests per HMC
+HMC_RETRIES = 3             # attempts of a request failing with HTTP 5xx
+HMC_RETRY_DELAY = 1         # seconds before the first retry, then doubled
+SESSION_TTL = 3600          # seconds a saved session key is reused
 
-action = ""     # (user provided -l present?)
-list_arg = ""   # (user provided -l)
-
-# Target HMC
-hmc_ip = ""         # (user provided)
-hmc_user_id = ""    # (user provided -u or retrieved)
-hmc_password = ""   # (user provided -p or retrieved)
-hmc_info = {}
-
-managed_system_info = {}
-
-# Dual VIOS pair
-vios_info = {}
-vios1_name = ""
-vios2_name = ""
-vios_num = 0        # number of VIOS UUID provided (-U option)
-vios1_uuid = ""     # (user provided -U)
-vios2_uuid = ""     # (user provided -U)
-managed_system_uuid = ""    # (user provided -m)
+# Values of the XML files already parsed
+xml_cache = {}
+xml_cache_lock = threading.Lock()
 
-lpar_info = {}
+# State of the HMCs, shared by the runs
+hmcs = {}
+hmcs_lock = threading.Lock()
 
-# Flags & Counters used by program
-rc = 0
-verbose = 0         # (user provided -v)
-num_hc_fail = 0
-num_hc_pass = 0
-total_hc = 0
-
-
-###############################################################################
-# Define functions
-###############################################################################
-# File manipulation functions #
 
-def touch(path):
+class VioshcError(Exception):
     """
-    Create file
+    Error ending a run, its message has already been written
 
-    Input: (str) file path
-    Output: none
+    Attributes: (int) rc exit code of the command
+                (str) msg error message
     """
-    log("creating file: {0}\n".format(path))
-    try:
-        open(path, 'a')
-    except IOError as e:
-        write('ERROR: Failed to create file {0}: {1}.'
-              .format(path, e.strerror), lvl=0)
-        sys.exit(3)
-    os.utime(path, None)
 
+    def __init__(self, rc, msg=""):
+        Exception.__init__(self, msg)
+        self.rc = rc
+        self.msg = msg
 
-def log(txt, debug='no'):
-    """
-    Write debug trace in the log file
-
-    Input: (str) text to write
-    Input: (str) level of the trace, writes if set to 'debug'
-    Output: none
-    """
-    global log_file
-    global mode
-    if mode == 'debug' or mode == debug:
-        log_file.write(txt)
 
+###############################################################################
+# Parsing functions
+###############################################################################
 
-def write(txt, lvl=1):
-    """
-    Write provided text on stdout and in log file depneding of the level
 
-    Input: (str) text to write
-    Input: (int) level, if 0 then prints out, used for: ERROR, WARNING, etc.
-                          >0, verbose needs to be greater than lvl to see it
-    Output: none
+class XmlStream(object):
     """
-    global verbose
-    log(txt + '\n')
-    if verbose >= lvl:
-        print(txt)
-
-
-def remove(path):
+    Read-only file wrapper skipping the lines before the XML document,
+    like the headers written at the top of some HMC answers
     """
-    Remove file
 
-    Input: (str) file path
-    Output: none
-    """
-    try:
-        if os.path.exists(path):
-            os.remove(path)
-        else:
-            log('file {0} does not exists.\n'.format(path))
-    except OSError as e:
-        write('ERROR: Failed to remove file {0}: {1}.'.format(path, e.strerror), lvl=0)
+    def __init__(self, f):
+        self.f = f
+        self.first = None
 
+    def read(self, size=-1):
+        if self.first is None:
+            line = self.f.readline()
+            while line and not line.startswith(b'<'):
+                line = self.f.readline()
+            self.first = line
+        if self.first:
+            data, self.first = self.first, b''
+            return data
+        return self.f.read(size)
 
-def format_xml_file(filename):
-    """
-    Remove extra headers from top of XML file
 
-    Input: (str) file name
-    Output: none
+def xml_file_key(filename):
     """
-    try:
-        f = open(filename, 'r+')
-    except IOError as e:
-        write('ERROR: Failed to create file {0}: {1}.'.format(filename, e.strerror), lvl=0)
-        sys.exit(3)
-    lines = f.readlines()
-    f.seek(0)
-    start_writing = False
-    for i in lines:
-        if i[0] == '<':
-            start_writing = True
-        if start_writing:
-            f.write(i)
-    f.truncate()
-    f.close()
-
-
-def exec_cmd(cmd):
+    Return the key identifying the content of a file, None if it does not exist
     """
-    Execute the given command
-
-    Input: (str) return code of command
-    Output:(int) stdout of the command
-    Output:(str) stderr of the command
-    """
-    global log_dir
-    rc = 0
-    output = ''
-    errout = ''
-    th_id = threading.current_thread().ident
-    stderr_file = os.path.join(log_dir, 'cmd_stderr_{0}'.format(th_id))
     try:
-        myfile = open(stderr_file, 'w')
-        output = subprocess.check_output(cmd, stderr=myfile)
-        myfile.close()
-        s = re.search(r'rc=([-\d]+)$', output)
-        if s:
-            rc = int(s.group(1))
-            output = re.sub(r'rc=[-\d]+\n$', '', output)  # remove the rc of c_rsh with echo $?
-
-    except subprocess.CalledProcessError as exc:
-        myfile.close()
-        errout = re.sub(r'rc=[-\d]+\n$', '', exc.output)  # remove the rc of c_rsh with echo $?
-        rc = exc.returncode
-        write('Command: {0} failed: {1}'.format(cmd, exc.args), lvl=0)
-
-    except (OSError, IOError) as exc:
-        myfile.close
-        if exc.args:
-            match = re.match(r'rc=[-\d]+\n$', exc.args[1])
-            if match:
-                errout = re.sub(r'rc=[-\d]+\n$', '', exc.args[1])  # remove the rc of c_rsh with echo $?
-                rc = exc.args[0]
-            else:
-                rc = 1
-                write('Command: {0} failed, exception: {1}'.format(cmd, exc), lvl=0)
-        else:
-            rc = 1
-            write('Command: {0} failed, exception: {1}'.format(cmd, exc), lvl=0)
-
-    except Exception as exc:
-        rc = 1
-        write('Command: {0} failed, exception: {1}'.format(cmd, exc.args), lvl=0)
-
-    # check for error message
-    if os.path.getsize(stderr_file) > 0:
-        myfile = open(stderr_file, 'r')
-        errout += ''.join(myfile)
-        myfile.close()
-    os.remove(stderr_file)
-
-    log('command {0} returned:\n'.format(cmd))
-    log(' rc:{0}\n'.format(rc))
-    log(' stdout:{0}\n'.format(output))
-    log(' stderr:{0}\n'.format(errout))
-    return (rc, output, errout)
-
-
-###############################################################################
-# Interfacing functions
-###############################################################################
-
-def retrieve_usr_pass(hmc_info):
-    """
-    Retrieve the username and password
-
-    Input: (str) hmc internet address
-    Output:(str) username
-    Output:(str) password
-    """
-    if hmc_info is None or 'type' not in hmc_info or 'passwd_file' not in hmc_info:
-        write('ERROR: Failed to retrieve user ID and password for {0}'
-              .format(hmc_info['hostname']), lvl=0)
-        return ("", "")
-
-    decrypt_file = get_decrypt_file(hmc_info['passwd_file'],
-                                    hmc_info['type'],
-                                    hmc_info['hostname'])
-    if decrypt_file != '':
-        (user, passwd) = get_usr_passwd(decrypt_file)
-    return (user, passwd)
-
-
-def get_nim_info(obj_name):
-    """
-    Get detailed on the provided Network Installation Management (NIM) object
-
-    Input: (str) NIM object name to look for
-    Output:(str) hash with NIM info, the associated value can be a list
-    """
-    info = {0}
-
-    cmd = ['/usr/sbin/lsnim', '-l', obj_name]
-    (rc, output, errout) = exec_cmd(cmd)
-    if rc != 0:
-        write('ERROR: Failed to get {0} NIM info: {1} {2}'.format(obj_name, output, errout), lvl=0)
+        st = os.stat(filename)
+    except OSError:
         return None
-
-    for line in output.split('\n'):
-        match = re.match(r'^\s*(\S+)\s*=\s*(\S+)\s*$', line)
-        if match:
-            if match.group(1) not in info:
-                info[match.group(1)] = match.group(2)
-            elif type(info[match.group(1)]) is list:
-                info[match.group(1)].append(match.group(2))
-            else:
-                info[match.group(1)] = [info[match.group(1)]]
-                info[match.group(1)].append(match.group(2))
-    return info
+    return (st.st_ino, st.st_size, st.st_mtime)
 
 
-def get_nim_name(hostname):
+def xml_extract(filename, paths):
     """
-    Get NIM client name associated with the given hostname
+    Collect the text of the elements matching the tag paths in a single
+    pass over the XML file, the results being memoized per file
 
-    Input: (str) hostname of the NIM client to look for
-    Output:(str) NIM object name
-    """
-    name = ""
+    A path is a tag name, or tag names separated by '/' to match an element
+    whose parents have these names (e.g. 'ServerAdapter/ConnectingPartitionID').
+    Namespaces are ignored. The first pass over a file collects all the tags
+    and parent/tag paths so that the next lookups do not parse it again.
 
-    cmd = ['lsnim', '-a', 'if1']
-    (rc, output, errout) = exec_cmd(cmd)
-    if rc != 0:
-        write('ERROR: Failed to get NIM name for {0}: {1} {2}'
-              .format(hostname, output, errout), lvl=0)
-        return ""
-
-    for line in output.split('\n'):
-        match = re.match(r'^\s*(\S+)\s*:\s*$', line)
-        if match:
-            name = match.group(1)
-            continue
-        match = re.match(r'^\s*if1\s*=\s*\S+\s+(\S+).*$', line)
-        if match and match.group(1) != hostname:
-            name = ""
-            continue
+    Inputs: (str)  XML file name to parse
+    Inputs: (list) tag paths to look for
+    Output: (dict) list of the values of each path (empty if not found),
+            None if the file cannot be parsed
+    """
+    key = xml_file_key(filename)
+    with xml_cache_lock:
+        entry = xml_cache.get(filename)
+        if entry is None or entry['key'] != key:
+            entry = {'key': key, 'values': None, 'deep': {}, 'error': False}
+            xml_cache[filename] = entry
+        if entry['error']:
+            return None
+        if entry['values'] is not None:
+            deep = [path for path in paths if path.count('/') > 1 and path not in entry['deep']]
+            if not deep:
+                return dict((path, entry['deep'][path] if path.count('/') > 1
+                             else entry['values'].get(path, [])) for path in paths)
         else:
-            break
-    if name == "":
-        write('ERROR: Failed to get NIM name for {0}: Not Found'
-              .format(hostname), lvl=0)
-    return name
-
-
-def get_hostname(host):
-    """
-    Get network information from either IP address or hostname
-
-    Input: (str) IP address or hostname
-    Output:      a triple (hostname, aliaslist, ipaddrlist)
-                 with
-                 - hostname:   primary host name responding to the given ip_address
-                 - aliaslist:  list of alternative host names for the same address (can be empty)
-                 - ipaddrlist: list of IPv4 addresses for the same interface on the same host
-    """
+            deep = [path for path in paths if path.count('/') > 1]
+
+    # paths of more than two tags are only collected on demand
+    by_tag = {}
+    for path in deep:
+        tags = path.split('/')
+        by_tag.setdefault(tags[-1], []).append((path, tags[:-1]))
+    values = {}
+    deep_values = dict((path, []) for path in deep)
+    local_names = {}
+    stack = []
     try:
-        match_key = re.match(r'^\d+.*$', host)
-        if match_key:
-            return socket.gethostbyaddr(host)
-        else:
-            return socket.gethostbyname_ex(host)
-    except OSError as e:
-        write("ERROR: Failed to get hostname for %s: %d %s." % (host, e.errno, e.strerror), lvl=0)
-        sys.exit(3)
-
-
-def get_decrypt_file(passwd_file, type, hostname):
-    """
-    Decrypt the encrypted password file
-
-    Input: (str) password file
-    Input: (str) managed type
-    Input: (str) managed hostname
-    Output:(str) decrypted file
-    """
-    log("getting decrypt file: {0} for {1} {2}\n".format(passwd_file, type, hostname))
-
-    cmd = ["/usr/bin/dkeyexch", "-f", passwd_file, "-I", type, "-H", hostname, "-S"]
-    (rc, output, errout) = exec_cmd(cmd)
-    if rc != 0:
-        write("ERROR: Failed to get the encrypted password file path for {0}: {1} {2}"
-              .format(hostname, output, errout), lvl=0)
-        return ""
+        with open(filename, 'rb') as f:
+            for event, elem in ET.iterparse(XmlStream(f), events=('start', 'end')):
+                if elem.tag not in local_names:
+                    local_names[elem.tag] = elem.tag.split('}', 1)[-1]
+                tag = local_names[elem.tag]
+                if event == 'start':
+                    stack.append(tag)
+                    continue
+                stack.pop()
+                values.setdefault(tag, []).append(elem.text)
+                if stack:
+                    values.setdefault(stack[-1] + '/' + tag, []).append(elem.text)
+                for path, parents in by_tag.get(tag, []):
+                    if stack[-len(parents):] == parents:
+                        deep_values[path].append(elem.text)
+                if stack:
+                    # the values are collected, release the element
+                    elem.clear()
+    except (IOError, ET.ParseError):
+        with xml_cache_lock:
+            entry['error'] = True
+        return None
 
-    # dkeyexch output is like:
-    # OpenSSH_6.0p1, OpenSSL 1.0.2h  3 May 2016
-    # /var/ibm/sysmgt/dsm/tmp/dsm1608597933307771402.tmp
-    return output.rstrip().split('\n')[1]
+    with xml_cache_lock:
+        entry['values'] = values
+        entry['deep'].update(deep_values)
+        return dict((path, entry['deep'][path] if path.count('/') > 1
+                     else entry['values'].get(path, [])) for path in paths)
 
 
-def get_usr_passwd(decrypt_file):
+def xml_invalidate(filename):
     """
-    Read the decrypted file and returns the username and password
-
-    Input: (str) decrypted file
-    Output:(str) username
-    Output:(str) password
+    Forget the memoized values of a file about to be rewritten
     """
-    try:
-        f = open(decrypt_file, 'r')
-    except IOError as e:
-        write("ERROR: Failed to open file {0}: {1}.".format(decrypt_file, e.strerror), lvl=0)
-        sys.exit(3)
-    arr = f.read().split(' ')
-    f.close()
-    return arr
+    with xml_cache_lock:
+        xml_cache.pop(filename, None)
 
 
-# TODO: change the xml parsing in build_managed_system?
-def build_managed_system(hmc_info, vios_info, managed_system_info, xml_file):
+def xml_forget(directory):
     """
-    Retrieve managed systems, VIOS UUIDs and machine SerialNumber information
-    from provided XML file.
-
-    Input: (dict) hmc_info hash
-    Input:  (str) xml_file of managed systems to parse
-    Output:(dict) VIOSes information
-    Output:(dict) managed systems and their SerialNumbers and VIOSes
+    Forget the memoized values of the files of a directory about to be removed
     """
-    curr_managed_sys = ""  # string to hold current managed system being searched
-    vios_num = 0
+    prefix = directory.rstrip('/') + '/'
+    with xml_cache_lock:
+        for filename in [name for name in xml_cache if name.startswith(prefix)]:
+            del xml_cache[filename]
 
-    log("Parse xml file: {0}\n".format(xml_file))
-    try:
-        tree = ET.ElementTree(file=xml_file)
-    except IOError as e:
-        write("ERROR: Failed to parse '{0}' file.".format(xml_file), lvl=0)
-        sys.exit(3)
-    except ET.ParseError as e:
-        write("ERROR: Failed to parse '{0}' file.".format(xml_file), lvl=0)
-        sys.exit(3)
-
-    log("Get managed system serial numbers\n")
-    iter_ = tree.getiterator()
-    for elem in iter_:
-        # Retrieving the current Managed System
-        if re.sub(r'{[^>]*}', "", elem.tag) == "entry":
-            elem_child = elem.getchildren()
-            for child in elem_child:
-                if re.sub(r'{[^>]*}', "", child.tag) != "id":
-                    continue
-                if child.text in managed_system_info:
-                    continue
-                curr_managed_sys = child.text
-                log("get managed system UUID: {0}\n".format(curr_managed_sys))
-                managed_system_info[curr_managed_sys] = {}
-                managed_system_info[curr_managed_sys]['serial'] = "Not Found"
-                managed_system_info[curr_managed_sys]['vios'] = []
-
-        if re.sub(r'{[^>]*}', "", elem.tag) == "MachineTypeModelAndSerialNumber":
-            # string to append to the managed system dict
-            serial_string = ""
-            elem_child = elem.getchildren()
-            for serial_child in elem_child:
-                if re.sub(r'{[^>]*}', "", serial_child.tag) == "MachineType":
-                    serial_string += serial_child.text + "-"
-                if re.sub(r'{[^>]*}', "", serial_child.tag) == "Model":
-                    serial_string += serial_child.text + "*"
-                if re.sub(r'{[^>]*}', "", serial_child.tag) == "SerialNumber":
-                    serial_string += serial_child.text
-            # Adding the serial to the current Managed System
-            managed_system_info[curr_managed_sys]['serial'] = serial_string
-
-        if re.sub(r'{[^>]*}', "", elem.tag) == "AssociatedVirtualIOServers":
-            write("Retrieving the VIOS UUIDs", lvl=2)
-            elem_child = elem.getchildren()
-
-            # The VIOS UUIDs are in the "link" attribute
-            for child in elem_child:
-                if re.sub(r'{[^>]*}', "", child.tag) != "link":
-                    continue
-                match = re.match(r'^.*VirtualIOServer\/(\S+)$', child.attrib['href'])
-                if match:
-                    uuid = match.group(1)
-                    vios_num += 1
-
-                    write("Collect info on clients of VIOS{0}: {1}".format(vios_num, uuid), lvl=2)
-                    filename = "{0}/vios{1}.xml".format(xml_dir, vios_num)
-                    rc = get_vios_info(hmc_info, uuid, filename)
-                    if rc != 0:
-                        write("WARNING: Failed to collect vios {0} info: {1}"
-                              .format(uuid, rc[1]), lvl=1)
-                        continue
 
-                    vios_name = build_vios_info(vios_info, filename, uuid)
-                    if vios_name == "":
-                        continue
+###############################################################################
+# Pycurl
+###############################################################################
 
-                    vios_info[vios_name]['managed_system'] = curr_managed_sys
-                    vios_info[vios_name]['filename'] = filename
-                    for key in vios_info[vios_name].keys():
-                        log("vios_info[{0}][{1}] = {2}\n"
-                            .format(vios_name, key, vios_info[vios_name][key]))
 
-                    managed_system_info[curr_managed_sys]['vios'].append(vios_name)
+class HmcClient(object):
+    """
+    REST client of an HMC reusing a pool of keep-alive Curl handles.
+
+    At most max_conn requests run at the same time, each on its own Curl
+    handle. A handle keeps its connection open once the request is done,
+    so the TLS handshake is done once per handle instead of once per request.
+    """
+
+    def __init__(self, hostname, max_conn=HMC_MAX_CONNECTIONS,
+                 retries=HMC_RETRIES, retry_delay=HMC_RETRY_DELAY):
+        self.hostname = hostname
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.slots = threading.BoundedSemaphore(max_conn)
+        self.lock = threading.Lock()
+        self.handles = []
+        self.relogon = None     # called with the run and the rejected session key on HTTP 401
+
+    def _acquire(self):
+        """
+        Wait for a free slot and return an idle handle, or a new one
+        """
+        self.slots.acquire()
+        with self.lock:
+            if self.handles:
+                return self.handles.pop()
+        return pycurl.Curl()
+
+    def _release(self, c):
+        """
+        Give the handle back to the pool, None if it has been closed
+        """
+        if c is not None:
+            with self.lock:
+                self.handles.append(c)
+        self.slots.release()
+
+    def perform(self, run, sess_key, url, filename):
+        """
+        Perform a single GET request and write the result in file
+
+        Input: (Vioshc) run to log the request in
+        Input: (str) HMC session key
+        Input: (str) URL for the request
+        Input: (str) file name to put the result
+        Output:(int) O if success, !0 in case of error
+        Output:(str) error message in case of error (can be None)
+        """
+        try:
+            f = open(filename, 'wb')
+        except IOError as e:
+            run.fail(3, 'ERROR: Failed to create file {0}: {1}.'.format(filename, e.strerror))
+
+        xml_invalidate(filename)
+        hdrs = ['X-API-Session:{0}'.format(sess_key)]
+        hdr = BytesIO()
+
+        c = self._acquire()
+        done = False
+        try:
+            # reset the options of the previous request, not the connection
+            c.reset()
+            c.setopt(c.NOSIGNAL, 1)
+            c.setopt(c.HTTPHEADER, hdrs)
+            c.setopt(c.URL, url)
+            c.setopt(c.SSL_VERIFYPEER, False)
+            c.setopt(c.WRITEDATA, f)
+            c.setopt(pycurl.HEADERFUNCTION, hdr.write)
+            c.perform()
+            http_code = c.getinfo(pycurl.HTTP_CODE)
+            done = True
+        except pycurl.error as e:
+            run.write("ERROR: Request to {0} failed: {1}.".format(url, e), lvl=0)
+            return 1, str(e)
+        finally:
+            # whatever the error, the slot is given back and a handle
+            # left in an unknown state is closed
+            f.close()
+            if not done:
+                c.close()
+                c = None
+            self._release(c)
+
+        # Get the http code and message to precise the error
+        status_lines = [line for line in hdr.getvalue().decode('latin-1').splitlines()
+                        if line.startswith('HTTP/')]
+        m = re.match(r'HTTP\/\S*\s*(\d+)\s*(.*)\s*$', status_lines[-1]) if status_lines else None
+        if m:
+            http_code = str(m.group(1))
+            http_message = " %s" % (str(m.group(2)))
+        else:
+            http_code = str(http_code)
+            http_message = ""
 
-    for ms in managed_system_info.keys():
-        for key in managed_system_info[ms].keys():
-            log("managed_system_info[{0}][{1}]: {2}\n".format(ms, key, managed_system_info[ms][key]))
+        if http_code != "200":
+            run.log("Curl returned '{0}{1}' for request '{2}'\n".format(http_code, http_message, url))
+            return http_code, http_message
 
-    return 0
+        return 0
 
+    def request(self, run, sess_key, url, filename):
+        """
+        Perform a GET request, retrying it on transient HTTP 5xx errors and
+        once with a new session key on HTTP 401
+
+        Input: (Vioshc) run to log the request in
+        Input: (str) HMC session key
+        Input: (str) URL for the request
+        Input: (str) file name to put the result
+        Output:(int) O if success, !0 in case of error
+        Output:(str) error message in case of error (can be None)
+        """
+        run.log("Curl request, sess_key: {0}, file: {1}, url: {2}\n".format(sess_key, filename, url))
+        delay = self.retry_delay
+        attempt = 1
+        relogged = False
+        while True:
+            ret = self.perform(run, sess_key, url, filename)
+            if ret != 0 and str(ret[0]) == '401' and self.relogon is not None and not relogged:
+                relogged = True
+                sess_key = self.relogon(run, sess_key)
+                if sess_key == "":
+                    return ret
+                continue
+            if ret == 0 or not str(ret[0]).startswith('5') or attempt >= self.retries:
+                return ret
+            run.log("Retrying request '{0}' in {1}s after HTTP {2}\n".format(url, delay, ret[0]))
+            time.sleep(delay)
+            delay *= 2
+            attempt += 1
 
-def get_session_key(hmc_info, filename):
-    """
-    Get a session key from the HMC with a Curl request
 
-    Input: (dict) hmc_info hash with HMC IP address, user ID, password
-    Inputs: (str) file name to write the HMC answer
-    Output: (str) session key
+class Hmc(object):
     """
-    s_key = ""
-    try:
-        f = open(filename, 'wb')
-    except IOError as e:
-        write("ERROR: Failed to create file {0}: {1}.".format(filename, e.strerror), lvl=0)
-        sys.exit(3)
-
-    url = "https://{0}:12443/rest/api/web/Logon".format(hmc_info['hostname'])
-    fields = '<LogonRequest schemaVersion=\"V1_0\" '\
-             'xmlns=\"http://www.ibm.com/xmlns/systems/power/firmware/web/mc/2012_10/\"  '\
-             'xmlns:mc=\"http://www.ibm.com/xmlns/systems/power/firmware/web/mc/2012_10/\"> '\
-             '<UserID>{0}</UserID>'\
-             .format(hmc_info['user_id'])
-
-    log("curl request on: {0}\n".format(url))
-    log("curl request fields: {0} <Password>xxx</Password></LogonRequest>\n".format(fields))
-    fields += ' <Password>{0}</Password></LogonRequest>'\
-              .format(hmc_info['user_password'])
-    hdrs = ['Content-Type: application/vnd.ibm.powervm.web+xml; type=LogonRequest']
+    State of an HMC shared by the runs done through it in the process.
 
-    try:
-        c = pycurl.Curl()
-        c.setopt(c.HTTPHEADER, hdrs)
-        c.setopt(c.CUSTOMREQUEST, "PUT")
-        c.setopt(c.POST, 1)
-        c.setopt(c.POSTFIELDS, fields)
-        c.setopt(c.URL, url)
-        c.setopt(c.SSL_VERIFYPEER, False)
-        c.setopt(c.WRITEDATA, f)
-        c.perform()
-    except pycurl.error as e:
-        write("ERROR: Curl request failed: {0}".format(e), lvl=0)
-        return ""
-
-    # Reopen the file in text mode
-    f.close()
-    try:
-        f = open(filename, 'r')
-    except IOError as e:
-        write("ERROR: Failed to create file {0}: {1}.".format(filename, e.strerror), lvl=0)
-        sys.exit(3)
-
-    # Isolate session key
-    for line in f:
-        if re.search('<X-API-Session', line):
-            s_key = re.sub(r'<[^>]*>', "", line)
+    The NIM info, credentials and session key are collected by the first
+    run connecting to the HMC, the managed systems and VIOSes by the first
+    run needing them. The next runs reuse them.
+    """
 
-    return s_key.strip()
+    def __init__(self, host):
+        self.host = host                    # as provided by the caller
+        self.lock = threading.Lock()        # serializes the collection
+        self.session_lock = threading.Lock()
+        self.info = None                    # hmc_info hash, None until connected
+        self.session_file = ""
+        self.client = None
+        self.managed_system_info = None     # None until discovered
+        self.vios_info = None
 
 
-def print_uuid(managed_system_info, vios_info, arg):
+def get_hmc(host):
     """
-    Print out managed system and VIOS UUIDs
+    Return the state of the HMC, shared by all the runs
 
-    Input:(dict) HMC info to get: IP address, session key
-    Input: (str) set arg flag to 'a' to print VIOS information
-    Output:(int) 0 for success, !0 otherwise
+    Input: (str) HMC IP address or hostname
+    Output:(Hmc) the state of the HMC
     """
-    write("\n%-37s    %-22s" % ("Managed Systems UUIDs", "Serial"), lvl=0)
-    write("-" * 37 + "    " + "-" * 22, 0)
-    for key in managed_system_info.keys():
-        write("%-37s    %-22s" % (key, managed_system_info[key]['serial']), lvl=0)
+    with hmcs_lock:
+        if host not in hmcs:
+            hmcs[host] = Hmc(host)
+        return hmcs[host]
 
-        if arg == 'a':
-            write("\n\t%-37s    %-14s" % ("VIOS", "Partition ID"), lvl=0)
-            write("\t" + "-" * 37 + "    " + "-" * 14, lvl=0)
-            for vios in managed_system_info[key]['vios']:
-                write("\t%-37s    %-14s" % (vios_info[vios]['uuid'], vios_info[vios]['id']), lvl=0)
-            write("", lvl=0)
-    write("", lvl=0)
-
-    return 0
 
 ###############################################################################
-# Parsing functions
+# Define functions
 ###############################################################################
 
+class Vioshc(object):
+    """
+    A run of vioshc: health check of a VIOS or pair of VIOSes, or listing of
+    the managed systems and VIOSes of an HMC.
+
+    The log file, xml directory, VIOS and LPAR info and results of the run
+    are kept in the object, so that several runs can be done in the same
+    process, in parallel if they use distinct objects.
+    """
+
+    def __init__(self, log_dir=LOG_DIR, verbose=0, debug=False, echo=False):
+        """
+        Create the log file and xml directory of the run
+
+        Input: (str)  directory of the log file and xml directory
+        Input: (int)  verbosity, lines of greater level are only logged
+        Input: (bool) debug mode: keep the xml directory
+        Input: (bool) print the lines written on stdout
+        Output: raises VioshcError upon error
+        """
+        self.log_dir = log_dir
+        self.verbose = verbose
+        self.mode = "debug" if debug else "no"
+        self.echo = echo
+        self.log_file = None
+        self.output = []        # lines written, up to the verbosity level
+        self.checks = []        # results of the health checks
+        self.num_hc_pass = 0
+        self.num_hc_fail = 0
+        self.vios_info = {}
+        self.lpar_info = {}
+
+        try:
+            os.makedirs(log_dir)
+        except OSError as e:
+            if not os.path.isdir(log_dir):
+                raise VioshcError(3, "ERROR: Failed to create log directory {0}: {1}."
+                                     .format(log_dir, e.strerror))
+
+        # Log file format is vioshc_YYYY_mm_dd_HHMMSS.log
+        # the runs started in the same second get a sequence number
+        today = datetime.now()
+        stamp = "%04d_%02d_%d_%02d%02d%02d" \
+                % (today.year, today.month, today.day, today.hour, today.minute, today.second)
+        seq = 0
+        while True:
+            suffix = stamp if seq == 0 else "{0}_{1}".format(stamp, seq)
+            self.xml_dir = "{0}/xml_dir_{1}".format(log_dir, suffix)
+            try:
+                os.mkdir(self.xml_dir)
+                break
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise VioshcError(3, "ERROR: Failed to create directory {0}: {1}."
+                                         .format(self.xml_dir, e.strerror))
+                seq += 1
+        self.log_path = "{0}/vioshc_{1}.log".format(log_dir, suffix)
+        try:
+            self.log_file = open(self.log_path, 'a+', 1)
+        except IOError as e:
+            shutil.rmtree(self.xml_dir, ignore_errors=True)
+            raise VioshcError(3, "ERROR: Failed to create log file {0}: {1}."
+                                 .format(self.log_path, e.strerror))
+
+        # Set xml files path names
+        self.filename_session_key = "{0}/sessionkey.xml".format(self.xml_dir)
+        self.filename_systems = "{0}/systems.xml".format(self.xml_dir)
+        self.filename_lpar_info = "{0}/lpar_info.xml".format(self.xml_dir)
+        self.filename_msg = "{0}/msg.txt".format(self.xml_dir)
+
+    def close(self):
+        """
+        End the run: remove the xml directory unless in debug mode and
+        close the log file
+        """
+        xml_forget(self.xml_dir)
+        if self.mode != "debug":
+            shutil.rmtree(self.xml_dir, ignore_errors=True)
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+    ###########################################################################
+    # File manipulation functions #
+    ###########################################################################
+
+    def touch(self, path):
+        """
+        Create file
+
+        Input: (str) file path
+        Output: none
+        """
+        self.log("creating file: {0}\n".format(path))
+        try:
+            open(path, 'a').close()
+        except IOError as e:
+            self.fail(3, 'ERROR: Failed to create file {0}: {1}.'.format(path, e.strerror))
+        os.utime(path, None)
+
+    def log(self, txt, debug='no'):
+        """
+        Write debug trace in the log file
+
+        Input: (str) text to write
+        Input: (str) level of the trace, writes if set to 'debug'
+        Output: none
+        """
+        if (self.mode == 'debug' or self.mode == debug) and self.log_file is not None:
+            self.log_file.write(txt)
+
+    def debug(self, txt):
+        """
+        Write debug trace in the log file, as the Ansible module debug
+        method used by run_pool
+
+        Input: (str) text to write
+        Output: none
+        """
+        self.log(txt + '\n', 'debug')
+
+    def write(self, txt, lvl=1):
+        """
+        Write provided text on stdout and in log file depneding of the level
+
+        Input: (str) text to write
+        Input: (int) level, if 0 then prints out, used for: ERROR, WARNING, etc.
+                              >0, verbose needs to be greater than lvl to see it
+        Output: none
+        """
+        self.log(txt + '\n')
+        if self.verbose >= lvl:
+            self.output.append(txt)
+            if self.echo:
+                print(txt)
+
+    def fail(self, rc, txt):
+        """
+        Write the error message and end the run
+
+        Input: (int) exit code of the command
+        Input: (str) error message
+        Output: raises VioshcError
+        """
+        self.write(txt, lvl=0)
+        raise VioshcError(rc, txt)
+
+    def report(self, check, status, txt):
+        """
+        Write and count the result of a health check
+
+        Input: (str) name of the health check
+        Input: (str) PASS or FAIL
+        Input: (str) message
+        Output: none
+        """
+        self.write(txt, lvl=0)
+        self.checks.append({'check': check, 'status': status, 'msg': txt})
+        if status == 'PASS':
+            self.num_hc_pass += 1
+        else:
+            self.num_hc_fail += 1
+
+    def remove(self, path):
+        """
+        Remove file
+
+        Input: (str) file path
+        Output: none
+        """
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+            else:
+                self.log('file {0} does not exists.\n'.format(path))
+        except OSError as e:
+            self.write('ERROR: Failed to remove file {0}: {1}.'.format(path, e.strerror), lvl=0)
+
+    def exec_cmd(self, cmd):
+        """
+        Execute the given command
+
+        Input: (str) return code of command
+        Output:(int) stdout of the command
+        Output:(str) stderr of the command
+        """
+        rc = 0
+        output = ''
+        errout = ''
+        th_id = threading.current_thread().ident
+        stderr_file = os.path.join(self.log_dir, 'cmd_stderr_{0}'.format(th_id))
+        try:
+            myfile = open(stderr_file, 'w')
+            output = subprocess.check_output(cmd, stderr=myfile)
+            myfile.close()
+            if not isinstance(output, str):
+                output = output.decode('utf-8', 'replace')
+            s = re.search(r'rc=([-\d]+)$', output)
+            if s:
+                rc = int(s.group(1))
+                output = re.sub(r'rc=[-\d]+\n$', '', output)  # remove the rc of c_rsh with echo $?
+
+        except subprocess.CalledProcessError as exc:
+            myfile.close()
+            exc_output = exc.output
+            if not isinstance(exc_output, str):
+                exc_output = exc_output.decode('utf-8', 'replace')
+            errout = re.sub(r'rc=[-\d]+\n$', '', exc_output)  # remove the rc of c_rsh with echo $?
+            rc = exc.returncode
+            self.write('Command: {0} failed: {1}'.format(cmd, exc.args), lvl=0)
+
+        except (OSError, IOError) as exc:
+            myfile.close()
+            if exc.args:
+                match = re.match(r'rc=[-\d]+\n$', exc.args[1])
+                if match:
+                    errout = re.sub(r'rc=[-\d]+\n$', '', exc.args[1])  # remove the rc of c_rsh with echo $?
+                    rc = exc.args[0]
+                else:
+                    rc = 1
+                    self.write('Command: {0} failed, exception: {1}'.format(cmd, exc), lvl=0)
+            else:
+                rc = 1
+                self.write('Command: {0} failed, exception: {1}'.format(cmd, exc), lvl=0)
 
-def grep(filename, tag):
-    """
-    Parse through xml to find tag value
-
-    Inputs: (str) XML file name to parse
-    Inputs: (str) tag to look for
-    Output: (str) value
-    """
-    format_xml_file(filename)
-    try:
-        tree = ET.ElementTree(file=filename)
-    except IOError as e:
-        log("WARNING: Failed to parse '{0}' to find '{1}' tag.\n".format(filename, tag))
-        return ""
-    except ET.ParseError as e:
-        log("WARNING: Failed to parse '{0}' to find '{1}' tag.\n".format(filename, tag))
-        return ""
-
-    iter_ = tree.getiterator()
-    for elem in iter_:
-        if re.sub(r'{[^>]*}', "", elem.tag) == tag:
-            return elem.text
-    return ""
-
-
-def grep_array(filename, tag):
-    """
-    Parse through xml file to create list of tag values
-
-    Inputs: (str)   XML file name to parse
-    Inputs: (str)   tag to look for
-    Output: (array) values corresponding to given tag
-    """
-    format_xml_file(filename)
-    arr = []
-    try:
-        tree = ET.ElementTree(file=filename)
-    except IOError as e:
-        log("WARNING: Failed to parse '{0}' to find '{1}' tag.\n".format(filename, tag))
-        return arr
-    except ET.ParseError as e:
-        log("WARNING: Failed to parse '{0}' to find '{1}' tag.\n".format(filename, tag))
+        except Exception as exc:
+            rc = 1
+            self.write('Command: {0} failed, exception: {1}'.format(cmd, exc.args), lvl=0)
+
+        # check for error message
+        if os.path.getsize(stderr_file) > 0:
+            myfile = open(stderr_file, 'r')
+            errout += ''.join(myfile)
+            myfile.close()
+        os.remove(stderr_file)
+
+        self.log('command {0} returned:\n'.format(cmd))
+        self.log(' rc:{0}\n'.format(rc))
+        self.log(' stdout:{0}\n'.format(output))
+        self.log(' stderr:{0}\n'.format(errout))
+        return (rc, output, errout)
+
+    ###########################################################################
+    # Interfacing functions
+    ###########################################################################
+
+    def retrieve_usr_pass(self, hmc_info):
+        """
+        Retrieve the username and password
+
+        Input: (str) hmc internet address
+        Output:(str) username
+        Output:(str) password
+        """
+        if hmc_info is None or 'type' not in hmc_info or 'passwd_file' not in hmc_info:
+            self.write('ERROR: Failed to retrieve user ID and password for {0}'
+                       .format(hmc_info['hostname']), lvl=0)
+            return ("", "")
+
+        (user, passwd) = ("", "")
+        decrypt_file = self.get_decrypt_file(hmc_info['passwd_file'],
+                                             hmc_info['type'],
+                                             hmc_info['hostname'])
+        if decrypt_file != '':
+            (user, passwd) = self.get_usr_passwd(decrypt_file)
+        return (user, passwd)
+
+    def get_nim_info(self, obj_name):
+        """
+        Get detailed on the provided Network Installation Management (NIM) object
+
+        Input: (str) NIM object name to look for
+        Output:(str) hash with NIM info, the associated value can be a list
+        """
+        info = {}
+
+        cmd = ['/usr/sbin/lsnim', '-l', obj_name]
+        (rc, output, errout) = self.exec_cmd(cmd)
+        if rc != 0:
+            self.write('ERROR: Failed to get {0} NIM info: {1} {2}'.format(obj_name, output, errout), lvl=0)
+            return None
+
+        for line in output.split('\n'):
+            match = re.match(r'^\s*(\S+)\s*=\s*(\S+)\s*$', line)
+            if match:
+                if match.group(1) not in info:
+                    info[match.group(1)] = match.group(2)
+                elif type(info[match.group(1)]) is list:
+                    info[match.group(1)].append(match.group(2))
+                else:
+                    info[match.group(1)] = [info[match.group(1)]]
+                    info[match.group(1)].append(match.group(2))
+        return info
+
+    def get_nim_name(self, hostname):
+        """
+        Get NIM client name associated with the given hostname
+
+        Input: (str) hostname of the NIM client to look for
+        Output:(str) NIM object name
+        """
+        name = ""
+
+        cmd = ['lsnim', '-a', 'if1']
+        (rc, output, errout) = self.exec_cmd(cmd)
+        if rc != 0:
+            self.write('ERROR: Failed to get NIM name for {0}: {1} {2}'
+                       .format(hostname, output, errout), lvl=0)
+            return ""
+
+        for line in output.split('\n'):
+            match = re.match(r'^\s*(\S+)\s*:\s*$', line)
+            if match:
+                name = match.group(1)
+                continue
+            match = re.match(r'^\s*if1\s*=\s*\S+\s+(\S+).*$', line)
+            if match and match.group(1) != hostname:
+                name = ""
+                continue
+            else:
+                break
+        if name == "":
+            self.write('ERROR: Failed to get NIM name for {0}: Not Found'
+                       .format(hostname), lvl=0)
+        return name
+
+    def get_hostname(self, host):
+        """
+        Get network information from either IP address or hostname
+
+        Input: (str) IP address or hostname
+        Output:      a triple (hostname, aliaslist, ipaddrlist)
+                     with
+                     - hostname:   primary host name responding to the given ip_address
+                     - aliaslist:  list of alternative host names for the same address (can be empty)
+                     - ipaddrlist: list of IPv4 addresses for the same interface on the same host
+        """
+        try:
+            match_key = re.match(r'^\d+.*$', host)
+            if match_key:
+                return socket.gethostbyaddr(host)
+            else:
+                return socket.gethostbyname_ex(host)
+        except (socket.error, OSError) as e:
+            self.fail(3, "ERROR: Failed to get hostname for {0}: {1}.".format(host, e))
+
+    def get_decrypt_file(self, passwd_file, type, hostname):
+        """
+        Decrypt the encrypted password file
+
+        Input: (str) password file
+        Input: (str) managed type
+        Input: (str) managed hostname
+        Output:(str) decrypted file
+        """
+        self.log("getting decrypt file: {0} for {1} {2}\n".format(passwd_file, type, hostname))
+
+        cmd = ["/usr/bin/dkeyexch", "-f", passwd_file, "-I", type, "-H", hostname, "-S"]
+        (rc, output, errout) = self.exec_cmd(cmd)
+        if rc != 0:
+            self.write("ERROR: Failed to get the encrypted password file path for {0}: {1} {2}"
+                       .format(hostname, output, errout), lvl=0)
+            return ""
+
+        # dkeyexch output is like:
+        # OpenSSH_6.0p1, OpenSSL 1.0.2h  3 May 2016
+        # /var/ibm/sysmgt/dsm/tmp/dsm1608597933307771402.tmp
+        return output.rstrip().split('\n')[1]
+
+    def get_usr_passwd(self, decrypt_file):
+        """
+        Read the decrypted file and returns the username and password
+
+        Input: (str) decrypted file
+        Output:(str) username
+        Output:(str) password
+        """
+        try:
+            f = open(decrypt_file, 'r')
+        except IOError as e:
+            self.fail(3, "ERROR: Failed to open file {0}: {1}.".format(decrypt_file, e.strerror))
+        arr = f.read().split(' ')
+        f.close()
         return arr
-    iter_ = tree.getiterator()
-    for elem in iter_:
-        if re.sub(r'{[^>]*}', "", elem.tag) == tag:
-            arr.append(elem.text)
-    return arr
-
-
-def grep_check(filename, tag):
-    """
-    Check for existence of tag in file
 
-    Inputs: (str)  XML file name to parse
-    Inputs: (str)  tag to look for
-    Output: (bool) True if the tag is present
-    Output: True if tag exists, False otherwise
-    """
-
-    # format_xml_file(filename)
-    found = False
-    try:
-        tree = ET.ElementTree(file=filename)
-    except IOError as e:
-        log("WARNING: Failed to parse '{0}' to find '{1}' tag.\n".format(filename, tag))
-        return found
-    except ET.ParseError as e:
-        log("WARNING: Failed to parse '{0}' to find '{1}' tag.\n".format(filename, tag))
-        return found
-    iter_ = tree.getiterator()
-    for elem in iter_:
-        if re.sub(r'{[^>]*}', "", elem.tag) == tag:
-            found = True
-    return found
-
-
-def awk(filename, tag1, tag2):
-    """
-    Parse through specific sections of xml file to create a list of tag values
-
-    Inputs: (str)  XML file name to parse
-    Inputs: (str)  outer tag
-    Inputs: (str)  inner tag
-    Output:(array) values corresponding to given tags
-    """
-    arr = []
-    try:
-        tree = ET.ElementTree(file=filename)
-    except IOError as e:
-        log("WARNING: Failed to parse '{0}' to find '{1}' and '{2}' tags.\n"
-            .format(filename, tag1, tag2))
-        return arr
-    except ET.ParseError as e:
-        log("WARNING: Failed to parse '{0}' to find '{1}' and '{2}' tags.\n"
-            .format(filename, tag1, tag2))
-        return arr
-    iter_ = tree.getiterator()
-    for elem in iter_:
-        if re.sub(r'{[^>]*}', "", elem.tag) == tag1:
-            elem_child = elem.getchildren()
-            for child in elem_child:
-                if re.sub(r'{[^>]*}', "", child.tag) == tag2:
-                    arr.append(child.text)
-    return arr
+    # TODO: change the xml parsing in build_managed_system?
+    def build_managed_system(self, hmc, vios_info, managed_system_info, xml_file):
+        """
+        Retrieve managed systems, VIOS UUIDs and machine SerialNumber information
+        from provided XML file.
+
+        Input: (Hmc) HMC state to get its hostname and session key
+        Input:  (str) xml_file of managed systems to parse
+        Output:(dict) VIOSes information
+        Output:(dict) managed systems and their SerialNumbers and VIOSes
+        """
+        curr_managed_sys = ""  # string to hold current managed system being searched
+        vios_num = 0
+
+        self.log("Parse xml file: {0}\n".format(xml_file))
+        try:
+            tree = ET.ElementTree(file=xml_file)
+        except (IOError, ET.ParseError):
+            self.fail(3, "ERROR: Failed to parse '{0}' file.".format(xml_file))
+
+        self.log("Get managed system serial numbers\n")
+        for elem in tree.iter():
+            # Retrieving the current Managed System
+            if re.sub(r'{[^>]*}', "", elem.tag) == "entry":
+                for child in list(elem):
+                    if re.sub(r'{[^>]*}', "", child.tag) != "id":
+                        continue
+                    if child.text in managed_system_info:
+                        continue
+                    curr_managed_sys = child.text
+                    self.log("get managed system UUID: {0}\n".format(curr_managed_sys))
+                    managed_system_info[curr_managed_sys] = {}
+                    managed_system_info[curr_managed_sys]['serial'] = "Not Found"
+                    managed_system_info[curr_managed_sys]['vios'] = []
+
+            if re.sub(r'{[^>]*}', "", elem.tag) == "MachineTypeModelAndSerialNumber":
+                # string to append to the managed system dict
+                serial_string = ""
+                for serial_child in list(elem):
+                    if re.sub(r'{[^>]*}', "", serial_child.tag) == "MachineType":
+                        serial_string += serial_child.text + "-"
+                    if re.sub(r'{[^>]*}', "", serial_child.tag) == "Model":
+                        serial_string += serial_child.text + "*"
+                    if re.sub(r'{[^>]*}', "", serial_child.tag) == "SerialNumber":
+                        serial_string += serial_child.text
+                # Adding the serial to the current Managed System
+                managed_system_info[curr_managed_sys]['serial'] = serial_string
+
+            if re.sub(r'{[^>]*}', "", elem.tag) == "AssociatedVirtualIOServers":
+                self.write("Retrieving the VIOS UUIDs", lvl=2)
+
+                # The VIOS UUIDs are in the "link" attribute
+                for child in list(elem):
+                    if re.sub(r'{[^>]*}', "", child.tag) != "link":
+                        continue
+                    match = re.match(r'^.*VirtualIOServer\/(\S+)$', child.attrib['href'])
+                    if match:
+                        uuid = match.group(1)
+                        vios_num += 1
+
+                        self.write("Collect info on clients of VIOS{0}: {1}".format(vios_num, uuid), lvl=2)
+                        filename = "{0}/vios{1}.xml".format(self.xml_dir, vios_num)
+                        rc = self.get_vios_info(hmc, uuid, filename)
+                        if rc != 0:
+                            self.write("WARNING: Failed to collect vios {0} info: {1}"
+                                       .format(uuid, rc[1]), lvl=1)
+                            continue
+
+                        vios_name = self.build_vios_info(vios_info, filename, uuid)
+                        if vios_name == "":
+                            continue
+
+                        vios_info[vios_name]['managed_system'] = curr_managed_sys
+                        vios_info[vios_name]['filename'] = filename
+                        # the file belongs to this run, keep what the next runs need
+                        # TBC - ConnectingPartitionID is present in VirtualFibreChannelMapping elem
+                        vios_info[vios_name]['clients'] = self.awk(filename, 'ServerAdapter',
+                                                                   'ConnectingPartitionID')
+                        for key in vios_info[vios_name].keys():
+                            self.log("vios_info[{0}][{1}] = {2}\n"
+                                     .format(vios_name, key, vios_info[vios_name][key]))
+
+                        managed_system_info[curr_managed_sys]['vios'].append(vios_name)
+
+        for ms in managed_system_info.keys():
+            for key in managed_system_info[ms].keys():
+                self.log("managed_system_info[{0}][{1}]: {2}\n".format(ms, key, managed_system_info[ms][key]))
 
+        return 0
 
-def build_vios_info(vios_info, filename, vios_uuid):
-    """
-    Parse VirtualIOServer XML file to build the vios_info hash
+    def get_session_key(self, hmc_info, filename):
+        """
+        Get a session key from the HMC with a Curl request
+
+        Input: (dict) hmc_info hash with HMC IP address, user ID, password
+        Inputs: (str) file name to write the HMC answer
+        Output: (str) session key
+        """
+        s_key = ""
+        try:
+            f = open(filename, 'wb')
+        except IOError as e:
+            self.fail(3, "ERROR: Failed to create file {0}: {1}.".format(filename, e.strerror))
+
+        url = "https://{0}:{1}/rest/api/web/Logon".format(hmc_info['hostname'], HMC_PORT)
+        fields = '<LogonRequest schemaVersion=\"V1_0\" '\
+                 'xmlns=\"http://www.ibm.com/xmlns/systems/power/firmware/web/mc/2012_10/\"  '\
+                 'xmlns:mc=\"http://www.ibm.com/xmlns/systems/power/firmware/web/mc/2012_10/\"> '\
+                 '<UserID>{0}</UserID>'\
+                 .format(hmc_info['user_id'])
+
+        self.log("curl request on: {0}\n".format(url))
+        self.log("curl request fields: {0} <Password>xxx</Password></LogonRequest>\n".format(fields))
+        fields += ' <Password>{0}</Password></LogonRequest>'\
+                  .format(hmc_info['user_password'])
+        hdrs = ['Content-Type: application/vnd.ibm.powervm.web+xml; type=LogonRequest']
+
+        try:
+            c = pycurl.Curl()
+            c.setopt(c.HTTPHEADER, hdrs)
+            c.setopt(c.CUSTOMREQUEST, "PUT")
+            c.setopt(c.POST, 1)
+            c.setopt(c.POSTFIELDS, fields)
+            c.setopt(c.URL, url)
+            c.setopt(c.SSL_VERIFYPEER, False)
+            c.setopt(c.WRITEDATA, f)
+            c.perform()
+        except pycurl.error as e:
+            self.write("ERROR: Curl request failed: {0}".format(e), lvl=0)
+            f.close()
+            return ""
+
+        # Reopen the file in text mode
+        f.close()
+        try:
+            f = open(filename, 'r')
+        except IOError as e:
+            self.fail(3, "ERROR: Failed to create file {0}: {1}.".format(filename, e.strerror))
+
+        # Isolate session key
+        for line in f:
+            if re.search('<X-API-Session', line):
+                s_key = re.sub(r'<[^>]*>', "", line)
+        f.close()
 
-    Input:(dict) VIOS info to fill
-    Input: (str) XML file name
-    Input: (str) VIOS uuid to look for
-    Output:(str) VIOS name use in dictionary if success,
-           prints error message and exits upon error
-    """
-    ns = {'Atom': 'http://www.w3.org/2005/Atom',
-          'vios': 'http://www.ibm.com/xmlns/systems/power/firmware/uom/mc/2012_10/'}
-    try:
-        e_tree = ET.parse(filename)
-    except IOError as e:
-        write("ERROR: Failed to parse {0} for {1}: {2}."
-              .format(filename, vios_uuid, e), lvl=0)
-        sys.exit(3)
-    except ET.ParseError as e:
-        write("ERROR: Failed to parse {0} for {1}: {2}".format(filename, vios_uuid, e), lvl=0)
-        sys.exit(3)
-    e_root = e_tree.getroot()
-
-    # NOTE: Some VIOSes do not return PartitionName element
-    #       so in that case we use the short hostname as hash
-    #       key and replace partition name by this short hostname
-
-    # Get element: ResourceMonitoringIPAddress
-    e_RMIPAddress = e_root.find(
-        "Atom:content/vios:VirtualIOServer/vios:ResourceMonitoringIPAddress",
-        ns)
-    if e_RMIPAddress is None:
-        write("WARNING: ResourceMonitoringIPAddress element not found in file {0} for {1}"
-              .format(filename, vios_uuid), lvl=1)
-        return ""
-        # sys.exit(3)
-
-    # Get the hostname
-    (hostname, aliases, ip_list) = get_hostname(e_RMIPAddress.text)
-    vios_name = hostname.split(".")[0]
-
-    vios_info[vios_name] = {}
-    vios_info[vios_name]['uuid'] = vios_uuid
-    vios_info[vios_name]['hostname'] = hostname
-    vios_info[vios_name]['ip'] = e_RMIPAddress.text
-
-    # Get element: PartitionName
-    e_PartionName = e_root.find("Atom:content/vios:VirtualIOServer/vios:PartitionName", ns)
-    if e_PartionName is None:
-        write("ERROR: PartitionName element not found in file {0}".format(filename), lvl=0)
-        del vios_info[vios_name]
-        return ""
-        # sys.exit(3)
-    else:
-        vios_info[vios_name]['partition_name'] = e_PartionName.text
-
-    # Get element: PartitionID
-    e_PartionID = e_root.find("Atom:content/vios:VirtualIOServer/vios:PartitionID", ns)
-    if e_PartionID is None:
-        write("ERROR: PartitionID element not found in file {0}".format(filename), lvl=0)
-        del vios_info[vios_name]
-        return ""
-        # sys.exit(3)
-    else:
-        vios_info[vios_name]['id'] = e_PartionID.text
-
-    # Get element: PartitionState
-    e_PartitionState = e_root.find("Atom:content/vios:VirtualIOServer/vios:PartitionState", ns)
-    if e_PartitionState is None:
-        write("ERROR: PartitionState element not found in file {0}".format(filename), lvl=0)
-        vios_info[vios_name]['partition_state'] = "none"
-        # sys.exit(3)
-    else:
-        vios_info[vios_name]['partition_state'] = e_PartitionState.text
-
-    # Get element: ResourceMonitoringControlState
-    e_RMCState = e_root.find(
-        "Atom:content/vios:VirtualIOServer/vios:ResourceMonitoringControlState",
-        ns)
-    if e_RMCState is None:
-        write("ERROR: ResourceMonitoringControlState element not found in file {0}"
-              .format(filename), lvl=0)
-        vios_info[vios_name]['control_state'] = e_RMCState.text
-        # sys.exit(3)
-    else:
-        vios_info[vios_name]['control_state'] = "none"
-
-    return vios_name
-
-
-def build_lpar_info(lpar_info, filename):
-    """
-    Parse the XML file to build the lpar_info hash. Retrieves partition ID
+        return s_key.strip()
+
+    def load_session_key(self, hmc_info, session_file):
+        """
+        Get the session key of the HMC saved by a previous run in the session file
+
+        Input: (dict) hmc_info hash with HMC hostname and user ID
+        Input: (str) session file, empty for none
+        Output: (str) session key, empty if not saved or expired
+        """
+        if session_file == "":
+            return ""
+        try:
+            with open(session_file, 'r') as f:
+                sessions = json.load(f)
+        except (IOError, OSError, ValueError):
+            return ""
+        session = sessions.get("{0}|{1}".format(hmc_info['hostname'], hmc_info.get('user_id', '')))
+        if not session or time.time() - session['time'] > SESSION_TTL:
+            return ""
+        self.log("Reusing the session key of {0} saved in {1}\n".format(hmc_info['hostname'], session_file))
+        return session['session_key']
+
+    def save_session_key(self, hmc_info, session_file, session_key):
+        """
+        Atomically save the session key of the HMC in the session file,
+        readable by root only
+
+        Input: (dict) hmc_info hash with HMC hostname and user ID
+        Input: (str) session file, empty for none
+        Input: (str) session key
+        Output: none
+        """
+        if session_file == "":
+            return
+        try:
+            with open(session_file, 'r') as f:
+                sessions = json.load(f)
+        except (IOError, OSError, ValueError):
+            sessions = {}
+        now = time.time()
+        sessions = dict((key, session) for key, session in sessions.items()
+                        if now - session['time'] <= SESSION_TTL)
+        sessions["{0}|{1}".format(hmc_info['hostname'], hmc_info.get('user_id', ''))] = \
+            {'session_key': session_key, 'time': now}
+
+        tmp_file = "{0}.{1}.{2}".format(session_file, os.getpid(), threading.current_thread().ident)
+        try:
+            if not os.path.exists(os.path.dirname(session_file)):
+                os.makedirs(os.path.dirname(session_file), 0o700)
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(sessions, f)
+            os.rename(tmp_file, session_file)
+        except (IOError, OSError) as e:
+            self.log("WARNING: Failed to save the session key in {0}: {1}\n".format(session_file, e))
+
+    def renew_session_key(self, hmc, stale_key):
+        """
+        Log on the HMC again when the HMC rejects the session key, once for
+        all the requests using the same stale key
+
+        Input: (Hmc) HMC state
+        Input: (str) session key rejected by the HMC
+        Output:(str) new session key, empty if the logon failed
+        """
+        hmc_info = hmc.info
+        with hmc.session_lock:
+            if hmc_info['session_key'] == stale_key:
+                self.write("Session key of {0} expired, getting a new one".format(hmc_info['hostname']), lvl=2)
+                hmc_info['session_key'] = self.get_session_key(hmc_info, self.filename_session_key)
+                if hmc_info['session_key'] != "":
+                    self.save_session_key(hmc_info, hmc.session_file, hmc_info['session_key'])
+            return hmc_info['session_key']
+
+    def connect(self, host, user_id="", password="", session_file=""):
+        """
+        Get the NIM info, credentials and session key of the HMC, once for
+        all the runs of the process
+
+        Input: (str) HMC IP address or hostname
+        Input: (str) HMC user ID, retrieved with the NIM password file if empty
+        Input: (str) HMC user password, retrieved with the NIM password file if empty
+        Input: (str) file saving the HMC session key for the next processes, empty for none
+        Output:(Hmc) HMC state,
+               raises VioshcError upon error
+        """
+        hmc = get_hmc(host)
+        with hmc.lock:
+            if hmc.info is not None:
+                self.log("Reusing the {0} info and session key of a previous run\n".format(host))
+                return hmc
+
+            self.write("Getting HMC {0} info".format(host), lvl=2)
+            # Get the HMC hostname in case user provided the short name or an IP address
+            (hostname, aliases, ip_list) = self.get_hostname(host)
+            self.log("hmc {0} hostname: {1}\n".format(host, hostname))
+
+            # Retrieve the NIM object name matching the hostname
+            nim_name = self.get_nim_name(hostname)
+            self.log("hmc {0} nim_name: {1}\n".format(hostname, nim_name))
+            if nim_name == "":
+                raise VioshcError(3, "Failed to get NIM name for {0}".format(hostname))
+
+            # Gets all NIM attributes for the HMC
+            hmc_info = self.get_nim_info(nim_name)
+            if hmc_info is None:
+                self.fail(3, "ERROR: Failed to retrieve HMC info.")
+            hmc_info['nim_name'] = nim_name
+            hmc_info['hostname'] = hostname
+            hmc_info['ip'] = ip_list[0]
+
+            for key in hmc_info.keys():
+                self.log("hmc_info[%-13s] = %s\n" % (key, hmc_info[key]))
+
+            self.write("Getting HMC credentials", lvl=2)
+            # If either username or password are empty, try to retrieve them
+            if (password == "") or (user_id == ""):
+                self.write("Retrieving HMC user id and password", lvl=2)
+                (user_id, password) = self.retrieve_usr_pass(hmc_info)
+            if (user_id != ""):
+                hmc_info['user_id'] = user_id
+            if (password != ""):
+                hmc_info['user_password'] = password
+
+            self.write("Getting HMC session key", lvl=2)
+            session_key = self.load_session_key(hmc_info, session_file)
+            if session_key == "":
+                session_key = self.get_session_key(hmc_info, self.filename_session_key)
+                if session_key == "":
+                    self.fail(3, "ERROR: Failed to get {0} session key.".format(host))
+                self.save_session_key(hmc_info, session_file, session_key)
+            hmc_info['session_key'] = session_key
+
+            hmc.session_file = session_file
+            hmc.client = HmcClient(hostname)
+            # log on again if the session key has expired
+            hmc.client.relogon = lambda run, stale_key: run.renew_session_key(hmc, stale_key)
+            hmc.info = hmc_info
+        return hmc
+
+    def discover(self, hmc):
+        """
+        Get the managed systems and VIOSes of the HMC, once for all the
+        runs of the process
+
+        Input: (Hmc) HMC state
+        Output: none, fills hmc.managed_system_info and hmc.vios_info,
+                raises VioshcError upon error
+        """
+        with hmc.lock:
+            if hmc.managed_system_info is not None:
+                self.log("Reusing the managed systems of {0} collected by a previous run\n".format(hmc.host))
+                return
+
+            self.log("\nGet Managed System info\n")
+            rc = self.get_managed_system(hmc, self.filename_systems)
+            if rc != 0:
+                self.fail(2, "ERROR: Failed to collect managed system info: {0}".format(rc[1]))
+            vios_info = {}
+            managed_system_info = {}
+            self.build_managed_system(hmc, vios_info, managed_system_info, self.filename_systems)
+            hmc.vios_info = vios_info
+            hmc.managed_system_info = managed_system_info
+
+    def list_uuids(self, hmc):
+        """
+        List the managed systems and VIOSes of the HMC
+
+        Input: (Hmc) HMC state
+        Output:(dict) per managed system UUID, its 'serial' and in 'vios' the
+                      'uuid' and partition 'id' of each of its VIOSes,
+               raises VioshcError upon error
+        """
+        self.discover(hmc)
+        systems = {}
+        for ms in hmc.managed_system_info.keys():
+            systems[ms] = {'serial': hmc.managed_system_info[ms]['serial'], 'vios': []}
+            for vios in hmc.managed_system_info[ms]['vios']:
+                systems[ms]['vios'].append({'uuid': hmc.vios_info[vios]['uuid'],
+                                            'id': hmc.vios_info[vios]['id']})
+        return systems
+
+    def print_uuid(self, systems, arg):
+        """
+        Print out managed system and VIOS UUIDs
+
+        Input:(dict) managed systems and VIOSes as returned by list_uuids
+        Input: (str) set arg flag to 'a' to print VIOS information
+        Output:(int) 0 for success, !0 otherwise
+        """
+        self.write("\n%-37s    %-22s" % ("Managed Systems UUIDs", "Serial"), lvl=0)
+        self.write("-" * 37 + "    " + "-" * 22, 0)
+        for key in systems.keys():
+            self.write("%-37s    %-22s" % (key, systems[key]['serial']), lvl=0)
+
+            if arg == 'a':
+                self.write("\n\t%-37s    %-14s" % ("VIOS", "Partition ID"), lvl=0)
+                self.write("\t" + "-" * 37 + "    " + "-" * 14, lvl=0)
+                for vios in systems[key]['vios']:
+                    self.write("\t%-37s    %-14s" % (vios['uuid'], vios['id']), lvl=0)
+                self.write("", lvl=0)
+        self.write("", lvl=0)
 
-    Input:(dict) LPAR info to fill
-    Input: (str) XML file name
-    Output:(int) 0 if success,
-           prints error message and exits upon error
-    """
-    ns = {'Atom': 'http://www.w3.org/2005/Atom',
-          'lpar': 'http://www.ibm.com/xmlns/systems/power/firmware/uom/mc/2012_10/'}
-    try:
-        e_tree = ET.parse(filename)
-    except IOError as e:
-        write("ERROR: Failed to parse {0}: {1}.".format(filename, e.strerror), lvl=0)
-        sys.exit(3)
-    except ET.ParseError as e:
-        write("ERROR: Failed to parse {0}: {1}".format(filename, e), lvl=0)
-        sys.exit(3)
-    e_root = e_tree.getroot()
-
-    # Get partitions UUID: element: id
-    e_Partitions = e_root.findall("Atom:entry", ns)
-    if e_Partitions is None:
-        write("ERROR: Cannot get entry element in file {0}".format(filename), lvl=0)
-        sys.exit(3)
-    elif len(e_Partitions) == 0:
-        write("No partion found in file {0}".format(filename), lvl=1)
         return 0
 
-    for e_Partition in e_Partitions:
-        # Get element: PartitionID
-        e_PartitionID = e_Partition.find("Atom:content/lpar:LogicalPartition/lpar:PartitionID", ns)
-        if e_PartitionID is None:
-            write("ERROR: PartitionID element not found in file {0}".format(filename), lvl=0)
-            sys.exit(3)
-        lpar_info[e_PartitionID.text] = {}
-
-        e_PartitionUUID = e_Partition.find("Atom:id", ns)
-        if e_PartitionUUID is None:
-            write("ERROR: id element of PartitionID:{0} entry not found in file {1}"
-                  .format(e_PartitionID.text, filename), lvl=0)
-            sys.exit(3)
-        lpar_info[e_PartitionID.text]['uuid'] = e_PartitionUUID.text
+    ###########################################################################
+    # Parsing functions
+    ###########################################################################
+
+    def xml_values(self, filename, paths):
+        """
+        Collect the values of the tag paths in the XML file (see xml_extract)
+
+        Inputs: (str)  XML file name to parse
+        Inputs: (list) tag paths to look for
+        Output: (dict) list of the values of each path, None if the file cannot be parsed
+        """
+        values = xml_extract(filename, paths)
+        if values is None:
+            self.log("WARNING: Failed to parse '{0}' to find {1}.\n".format(filename, paths))
+        return values
+
+    def grep(self, filename, tag):
+        """
+        Parse through xml to find tag value
+
+        Inputs: (str) XML file name to parse
+        Inputs: (str) tag to look for
+        Output: (str) value
+        """
+        values = self.xml_values(filename, [tag])
+        if not values or not values[tag]:
+            return ""
+        return values[tag][0]
+
+    def grep_array(self, filename, tag):
+        """
+        Parse through xml file to create list of tag values
+
+        Inputs: (str)   XML file name to parse
+        Inputs: (str)   tag to look for
+        Output: (array) values corresponding to given tag
+        """
+        values = self.xml_values(filename, [tag])
+        if not values:
+            return []
+        return list(values[tag])
+
+    def grep_check(self, filename, tag):
+        """
+        Check for existence of tag in file
+
+        Inputs: (str)  XML file name to parse
+        Inputs: (str)  tag to look for
+        Output: (bool) True if tag exists, False otherwise
+        """
+        values = self.xml_values(filename, [tag])
+        return bool(values and values[tag])
+
+    def awk(self, filename, tag1, tag2):
+        """
+        Parse through specific sections of xml file to create a list of tag values
+
+        Inputs: (str)  XML file name to parse
+        Inputs: (str)  outer tag
+        Inputs: (str)  inner tag
+        Output:(array) values corresponding to given tags
+        """
+        path = '{0}/{1}'.format(tag1, tag2)
+        values = self.xml_values(filename, [path])
+        if not values:
+            return []
+        return list(values[path])
+
+    def build_vios_info(self, vios_info, filename, vios_uuid):
+        """
+        Parse VirtualIOServer XML file to build the vios_info hash
+
+        Input:(dict) VIOS info to fill
+        Input: (str) XML file name
+        Input: (str) VIOS uuid to look for
+        Output:(str) VIOS name use in dictionary if success,
+               raises VioshcError upon error
+        """
+        ns = {'Atom': 'http://www.w3.org/2005/Atom',
+              'vios': 'http://www.ibm.com/xmlns/systems/power/firmware/uom/mc/2012_10/'}
+        try:
+            e_tree = ET.parse(filename)
+        except (IOError, ET.ParseError) as e:
+            self.fail(3, "ERROR: Failed to parse {0} for {1}: {2}.".format(filename, vios_uuid, e))
+        e_root = e_tree.getroot()
+
+        # NOTE: Some VIOSes do not return PartitionName element
+        #       so in that case we use the short hostname as hash
+        #       key and replace partition name by this short hostname
+
+        # Get element: ResourceMonitoringIPAddress
+        e_RMIPAddress = e_root.find(
+            "Atom:content/vios:VirtualIOServer/vios:ResourceMonitoringIPAddress",
+            ns)
+        if e_RMIPAddress is None:
+            self.write("WARNING: ResourceMonitoringIPAddress element not found in file {0} for {1}"
+                       .format(filename, vios_uuid), lvl=1)
+            return ""
+
+        # Get the hostname
+        (hostname, aliases, ip_list) = self.get_hostname(e_RMIPAddress.text)
+        vios_name = hostname.split(".")[0]
+
+        vios_info[vios_name] = {}
+        vios_info[vios_name]['uuid'] = vios_uuid
+        vios_info[vios_name]['hostname'] = hostname
+        vios_info[vios_name]['ip'] = e_RMIPAddress.text
 
         # Get element: PartitionName
-        e_PartionName = e_Partition.find("Atom:content/lpar:LogicalPartition/lpar:PartitionName",
-                                         ns)
+        e_PartionName = e_root.find("Atom:content/vios:VirtualIOServer/vios:PartitionName", ns)
         if e_PartionName is None:
-            write("ERROR: PartitionName element of PartitionID={0} not found in file {1}"
-                  .format(e_PartitionID.text, filename), lvl=0)
-            sys.exit(3)
-        lpar_info[e_PartitionID.text]['name'] = e_PartionName.text
+            self.write("ERROR: PartitionName element not found in file {0}".format(filename), lvl=0)
+            del vios_info[vios_name]
+            return ""
+        else:
+            vios_info[vios_name]['partition_name'] = e_PartionName.text
 
-    return 0
+        # Get element: PartitionID
+        e_PartionID = e_root.find("Atom:content/vios:VirtualIOServer/vios:PartitionID", ns)
+        if e_PartionID is None:
+            self.write("ERROR: PartitionID element not found in file {0}".format(filename), lvl=0)
+            del vios_info[vios_name]
+            return ""
+        else:
+            vios_info[vios_name]['id'] = e_PartionID.text
 
+        # Get element: PartitionState
+        e_PartitionState = e_root.find("Atom:content/vios:VirtualIOServer/vios:PartitionState", ns)
+        if e_PartitionState is None:
+            self.write("ERROR: PartitionState element not found in file {0}".format(filename), lvl=0)
+            vios_info[vios_name]['partition_state'] = "none"
+        else:
+            vios_info[vios_name]['partition_state'] = e_PartitionState.text
+
+        # Get element: ResourceMonitoringControlState
+        e_RMCState = e_root.find(
+            "Atom:content/vios:VirtualIOServer/vios:ResourceMonitoringControlState",
+            ns)
+        if e_RMCState is None:
+            self.write("ERROR: ResourceMonitoringControlState element not found in file {0}"
+                       .format(filename), lvl=0)
+            vios_info[vios_name]['control_state'] = "none"
+        else:
+            vios_info[vios_name]['control_state'] = e_RMCState.text
+
+        return vios_name
+
+    def build_lpar_info(self, lpar_info, filename):
+        """
+        Parse the XML file to build the lpar_info hash. Retrieves partition ID
+
+        Input:(dict) LPAR info to fill
+        Input: (str) XML file name
+        Output:(int) 0 if success,
+               raises VioshcError upon error
+        """
+        ns = {'Atom': 'http://www.w3.org/2005/Atom',
+              'lpar': 'http://www.ibm.com/xmlns/systems/power/firmware/uom/mc/2012_10/'}
+        try:
+            e_tree = ET.parse(filename)
+        except (IOError, ET.ParseError) as e:
+            self.fail(3, "ERROR: Failed to parse {0}: {1}".format(filename, e))
+        e_root = e_tree.getroot()
+
+        # Get partitions UUID: element: id
+        e_Partitions = e_root.findall("Atom:entry", ns)
+        if e_Partitions is None:
+            self.fail(3, "ERROR: Cannot get entry element in file {0}".format(filename))
+        elif len(e_Partitions) == 0:
+            self.write("No partion found in file {0}".format(filename), lvl=1)
+            return 0
+
+        for e_Partition in e_Partitions:
+            # Get element: PartitionID
+            e_PartitionID = e_Partition.find("Atom:content/lpar:LogicalPartition/lpar:PartitionID", ns)
+            if e_PartitionID is None:
+                self.fail(3, "ERROR: PartitionID element not found in file {0}".format(filename))
+            lpar_info[e_PartitionID.text] = {}
+
+            e_PartitionUUID = e_Partition.find("Atom:id", ns)
+            if e_PartitionUUID is None:
+                self.fail(3, "ERROR: id element of PartitionID:{0} entry not found in file {1}"
+                             .format(e_PartitionID.text, filename))
+            lpar_info[e_PartitionID.text]['uuid'] = e_PartitionUUID.text
+
+            # Get element: PartitionName
+            e_PartionName = e_Partition.find("Atom:content/lpar:LogicalPartition/lpar:PartitionName",
+                                             ns)
+            if e_PartionName is None:
+                self.fail(3, "ERROR: PartitionName element of PartitionID={0} not found in file {1}"
+                             .format(e_PartitionID.text, filename))
+            lpar_info[e_PartitionID.text]['name'] = e_PartionName.text
 
-###############################################################################
-# c_rsh functions
-###############################################################################
+        return 0
 
+    ###########################################################################
+    # c_rsh functions
+    ###########################################################################
+
+    def get_vios_sea_state(self, vios_name, sea_device):
+        """
+        Parse an XML file to get the SEA device state
+
+        Input: (str) VIOS name
+        Input: (str) SEA device name
+        Output:(int) 0 if success
+        Output:(str) SEA device state,
+               prints error message upon error
+        """
+        state = ""
+
+        # file to get all SEA info (debug)
+        filename = "{0}/{1}_{2}.txt".format(self.xml_dir, vios_name, sea_device)
+        try:
+            f = open(filename, 'w+')
+        except IOError as e:
+            self.write("ERROR: Failed to create file {0}: {1}.".format(filename, e.strerror), lvl=0)
+            f = None
+
+        # ssh into vios1
+        cmd = [C_RSH, self.vios_info[vios_name]['hostname'],
+               "LC_ALL=C /bin/entstat -d {0}; echo rc=$?".format(sea_device)]
+        self.log("SharedEthernetAdapter cmd='{0}'\n".format(cmd))
+        (rc, output, errout) = self.exec_cmd(cmd)
+        if rc != 0:
+            self.write("ERROR: Failed to get the state of the {0} SEA adapter on {1}: {2} {3}"
+                       .format(sea_device, vios_name, output, errout), lvl=0)
+            if f is not None:
+                f.close()
+            return (1, "")
+
+        found_stat = False
+        found_packet = False
+        for line in output.rstrip().split('\n'):
+            # file to get all SEA info (for debug)
+            if not (f is None):
+                f.write("{0}\n".format(line))
+
+            if not found_stat:
+                # Statistics for adapters in the Shared Ethernet Adapter entX
+                match_key = re.match(r"^Statistics for adapters in the Shared Ethernet Adapter {0}"
+                                     .format(sea_device), line)
+                if match_key:
+                    found_stat = True
+                    continue
 
-def get_vios_sea_state(vios_name, sea_device):
-    """
-    Parse an XML file to get the SEA device state
-
-    Input:(dict) LPAR info to fill
-    Input: (str) VIOS name
-    Input: (str) SEA device name
-    Output:(int) 0 if success
-    Output:(str) SEA device state,
-           prints error message and exits upon error
-    """
-    global vios_info
-    global xml_dir
+            if not found_packet:
+                # Type of Packets Received:
+                match_key = re.match(r"^Type of Packets Received(.*)$", line)
+                if match_key:
+                    found_packet = True
+                    continue
 
-    state = ""
+            if found_packet:
+                # State: PRIMARY | BACKUP | STANDBY | ......
+                match_key = re.match(r"^\s+State:\s+(.*)$", line)
+                if match_key:
+                    state = match_key.group(1)
+                    found_stat = False
+                    found_packet = False
+                    continue
+        if f is not None:
+            f.close()
+
+        if state == "":
+            self.write("ERROR: Failed to get the state of the {0} SEA adapter on {1}: State field not found."
+                       .format(sea_device, vios_name), lvl=0)
+            return (1, "")
+
+        self.log("VIOS {0} sea adapter {1} is in {2} state".format(vios_name, sea_device, state))
+        return (0, state)
+
+    def get_vscsi_mapping(self, vios_name, vios_uuid):
+        """
+        Build vios_scsi_mapping dictionnary
+        from an XML file: <vios_name>_vscsi_mapping.xml
+
+        vios_scsi_mapping[UDID] = device_mapping dictionnary
+            device_mapping["Backing_device_Name"] = Backing_device_Name
+            device_mapping["Backing_device_Type"] = device_type
+            device_mapping["Reserve_policy"] = ReservePolicy
+            device_mapping["RemoteLParIDs"] = [] contains the list of client partition IDs
+
+        print device mapping table
+
+        Input:  (str) vios name
+        Input:  (str) vios UUID
+        Output:(dict) vios_scsi_mapping dictionnary
+        """
+        hmc_info = self.hmc.info
+        self.touch(self.filename_msg)
+
+        self.write("\nRecovering vSCSI mapping for {0}:".format(vios_name), 2)
+        filename = "{0}/{1}_vscsi_mapping.xml".format(self.xml_dir, vios_name)
+        # Get vSCSI info, write data to file
+        url = "https://{0}:{1}/rest/api/uom/VirtualIOServer/{2}?group=ViosSCSIMapping"\
+              .format(hmc_info['hostname'], HMC_PORT, vios_uuid)
+        self.curl_request(self.hmc, url, filename)
+
+        # Check for error response in file
+        if self.grep_check(filename, 'HttpErrorResponse'):
+            self.write("ERROR: Request to {0} returned Error Response.".format(url), lvl=0)
+            self.write("ERROR: Unable to detect vSCSI Information", lvl=0)
+
+        # Parse for backup device info
+        try:
+            tree = ET.ElementTree(file=filename)
+        except (IOError, ET.ParseError) as e:
+            self.fail(2, "ERROR: Failed to parse {0}: {1}".format(filename, e))
+        iter_ = list(tree.iter())
+        device_target_mapping = {}
+        for elem in iter_:
+            if re.sub(r'{[^>]*}', "", elem.tag) == 'ServerAdapter':
+                backing_device_name = ""
+                remote_logical_partition_id = ""
+                for child in list(elem):
+                    if re.sub(r'{[^>]*}', "", child.tag) == 'BackingDeviceName':
+                        backing_device_name = re.sub(r'<[^>]*>', "", child.text)
+                    if re.sub(r'{[^>]*}', "", child.tag) == 'RemoteLogicalPartitionID':
+                        remote_logical_partition_id = re.sub(r'<[^>]*>', "", child.text)
+                if backing_device_name not in device_target_mapping:
+                    device_target_mapping[backing_device_name] = []
+                device_target_mapping[backing_device_name].append(remote_logical_partition_id)
+
+        for dev in device_target_mapping:
+            device_target_mapping[dev].sort()
+
+        vios_scsi_mapping = {}
+        for elem in iter_:
+            backing_device_name = ""
+            backing_device_type = ""
+            UDID = ""
+            reserve_policy = ""
+            if re.sub(r'{[^>]*}', "", elem.tag) == 'Storage':
+                for child in list(elem):
+                    str_tag = re.sub(r'{[^>]*}', "", child.tag)
+
+                    if str_tag == 'PhysicalVolume':
+                        backing_device_type = "PhysicalVolume"
+                    if str_tag == 'LogicalUnit':
+                        backing_device_type = "ssp"
+                    if str_tag == 'VirtualDisk':
+                        backing_device_type = "LogicalVolume"
+                    if str_tag == "PhysicalVolume" or\
+                       str_tag == "LogicalUnit" or str_tag == "VirtualDisk":
+                        for kid in list(child):
+                            if re.sub(r'{[^>]*}', "", kid.tag) == 'VolumeName':
+                                backing_device_name = re.sub(r'<[^>]*>', "", kid.text)
+                            if re.sub(r'{[^>]*}', "", kid.tag) == 'UnitName':
+                                backing_device_name = re.sub(r'<[^>]*>', "", kid.text)
+                            if re.sub(r'{[^>]*}', "", kid.tag) == 'DiskName':
+                                backing_device_name = re.sub(r'<[^>]*>', "", kid.text)
+                            if re.sub(r'{[^>]*}', "", kid.tag) == 'ReservePolicy':
+                                reserve_policy = re.sub(r'<[^>]*>', "", kid.text)
+                            if re.sub(r'{[^>]*}', "", kid.tag) == 'UniqueDeviceID':
+                                UDID = re.sub(r'<[^>]*>', "", kid.text)
+                    else:
+                        continue
 
-    # file to get all SEA info (debug)
-    filename = "{0}/{1}_{2}.txt".format(xml_dir, vios_name, sea_device)
-    try:
-        f = open(filename, 'w+')
-    except IOError as e:
-        write("ERROR: Failed to create file {0}: {1}.".format(filename, e.strerror), lvl=0)
-        f = None
-
-    # ssh into vios1
-    cmd = [C_RSH, vios_info[vios_name]['hostname'],
-           "LC_ALL=C /bin/entstat -d {0}; echo rc=$?".format(sea_device)]
-    log("SharedEthernetAdapter cmd='{0}'\n".format(cmd))
-    (rc, output, errout) = exec_cmd(cmd)
-    if rc != 0:
-        write("ERROR: Failed to get the state of the {0} SEA adapter on {1}: {2} {3}"
-              .format(sea_device, vios_name, output, errout), lvl=0)
-        return (1, "")
-
-    found_stat = False
-    found_packet = False
-    for line in output.rstrip().split('\n'):
-        # file to get all SEA info (for debug)
-        if not (f is None):
-            f.write("{0}\n".format(line))
-
-        if not found_stat:
-            # Statistics for adapters in the Shared Ethernet Adapter entX
-            match_key = re.match(r"^Statistics for adapters in the Shared Ethernet Adapter {0}"
-                                 .format(sea_device), line)
-            if match_key:
-                found_stat = True
-                continue
+                vios_scsi_mapping[UDID] = {}
+                vios_scsi_mapping[UDID]["BackingDeviceName"] = backing_device_name
+                vios_scsi_mapping[UDID]["BackingDeviceType"] = backing_device_type
+                vios_scsi_mapping[UDID]["ReservePolicy"] = reserve_policy
+                vios_scsi_mapping[UDID]["RemoteLParIDs"] = []
+                if backing_device_name in device_target_mapping:
+                    vios_scsi_mapping[UDID]["RemoteLParIDs"] = \
+                        device_target_mapping[backing_device_name]
 
-        if not found_packet:
-            # Type of Packets Received:
-            match_key = re.match(r"^Type of Packets Received(.*)$", line)
-            if match_key:
-                found_packet = True
-                continue
+        if len(vios_scsi_mapping) == 0:
+            self.write("WARNING: no vSCSI disks configured on {0}.".format(vios_name), lvl=1)
 
-        if found_packet:
-            # State: PRIMARY | BACKUP | STANDBY | ......
-            match_key = re.match(r"^\s+State:\s+(.*)$", line)
-            if match_key:
-                state = match_key.group(1)
-                found_stat = False
-                found_packet = False
+        else:
+            self.write("\nvSCSI mapping on {0}:".format(vios_name), lvl=1)
+            vscsi_header = "Device Name     UDID                                             "\
+                           "                        Disk Type       Reserve Policy    Client LPar ID"
+            divider = "-----------------------------------------------------------------"\
+                      "------------------------------------------------------------------------"
+            format_string = "%-15s %-72s %-16s %-18s %-15s"
+            self.write(vscsi_header, lvl=1)
+            self.write(divider, lvl=1)
+
+            msg_txt = open(self.filename_msg, 'w+')
+
+            for udid in vios_scsi_mapping:
+                self.write(format_string % (vios_scsi_mapping[udid]["BackingDeviceName"],
+                           udid, vios_scsi_mapping[udid]["BackingDeviceType"],
+                           vios_scsi_mapping[udid]["ReservePolicy"],
+                           vios_scsi_mapping[udid]["RemoteLParIDs"]), lvl=1)
+            for udid in vios_scsi_mapping:
+                if vios_scsi_mapping[udid]["ReservePolicy"] == "SinglePath":
+                    msg = "WARNING: You have single path for {0} on VIOS {1} which is likely an issue"\
+                          .format(vios_scsi_mapping[udid]["BackingDeviceName"], vios_name)
+                    self.write(msg, lvl=1)
+                    msg_txt.write(msg)
+                elif vios_scsi_mapping[udid]["BackingDeviceType"] == "Other":
+                    msg = "WARNING: {0} is not supported by both VIOSes because it is of type {1}"\
+                          .format(vios_scsi_mapping[udid]["BackingDeviceName"],
+                                  vios_scsi_mapping[udid]["BackingDeviceType"])
+                    self.write(msg, lvl=1)
+                    msg_txt.write(msg)
+                elif vios_scsi_mapping[udid]["BackingDeviceType"] == "LogicalVolume":
+                    msg = "WARNING: This backing device: {0} is not accessible via both VIOSes"\
+                          .format(vios_scsi_mapping[udid]["BackingDeviceName"])
+                    self.write(msg, lvl=1)
+                    msg_txt.write(msg)
+            msg_txt.close()
+
+        return vios_scsi_mapping
+
+    def build_fc_mapping(self, vios_name, vios_uuid, fc_mapping):
+        """
+        Build fc_mapping dictionnary
+        from an XML file: <vios_name>__fc_mapping.xml
+
+        fc_mapping[server_name] = {}
+                  [server_name][client_name] = {}
+                  [server_name][client_name]["VirtualSlotsNumber"] = local slot number
+                  [server_name][client_name]["ConnectingVirtualSlotsNumber"] = remote slot number
+
+        Input:  (str) vios name
+        Input:  (str) vios UUID
+        Input: (dict) FC mapping to fill
+        Output: none
+        """
+        hmc_info = self.hmc.info
+        vios_info = self.vios_info
+        lpar_info = self.lpar_info
+
+        self.write("\nRecovering Fiber Chanel mapping for {0}:".format(vios_name), 2)
+        filename = "{0}/{1}_fc_mapping.xml".format(self.xml_dir, vios_name)
+
+        # build xml file using hmc curl reques
+        url = "https://{0}:{1}/rest/api/uom/VirtualIOServer/{2}?group=ViosFCMapping"\
+              .format(hmc_info['hostname'], HMC_PORT, vios_uuid)
+        self.curl_request(self.hmc, url, filename)  # Check for error response in file
+        if self.grep_check(filename, 'HttpErrorResponse'):
+            self.write("ERROR: Request to {0} returned Error Response.".format(url), lvl=0)
+            self.write("ERROR: Unable to detect vSCSI Information", lvl=0)
+
+        # Analize xml file
+        try:
+            tree = ET.ElementTree(file=filename)
+        except (IOError, ET.ParseError) as e:
+            self.fail(2, "ERROR: Failed to parse {0}: {1}".format(filename, e))
+
+        for elem in tree.iter():
+            if re.sub(r'{[^>]*}', "", elem.tag) == 'ServerAdapter':
+                LocalPartitionID = ''
+                VirtualSlotNumber = ''
+                ConnectingPartitionID = ''
+                ConnectingVirtualSlotNumber = ''
+                for child in list(elem):
+                    if re.sub(r'{[^>]*}', '', child.tag) == 'LocalPartitionID':
+                        LocalPartitionID = re.sub(r'<[^>]*>', "", child.text)
+                    if re.sub(r'{[^>]*}', '', child.tag) == 'VirtualSlotNumber':
+                        VirtualSlotNumber = re.sub(r'<[^>]*>', "", child.text)
+                    if re.sub(r'{[^>]*}', "", child.tag) == 'ConnectingPartitionID':
+                        ConnectingPartitionID = re.sub(r'<[^>]*>', "", child.text)
+                    if re.sub(r'{[^>]*}', "", child.tag) == 'ConnectingVirtualSlotNumber':
+                        ConnectingVirtualSlotNumber = re.sub(r'<[^>]*>', "", child.text)
+                if vios_info[vios_name]['id'] == LocalPartitionID:
+                    if ConnectingPartitionID in lpar_info:
+                        lpar_name = lpar_info[ConnectingPartitionID]["name"]
+                    else:
+                        lpar_name = ConnectingPartitionID
+                    fc_mapping[vios_name] = {}
+                    fc_mapping[vios_name][lpar_name] = {}
+                    fc_mapping[vios_name][lpar_name]['VirtualSlotNumber'] = VirtualSlotNumber
+                    fc_mapping[vios_name][lpar_name]['ConnectingVirtualSlotNumber'] = \
+                        ConnectingVirtualSlotNumber
+
+    def build_sea_config(self, vios_name, vios_uuid, sea_config):
+        """
+        Build sea_config dictionnary
+        from an XML file: <vios_name>_network.xml
+
+        sea_config[vios_name] = {}
+                  [vios_name][VLAN_IDs] = {}
+                  [vios_name][VLAN_IDs]["BackingDeviceName"] = "entx"
+                  [vios_name][VLAN_IDs]["BackingDeviceState"] = "Inactive/Disconnected/...."
+                  [vios_name][VLAN_IDs]["SEADeviceName"] = "entx"
+                  [vios_name][VLAN_IDs]["SEADeviceState"] = ""
+                  [vios_name][VLAN_IDs]["HighAvailabilityMode"] = "auto/sharing"
+                  [vios_name][VLAN_IDs]["Priority"] = priority
+
+        Input:  (str) vios name
+        Input:  (str) vios UUID
+        Input: (dict) SEA config to fill
+        Output: none
+        """
+        hmc_info = self.hmc.info
+
+        self.write("\nRecovering SEA configuration for {0}:".format(vios_name), 2)
+
+        sea_config[vios_name] = {}
+        filename = "{0}/{1}_network.xml".format(self.xml_dir, vios_name)
+
+        url = "https://{0}:{1}/rest/api/uom/VirtualIOServer/{2}?group=ViosNetwork"\
+              .format(hmc_info['hostname'], HMC_PORT, vios_uuid)
+        self.curl_request(self.hmc, url, filename)
+
+        if self.grep_check(filename, 'HttpErrorResponse'):
+            self.write("ERROR: Request to {0} returned Error Response."
+                       .format(url), lvl=0)
+            self.write("ERROR: Unable to detect vSCSI Information", lvl=0)
+
+        try:
+            tree = ET.ElementTree(file=filename)
+        except (IOError, ET.ParseError) as e:
+            self.fail(2, "ERROR: Failed to parse {0}: {1}".format(filename, e))
+
+        for elem in tree.iter():
+            if re.sub(r'{[^>]*}', "", elem.tag) == 'SharedEthernetAdapter':
+                HighAvailabilityMode = ""
+                VLANIDs = []
+                VLAN_IDs = ""
+                BackingDeviceName = "none"
+                BackingDeviceState = "none"
+                SEADeviceName = "none"
+                Priority = ""
+                for child in list(elem):
+                    if re.sub(r'{[^>]*}', "", child.tag) == 'BackingDeviceChoice':
+                        for child in list(child):
+                            if re.sub(r'{[^>]*}', "", child.tag) == 'EthernetBackingDevice':
+                                for child in list(child):
+                                    if re.sub(r'{[^>]*}', "", child.tag) == 'DeviceName':
+                                        BackingDeviceName = child.text
+                                    if re.sub(r'{[^>]*}', "", child.tag) == 'IPInterface':
+                                        for child in list(child):
+                                            if re.sub(r'{[^>]*}', "", child.tag) == 'State':
+                                                BackingDeviceState = child.text
+                    # if re.sub(r'{[^>]*}', "", child.tag) == 'PortVLANID':
+                        # VLANID = child.text
+                    if re.sub(r'{[^>]*}', "", child.tag) == 'HighAvailabilityMode':
+                        HighAvailabilityMode = child.text
+                    if re.sub(r'{[^>]*}', "", child.tag) == 'DeviceName':
+                        SEADeviceName = child.text
+                    if re.sub(r'{[^>]*}', "", child.tag) == 'TrunkAdapters':
+                        for child in list(child):
+                            if re.sub(r'{[^>]*}', "", child.tag) == 'TrunkAdapter':
+                                for child in list(child):
+                                    if re.sub(r'{[^>]*}', "", child.tag) == 'PortVLANID':
+                                        VLANIDs.append(child.text)
+                                    if re.sub(r'{[^>]*}', "", child.tag) == 'TrunkPriority':
+                                        Priority = child.text
+                VLANIDs.sort()
+                for id in VLANIDs:
+                    VLAN_IDs = VLAN_IDs + id + ","
+                VLAN_IDs = VLAN_IDs[:-1]
+                sea_config[vios_name][VLAN_IDs] = {}
+                sea_config[vios_name][VLAN_IDs]["BackingDeviceName"] = BackingDeviceName
+                sea_config[vios_name][VLAN_IDs]["BackingDeviceState"] = BackingDeviceState
+                sea_config[vios_name][VLAN_IDs]["SEADeviceName"] = SEADeviceName
+                sea_config[vios_name][VLAN_IDs]["SEADeviceState"] = ""
+                sea_config[vios_name][VLAN_IDs]["HighAvailabilityMode"] = HighAvailabilityMode
+                sea_config[vios_name][VLAN_IDs]["Priority"] = Priority
+        for vlan_id in sea_config[vios_name]:
+            (rc, state) = self.get_vios_sea_state(vios_name, sea_config[vios_name][vlan_id]["SEADeviceName"])
+            if rc == 0:
+                sea_config[vios_name][vlan_id]["SEADeviceState"] = state
+
+    ###########################################################################
+    # REST requests
+    ###########################################################################
+
+    def curl_request(self, hmc, url, filename):
+        """
+        Perform a Curl request with given URL and write the result in file
+
+        Input: (Hmc) HMC state to get its client and session key
+        Input: (str) URL for the request
+        Input: (str) file name to put the result
+        Output:(int) O if success, !0 in case of error
+        Output:(str) error message in case of error (can be None)
+        """
+        return hmc.client.request(self, hmc.info['session_key'], url, filename)
+
+    def fetch_lpar_files(self, get_func, ids, suffix):
+        """
+        Run a REST request for each client LPAR in parallel, the number of
+        concurrent requests being bounded by the HMC client
+
+        Input: (function) get_* method called with the HMC, the LPAR UUID
+                          and the file name to put the result
+        Input: (list) IDs of the client LPARs
+        Input: (str)  suffix of the file name of each LPAR
+        Output:(dict) file name of the result of each LPAR ID in lpar_info
+        """
+        lpar_info = self.lpar_info
+        files = {}
+        for id in ids:
+            if id in lpar_info:
+                files[id] = "{0}/{1}_{2}.xml".format(self.xml_dir, lpar_info[id]['name'], suffix)
+
+        errors = []
+
+        def fetch(id):
+            """
+            Run the request of a client LPAR, recording the error ending the
+            run to raise it in the calling thread
+            """
+            try:
+                get_func(self.hmc, lpar_info[id]['uuid'], files[id])
+            except BaseException as exc:
+                errors.append(exc)
+                raise
+
+        run_pool(self, fetch, list(files), HMC_MAX_CONNECTIONS)
+        if errors:
+            raise errors[0]
+        return files
+
+    def get_vios_info(self, hmc, vios_uuid, filename):
+        """
+        Get VIOS information given its UUID
+
+        Input: (Hmc) HMC state to get its hostname and session key
+        Input: (str) vios UUID
+        Input: (str) file name to put the result
+        Output:(int) O if success, !0 in case of error
+        Output:(str) error message in case of error (can be None)
+        """
+        url = "https://{0}:{1}/rest/api/uom/VirtualIOServer/{2}"\
+              .format(hmc.info['hostname'], HMC_PORT, vios_uuid)
+        return self.curl_request(hmc, url, filename)
+
+    def get_managed_system(self, hmc, filename):
+        """
+        Get managed systems information
+
+        Input: (Hmc) HMC state to get its hostname and session key
+        Input: (str) file name to put the result
+        Output:(int) O if success, !0 in case of error
+        Output:(str) error message in case of error (can be None)
+        """
+        url = "https://{0}:{1}/rest/api/uom/ManagedSystem".format(hmc.info['hostname'], HMC_PORT)
+        return self.curl_request(hmc, url, filename)
+
+    def get_managed_system_lpar(self, hmc, managed_system_uuid, filename):
+        """
+        Get LPARs of a managed system
+
+        Input: (Hmc) HMC state to get its hostname and session key
+        Input: (str) managed system UUID
+        Input: (str) file name to put the result
+        Output:(int) O if success, !0 in case of error
+        Output:(str) error message in case of error (can be None)
+        """
+        url = "https://{0}:{1}/rest/api/uom/ManagedSystem/{2}/LogicalPartition"\
+              .format(hmc.info['hostname'], HMC_PORT, managed_system_uuid)
+        return self.curl_request(hmc, url, filename)
+
+    def get_vfc_client_adapter(self, hmc, lpar, filename):
+        """
+        Get information on LPAR to see network connections
+
+        Input: (Hmc) HMC state to get its hostname and session key
+        Input: (str) managed system UUID
+        Input: (str) file name to put the result
+        Output:(int) O if success, !0 in case of error
+        Output:(str) error message in case of error (can be None)
+        """
+        url = "https://{0}:{1}/rest/api/uom/LogicalPartition/{2}/VirtualFibreChannelClientAdapter"\
+              .format(hmc.info['hostname'], HMC_PORT, lpar)
+        return self.curl_request(hmc, url, filename)
+
+    def get_vnic_info(self, hmc, uuid, filename):
+        """
+        Get information on VIOS Virtual NIC Dedicated adapter
+
+        Input: (Hmc) HMC state to get its hostname and session key
+        Input: (str) VIOS UUID
+        Input: (str) file name to put the result
+        Output:(int) O if success, !0 in case of error
+        Output:(str) error message in case of error (can be None)
+        """
+        url = "https://{0}:{1}/rest/api/uom/LogicalPartition/{2}/VirtualNICDedicated"\
+              .format(hmc.info['hostname'], HMC_PORT, uuid)
+        return self.curl_request(hmc, url, filename)
+
+    ###########################################################################
+    # Health checks
+    ###########################################################################
+
+    def check(self, hmc, managed_system_uuid, vios_uuids):
+        """
+        Check the health of a VIOS or pair of VIOSes from a rolling update
+        point of view
+
+        Input: (Hmc) HMC state, see connect
+        Input: (str) managed system UUID
+        Input:(list) UUIDs of the VIOSes, the first one is the primary
+        Output:(dict) results with
+                      'rc'       0 if all the health checks passed, 1 otherwise
+                      'checks'   'check', 'status' (PASS or FAIL) and 'msg'
+                                 of each health check
+                      'num_pass', 'num_fail' and 'pass_pct'
+                      'log_file' the log file of the run
+                      'output'   the lines written up to the verbosity level
+               raises VioshcError upon error
+        """
+        self.hmc = hmc
+        self.managed_system_uuid = managed_system_uuid
+        self.vios_num = len(vios_uuids)
+        self.vios1_uuid = vios_uuids[0]
+        self.vios2_uuid = vios_uuids[1] if self.vios_num > 1 else ""
+        self.discover(hmc)
+
+        self.select_vios()
+        self.collect_lpar_info()
+        active_client_id = self.check_active_clients()
+        self.check_vscsi()
+        self.check_fc_mapping(active_client_id)
+        self.check_sea()
+        self.check_vnic(active_client_id)
+
+        # Perform analysis on Pass and Fails
+        total_hc = self.num_hc_fail + self.num_hc_pass
+        pass_pct = self.num_hc_pass * 100 // total_hc if total_hc else 0
+        self.write("\n\n%d of %d Health Checks Passed" % (self.num_hc_pass, total_hc), lvl=0)
+        self.write("%d of %d Health Checks Failed" % (self.num_hc_fail, total_hc), lvl=0)
+        self.write("Pass rate of %d%%\n" % (pass_pct), lvl=0)
+
+        return {'rc': 0 if self.num_hc_pass == total_hc else 1,
+                'checks': self.checks,
+                'num_pass': self.num_hc_pass,
+                'num_fail': self.num_hc_fail,
+                'pass_pct': pass_pct,
+                'log_file': self.log_path,
+                'output': self.output}
+
+    def select_vios(self):
+        """
+        Get name and partition ID of the VIOSes of interest among the VIOSes
+        of the HMC, and check they are in the managed system
+
+        Output: none, fills vios_info, raises VioshcError upon error
+        """
+        self.write("Find VIOS(es) Name from specified UUID(s)", lvl=2)
+        vios_info = self.vios_info
+        self.vios1_name = ""
+        self.vios2_name = ""
+        for name in self.hmc.vios_info.keys():
+            if self.hmc.vios_info[name]['uuid'] == self.vios1_uuid:
+                self.vios1_name = name
+                vios_info[name] = dict(self.hmc.vios_info[name], role='primary')
+            elif self.vios_num > 1 and self.hmc.vios_info[name]['uuid'] == self.vios2_uuid:
+                self.vios2_name = name
+                vios_info[name] = dict(self.hmc.vios_info[name], role='secondary')
+        for name in vios_info.keys():
+            for key in vios_info[name].keys():
+                self.log("vios_info[{0}][{1}] = {2}\n".format(name, key, vios_info[name][key]))
+        rc = 0
+        if self.vios1_name == "":
+            self.write("ERROR: Failed to find VIOS1 {0} info.".format(self.vios1_uuid), lvl=0)
+            rc = 1
+        if self.vios_num > 1 and self.vios2_name == "":
+            self.write("ERROR: Failed to find VIOS2 {0} info.".format(self.vios2_uuid), lvl=0)
+            rc = 1
+        if rc != 0:
+            raise VioshcError(2, "Failed to find the VIOS info of {0}".format(" ".join(
+                [self.vios1_uuid, self.vios2_uuid][:self.vios_num])))
+
+        primary_header = "\nPrimary VIOS Name         IP Address      ID         UUID                "
+        backup_header = "\nBackup VIOS Name          IP Address      ID         UUID                "
+        divider = "-----------------------------------------------------------------------------------" \
+                  "--------------"
+        format = "%-25s %-15s %-10s %-40s "
+
+        for vios in vios_info.keys():
+            # If Resource Monitoring Control State is inactive, it will throw off our UUID/IP pairing
+            if (vios_info[vios]['control_state'] == "inactive"):
                 continue
 
-    if state == "":
-        write("ERROR: Failed to get the state of the {0} SEA adapter on {1}: State field not found."
-              .format(sea_device, vios_name), lvl=0)
-        return (1, "")
-
-    log("VIOS {0} sea adapter {1} is in {2} state".format(vios_name, sea_device, state))
-    return (0, state)
+            # If VIOS is not running, skip it otherwise it will throw off our UUID/IP pairing
+            if vios_info[vios]['partition_state'] == "not running":
+                continue
 
+            # Get VIOS1 info (original VIOS)
+            if vios_info[vios]['role'] == "primary":
+                self.write(primary_header, lvl=0)
+            else:
+                self.write(backup_header, lvl=0)
+
+            self.write(divider, lvl=0)
+            self.write(format % (vios_info[vios]['partition_name'], vios_info[vios]['ip'],
+                                 vios_info[vios]['id'], vios_info[vios]['uuid']), lvl=0)
+
+        # Check both vios are in the same CEC
+        for (num, name) in [(1, self.vios1_name), (2, self.vios2_name)][:self.vios_num]:
+            if vios_info[name]['managed_system'] != self.managed_system_uuid:
+                self.fail(2, "ERROR: VIOS{0} {1} (UUID: {2}) is on Managed System {3}, not {4}\n"
+                             .format(num, name, vios_info[name]['uuid'],
+                                     vios_info[name]['managed_system'],
+                                     self.managed_system_uuid))
+
+    def collect_lpar_info(self):
+        """
+        Get UUIDs of all LPARs that belong to the managed system that we
+        are interested in
+
+        Output: none, fills lpar_info, raises VioshcError upon error
+        """
+        # Get managed system LPAR info, write data to file
+        self.write("Collect LPAR info for managed system: {0}".format(self.managed_system_uuid), 2)
+        rc1 = self.get_managed_system_lpar(self.hmc, self.managed_system_uuid, self.filename_lpar_info)
+        if rc1 != 0:
+            self.fail(2, "ERROR: Failed to collect managed system {0} info: {1}"
+                         .format(self.managed_system_uuid, rc1[1]))
+
+        # Check for error response in file
+        if self.grep_check(self.filename_lpar_info, 'HttpErrorResponse'):
+            self.write("ERROR: Request to https://{0}:{1}/rest/api/uom/ManagedSystem/{2}/LogicalPartition \
+returned Error Response.".format(self.hmc.host, HMC_PORT, self.managed_system_uuid), lvl=0)
+            self.write("Unable to detect LPAR information.", lvl=0)
+
+        self.build_lpar_info(self.lpar_info, self.filename_lpar_info)
+
+        # Log VIOS information
+        for id in self.lpar_info.keys():
+            self.log("lpar[{0}]: {1}\n".format(id, str(self.lpar_info[id])))
+
+    def check_active_clients(self):
+        """
+        Check active clients are the same for VIOS1 and VIOS2
+
+        Output:(list) IDs of the active clients
+        """
+        vios_info = self.vios_info
+        lpar_info = self.lpar_info
+
+        self.write("Check active client(s):", lvl=2)
+        active_client_id = []
+        active_client = {}
+        diff_clients = []
+
+        # Find configured clients of VIOS1
+        active_client['vios1'] = vios_info[self.vios1_name]['clients']
+        self.log("active_client['vios1']: " + str(active_client['vios1']) + "\n")
+
+        if self.vios_num > 1:
+            # Find configured clients of VIOS2
+            active_client['vios2'] = vios_info[self.vios2_name]['clients']
+            self.log("active_client['vios2']: " + str(active_client['vios2']) + "\n")
+
+            # Check that both VIOSes have the same clients
+            # if they do not, all health-checks will fail and we cannot continue the program
+            for id in active_client['vios1']:
+                if (id not in active_client['vios2']) and (id not in diff_clients):
+                    diff_clients.append(id)
+            diff_clients.sort()
+            self.log("diff_clients: " + str(diff_clients) + "\n")
+
+        # Check for error response in file
+        if self.grep_check(self.filename_lpar_info, 'HttpErrorResponse'):
+            self.report('active_clients', 'FAIL', "FAIL: Unable to detect active clients")
+        elif len(diff_clients) == 0:
+            active_client_id = active_client['vios1']
+            if self.vios_num > 1:
+                self.report('active_clients', 'PASS', "PASS: Active client lists are the same for both VIOSes")
+            else:
+                self.num_hc_pass += 1
+        else:
+            self.report('active_clients', 'FAIL',
+                        "FAIL: Active clients lists are not the same for {0} and {1}, check these clients:"
+                        .format(self.vios1_name, self.vios2_name))
+            self.write(str(diff_clients), lvl=1)
+
+        self.write("\nActive clients information:", lvl=1)
+
+        header = "LPAR                      ID         UUID                            "
+        divider = "---------------------------------------------------------------------------"
+        format = "%-25s %-10s %-40s "
+        self.write(header, lvl=1)
+        self.write(divider, lvl=1)
+
+        # Print active clients, IDs, and UUIDs
+        for id in active_client_id:
+            if id in lpar_info:
+                self.write(format % (lpar_info[id]['name'], id, lpar_info[id]['uuid']), lvl=1)
+            else:
+                self.log("active_client_id '{0}' not lpar_info dictionary\n".format(id))
 
-def get_vscsi_mapping(vios_name, vios_uuid):
-    """
-    Build vios_scsi_mapping dictionnary
-    from an XML file: <vios_name>_vscsi_mapping.xml
+        return active_client_id
 
-    vios_scsi_mapping[UDID] = device_mapping dictionnary
-        device_mapping["Backing_device_Name"] = Backing_device_Name
-        device_mapping["Backing_device_Type"] = device_type
-        device_mapping["Reserve_policy"] = ReservePolicy
-        device_mapping["RemoteLParIDs"] = [] contains the list of client partition IDs
+    def check_vscsi(self):
+        """
+        Get vSCSI mappings and check they are the same on both VIOSes
+        """
+        self.write("\nvSCSI validation:", lvl=1)
+        vscsi1_mapping = self.get_vscsi_mapping(self.vios1_name, self.vios1_uuid)
 
-    print device mapping table
+        # Get vSCSI mappings for VIOS2 if VIOS tuple
+        if self.vios_num > 1:
+            vscsi2_mapping = self.get_vscsi_mapping(self.vios2_name, self.vios2_uuid)
 
-    Input:  (str) vios name
-    Input:  (str) vios UUID
-    Output:(dict) vios_scsi_mapping dictionnary
-    """
-    global filename_msg
-    global hmc_info
-    global xml_dir
-    touch(filename_msg)
-
-    write("\nRecovering vSCSI mapping for {0}:".format(vios_name), 2)
-    filename = "{0}/{1}_vscsi_mapping.xml".format(xml_dir, vios_name)
-    # Get vSCSI info, write data to file
-    url = "https://{0}:12443/rest/api/uom/VirtualIOServer/{1}?group=ViosSCSIMapping"\
-          .format(hmc_info['hostname'], vios_uuid)
-    curl_request(hmc_info['session_key'], url, filename)
-
-    # Check for error response in file
-    if grep_check(filename, 'HttpErrorResponse'):
-        write("ERROR: Request to {0} returned Error Response.".format(url), lvl=0)
-        write("ERROR: Unable to detect vSCSI Information", lvl=0)
-
-    # Parse for backup device info
-    try:
-        tree = ET.ElementTree(file=filename)
-    except IOError as e:
-        write("ERROR: Failed to parse {0}: {1}.".format(filename, e.strerror), lvl=0)
-        sys.exit(2)
-    except ET.ParseError as e:
-        write("ERROR: Failed to parse {0}: {1}".format(filename, e), lvl=0)
-        sys.exit(2)
-    iter_ = tree.getiterator()
-    device_target_mapping = {}
-    for elem in iter_:
-        if re.sub(r'{[^>]*}', "", elem.tag) == 'ServerAdapter':
-            backing_device_name = ""
-            remote_logical_partition_id = ""
-            elem_child = elem.getchildren()
-            for child in elem_child:
-                if re.sub(r'{[^>]*}', "", child.tag) == 'BackingDeviceName':
-                    backing_device_name = re.sub(r'<[^>]*>', "", child.text)
-                if re.sub(r'{[^>]*}', "", child.tag) == 'RemoteLogicalPartitionID':
-                    remote_logical_partition_id = re.sub(r'<[^>]*>', "", child.text)
-            if backing_device_name not in device_target_mapping:
-                device_target_mapping[backing_device_name] = []
-            device_target_mapping[backing_device_name].append(remote_logical_partition_id)
-
-    for dev in device_target_mapping:
-        device_target_mapping[dev].sort()
-
-    vios_scsi_mapping = {}
-    for elem in iter_:
-        backing_device_name = ""
-        backing_device_type = ""
-        UDID = ""
-        reserve_policy = ""
-        if re.sub(r'{[^>]*}', "", elem.tag) == 'Storage':
-            elem_child = elem.getchildren()
-            for child in elem_child:
-                str_tag = re.sub(r'{[^>]*}', "", child.tag)
-
-                if str_tag == 'PhysicalVolume':
-                    backing_device_type = "PhysicalVolume"
-                if str_tag == 'LogicalUnit':
-                    backing_device_type = "ssp"
-                if str_tag == 'VirtualDisk':
-                    backing_device_type = "LogicalVolume"
-                if str_tag == "PhysicalVolume" or\
-                   str_tag == "LogicalUnit" or str_tag == "VirtualDisk":
-                    sub_children = child.getchildren()
-                    for kid in sub_children:
-                        if re.sub(r'{[^>]*}', "", kid.tag) == 'VolumeName':
-                            backing_device_name = re.sub(r'<[^>]*>', "", kid.text)
-                        if re.sub(r'{[^>]*}', "", kid.tag) == 'UnitName':
-                            backing_device_name = re.sub(r'<[^>]*>', "", kid.text)
-                        if re.sub(r'{[^>]*}', "", kid.tag) == 'DiskName':
-                            backing_device_name = re.sub(r'<[^>]*>', "", kid.text)
-                        if re.sub(r'{[^>]*}', "", kid.tag) == 'ReservePolicy':
-                            reserve_policy = re.sub(r'<[^>]*>', "", kid.text)
-                        if re.sub(r'{[^>]*}', "", kid.tag) == 'UniqueDeviceID':
-                            UDID = re.sub(r'<[^>]*>', "", kid.text)
-                else:
-                    continue
+            # Compare the both vSCSI mapping
+            if vscsi1_mapping == vscsi2_mapping:
+                self.report('vscsi', 'PASS', "PASS: same vSCSI configuration on both VIOSes.")
+            else:
+                self.report('vscsi', 'FAIL', "FAIL: vSCSI configurations are not identical on both VIOSes.")
+
+    def check_fc_mapping(self, active_client_id):
+        """
+        Get Fibre Channel mappings and check they are the same on both VIOSes
+
+        Input:(list) IDs of the active clients
+        """
+        vios1_name = self.vios1_name
+        vios2_name = self.vios2_name
+        fc_mapping = {}
+        # fc_mapping[server_name] = {}
+        # fc_mapping[server_name][client_name] = {}
+        # fc_mapping[server_name][client_name]["VirtualSlotsNumber"] = local virtual slot number
+        # fc_mapping[server_name][client_name]["ConnectingVirtualSlotsNumber"] = remote virtual slot number
+        self.build_fc_mapping(vios1_name, self.vios1_uuid, fc_mapping)
+        if self.vios_num > 1:
+            # Fibre Channel mapping for VIOS2
+            self.build_fc_mapping(vios2_name, self.vios2_uuid, fc_mapping)
+
+        self.write("\nNPIV Path Validation:", lvl=1)
+
+        fc_header = "VIOS Name               Local VSlot   Remote VSlot     Client"
+        divider = "---------------------------------------------------------------------------"
+        format = "%-28s %-12s %-12s %-20s "
+        self.write(fc_header, lvl=1)
+        self.write(divider, lvl=1)
+
+        for server in fc_mapping:
+            for client in fc_mapping[server]:
+                self.write(format
+                           % (server, fc_mapping[server][client]["VirtualSlotNumber"],
+                              fc_mapping[server][client]["ConnectingVirtualSlotNumber"], client),
+                           lvl=1)
+
+        # Compares the both VIOS Fiber Channel mapping
+        if self.vios_num > 1:
+            if vios1_name not in fc_mapping and vios2_name not in fc_mapping:
+                self.report('fc_mapping', 'PASS', "PASS: no FC mapping configuration on both VIOSes.")
+            elif vios1_name not in fc_mapping or vios2_name not in fc_mapping:
+                self.report('fc_mapping', 'FAIL', "FAIL: FC configurations are not identical on both VIOSes.")
+            elif sorted(fc_mapping[vios1_name]) == sorted(fc_mapping[vios2_name]):
+                self.report('fc_mapping', 'PASS', "PASS: same FC mapping configuration on both VIOSes.")
+            else:
+                self.report('fc_mapping', 'FAIL', "FAIL: FC configurations are not identical on both VIOSes.")
+
+        # NPIV PATH VALIDATION
+        # TBC - the mig_vscsi notZoned checks of each client are disabled,
+        #       they were made here on the files fetched below
+        self.fetch_lpar_files(self.get_vfc_client_adapter, active_client_id, 'npiv_mapping')
+
+    def check_sea(self):
+        """
+        Get the SEA configuration of the VIOSes and check the SEAs are
+        configured for failover
+        """
+        vios1_name = self.vios1_name
+        vios2_name = self.vios2_name
+        sea_config = {}
+        self.build_sea_config(vios1_name, self.vios1_uuid, sea_config)
+        # sea_config[vios_name] = {}
+        #           [vios_name][VLANID] = {}
+        #           [vios_name][VLANID]["BackingDeviceName"] = "entx"
+        #           [vios_name][VLANID]["BackingDeviceState"] = "Inactive/Disconnected/...."
+        #           [vios_name][VLANID]["SEADeviceName"] = "entx"
+        #           [vios_name][VLANID]["SEADeviceState"] = "UNHEALTHY/PRIMARY/BACKUP/STANDBY"
+        #           [vios_name][VLANID]["HighAvailabilityMode"] = "auto/sharing"
+        #           [vios_name][VLANID]["Priority"] = priority
+        if self.vios_num > 1:
+            self.build_sea_config(vios2_name, self.vios2_uuid, sea_config)
+
+        self.write("\nSEA Validation:", lvl=1)
+        vios1_state = ""
+        vios2_state = ""
+
+        header = "VIOS                 VLAN(s)   HA MODE  SEA Dev   SEA State    Backing Dev  State     "
+        divider = "--------------------------------------------------------------------------------------"
+        format = "%-20s %-9s %-8s %-9s %-12s %-12s %-10s"
+
+        self.write(header, lvl=1)
+        self.write(divider, lvl=1)
+        for vlan_id in sea_config[vios1_name]:
+            self.write(format % (vios1_name, vlan_id,
+                       sea_config[vios1_name][vlan_id]["HighAvailabilityMode"],
+                       sea_config[vios1_name][vlan_id]["SEADeviceName"],
+                       sea_config[vios1_name][vlan_id]["SEADeviceState"],
+                       sea_config[vios1_name][vlan_id]["BackingDeviceName"],
+                       sea_config[vios1_name][vlan_id]["BackingDeviceState"]), lvl=1)
+        if self.vios_num > 1:
+            for vlan_id in sea_config[vios2_name]:
+                self.write(format % (vios2_name, vlan_id,
+                           sea_config[vios2_name][vlan_id]["HighAvailabilityMode"],
+                           sea_config[vios2_name][vlan_id]["SEADeviceName"],
+                           sea_config[vios2_name][vlan_id]["SEADeviceState"],
+                           sea_config[vios2_name][vlan_id]["BackingDeviceName"],
+                           sea_config[vios2_name][vlan_id]["BackingDeviceState"]), lvl=1)
+
+            for vlan_id in sea_config[vios1_name]:
+                vios1_state = sea_config[vios1_name][vlan_id]["SEADeviceState"]
+                if vlan_id in sea_config[vios2_name]:
+                    ha_mode1 = sea_config[vios1_name][vlan_id]["HighAvailabilityMode"]
+                    ha_mode2 = sea_config[vios2_name][vlan_id]["HighAvailabilityMode"]
+                    if ha_mode1 != "auto" and ha_mode1 != "sharing" or ha_mode1 != ha_mode2:
+                        self.report('sea', 'FAIL', "FAIL: SEA(s) deserving VLAN(s) {0} are not configured for failover."
+                                    .format(vlan_id))
+                        continue
 
-            vios_scsi_mapping[UDID] = {}
-            vios_scsi_mapping[UDID]["BackingDeviceName"] = backing_device_name
-            vios_scsi_mapping[UDID]["BackingDeviceType"] = backing_device_type
-            vios_scsi_mapping[UDID]["ReservePolicy"] = reserve_policy
-            vios_scsi_mapping[UDID]["RemoteLParIDs"] = []
-            if backing_device_name in device_target_mapping:
-                vios_scsi_mapping[UDID]["RemoteLParIDs"] = \
-                    device_target_mapping[backing_device_name]
-
-    if len(vios_scsi_mapping) == 0:
-        write("WARNING: no vSCSI disks configured on {0}.".format(vios_name), lvl=1)
-
-    else:
-        write("\nvSCSI mapping on {0}:".format(vios_name), lvl=1)
-        vscsi_header = "Device Name     UDID                                             "\
-                       "                        Disk Type       Reserve Policy    Client LPar ID"
-        divider = "-----------------------------------------------------------------"\
-                  "------------------------------------------------------------------------"
-        format_string = "%-15s %-72s %-16s %-18s %-15s"
-        write(vscsi_header, lvl=1)
-        write(divider, lvl=1)
-
-        msg_txt = open(filename_msg, 'w+')
-
-        for udid in vios_scsi_mapping:
-            write(format_string % (vios_scsi_mapping[udid]["BackingDeviceName"],
-                  udid, vios_scsi_mapping[udid]["BackingDeviceType"],
-                  vios_scsi_mapping[udid]["ReservePolicy"],
-                  vios_scsi_mapping[udid]["RemoteLParIDs"]), lvl=1)
-        for udid in vios_scsi_mapping:
-            if vios_scsi_mapping[udid]["ReservePolicy"] == "SinglePath":
-                msg = "WARNING: You have single path for {0} on VIOS {1} which is likely an issue"\
-                      .format(vios_scsi_mapping[udid]["BackingDeviceName"], vios_name)
-                write(msg, lvl=1)
-                msg_txt.write(msg)
-            elif vios_scsi_mapping[udid]["BackingDeviceType"] == "Other":
-                msg = "WARNING: {0} is not supported by both VIOSes because it is of type {1}"\
-                      .format(vios_scsi_mapping[udid]["BackingDeviceName"],
-                              vios_scsi_mapping[udid]["BackingDeviceType"])
-                write(msg, lvl=1)
-                msg_txt.write(msg)
-            elif vios_scsi_mapping[udid]["BackingDeviceType"] == "LogicalVolume":
-                msg = "WARNING: This backing device: {0} is not accessible via both VIOSes"\
-                      .format(vios_scsi_mapping[udid]["BackingDeviceName"])
-                write(msg, lvl=1)
-                msg_txt.write(msg)
-
-    return vios_scsi_mapping
-
-
-def build_fc_mapping(vios_name, vios_uuid, fc_mapping):
-    """
-    Build fc_mapping dictionnary
-    from an XML file: <vios_name>__fc_mapping.xml
-
-    fc_mapping[server_name] = {}
-              [server_name][client_name] = {}
-              [server_name][client_name]["VirtualSlotsNumber"] = local slot number
-              [server_name][client_name]["ConnectingVirtualSlotsNumber"] = remote slot number
-
-    Input:  (str) vios name
-    Input:  (str) vios UUID
-    Input: (dict) FC mapping to fill
-    Output: none
-    """
-    global hmc_info
-    global vios_info
-    global lpar_info
-
-    write("\nRecovering Fiber Chanel mapping for {0}:".format(vios_name), 2)
-    filename = "{0}/{1}_fc_mapping.xml".format(xml_dir, vios_name)
-
-    # build xml file using hmc curl reques
-    url = "https://{0}:12443/rest/api/uom/VirtualIOServer/{1}?group=ViosFCMapping"\
-          .format(hmc_info['hostname'], vios_uuid)
-    curl_request(hmc_info['session_key'], url, filename)  # Check for error response in file
-    if grep_check(filename, 'HttpErrorResponse'):
-        write("ERROR: Request to {0} returned Error Response.".format(url), lvl=0)
-        write("ERROR: Unable to detect vSCSI Information", lvl=0)
-
-    # Analize xml file
-    try:
-        tree = ET.ElementTree(file=filename)
-    except IOError as e:
-        write("ERROR: Failed to parse {0}: {1}.".format(filename, e.strerror), lvl=0)
-        sys.exit(2)
-    except ET.ParseError as e:
-        write("ERROR: Failed to parse {0}: {1}".format(filename, e), lvl=0)
-        sys.exit(2)
-    iter_ = tree.getiterator()
-
-    for elem in iter_:
-        if re.sub(r'{[^>]*}', "", elem.tag) == 'ServerAdapter':
-            LocalPartitionID = ''
-            VirtualSlotNumber = ''
-            ConnectingPartitionID = ''
-            ConnectingVirtualSlotNumber = ''
-            elem_child = elem.getchildren()
-            for child in elem_child:
-                if re.sub(r'{[^>]*}', '', child.tag) == 'LocalPartitionID':
-                    LocalPartitionID = re.sub(r'<[^>]*>', "", child.text)
-                if re.sub(r'{[^>]*}', '', child.tag) == 'VirtualSlotNumber':
-                    VirtualSlotNumber = re.sub(r'<[^>]*>', "", child.text)
-                if re.sub(r'{[^>]*}', "", child.tag) == 'ConnectingPartitionID':
-                    ConnectingPartitionID = re.sub(r'<[^>]*>', "", child.text)
-                if re.sub(r'{[^>]*}', "", child.tag) == 'ConnectingVirtualSlotNumber':
-                    ConnectingVirtualSlotNumber = re.sub(r'<[^>]*>', "", child.text)
-            if vios_info[vios_name]['id'] == LocalPartitionID:
-                if ConnectingPartitionID in lpar_info:
-                    lpar_name = lpar_info[ConnectingPartitionID]["name"]
+                    vios2_state = sea_config[vios2_name][vlan_id]["SEADeviceState"]
+                    if ("PRIMARY" in vios1_state and ("BACKUP" in vios2_state or "STANDBY" in vios2_state))\
+                       or ("PRIMARY" in vios2_state and
+                           ("BACKUP" in vios1_state or "STANDBY" in vios1_state)):
+                        self.report('sea', 'PASS', 'PASS: SEA(s) deserving VLAN(s) {0} are configured for failover.'
+                                    .format(vlan_id))
+                    elif (vios1_state == "LIMBO") and (vios2_state == "LIMBO"):
+                        self.report('sea', 'PASS', 'PASS: SEA(s) deserving VLAN(s) {0} are configured on both VIOSes but '
+                                    'not in usable state'.format(vlan_id))
+                    else:
+                        self.report('sea', 'FAIL', 'FAIL: SEA(s) deserving VLAN(s) {0} are not in the correct state for '
+                                    'HA operation.'.format(vlan_id))
+                elif vios1_state == "LIMBO" or vios1_state == "":
+                    self.write('PASS: SEA(s) deserving VLAN(s) {0} are not configured on both VIOSes but '
+                               'not in usable state.'.format(vlan_id), lvl=0)
                 else:
-                    lpar_name = ConnectingPartitionID
-                fc_mapping[vios_name] = {}
-                fc_mapping[vios_name][lpar_name] = {}
-                fc_mapping[vios_name][lpar_name]['VirtualSlotNumber'] = VirtualSlotNumber
-                fc_mapping[vios_name][lpar_name]['ConnectingVirtualSlotNumber'] = \
-                    ConnectingVirtualSlotNumber
-
-
-def build_sea_config(vios_name, vios_uuid, sea_config):
-    """
-    Build sea_config dictionnary
-    from an XML file: <vios_name>_network.xml
-
-    sea_config[vios_name] = {}
-              [vios_name][VLAN_IDs] = {}
-              [vios_name][VLAN_IDs]["BackingDeviceName"] = "entx"
-              [vios_name][VLAN_IDs]["BackingDeviceState"] = "Inactive/Disconnected/...."
-              [vios_name][VLAN_IDs]["SEADeviceName"] = "entx"
-              [vios_name][VLAN_IDs]["SEADeviceState"] = ""
-              [vios_name][VLAN_IDs]["HighAvailabilityMode"] = "auto/sharing"
-              [vios_name][VLAN_IDs]["Priority"] = priority
-
-    Input:  (str) vios name
-    Input:  (str) vios UUID
-    Input: (dict) SEA config to fill
-    Output: none
-    """
-    global hmc_info
-    global vios_info
-    global lpar_info
-
-    write("\nRecovering SEA configuration for {0}:".format(vios_name), 2)
-
-    sea_config[vios_name] = {}
-    filename = "{0}/{1}_network.xml".format(xml_dir, vios_name)
-
-    url = "https://{0}:12443/rest/api/uom/VirtualIOServer/{1}?group=ViosNetwork"\
-          .format(hmc_info['hostname'], vios_uuid)
-    curl_request(hmc_info['session_key'], url, filename)
-
-    if grep_check(filename, 'HttpErrorResponse'):
-        write("ERROR: Request to {0} returned Error Response."
-              .format(url), lvl=0)
-        write("ERROR: Unable to detect vSCSI Information", lvl=0)
-
-    try:
-        tree = ET.ElementTree(file=filename)
-    except IOError as e:
-        write("ERROR: Failed to parse {0}: {1}.".format(filename, e.strerror), lvl=0)
-        sys.exit(2)
-    except ET.ParseError as e:
-        write("ERROR: Failed to parse {0}: {1}".format(filename, e), lvl=0)
-        sys.exit(2)
-    iter_ = tree.getiterator()
-
-    for elem in iter_:
-        if re.sub(r'{[^>]*}', "", elem.tag) == 'SharedEthernetAdapter':
-            HighAvailabilityMode = ""
-            VLANIDs = []
-            VLAN_IDs = ""
-            BackingDeviceName = "none"
-            BackingDeviceState = "none"
-            SEADeviceName = "none"
-            Priority = ""
-            elem_child = elem.getchildren()
-            for child in elem_child:
-                if re.sub(r'{[^>]*}', "", child.tag) == 'BackingDeviceChoice':
-                    sub_child = child.getchildren()
-                    for child in sub_child:
-                        if re.sub(r'{[^>]*}', "", child.tag) == 'EthernetBackingDevice':
-                            sub_child2 = child.getchildren()
-                            for child in sub_child2:
-                                if re.sub(r'{[^>]*}', "", child.tag) == 'DeviceName':
-                                    BackingDeviceName = child.text
-                                if re.sub(r'{[^>]*}', "", child.tag) == 'IPInterface':
-                                    sub_child3 = child.getchildren()
-                                    for child in sub_child3:
-                                        if re.sub(r'{[^>]*}', "", child.tag) == 'State':
-                                            BackingDeviceState = child.text
-                # if re.sub(r'{[^>]*}', "", child.tag) == 'PortVLANID':
-                    # VLANID = child.text
-                if re.sub(r'{[^>]*}', "", child.tag) == 'HighAvailabilityMode':
-                    HighAvailabilityMode = child.text
-                if re.sub(r'{[^>]*}', "", child.tag) == 'DeviceName':
-                    SEADeviceName = child.text
-                if re.sub(r'{[^>]*}', "", child.tag) == 'TrunkAdapters':
-                    sub_child = child.getchildren()
-                    for child in sub_child:
-                        if re.sub(r'{[^>]*}', "", child.tag) == 'TrunkAdapter':
-                            sub_child2 = child.getchildren()
-                            for child in sub_child2:
-                                if re.sub(r'{[^>]*}', "", child.tag) == 'PortVLANID':
-                                    VLANIDs.append(child.text)
-                                if re.sub(r'{[^>]*}', "", child.tag) == 'TrunkPriority':
-                                    Priority = child.text
-            VLANIDs.sort()
-            for id in VLANIDs:
-                VLAN_IDs = VLAN_IDs + id + ","
-            VLAN_IDs = VLAN_IDs[:-1]
-            sea_config[vios_name][VLAN_IDs] = {}
-            sea_config[vios_name][VLAN_IDs]["BackingDeviceName"] = BackingDeviceName
-            sea_config[vios_name][VLAN_IDs]["BackingDeviceState"] = BackingDeviceState
-            sea_config[vios_name][VLAN_IDs]["SEADeviceName"] = SEADeviceName
-            sea_config[vios_name][VLAN_IDs]["SEADeviceState"] = ""
-            sea_config[vios_name][VLAN_IDs]["HighAvailabilityMode"] = HighAvailabilityMode
-            sea_config[vios_name][VLAN_IDs]["Priority"] = Priority
-    for vlan_id in sea_config[vios_name]:
-        (rc, state) = get_vios_sea_state(vios_name, sea_config[vios_name][vlan_id]["SEADeviceName"])
-        if rc == 0:
-            sea_config[vios_name][vlan_id]["SEADeviceState"] = state
+                    self.report('sea', 'FAIL', 'FAIL: SEA(s) deserving VLAN(s) {0} are not configured on both VIOSes.'
+                                .format(vlan_id))
+
+            for vlan_id in sea_config[vios2_name]:
+                if vlan_id not in sea_config[vios1_name]:
+                    vios2_state = sea_config[vios2_name][vlan_id]["SEADeviceState"]
+                    if vios2_state == "LIMBO" or vios2_state == "":
+                        self.write('PASS: SEA(s) deserving VLAN(s) {0} are not configured on both VIOSes but '
+                                   'not in usable state.'.format(vlan_id), lvl=0)
+                    else:
+                        self.report('sea', 'FAIL', 'FAIL: SEA(s) deserving VLAN(s) {0} are not configured on both VIOSes.'
+                                    .format(vlan_id))
+        if len(sea_config[vios1_name].keys()) == 0 \
+           and (self.vios_num == 1 or (self.vios_num > 1 and len(sea_config[vios2_name].keys()) == 0)):
+            self.write('\nNo SEA Configuration Detected.', lvl=0)
+
+    def check_vnic(self, active_client_id):
+        """
+        VNIC validation with REST API: check the active clients are
+        connected to the VNIC servers of the VIOSes
+
+        Input:(list) IDs of the active clients
+        """
+        lpar_info = self.lpar_info
+        vnic_fail_flag = 0
+        vnic_configured = 0
+
+        self.write("\nVNIC Validation:", lvl=1)
+
+        # Get VNIC info of all the clients in parallel, write data to files
+        vnic_files = self.fetch_lpar_files(self.get_vnic_info, active_client_id, 'vnic_info')
+        for id in active_client_id:
+            # grep_devnull
+            if id in vnic_files and self.grep_check(vnic_files[id], '200 OK'):
+                vnic_configured = 1
+                break
+
+        # If a VNIC configuration is detected, perform the validation
+        if vnic_configured == 0:
+            self.write("No VNIC Configuration Detected.", lvl=0)
+            return
+
+        header = "Client Name           Client ID       VIOS1 VNIC Server           VIOS2 VNIC Server"
+        divider = "-----------------------------------------------------------------------------------"\
+                  "----"
+        format = "%-20s %-15s %-27s %-27s "
+        self.write(header, lvl=0)
+        self.write(divider, lvl=0)
+
+        for id in active_client_id:
+            vios1_associated = "DISCONNECTED"
+            if self.vios_num > 1:
+                vios2_associated = "DISCONNECTED"
+            else:
+                vios2_associated = "n/a"
+
+            # Check to see if VNIC Server on VIOS1 is associated
+            associated_vios = []
+            if id in vnic_files:
+                associated_vios = self.grep_array(vnic_files[id], 'AssociatedVirtualIOServer')
+            for vios in associated_vios:
+                if self.vios1_uuid in vios:
+                    vios1_associated = "CONNECTED"
+                if self.vios2_uuid and self.vios2_uuid in vios:
+                    vios2_associated = "CONNECTED"
+
+            if id in lpar_info:
+                self.write(format % (lpar_info[id]['name'], id,
+                                     vios1_associated, vios2_associated), lvl=0)
+                self.write("\n", lvl=0)
+                if vios1_associated == "DISCONNECTED":
+                    self.report('vnic', 'FAIL', 'FAIL: {0} is not connected with VIOS1 VNIC Server.'
+                                .format(lpar_info[id]['name']))
+                    vnic_fail_flag = 1
+                if vios2_associated == "DISCONNECTED":
+                    self.report('vnic', 'FAIL', 'FAIL: {0} is not connected with VIOS2 VNIC Server.'
+                                .format(lpar_info[id]['name']))
+                    vnic_fail_flag = 1
+
+        if vnic_fail_flag == 0:
+            self.report('vnic', 'PASS', "PASS: VNIC Configuration is Correct.")
 
 
 ###############################################################################
-# Pycurl
+# Library
 ###############################################################################
 
-def curl_request(sess_key, url, filename):
-    """
-    Perform a Curl request with given URL and write the result in file
-
-    Input: (str) HMC session key
-    Input: (str) URL for the request
-    Input: (str) URL for the request
-    Output:(int) O if success, !0 in case of error
-    Output:(str) error message in case of error (can be None)
-    """
-    log("Curl request, sess_key: {0}, file: {1}, url: {2}\n".format(sess_key, filename, url))
-    try:
-        f = open(filename, 'wb')
-    except IOError as e:
-        write('ERROR: Failed to create file {0}: {1}.'.format(filename, e.strerror), lvl=0)
-        sys.exit(3)
-
-    hdrs = ['X-API-Session:{0}'.format(sess_key)]
-    hdr = cStringIO.StringIO()
-
-    try:
-        c = pycurl.Curl()
-        c.setopt(c.HTTPHEADER, hdrs)
-        c.setopt(c.URL, url)
-        c.setopt(c.SSL_VERIFYPEER, False)
-        c.setopt(c.WRITEDATA, f)
-        c.setopt(pycurl.HEADERFUNCTION, hdr.write)
-        # for debug:
-        log("c.URL:'{0}' url:'{1}'\n".format(c.URL, url))
-        log(" c.HTTPHEADER='{0}' hdrs:'{1}'\n".format(c.HTTPHEADER, hdrs))
-        log(" c.SSL_VERIFYPEER='{0}'\n".format(c.SSL_VERIFYPEER))
-        log(" c.WRITEDATA='{0}' f:'{1}'\n".format(c.WRITEDATA, f))
-        log(" headerfunction='{0} {1}'\n".format(pycurl.HEADERFUNCTION, hdr.write))
-
-        c.perform()
-
-    except pycurl.error as e:
-        write("ERROR: Request to {0} failed: {1}.".format(url, e), lvl=0)
-        f.close()
-        return 1, e.strerror
-
-    f.close()
-    # TBC - uncomment the 2 following lines for debug
-    # f = open(filename, 'r')
-    # log("\n### File %s content ###{0}### End of file {1} ###\n"
-    #     .format(filename, f.read(), filename))
-
-    # Get the http code and message to precise the error
-    status_line = hdr.getvalue().splitlines()[0]
-    m = re.match(r'HTTP\/\S*\s*(\d+)\s*(.*)\s*$', status_line)
-    if m:
-        http_code = str(m.group(1))
-        http_message = " %s" % (str(m.group(2)))
-    else:
-        http_code = c.getinfo(pycurl.HTTP_CODE)
-        http_message = ""
-
-    if http_code != "200":
-        log("Curl returned '{0}{1}' for request '{2}'\n".format(http_code, http_message, url))
-        return http_code, http_message
-
-    return 0
-
-
-def get_vios_info(hmc_info, vios_uuid, filename):
-    """
-    Get VIOS information given its UUID
-
-    Input:(dict) HMC information to get its hostname and session key
-    Input: (str) vios UUID
-    Input: (str) file name to put the result
-    Output:(int) O if success, !0 in case of error
-    Output:(str) error message in case of error (can be None)
-    """
-    url = "https://{0}:12443/rest/api/uom/VirtualIOServer/{1}"\
-          .format(hmc_info['hostname'], vios_uuid)
-    return curl_request(hmc_info['session_key'], url, filename)
-
-
-def get_managed_system(hmc_info, filename):
+def health_check(host, managed_system_uuid, vios_uuids, user_id="", password="",
+                 session_file="", log_dir=LOG_DIR, verbose=0, debug=False):
     """
-    Get managed systems information
+    Check the health of a VIOS or pair of VIOSes from a rolling update point
+    of view, sharing the HMC state with the other runs of the process
 
-    Input:(dict) HMC information to get its hostname and session key
-    Input: (str) file name to put the result
-    Output:(int) O if success, !0 in case of error
-    Output:(str) error message in case of error (can be None)
-    """
-    url = "https://{0}:12443/rest/api/uom/ManagedSystem".format(hmc_info['hostname'])
-    return curl_request(hmc_info['session_key'], url, filename)
-
-
-def get_managed_system_lpar(hmc_info, managed_system_uuid, filename):
-    """
-    Get LPARs of a managed system
-
-    Input:(dict) HMC information to get its hostname and session key
-    Input: (str) managed system UUID
-    Input: (str) file name to put the result
-    Output:(int) O if success, !0 in case of error
-    Output:(str) error message in case of error (can be None)
-    """
-    url = "https://{0}:12443/rest/api/uom/ManagedSystem/{1}/LogicalPartition"\
-          .format(hmc_info['hostname'], managed_system_uuid)
-    return curl_request(hmc_info['session_key'], url, filename)
-
-
-def get_vfc_client_adapter(hmc_info, lpar, filename):
-    """
-    Get information on LPAR to see network connections
-
-    Input:(dict) HMC information to get its hostname and session key
+    Input: (str) HMC IP address or hostname
     Input: (str) managed system UUID
-    Input: (str) file name to put the result
-    Output:(int) O if success, !0 in case of error
-    Output:(str) error message in case of error (can be None)
-    """
-    url = "https://{0}:12443/rest/api/uom/LogicalPartition/{1}/VirtualFibreChannelClientAdapter"\
-          .format(hmc_info['hostname'], lpar)
-    return curl_request(hmc_info['session_key'], url, filename)
-
-
-def get_vnic_info(hmc_info, uuid, filename):
-    """
-    Get information on VIOS Virtual NIC Dedicated adapter
-
-    Input:(dict) HMC information to get its hostname and session key
-    Input: (str) VIOS UUID
-    Input: (str) file name to put the result
-    Output:(int) O if success, !0 in case of error
-    Output:(str) error message in case of error (can be None)
-    """
-    url = "https://{0}:12443/rest/api/uom/LogicalPartition/{1}/VirtualNICDedicated"\
-          .format(hmc_info['hostname'], uuid)
-    return curl_request(hmc_info['session_key'], url, filename)
+    Input:(list) UUIDs of the VIOSes, the first one is the primary
+    Input: (str) HMC user ID and password, retrieved with the NIM password file if empty
+    Input: (str) file saving the HMC session key for the next processes, empty for none
+    Input: (str) directory of the log file
+    Input: (int) verbosity of the output
+    Input:(bool) debug mode: keep the xml directory
+    Output:(dict) results of the health checks, see Vioshc.check,
+           raises VioshcError upon error
+    """
+    run = Vioshc(log_dir, verbose, debug)
+    try:
+        hmc = run.connect(host, user_id, password, session_file)
+        return run.check(hmc, managed_system_uuid, vios_uuids)
+    finally:
+        run.close()
 
 
-def usage():
+def list_uuids(host, user_id="", password="", session_file="", log_dir=LOG_DIR,
+               verbose=0, debug=False):
     """
-    Display the usage:
+    List the managed systems and VIOSes of the HMC, sharing the HMC state
+    with the other runs of the process
 
-    Input:  none
-    Output: none
+    Input: see health_check
+    Output:(dict) managed systems and VIOSes, see Vioshc.list_uuids,
+           raises VioshcError upon error
     """
-    global USAGE
-    write(USAGE, lvl=0)
+    run = Vioshc(log_dir, verbose, debug)
+    try:
+        hmc = run.connect(host, user_id, password, session_file)
+        return run.list_uuids(hmc)
+    finally:
+        run.close()
 
 
 ###############################################################################
@@ -1360,9 +2319,9 @@ def usage():
 ###############################################################################
 USAGE = "Usage: \n\
   vioshc -h\n\
-  vioshc [-u id] [-p pwd] -i hmc_ip_addr -l {a | m} [-v] [-L log_dir]\n\
+  vioshc [-u id] [-p pwd] -i hmc_ip_addr -l {a | m} [-v] [-L log_dir] [-S session_file]\n\
   vioshc [-u id] [-p pwd] -i hmc_ip_addr -m managed_system\n\
-        -U vios_uuid [-U vios_uuid] [-v] [-L log_dir] [-D]\n\
+        -U vios_uuid [-U vios_uuid] [-v] [-L log_dir] [-D] [-S session_file]\n\
   \n\
    -h : display this help message\n\
    -i : hmc ip address or hostname\n\
@@ -1375,736 +2334,150 @@ USAGE = "Usage: \n\
       a : list managed system and vios UUIDs\n\
       m : list managed system UUIDs\n\
    -L : specify a log directory\n\
-   -D : debug mode: keep the xml directory\n"
+   -D : debug mode: keep the xml directory\n\
+   -S : file saving the HMC session key to reuse it in the next runs\n"
 
-# Establish a log file
-today = datetime.now()
-# Default log directory
-log_dir = "/tmp/vios_maint"
-mode = "no"  # no debug
 
-try:
-    opts, args = getopt.getopt(
-        sys.argv[1:],
-        'hi:u:p:U:m:vDL:l:',
-        ["help", 'HMC IP=', 'User ID=', 'Password=',
-         'VIOS UUID=', 'Managed System UUID=', 'Verbose',
-         'Debug', 'Log Directory=', 'List'])
-except getopt.GetoptError:
-    print(USAGE)
-    sys.exit(2)
-
-# first search the log file parameter
-for opt, arg in opts:
-    if opt in ('-L'):
-        log_dir = arg
-
-# Establish a log file
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
-
-# Log file format is vios_maint_YYYY-mm-dd_HHMMSS.log
-# TBC - for debugging it could be easier to have a fixed file name
-log_path = "%s/vioshc_%04d_%02d_%d_%02d%02d%02d.log" \
-           % (log_dir, today.year, today.month, today.day, today.hour, today.minute, today.second)
-xml_dir = "%s/xml_dir_%04d_%02d_%d_%02d%02d%02d" \
-          % (log_dir, today.year, today.month, today.day, today.hour, today.minute, today.second)
-os.makedirs(xml_dir)
-try:
-    log_file = open(log_path, 'a+', 1)
-except IOError as e:
-    print("ERROR: Failed to create log file {0}: {1}.".format(log_path, e.strerror))
-    sys.exit(3)
-
-log("################################################################################\n")
-log("vioshc log file for command:\n{0}\n".format(sys.argv[0:]))
-log("################################################################################\n")
-
-###############################################################################
-# Parse command line arguments & Curl requirement
-###############################################################################
-log("\nParsing command line arguments\n")
-log("PID=%(thread)d")
-action = "check"
-
-for opt, arg in opts:
-    if opt in ('-h', "--help"):
-        usage()
-        sys.exit(0)
-    elif opt in ('-i'):
-        hmc_ip = arg
-    elif opt in ('-u'):
-        hmc_user_id = arg
-    elif opt in ('-p'):
-        hmc_password = arg
-    elif opt in ('-U'):
-        # Check if VIOS UUID is valid
-        if re.match(r"^[a-zA-Z0-9-]*$", arg):
-            if vios1_uuid == "":
-                vios1_uuid = arg
-            elif vios2_uuid == "":
-                vios2_uuid = arg
-            else:
-                write("Warning: more than 2 UUID specified. They will be ignored.", lvl=1)
-            vios_num += 1
-        else:
-            write("Invalid UUID. Please try again.", lvl=0)
-            sys.exit(2)
-    elif opt in ('-m'):
-        # Check if managed system UUID is valid
-        if re.match(r"^[a-zA-Z0-9-]*$", arg):
-            managed_system_uuid = arg
-        else:
-            write("Invalid UUID format. Please try again.", lvl=0)
-            sys.exit(2)
-    elif opt in ('-v'):
-        verbose += 1
-        if verbose == 1:
-            print("Log file is: {0}\n".format(log_path))  # no need to log in file here
-    elif opt in ('-l'):
-        action = "list"
-        list_arg = arg
-    elif opt in ('-D'):
-        mode = "debug"
-
-# Check mandatory arguments
-log("\nChecking mandatory arguments\n")
-rc = 0
-if hmc_ip == "":
-    write("Missing HMC information.", lvl=0)
-    rc += 1
-if action == "check":
-    if vios1_uuid == "":
-        write("Missing VIOS UUID.", lvl=0)
-        rc += 1
-    if managed_system_uuid == "":
-        write("Missing Managed System UUID.", lvl=0)
-        rc += 1
-elif action == "list":
-    if list_arg != 'a' and list_arg != 'm':
-        write("Invalid argument '%s' for list flag." % (list_arg), lvl=0)
-        rc += 1
-else:
-    write("ERROR: Unknown action {0}.".format(action), lvl=0)
-    rc += 1
-if rc != 0:
-    usage()
-    sys.exit(2)
-
-###############################################################################
-# Set xml files path names
-###############################################################################
-filename_session_key = "{0}/sessionkey.xml".format(xml_dir)
-filename_systems = "{0}/systems.xml".format(xml_dir)
-filename_lpar_info = "{0}/lpar_info.xml".format(xml_dir)
-
-# filename_network1 = "{0}/network1.xml".format(xml_dir)
-# filename_network2 = "{0}/network2.xml".format(xml_dir)
-filename_vnic_info = "{0}/vnic_info.xml".format(xml_dir)
-filename_msg = "{0}/msg.txt".format(xml_dir)
-
-# Checks for curl on the system: return status is 0 if successful, else failed
-os.system('command -v curl >/dev/null 2>&1 || '
-          '{ echo "ERROR: Curl not installed on this system. Exiting now." >&2; exit 2; }')
-
-
-###############################################################################
-# Get HMC credentials
-###############################################################################
-write("Getting HMC {0} info".format(hmc_ip), lvl=2)
-# Get the HMC hostname in case user provided the short name or an IP address
-(hostname, aliases, ip_list) = get_hostname(hmc_ip)
-log("hmc {0} hostname: {1}\n".format(hmc_ip, hostname))
-
-###############################################################################
-# Retrieve the NIM object name matching the hostname
-###############################################################################
-nim_name = get_nim_name(hostname)
-log("hmc {0} nim_name: {1}\n".format(hostname, nim_name))
-if nim_name == "":
-    sys.exit(3)
-
-###############################################################################
-# Gets all NIM attributes for the HMC
-###############################################################################
-hmc_info = get_nim_info(nim_name)
-if hmc_info is None:
-    write("ERROR: Failed to retrieve HMC info.", lvl=0)
-    sys.exit(3)
-hmc_info['nim_name'] = nim_name
-hmc_info['hostname'] = hostname
-hmc_info['ip'] = ip_list[0]
-
-for key in hmc_info.keys():
-    log("hmc_info[%-13s] = %s\n" % (key, hmc_info[key]))
-
-write("Getting HMC credentials", lvl=2)
-# If either username or password are empty, try to retrieve them
-if (hmc_password == "") or (hmc_user_id == ""):
-    write("Retrieving HMC user id and password", lvl=2)
-    (hmc_user_id, hmc_password) = retrieve_usr_pass(hmc_info)
-if (hmc_user_id != ""):
-    hmc_info['user_id'] = hmc_user_id
-if (hmc_password != ""):
-    hmc_info['user_password'] = hmc_password
-
-write("Getting HMC session key", lvl=2)
-session_key = get_session_key(hmc_info, filename_session_key)
-if session_key == "":
-    write("ERROR: Failed to get {0} session key.".format(hmc_ip), lvl=0)
-    sys.exit(3)
-hmc_info['session_key'] = session_key
-
-
-###############################################################################
-# Get managed system info
-###############################################################################
-log("\nGet Managed System info\n")
-rc = get_managed_system(hmc_info, filename_systems)
-if rc != 0:
-    write("ERROR: Failed to collect managed system info: {0}".format(rc[1]), lvl=0)
-    sys.exit(2)
-build_managed_system(hmc_info, vios_info, managed_system_info, filename_systems)
-
-
-###############################################################################
-# List UUIDs
-###############################################################################
-if action == "list":
-    log("\nListing UUIDs\n")
-    rc = print_uuid(managed_system_info, vios_info, list_arg)
-    # Clean up
-    if mode != "debug":
-        shutil.rmtree(xml_dir, ignore_errors=True)
-    sys.exit(rc)
-
-
-###############################################################################
-# REST Call to /rest/api/uom/VirtualIOServer
-# Get name and partition ID of each VIOS then filters
-#  the ones of interest
-###############################################################################
-write("Find VIOS(es) Name from specified UUID(s)", lvl=2)
-for name in vios_info.keys():
-    if vios_info[name]['uuid'] == vios1_uuid:
-        vios1_name = name
-        vios_info[name]['role'] = 'primary'
-    elif vios_num > 1 and vios_info[name]['uuid'] == vios2_uuid:
-        vios2_name = name
-        vios_info[name]['role'] = 'secondary'
-    else:
-        del vios_info[name]
-for name in vios_info.keys():
-    for key in vios_info[name].keys():
-        log("vios_info[{0}][{1}] = {2}\n".format(name, key, vios_info[name][key]))
-rc = 0
-if vios1_name == "":
-    write("ERROR: Failed to find VIOS1 {0} info.".format(vios1_uuid), lvl=0)
-    rc = 1
-if vios_num > 1 and vios2_name == "":
-    write("ERROR: Failed to find VIOS2 {0} info.".format(vios2_uuid), lvl=0)
-    rc = 1
-if rc != 0:
-    sys.exit(2)
-
-primary_header = "\nPrimary VIOS Name         IP Address      ID         UUID                "
-backup_header = "\nBackup VIOS Name          IP Address      ID         UUID                "
-divider = "-----------------------------------------------------------------------------------" \
-          "--------------"
-format = "%-25s %-15s %-10s %-40s "
-
-for vios in vios_info.keys():
-    # If Resource Monitoring Control State is inactive, it will throw off our UUID/IP pairing
-    if (vios_info[vios]['control_state'] == "inactive"):
-        continue
-
-    # If VIOS is not running, skip it otherwise it will throw off our UUID/IP pairing
-    if vios_info[vios]['partition_state'] == "not running":
-        continue
-
-    # Get VIOS1 info (original VIOS)
-    if vios_info[vios]['role'] == "primary":
-        write(primary_header, lvl=0)
-    else:
-        write(backup_header, lvl=0)
-
-    write(divider, lvl=0)
-    write(format % (vios_info[vios]['partition_name'], vios_info[vios]['ip'],
-                    vios_info[vios]['id'], vios_info[vios]['uuid']), lvl=0)
-
-# Check both vios are in the same CEC
-if vios_info[vios1_name]['managed_system'] != managed_system_uuid:
-    write("ERROR: VIOS1 {0} (UUID: {1}) is on Managed System {2}, not {3}\n"
-          .format(vios1_name, vios_info[vios1_name]['uuid'],
-                  vios_info[vios1_name]['managed_system'],
-                  managed_system_uuid), lvl=0)
-    sys.exit(2)
-if vios_num > 1 and vios_info[vios2_name]['managed_system'] != managed_system_uuid:
-    write("ERROR: VIOS2 {0} (UUID: {1}) is on Managed System {2}, not {3}\n"
-          .format(vios2_name, vios_info[vios2_name]['uuid'],
-                  vios_info[vios2_name]['managed_system'],
-                  managed_system_uuid), lvl=0)
-    sys.exit(2)
+def main():
+    """
+    vioshc command: parse the arguments, run the health check or list the
+    UUIDs and print the results
 
+    Exits 0 if all health checks pass, 1 if any health check fails,
+    2 or 3 upon error
+    """
+    log_dir = LOG_DIR
+    action = "check"    # (user provided -l present?)
+    list_arg = ""       # (user provided -l)
+    hmc_ip = ""         # (user provided)
+    hmc_user_id = ""    # (user provided -u or retrieved)
+    hmc_password = ""   # (user provided -p or retrieved)
+    session_file = ""   # (user provided -S)
+    vios_num = 0        # number of VIOS UUID provided (-U option)
+    vios1_uuid = ""     # (user provided -U)
+    vios2_uuid = ""     # (user provided -U)
+    managed_system_uuid = ""    # (user provided -m)
 
-###############################################################################
-# Get UUIDs of all LPARs that belong to the managed
-# system that we are interested in
-###############################################################################
-# Get managed system LPAR info, write data to file
-write("Collect LPAR info for managed system: {0}".format(managed_system_uuid), 2)
-rc1 = get_managed_system_lpar(hmc_info, managed_system_uuid, filename_lpar_info)
-if rc1 != 0:
-    write("ERROR: Failed to collect managed system {0} info: {1}"
-          .format(managed_system_uuid, rc1[1]), lvl=0)
-    sys.exit(2)
+    try:
+        opts, args = getopt.getopt(
+            sys.argv[1:],
+            'hi:u:p:U:m:vDL:l:S:',
+            ["help", 'HMC IP=', 'User ID=', 'Password=',
+             'VIOS UUID=', 'Managed System UUID=', 'Verbose',
+             'Debug', 'Log Directory=', 'List', 'Session File='])
+    except getopt.GetoptError:
+        print(USAGE)
+        sys.exit(2)
 
-# Check for error response in file
-if grep_check(filename_lpar_info, 'HttpErrorResponse'):
-    write("ERROR: Request to https://{0}:12443/rest/api/uom/ManagedSystem/{1}/LogicalPartition \
-returned Error Response.".format(hmc_ip, managed_system_uuid), lvl=0)
-    write("Unable to detect LPAR information.", lvl=0)
+    # first search the log file parameter
+    for opt, arg in opts:
+        if opt in ('-L'):
+            log_dir = arg
 
-build_lpar_info(lpar_info, filename_lpar_info)
+    # Establish a log file
+    try:
+        run = Vioshc(log_dir, echo=True)
+    except VioshcError as e:
+        print(e.msg)
+        sys.exit(e.rc)
 
-# Log VIOS information
-for id in lpar_info.keys():
-    log("lpar[{0}]: {1}\n".format(id, str(lpar_info[id])))
+    run.log("################################################################################\n")
+    run.log("vioshc log file for command:\n{0}\n".format(sys.argv[0:]))
+    run.log("################################################################################\n")
 
+    ###########################################################################
+    # Parse command line arguments & Curl requirement
+    ###########################################################################
+    run.log("\nParsing command line arguments\n")
+    run.log("PID=%(thread)d")
 
-###############################################################################
-# Check active clients are the same for VIOS1 and VIOS2
-###############################################################################
-write("Check active client(s):", lvl=2)
-active_client_id = []
-active_client = {}
-diff_clients = []
-
-# Find configured clients of VIOS1
-# TBC - ConnectingPartitionID is present in VirtualFibreChannelMapping elem
-active_client['vios1'] = awk(vios_info[vios1_name]['filename'], 'ServerAdapter',
-                             'ConnectingPartitionID')
-log("active_client['vios1']: " + str(active_client['vios1']) + "\n")
-
-if vios_num > 1:
-    # Find configured clients of VIOS2
-    active_client['vios2'] = awk(vios_info[vios2_name]['filename'], 'ServerAdapter',
-                                 'ConnectingPartitionID')
-    log("active_client['vios2']: " + str(active_client['vios2']) + "\n")
-
-    # Check that both VIOSes have the same clients
-    # if they do not, all health-checks will fail and we cannot continue the program
-    for id in active_client['vios1']:
-        if (id not in active_client['vios2']) and (id not in diff_clients):
-            diff_clients.append(id)
-    diff_clients.sort()
-    log("diff_clients: " + str(diff_clients) + "\n")
-
-# Check for error response in file
-if grep_check(filename_lpar_info, 'HttpErrorResponse'):
-    write("FAIL: Unable to detect active clients", lvl=0)
-    num_hc_fail += 1
-elif len(diff_clients) == 0:
-    if vios_num > 1:
-        write("PASS: Active client lists are the same for both VIOSes", lvl=0)
-    active_client_id = active_client['vios1']
-    num_hc_pass += 1
-else:
-    write("FAIL: Active clients lists are not the same for {0} and {1}, check these clients:"
-          .format(vios1_name, vios2_name), lvl=0)
-    write(str(diff_clients), lvl=1)
-    num_hc_fail += 1
-
-write("\nActive clients information:", lvl=1)
-
-header = "LPAR                      ID         UUID                            "
-divider = "---------------------------------------------------------------------------"
-format = "%-25s %-10s %-40s "
-write(header, lvl=1)
-write(divider, lvl=1)
-
-# Print active clients, IDs, and UUIDs
-for id in active_client_id:
-    for keys, values in lpar_info.items():
-        log("lpar_info: " + keys + "\n")
-        # og("lpar_info: " + values + "\n")
-    if id in lpar_info:
-        write(format % (lpar_info[id]['name'], id, lpar_info[id]['uuid']), lvl=1)
-    else:
-        log("active_client_id '{0}' not lpar_info dictionary\n".format(id))
+    rc = 0
+    for opt, arg in opts:
+        if opt in ('-h', "--help"):
+            run.write(USAGE, lvl=0)
+            run.close()
+            sys.exit(0)
+        elif opt in ('-i'):
+            hmc_ip = arg
+        elif opt in ('-u'):
+            hmc_user_id = arg
+        elif opt in ('-p'):
+            hmc_password = arg
+        elif opt in ('-U'):
+            # Check if VIOS UUID is valid
+            if re.match(r"^[a-zA-Z0-9-]*$", arg):
+                if vios1_uuid == "":
+                    vios1_uuid = arg
+                elif vios2_uuid == "":
+                    vios2_uuid = arg
+                else:
+                    run.write("Warning: more than 2 UUID specified. They will be ignored.", lvl=1)
+                vios_num += 1
+            else:
+                run.write("Invalid UUID. Please try again.", lvl=0)
+                run.close()
+                sys.exit(2)
+        elif opt in ('-m'):
+            # Check if managed system UUID is valid
+            if re.match(r"^[a-zA-Z0-9-]*$", arg):
+                managed_system_uuid = arg
+            else:
+                run.write("Invalid UUID format. Please try again.", lvl=0)
+                run.close()
+                sys.exit(2)
+        elif opt in ('-v'):
+            run.verbose += 1
+            if run.verbose == 1:
+                print("Log file is: {0}\n".format(run.log_path))  # no need to log in file here
+        elif opt in ('-l'):
+            action = "list"
+            list_arg = arg
+        elif opt in ('-D'):
+            run.mode = "debug"
+        elif opt in ('-S'):
+            session_file = arg
+
+    # Check mandatory arguments
+    run.log("\nChecking mandatory arguments\n")
+    if hmc_ip == "":
+        run.write("Missing HMC information.", lvl=0)
+        rc += 1
+    if action == "check":
+        if vios1_uuid == "":
+            run.write("Missing VIOS UUID.", lvl=0)
+            rc += 1
+        if managed_system_uuid == "":
+            run.write("Missing Managed System UUID.", lvl=0)
+            rc += 1
+    elif action == "list":
+        if list_arg != 'a' and list_arg != 'm':
+            run.write("Invalid argument '%s' for list flag." % (list_arg), lvl=0)
+            rc += 1
+    if rc != 0:
+        run.write(USAGE, lvl=0)
+        run.close()
+        sys.exit(2)
 
+    # Checks for curl on the system: return status is 0 if successful, else failed
+    os.system('command -v curl >/dev/null 2>&1 || '
+              '{ echo "ERROR: Curl not installed on this system. Exiting now." >&2; exit 2; }')
 
-###############################################################################
-# Get vSCSI mappings
-###############################################################################
-write("\nvSCSI validation:", lvl=1)
-vscsi1_mapping = get_vscsi_mapping(vios1_name, vios1_uuid)
-
-# Get vSCSI mappings for VIOS2 if VIOS tuple
-if vios_num > 1:
-    vscsi2_mapping = get_vscsi_mapping(vios2_name, vios2_uuid)
-
-    # Compare the both vSCSI mapping
-    if vscsi1_mapping == vscsi2_mapping:
-        write("PASS: same vSCSI configuration on both VIOSes.", lvl=0)
-        num_hc_pass += 1
-    else:
-        write("FAIL: vSCSI configurations are not identical on both VIOSes.", lvl=0)
-        num_hc_fail += 1
-
-
-#######################################################
-# Fibre Channel mappings
-#######################################################
-fc_mapping = {}
-# fc_mapping[server_name] = {}
-# fc_mapping[server_name][client_name] = {}
-# fc_mapping[server_name][client_name]["VirtualSlotsNumber"] = local virtual slot number
-# fc_mapping[server_name][client_name]["ConnectingVirtualSlotsNumber"] = remote virtual slot number
-build_fc_mapping(vios1_name, vios1_uuid, fc_mapping)
-if vios_num > 1:
-    # Fibre Channel mapping for VIOS2
-    build_fc_mapping(vios2_name, vios2_uuid, fc_mapping)
-
-write("\nNPIV Path Validation:", lvl=1)
-
-fc_header = "VIOS Name               Local VSlot   Remote VSlot     Client"
-divider = "---------------------------------------------------------------------------"
-format = "%-28s %-12s %-12s %-20s "
-write(fc_header, lvl=1)
-write(divider, lvl=1)
-
-i = 0  # index for looping through all partition mappings
-for server in fc_mapping:
-    for client in fc_mapping[server]:
-        write(format
-              % (server, fc_mapping[server][client]["VirtualSlotNumber"],
-                 fc_mapping[server][client]["ConnectingVirtualSlotNumber"], client),
-              lvl=1)
-
-# Compares the both VIOS Fiber Channel mapping
-if vios_num > 1:
-    if vios1_name not in fc_mapping and vios2_name not in fc_mapping:
-        write("PASS: no FC mapping configuration on both VIOSes.", lvl=0)
-        num_hc_pass += 1
-    elif vios1_name not in fc_mapping or vios2_name not in fc_mapping:
-        write("FAIL: FC configurations are not identical on both VIOSes.", lvl=0)
-        num_hc_fail += 1
-    else:
-        vios1_client_list = fc_mapping[vios1_name].keys().sort()
-        vios2_client_list = fc_mapping[vios2_name].keys().sort()
-        if vios1_client_list == vios2_client_list:
-            write("PASS: same FC mapping configuration on both VIOSes.", lvl=0)
-            num_hc_pass += 1
+    try:
+        hmc = run.connect(hmc_ip, hmc_user_id, hmc_password, session_file)
+        if action == "list":
+            run.log("\nListing UUIDs\n")
+            rc = run.print_uuid(run.list_uuids(hmc), list_arg)
         else:
-            write("FAIL: FC configurations are not identical on both VIOSes.", lvl=0)
-            num_hc_fail += 1
-
-###############################################################################
-# NPIV PATH VALIDATION
-# TBC - remove this section when we validate checks
-#       made here are already done in FC mapping part
-#       here above
-###############################################################################
-
-# fc_ids = []
-# drc_list = []
-# WWPN_list = []
-
-# write("\nNPIV Path Validation:")
-
-# # Check for path validation by running mig_vscsi to check for notzoned tag
-# # for each active partition, get notzoned info for both vios and check if false
-# notzoned = ""
-# notzoned_value = ""
-for id in active_client_id:
-    if id in lpar_info:
-        # Get LPAR info, write data to xml file
-        filename_npiv_mapping = "{0}/{1}_npiv_mapping.xml".format(xml_dir, lpar_info[id]['name'])
-        get_vfc_client_adapter(hmc_info, lpar_info[id]['uuid'], filename_npiv_mapping)
-    # # TBC - uncomment the 2 following lines for debug
-    # #f = open(filename_npiv_mapping, 'r')
-    # #log("\n### File %s content ###%s### End of file %s ###\n"
-    #      % (filename_npiv_mapping, f.read(), filename_npiv_mapping))
-
-    # # Create a list of fibre channel IDs
-    # fc_ids = grep_array(filename_npiv_mapping, 'LocalPartitionID')
-    # if len(fc_ids) == 0:
-    #     write("No vFC client adapter ID for lpar: %s (%s)"
-    #           % (lpar_info[id]['name'], lpar_info[id]['uuid']))
-    #     #remove(filename_npiv_mapping)
-    #     continue
-
-    # # Create a list of dynamic reconfiguration connectors
-    # drc_list = grep_array(filename_npiv_mapping, 'DynamicReconfigurationConnectorName')
-    # # Create a list of WWPN
-    # WWPN_list = grep_array(filename_npiv_mapping, 'WWPN')
-
-    # touch(filename_adapter1)
-    # touch(filename_adapter2)
-
-    # # Cannot get mig_vscsi to stdout so need to use another file to get info
-    # j = 0
-    # for partition_id in fc_ids:
-    #     if vios_info[vios1_name]['id'] == partition_id:
-    #         lower_WWPN = WWPN_list[j]
-    #         j += 1  # get the higher WWPN
-    #         higher_WWPN = WWPN_list[j]
-    #         DRC = drc_list[j]
-    #         j += 1  # one more increment bc we skip clients, and drc_list repeats itself twice
-
-    #         cmd = [C_RSH, vios_info[vios1_name]['hostname'],
-    #                "LC_ALL=C /usr/lib/methods/mig_vscsi -f get_adapter "
-    #                "-t vscsi -s %s -a ACTIVE_LPM -c RPA  -M 1 -d 5 -W 0x%s -w 0x%s -F %s; "
-    #                "echo rc=$?"
-    #                % (DRC, lower_WWPN, higher_WWPN, filename_adapter1)]
-    #         (rc, output, errout) = exec_cmd(cmd)
-    #         if rc != 0 or re.match(r'.*ERROR.*', output.rstrip()):
-    #             write("ERROR: Cannot get vSCSI adapter info on %s, mig_vscsi command: %s %s"
-    #                   % (vios1_name, output.rstrip(), errout), lvl=0)
-    #             num_hc_fail += 1
-    #             continue
-
-    #         if os.path.exists(filename_adapter1):
-    #             notzoned_value = grep(filename_adapter1, 'notZoned')
-    #             notzoned = re.match(r'.*false.*', notzoned_value)
-
-    #     if vios_num > 1 and vios_info[vios2_name]['id'] == partition_id:
-    #         lower_WWPN = WWPN_list[j]
-    #         j += 1  # get the higher WWPN
-    #         higher_WWPN = WWPN_list[j]
-    #         DRC = drc_list[j]
-    #         j += 1  # one more increment bc we skip clients, and drc_list repeats itself twice
-
-    #         cmd = [C_RSH, vios_info[vios2_name]['hostname'],
-    #                "LC_ALL=C /usr/lib/methods/mig_vscsi -f get_adapter "
-    #                "-t vscsi -s %s -a ACTIVE_LPM -c RPA  -M 1 -d 5 -W 0x%s -w 0x%s -F %s; "
-    #                "echo rc=$?"
-    #                % (DRC, lower_WWPN, higher_WWPN, filename_adapter2)]
-    #         (rc, output, errout) = exec_cmd(cmd)
-    #         if rc != 0 or re.match(r'.*ERROR.*', output.rstrip()):
-    #             write("ERROR: Cannot get vSCSI adapter info on %s, mig_vscsi command: %s %s"
-    #                   % (vios2_name, output.rstrip(), errout), lvl=0)
-    #             num_hc_fail += 1
-    #             continue
-
-    #         if os.path.exists(filename_adapter2):
-    #             notzoned_value = grep(filename_adapter2, 'notZoned')
-    #             notzoned = notzoned and re.match(r'.*false.*', notzoned_value)
-
-    #     if notzoned:
-    #         if vios_num > 1:
-    #             write("PASS: %s has a NPIV path through both VIOSes." % (lpar_info[id]['name']))
-    #         else:
-    #             write("PASS: %s has a NPIV path through the VIOS." % (lpar_info[id]['name']))
-    #         num_hc_pass += 1
-    #     else:
-    #         if vios_num > 1:
-    #             write("FAIL: %s doesn't have a NPIV path through both VIOSes."
-    #                   % (lpar_info[id]['name']), lvl=0)
-    #         else:
-    #             write("FAIL: %s doesn't have a NPIV path through the VIOS."
-    #                   % (lpar_info[id]['name']))
-    #         num_hc_fail += 1
-
-###############################################################################
-# Building SEA configuration for VIOSes
-###############################################################################
-sea_config = {}
-build_sea_config(vios1_name, vios1_uuid, sea_config)
-# sea_config[vios_name] = {}
-#           [vios_name][VLANID] = {}
-#           [vios_name][VLANID]["BackingDeviceName"] = "entx"
-#           [vios_name][VLANID]["BackingDeviceState"] = "Inactive/Disconnected/...."
-#           [vios_name][VLANID]["SEADeviceName"] = "entx"
-#           [vios_name][VLANID]["SEADeviceState"] = "UNHEALTHY/PRIMARY/BACKUP/STANDBY"
-#           [vios_name][VLANID]["HighAvailabilityMode"] = "auto/sharing"
-#           [vios_name][VLANID]["Priority"] = priority
-if vios_num > 1:
-    build_sea_config(vios2_name, vios2_uuid, sea_config)
-
-###############################################################################
-# SEA validation
-###############################################################################
-write("\nSEA Validation:", lvl=1)
-vios1_state = ""
-vios2_state = ""
-
-header = "VIOS                 VLAN(s)   HA MODE  SEA Dev   SEA State    Backing Dev  State     "
-divider = "--------------------------------------------------------------------------------------"
-format = "%-20s %-9s %-8s %-9s %-12s %-12s %-10s"
-
-write(header, lvl=1)
-write(divider, lvl=1)
-for vlan_id in sea_config[vios1_name]:
-    write(format % (vios1_name, vlan_id,
-          sea_config[vios1_name][vlan_id]["HighAvailabilityMode"],
-          sea_config[vios1_name][vlan_id]["SEADeviceName"],
-          sea_config[vios1_name][vlan_id]["SEADeviceState"],
-          sea_config[vios1_name][vlan_id]["BackingDeviceName"],
-          sea_config[vios1_name][vlan_id]["BackingDeviceState"]), lvl=1)
-if vios_num > 1:
-    for vlan_id in sea_config[vios2_name]:
-        write(format % (vios2_name, vlan_id,
-              sea_config[vios2_name][vlan_id]["HighAvailabilityMode"],
-              sea_config[vios2_name][vlan_id]["SEADeviceName"],
-              sea_config[vios2_name][vlan_id]["SEADeviceState"],
-              sea_config[vios2_name][vlan_id]["BackingDeviceName"],
-              sea_config[vios2_name][vlan_id]["BackingDeviceState"]), lvl=1)
-
-    for vlan_id in sea_config[vios1_name]:
-        vios1_state = sea_config[vios1_name][vlan_id]["SEADeviceState"]
-        if vlan_id in sea_config[vios2_name]:
-            ha_mode1 = sea_config[vios1_name][vlan_id]["HighAvailabilityMode"]
-            ha_mode2 = sea_config[vios2_name][vlan_id]["HighAvailabilityMode"]
-            if ha_mode1 != "auto" and ha_mode1 != "sharing" or ha_mode1 != ha_mode2:
-                write("FAIL: SEA(s) deserving VLAN(s) {0} are not configured for failover."
-                      .format(vlan_id), lvl=0)
-                num_hc_fail += 1
-                continue
+            vios_uuids = [vios1_uuid, vios2_uuid][:min(vios_num, 2)]
+            rc = run.check(hmc, managed_system_uuid, vios_uuids)['rc']
+    except VioshcError as e:
+        rc = e.rc
+    finally:
+        run.close()
+
+    # Should exit 0 if all health checks pass, exit 1 if any health check fails
+    sys.exit(rc)
 
-            vios2_state = sea_config[vios2_name][vlan_id]["SEADeviceState"]
-            if ("PRIMARY" in vios1_state and ("BACKUP" in vios2_state or "STANDBY" in vios2_state))\
-               or ("PRIMARY" in vios2_state and
-                   ("BACKUP" in vios1_state or "STANDBY" in vios1_state)):
-                write('PASS: SEA(s) deserving VLAN(s) {0} are configured for failover.'
-                      .format(vlan_id), lvl=0)
-                num_hc_pass += 1
-                continue
-            elif (vios1_state == "LIMBO") and (vios2_state == "LIMBO"):
-                write('PASS: SEA(s) deserving VLAN(s) {0} are configured on both VIOSes but '
-                      'not in usable state'.format(vlan_id), lvl=0)
-                num_hc_pass += 1
-                continue
-            else:
-                write('FAIL: SEA(s) deserving VLAN(s) {0} are not in the correct state for '
-                      'HA operation.'.format(vlan_id), lvl=0)
-                num_hc_fail += 1
-                continue
-        elif vios1_state == "LIMBO":
-            write('PASS: SEA(s) deserving VLAN(s) {0} are not configured on both VIOSes but '
-                  'not in usable state.'.format(vlan_id), lvl=0)
-            continue
-        elif vios1_state == "":
-            write('PASS: SEA(s) deserving VLAN(s) {0} are not configured on both VIOSes but '
-                  'not in usable state.'.format(vlan_id), lvl=0)
-            continue
-        else:
-            write('FAIL: SEA(s) deserving VLAN(s) {0} are not configured on both VIOSes.'
-                  .format(vlan_id), lvl=0)
-            num_hc_fail += 1
-            continue
-
-    for vlan_id in sea_config[vios2_name]:
-        if vlan_id not in sea_config[vios1_name]:
-            vios2_state = sea_config[vios2_name][vlan_id]["SEADeviceState"]
-            if vios2_state == "LIMBO":
-                write('PASS: SEA(s) deserving VLAN(s) {0} are not configured on both VIOSes '
-                      'but not in usable state.'.format(vlan_id), lvl=0)
-                num_hc_fail += 1
-                continue
-            elif vios2_state == "":
-                write('PASS: SEA(s) deserving VLAN(s) {0} are not configured on both VIOSes but '
-                      'not in usable state.'.format(vlan_id), lvl=0)
-                continue
-            else:
-                write('FAIL: SEA(s) deserving VLAN(s) {0} are not configured on both VIOSes.'
-                      .format(vlan_id), lvl=0)
-                num_hc_fail += 1
-                continue
-if len(sea_config[vios1_name].keys()) == 0 \
-   and (vios_num == 1 or (vios_num > 1 and len(sea_config[vios2_name].keys()) == 0)):
-    write('\nNo SEA Configuration Detected.', lvl=0)
-
-#######################################################
-# VNIC validation with REST API
-#######################################################
-vnic_fail_flag = 0
-vnic_configured = 0
-
-write("\nVNIC Validation:", lvl=1)
-
-for id in active_client_id:
-    # Get VNIC info, write data to file
-    if id in lpar_info:
-        get_vnic_info(hmc_info, lpar_info[id]['uuid'], filename_vnic_info)
-
-    # grep_devnull
-    if grep_check(filename_vnic_info, '200 OK'):
-        vnic_configured = 1
-        break
-
-# If a VNIC configuration is detected, perform the validation
-if vnic_configured == 0:
-    write("No VNIC Configuration Detected.", lvl=0)
-else:
-    header = "Client Name           Client ID       VIOS1 VNIC Server           VIOS2 VNIC Server"
-    divider = "-----------------------------------------------------------------------------------"\
-              "----"
-    format = "%-20s %-15s %-27s %-27s "
-    write(header, lvl=0)
-    write(divider, lvl=0)
-
-    i = 0
-    for id in active_client_id:
-        vios1_associated = "DISCONNECTED"
-        if vios_num > 1:
-            vios2_associated = "DISCONNECTED"
-        else:
-            vios2_associated = "n/a"
-
-        # Get VNIC info, write data to vnic_info.xml
-        if id in lpar_info:
-            get_vnic_info(hmc_info, lpar_info[id]['uuid'], filename_vnic_info)
-
-        # Check to see if VNIC Server on VIOS1 is associated
-        associated_vios = grep_array(filename_vnic_info, 'AssociatedVirtualIOServer')
-        for vios in associated_vios:
-            if vios1_uuid in vios:
-                vios1_associated = "CONNECTED"
-            if vios2_uuid in vios:
-                vios2_associated = "CONNECTED"
-
-        if id in lpar_info:
-            write(format % (lpar_info[id]['name'], active_client_id[i],
-                            vios1_associated, vios2_associated), lvl=0)
-            write("\n", lvl=0)
-            if vios1_associated == "DISCONNECTED":
-                write('FAIL: {0} is not connected with VIOS1 VNIC Server.'
-                      .format(lpar_info[id]['name']), lvl=0)
-                vnic_fail_flag = 1
-                num_hc_fail += 1
-            if vios2_associated == "DISCONNECTED":
-                write('FAIL: {0} is not connected with VIOS2 VNIC Server.'
-                      .format(lpar_info[id]['name']), lvl=0)
-                vnic_fail_flag = 1
-                num_hc_fail += 1
-
-        vios1_associated = 0
-        vios2_associated = 0
-        i += 1
-
-    if vnic_fail_flag == 0:
-        write("PASS: VNIC Configuration is Correct.", lvl=0)
-        num_hc_pass += 1
 
-###############################################################################
-# End of Health Checks
-###############################################################################
-# Perform analysis on Pass and Fails
-total_hc = num_hc_fail + num_hc_pass
-pass_pct = num_hc_pass * 100 / total_hc
-write("\n\n%d of %d Health Checks Passed" % (num_hc_pass, total_hc), lvl=0)
-write("%d of %d Health Checks Failed" % (num_hc_fail, total_hc), lvl=0)
-write("Pass rate of %d%%\n" % (pass_pct), lvl=0)
-
-if mode != 'debug':
-    shutil.rmtree(xml_dir, ignore_errors=True)
-
-log_file.close()
-
-# Should exit 0 if all health checks pass, exit 1 if any health check fails
-if (num_hc_pass == total_hc):
-    sys.exit(0)
-else:
-    sys.exit(1)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.bulk import (
+    bulk_entries, bulk_exit, bulk_fail)
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule, ModuleExit
+
+
+def test_single_entry():
+    module = FakeModule(name='user1', state='present', users=None)
+
+    assert bulk_entries(module, 'users') == [module.params]
+    with pytest.raises(ModuleExit):
+        bulk_exit(module, 'users', 'user', [dict(name='user1', changed=True, msg='created')])
+    assert module.result == dict(name='user1', changed=True, msg='created', failed=False)
+
+
+def test_entries_merged_with_module_options():
+    module = FakeModule(name=None, state='present', remove_password=True,
+                        users=[dict(name='user1', state=None, remove_password=None),
+                               dict(name='user2', state='absent', remove_password=False)])
+
+    entries = bulk_entries(module, 'users')
+    assert [(params['name'], params['state'], params['remove_password']) for params in entries] == [
+        ('user1', 'present', True), ('user2', 'absent', False)]
+    assert module.params['state'] == 'present'
+
+
+def test_summary():
+    module = FakeModule(filesystems=[{}, {}, {}])
+    results = [dict(filesystem='/fs%d' % i, changed=i != 1, msg='') for i in range(3)]
+
+    with pytest.raises(ModuleExit):
+        bulk_exit(module, 'filesystems', 'filesystem', results)
+    assert module.result['changed']
+    assert module.result['msg'] == '3 filesystem(s) processed, 2 changed'
+    assert module.result['filesystems'] == results
+
+
+def test_failure_returns_partial_results():
+    module = FakeModule(groups=[{}, {}])
+    results = [dict(name='group1', changed=True, msg='created')]
+    exc = CommandError(['mkgroup', 'group2'], 1, 'out', 'err', 'Failed to create group: group2')
+
+    with pytest.raises(ModuleExit):
+        bulk_fail(module, 'groups', results, exc)
+    assert module.result == dict(msg='Failed to create group: group2', rc=1, stdout='out', stderr='err',
+                                 groups=results, failed=True)
+
+    module = FakeModule(groups=None)
+    with pytest.raises(ModuleExit):
+        bulk_fail(module, 'groups', [], exc)
+    assert 'groups' not in module.result
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.cache_file import (
+    TtlCache, load_cache, save_cache)
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+
+def test_save_and_load(tmpdir):
+    path = str(tmpdir.join('sub', 'cache.json'))
+    module = FakeModule()
+
+    assert save_cache(module, path, 2, {'entries': {'a': 1}})
+    assert load_cache(path, 2) == {'version': 2, 'entries': {'a': 1}}
+    assert os.listdir(str(tmpdir.join('sub'))) == ['cache.json']
+
+
+def test_load_other_version_or_invalid(tmpdir):
+    path = str(tmpdir.join('cache.json'))
+    save_cache(FakeModule(), path, 1, {'entries': {}})
+    assert load_cache(path, 2) is None
+
+    with open(path, 'w') as cache:
+        cache.write('{not json')
+    assert load_cache(path, 1) is None
+    assert load_cache(str(tmpdir.join('missing.json')), 1) is None
+
+
+def test_save_failure_is_logged(tmpdir):
+    blocker = tmpdir.join('file')
+    blocker.write('')
+    module = FakeModule()
+
+    assert not save_cache(module, str(blocker.join('cache.json')), 1, {}, 'test cache')
+    assert module.logs and module.logs[0].startswith('[WARNING] Cannot write test cache')
+
+
+def test_ttl_cache(tmpdir):
+    path = str(tmpdir.join('cache.json'))
+    cache = TtlCache(FakeModule(), path, 1, 60)
+    cache.set_entry('a', value=1)
+    cache.set_entry('b', value=2)
+    cache.entries['b']['time'] -= 120
+
+    assert cache.get_entry('a')['value'] == 1
+    assert cache.get_entry('b') is None
+    assert cache.get_entry('c') is None
+
+    # the expired entries are not written
+    cache.save()
+    assert not cache.changed
+    assert list(TtlCache(FakeModule(), path, 1, 60).entries) == ['a']
+    assert TtlCache(FakeModule(), path, 2, 60).entries == {}
+
+
+def test_ttl_cache_invalidate(tmpdir):
+    path = str(tmpdir.join('cache.json'))
+    cache = TtlCache(FakeModule(), path, 1, 60)
+    cache.set_entry('a', value=1)
+    cache.save()
+
+    cache = TtlCache(FakeModule(), path, 1, 60)
+    cache.invalidate(['missing'])
+    assert not cache.changed
+    cache.invalidate(['a'])
+    assert cache.changed
+    cache.save()
+    assert TtlCache(FakeModule(), path, 1, 60).entries == {}
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import time
+
+import pytest
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.disk_inventory import (
+    DiskInventory, collect_local_disks, parse_local_inventory, parse_lspv, parse_lspv_free,
+    vios_disk_collector, VIOS_FREE_MARK)
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+LOCAL_OUTPUT = """pv hdisk0 000018fa3b12f5cb rootvg active
+pv hdisk1 000018fa3b12f6aa None
+size hdisk1 20480
+lvm hdisk1 1
+pv hdisk2 none None
+lvm hdisk2 2
+size hdisk2 10240
+pv hdisk3 none None
+lvm hdisk3
+size hdisk3 10240
+pv hdisk4 none None
+lvm hdisk4 1
+size hdisk4
+"""
+
+VIOS_LSPV = """NAME             PVID                                 VG               STATUS
+hdisk0           00f6db0a6c7aece5                     rootvg           active
+hdisk1           00f6db0a6c7aed2c                     None
+"""
+VIOS_LSPV_FREE = """NAME            PVID                                SIZE(megabytes)
+hdisk1          00f6db0a6c7aed2c                    572325
+"""
+
+
+@pytest.fixture
+def inventory_1000_disks():
+    """
+    LOCAL_SCRIPT output of a host with 1000 disks, half of them free, the
+    probe lines of the free disks interleaved as the concurrent probes do
+    """
+    lines = []
+    for i in range(1000):
+        if i % 2:
+            lines.append('pv hdisk{0} 00f6db0a{0:08d} datavg{1} active'.format(i, i % 10))
+        else:
+            lines.append('pv hdisk{0} none None'.format(i))
+    for i in range(0, 1000, 2):
+        lines.append('size hdisk{0} {1}'.format(i, 10240 + i))
+    for i in range(0, 1000, 2):
+        lines.append('lvm hdisk{0} 1'.format(i))
+    return '\n'.join(lines) + '\n'
+
+
+def test_parse_local_inventory():
+    module = FakeModule()
+    inventory = parse_local_inventory(module, LOCAL_OUTPUT)
+
+    assert inventory['pvs']['hdisk0'] == {'pvid': '000018fa3b12f5cb', 'vg': 'rootvg', 'status': 'active'}
+    assert inventory['pvs']['hdisk2'] == {'pvid': 'none', 'vg': 'None', 'status': ''}
+    # hdisk2 has another signature, hdisk3 and hdisk4 cannot be probed
+    assert inventory['free_pvs'] == {'hdisk1': {'pvid': '000018fa3b12f6aa', 'size': 20480}}
+    assert module.logs == ['[WARN] could not query pv hdisk3', '[WARN] could not retrieve hdisk4 size']
+
+
+def test_parse_vios_lspv():
+    assert parse_lspv(VIOS_LSPV) == {
+        'hdisk0': {'pvid': '00f6db0a6c7aece5', 'vg': 'rootvg', 'status': 'active'},
+        'hdisk1': {'pvid': '00f6db0a6c7aed2c', 'vg': 'None', 'status': ''},
+    }
+    assert parse_lspv_free(VIOS_LSPV_FREE) == {'hdisk1': {'pvid': '00f6db0a6c7aed2c', 'size': 572325}}
+
+
+def test_vios_collector():
+    calls = []
+
+    def nim_exec(module, host, cmd):
+        calls.append(host)
+        return 0, VIOS_LSPV + VIOS_FREE_MARK + '\n' + VIOS_LSPV_FREE, ''
+
+    inventory = vios_disk_collector(nim_exec)(FakeModule(), 'vios1')
+    assert calls == ['vios1']
+    assert sorted(inventory['pvs']) == ['hdisk0', 'hdisk1']
+    assert list(inventory['free_pvs']) == ['hdisk1']
+
+
+def test_collect_failure():
+    with pytest.raises(CommandError) as exc:
+        collect_local_disks(FakeModule(rc=2))
+    assert exc.value.rc == 2
+
+
+def test_inventory_cached_until_invalidated():
+    module = FakeModule(stdout=LOCAL_OUTPUT)
+    inventory = DiskInventory(module, collect_local_disks)
+
+    inventory.get()
+    inventory.get()
+    assert len(module.commands) == 1
+    inventory.invalidate()
+    inventory.get()
+    assert len(module.commands) == 2
+
+
+def test_benchmark_1000_disks(inventory_1000_disks):
+    module = FakeModule(stdout=inventory_1000_disks)
+
+    start = time.time()
+    disks = DiskInventory(module, collect_local_disks).get()
+    elapsed = time.time() - start
+
+    assert len(disks['pvs']) == 1000
+    assert len(disks['free_pvs']) == 500
+    assert disks['free_pvs']['hdisk998'] == {'pvid': 'none', 'size': 11238}
+    # one command for the whole host instead of two per free disk
+    assert len(module.commands) == 1
+    assert elapsed < 1
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import os
+import socket
+import threading
+import time
+import zipfile
+from io import BytesIO
+
+import pytest
+
+from ansible.module_utils.six.moves import BaseHTTPServer
+
+from ansible_collections.ibm.power_aix.plugins.module_utils import flrtvc_cache
+from ansible_collections.ibm.power_aix.plugins.module_utils.flrtvc_cache import (
+    EpkgIndex, get_apar_csv, parse_epkg_info, refresh_flrtvc_zip, to_utc_epoch)
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+EMGR_OUTPUT = """
+LABEL:            IJ02726s8a
+PACKAGING DATE:   Mon Oct  9 09:35:09 CDT 2017
++-----------------------------------------------------------------------------+
+   PACKAGE:       bos.net.tcp.client
+   LOCATION:      /usr/lib/drivers/netinet
+   PACKAGE:       bos.net.tcp.server
+   LOCATION:      /usr/sbin/inetd
+bos.net.tcp.client 7.2.1.0 7.2.1.4
+bos.net.tcp.server 7.2.1.0 7.2.1.3
+"""
+
+APAR_CSV = b"""Product,Fixed In Version,APAR,Abstract,Type
+aix,7.2.5.1,IJ12345,fix,sec
+"""
+
+# error page of a proxy, not in the encoding of the C locale
+ERROR_PAGE = u"<html><body>Accès refusé</body></html>\n".encode('utf-8')
+
+
+def test_to_utc_epoch():
+    assert to_utc_epoch('Mon Oct 9 14:35:09 UTC 2017') == (1507559709, '')
+    assert to_utc_epoch('Mon Oct 9 09:35:09 CDT 2017') == (1507559709, '')
+    assert to_utc_epoch('Mon Oct 9 14:35:09 2017') == (1507559709, '')
+    assert to_utc_epoch('garbage')[0] == -1
+
+
+def test_parse_epkg_info():
+    info = parse_epkg_info(EMGR_OUTPUT)
+
+    assert info['label'] == 'IJ02726s8a'
+    assert info['sec_from_epoch'] == 1507559709
+    assert info['filesets'] == ['bos.net.tcp.client', 'bos.net.tcp.server']
+    assert info['files'] == ['/usr/lib/drivers/netinet', '/usr/sbin/inetd']
+    assert info['prereq'] == [['bos.net.tcp.client', '7.2.1.0', '7.2.1.4'],
+                              ['bos.net.tcp.server', '7.2.1.0', '7.2.1.3']]
+
+
+def test_epkg_index_is_persistent(tmpdir):
+    epkg = tmpdir.join('IJ02726s8a.epkg.Z')
+    epkg.write('epkg content')
+    cachedir = str(tmpdir.join('cache'))
+    output = {'messages': []}
+
+    module = FakeModule(EMGR_OUTPUT)
+    info = EpkgIndex(module, cachedir).get(output, 'localhost', str(epkg))
+    assert info['label'] == 'IJ02726s8a'
+    assert len(module.commands) == 1
+
+    module = FakeModule()
+    assert EpkgIndex(module, cachedir).get(output, 'localhost', str(epkg)) == info
+    assert module.commands == []
+    assert output['messages'] == []
+
+
+def test_epkg_index_does_not_persist_errors(tmpdir):
+    epkg = tmpdir.join('IJ02726s8a.epkg.Z')
+    epkg.write('epkg content')
+    cachedir = str(tmpdir.join('cache'))
+    output = {'messages': []}
+
+    index = EpkgIndex(FakeModule(EMGR_OUTPUT, rc=1), cachedir)
+    index.get(output, 'localhost', str(epkg))
+    index.get(output, 'localhost', str(epkg))
+    assert output['messages'] == ['Cannot get efix information {0}'.format(epkg)] * 2
+
+    module = FakeModule(EMGR_OUTPUT)
+    EpkgIndex(module, cachedir).get(output, 'localhost', str(epkg))
+    assert len(module.commands) == 1
+
+
+class FakeServer(object):
+    """
+    open_url of the fix server returning body, counting the requests
+    """
+
+    def __init__(self, body=APAR_CSV, delay=0):
+        self.body = body
+        self.delay = delay
+        self.requests = 0
+
+    def open_url(self, url, validate_certs=True):
+        self.requests += 1
+        time.sleep(self.delay)
+        if self.body is None:
+            raise IOError('unreachable')
+        return BytesIO(self.body)
+
+
+@pytest.fixture
+def fix_server(monkeypatch):
+    server = FakeServer()
+    monkeypatch.setattr(flrtvc_cache, 'open_url', server.open_url)
+    return server
+
+
+def test_apar_csv_downloaded_then_cached(fix_server, tmpdir):
+    tooldir = str(tmpdir.join('tools'))
+    output = {'messages': []}
+
+    path, meta = get_apar_csv(FakeModule(), output, tooldir, 24)
+    assert path == os.path.join(tooldir, 'apar.csv')
+    assert meta['source'] == 'download'
+    with open(path, 'rb') as csv:
+        assert csv.read() == APAR_CSV
+
+    # within the TTL, the server is not requested
+    path, meta = get_apar_csv(FakeModule(), output, tooldir, 24)
+    assert meta['source'] == 'cache'
+    assert fix_server.requests == 1
+    assert output['messages'] == []
+
+
+def test_apar_csv_expired(fix_server, tmpdir):
+    tooldir = str(tmpdir.join('tools'))
+    get_apar_csv(FakeModule(), {'messages': []}, tooldir, 24)
+    meta_file = os.path.join(tooldir, 'apar.json')
+    with open(meta_file) as myfile:
+        cache = json.load(myfile)
+    cache['fetched'] -= 25 * 3600
+    with open(meta_file, 'w') as myfile:
+        json.dump(cache, myfile)
+
+    path, meta = get_apar_csv(FakeModule(), {'messages': []}, tooldir, 24)
+    assert meta['source'] == 'download'
+    assert fix_server.requests == 2
+
+
+def test_apar_csv_bad_content_uses_cache(fix_server, tmpdir):
+    tooldir = str(tmpdir.join('tools'))
+    get_apar_csv(FakeModule(), {'messages': []}, tooldir, 0)
+
+    fix_server.body = ERROR_PAGE
+    output = {'messages': []}
+    path, meta = get_apar_csv(FakeModule(), output, tooldir, 0)
+    assert meta['source'] == 'cache'
+    assert 'unexpected content: <html>' in output['messages'][0]
+    assert not os.path.exists(path + '.tmp')
+    with open(path, 'rb') as csv:
+        assert csv.read() == APAR_CSV
+
+
+def test_apar_csv_bad_content_without_cache(fix_server, tmpdir):
+    tooldir = str(tmpdir.join('tools'))
+    fix_server.body = ERROR_PAGE
+    output = {'messages': []}
+
+    assert get_apar_csv(FakeModule(), output, tooldir, 24) == (
+        None, {'path': None, 'source': 'flrtvc', 'age': 0, 'time': pytest.approx(0, abs=1)})
+    assert os.listdir(tooldir) == []
+    assert len(output['messages']) == 1
+
+
+def test_apar_csv_timing(fix_server, tmpdir):
+    fix_server.delay = 0.2
+    path, meta = get_apar_csv(FakeModule(), {'messages': []}, str(tmpdir), 24)
+    assert 0.2 <= meta['time'] < 2
+    assert meta['age'] == 0
+
+    path, meta = get_apar_csv(FakeModule(), {'messages': []}, str(tmpdir), 24)
+    assert meta['time'] < 0.2
+
+
+def flrtvc_zip(version):
+    """
+    Content of a FLRTVC zip file with the flrtvc.ksh script
+    """
+    data = BytesIO()
+    with zipfile.ZipFile(data, 'w') as zfile:
+        zfile.writestr('flrtvc.ksh', '# flrtvc version {0}\n'.format(version))
+    return data.getvalue()
+
+
+class ZipHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Fix server answering the conditional requests of the FLRTVC zip file
+    """
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', server.etag)
+        self.send_header('Content-Length', str(len(server.body)))
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def zip_server(monkeypatch):
+    """
+    Local HTTP stand-in of the fix server
+    """
+    server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), ZipHandler)
+    server.etag = '"v1"'
+    server.body = flrtvc_zip(1)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    monkeypatch.setattr(flrtvc_cache, 'FLRTVC_URL',
+                        'http://127.0.0.1:{0}/FLRTVC-latest.zip'.format(server.server_address[1]))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def read_zip(path):
+    with zipfile.ZipFile(path) as zfile:
+        return zfile.read('flrtvc.ksh')
+
+
+def test_flrtvc_zip_conditional_get(zip_server, tmpdir):
+    tooldir = str(tmpdir)
+    output = {'messages': []}
+
+    zip_file = refresh_flrtvc_zip(FakeModule(), output, tooldir)
+    assert read_zip(zip_file) == b'# flrtvc version 1\n'
+    with open(os.path.join(tooldir, 'FLRTVC-latest.json')) as myfile:
+        assert json.load(myfile)['etag'] == '"v1"'
+
+    # not modified, the cached file is reused
+    assert refresh_flrtvc_zip(FakeModule(), output, tooldir) == zip_file
+    assert zip_server.requests == [None, '"v1"']
+
+    zip_server.etag = '"v2"'
+    zip_server.body = flrtvc_zip(2)
+    refresh_flrtvc_zip(FakeModule(), output, tooldir)
+    assert read_zip(zip_file) == b'# flrtvc version 2\n'
+    assert output['messages'] == []
+
+
+def test_flrtvc_zip_not_a_zip(zip_server, tmpdir):
+    tooldir = str(tmpdir)
+    zip_file = refresh_flrtvc_zip(FakeModule(), {'messages': []}, tooldir)
+
+    zip_server.etag = '"portal"'
+    zip_server.body = b'<html><body>Please log in</body></html>'
+    output = {'messages': []}
+    assert refresh_flrtvc_zip(FakeModule(), output, tooldir) == zip_file
+    assert read_zip(zip_file) == b'# flrtvc version 1\n'
+    assert 'not a zip file' in output['messages'][0]
+    assert sorted(os.listdir(tooldir)) == ['FLRTVC-latest.json', 'FLRTVC-latest.zip']
+
+    # without cached file, there is no usable zip file
+    assert refresh_flrtvc_zip(FakeModule(), output, str(tmpdir.mkdir('empty'))) is None
+    assert output['messages'][-1].endswith('not a zip file')
+
+
+def test_flrtvc_zip_unreachable(zip_server, tmpdir, monkeypatch):
+    tooldir = str(tmpdir)
+    zip_file = refresh_flrtvc_zip(FakeModule(), {'messages': []}, tooldir)
+
+    # a port nothing listens on
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    monkeypatch.setattr(flrtvc_cache, 'FLRTVC_URL', 'http://127.0.0.1:{0}/FLRTVC-latest.zip'.format(port))
+
+    output = {'messages': []}
+    assert refresh_flrtvc_zip(FakeModule(), output, tooldir) == zip_file
+    assert output['messages'][0].endswith('using cached {0}'.format(zip_file))
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.hmc_cache import HmcUuidCache
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+
+def test_uuids_per_hmc_and_cec(tmpdir):
+    path = str(tmpdir.join('hmc_uuids.json'))
+    cache = HmcUuidCache(FakeModule(), path)
+    cache.set('hmc1', '21C1B6V', 'cec-uuid1', {'1': 'vios-uuid1', '2': 'vios-uuid2'})
+    cache.set('hmc2', '21C1B6V', 'cec-uuid2', {'1': 'vios-uuid3'})
+    cache.save()
+
+    cache = HmcUuidCache(FakeModule(), path)
+    assert cache.get('hmc1', '21C1B6V')['vios'] == {'1': 'vios-uuid1', '2': 'vios-uuid2'}
+    assert cache.get('hmc2', '21C1B6V')['cec_uuid'] == 'cec-uuid2'
+    assert cache.get('hmc1', 'other') is None
+
+
+def test_expired_and_invalidated(tmpdir):
+    path = str(tmpdir.join('hmc_uuids.json'))
+    cache = HmcUuidCache(FakeModule(), path, ttl=60)
+    cache.set('hmc1', 'cec1', 'cec-uuid1', {})
+    cache.set('hmc1', 'cec2', 'cec-uuid2', {})
+    cache.set('hmc1', 'cec3', 'cec-uuid3', {})
+    cache.entries['hmc1/cec1']['time'] -= 120
+    assert cache.get('hmc1', 'cec1') is None
+
+    cache.invalidate_cec('hmc1', 'cec2')
+    assert cache.get('hmc1', 'cec2') is None
+    cache.save()
+    assert list(HmcUuidCache(FakeModule(), path, ttl=60).entries) == ['hmc1/cec3']
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.lpp_catalog import (
+    LppCatalog, UNKNOWN, format_oslevel, lpp_source_oslevel, parse_oslevel)
+
+LPP_SOURCES = {
+    '7200-04-01-1939-lpp_source': {'type': 'lpp_source'},
+    '7200-04-02-2016-lpp_source': {'type': 'lpp_source'},
+    '7200-05-01-2038-lpp_source': {'type': 'lpp_source'},
+    '7200-05-03-2148-lpp_source': {'type': 'lpp_source'},
+    '7200-05-02-2114-lpp_source': {'type': 'lpp_source'},
+    'aix72tl5': {'type': 'lpp_source', 'oslevel_r': '7200-05'},
+    '7300-01-01-2246-lpp_source': {'type': 'lpp_source'},
+    'custom': {'type': 'lpp_source'},
+}
+
+
+def test_parse_and_format_oslevel():
+    assert parse_oslevel('7200-05-03-2148\n') == (7200, 5, 3, 2148)
+    assert parse_oslevel('7200-05') == (7200, 5, UNKNOWN, UNKNOWN)
+    assert parse_oslevel('7.2') is None
+    assert parse_oslevel(None) is None
+    assert format_oslevel((7200, 5, 3, 2148)) == '7200-05-03-2148'
+    assert format_oslevel((7200, 5, UNKNOWN, UNKNOWN)) == '7200-05'
+
+
+def test_lpp_source_oslevel():
+    assert lpp_source_oslevel('7200-05-03-2148-lpp_source', {}) == (7200, 5, 3, 2148)
+    assert lpp_source_oslevel('aix72tl5', {'oslevel_r': '7200-05'}) == (7200, 5, UNKNOWN, UNKNOWN)
+    assert lpp_source_oslevel('custom', None) is None
+
+
+def test_find_next_and_latest():
+    catalog = LppCatalog(LPP_SOURCES)
+    oslevel = (7200, 4, 1, 1939)
+
+    assert catalog.level('custom') is None
+    assert catalog.find(oslevel, 'next', 'sp') == '7200-04-02-2016-lpp_source'
+    assert catalog.find(oslevel, 'latest', 'sp') == '7200-04-02-2016-lpp_source'
+    # the TL resource without SP sorts before the SPs of the TL
+    assert catalog.find(oslevel, 'next', 'tl') == 'aix72tl5'
+    assert catalog.find(oslevel, 'latest', 'tl') == '7200-05-03-2148-lpp_source'
+    # never crosses the release
+    assert catalog.find((7200, 5, 3, 2148), 'latest', 'tl') is None
+    assert catalog.find((7200, 5, 3, 2148), 'next', 'sp') is None
+    assert catalog.find((7200, 5, 1, 2038), 'next', 'sp') == '7200-05-02-2114-lpp_source'
+
+
+def test_find_resolved_once_per_level():
+    catalog = LppCatalog(LPP_SOURCES)
+
+    catalog.find((7200, 4, 1, 1939), 'latest', 'sp')
+    catalog.entries = []
+    # same release, TL and SP, another build
+    assert catalog.find((7200, 4, 1, 1940), 'latest', 'sp') == '7200-04-02-2016-lpp_source'
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible_collections.ibm.power_aix.plugins.module_utils import lpp_inventory
+from ansible_collections.ibm.power_aix.plugins.module_utils.lpp_inventory import (
+    LppInventoryCache, compare_inventories, get_inventories, parse_inventory)
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+INVENTORY = """oslevel 7200-05-03-2148
+fingerprint 3141592653-1048576
+efix IJ25165s2a S
+efix IJ31186s2a Q
+| #Package Name:Fileset:Level:State:PTF Id:Fix State:Type:Description:Destination Dir.:Uninstaller:\
+Message Catalog:Message Set:Message Number:Parent:Automatic:EFIX Locked:Install Path:Build Date
+| bos:bos.rte:7.2.5.0: : :C:F:Base Operating System Runtime: : : : : : :0:0:/:2045
+| bos.net:bos.net.tcp.client:7.2.5.1: : :C:F:TCP/IP Client Support: : : : : : :0:0:/:2045
+lslpp 0
+"""
+
+UNCHANGED = """oslevel 7200-05-03-2148
+fingerprint 3141592653-1048576
+unchanged
+"""
+
+
+def test_parse_inventory():
+    inventory = parse_inventory(INVENTORY)
+    assert inventory == {'oslevel': '7200-05-03-2148', 'fingerprint': '3141592653-1048576', 'unchanged': False,
+                         'efixes': {'IJ25165s2a': 'S', 'IJ31186s2a': 'Q'},
+                         'filesets': {'bos.rte': '7.2.5.0', 'bos.net.tcp.client': '7.2.5.1'}, 'rc': 0}
+
+    assert parse_inventory(UNCHANGED) == {'oslevel': '7200-05-03-2148', 'fingerprint': '3141592653-1048576',
+                                          'unchanged': True, 'efixes': {}, 'filesets': {}}
+
+
+def test_incomplete_inventory():
+    # the connection closed during the fileset listing
+    assert parse_inventory(INVENTORY.replace('lslpp 0\n', '')) is None
+    assert parse_inventory('oslevel 7200-05-03-2148\n') is None
+    assert parse_inventory('') is None
+
+
+def test_unchanged_fingerprint(tmpdir, monkeypatch):
+    cmds = []
+    answers = [INVENTORY, UNCHANGED]
+
+    def run_cmd(module, cmd, deadline):
+        cmds.append(cmd)
+        return 0, answers.pop(0), ''
+
+    monkeypatch.setattr(lpp_inventory, 'run_cmd', run_cmd)
+    cache = LppInventoryCache(FakeModule(), str(tmpdir))
+
+    inventories, sources = get_inventories(FakeModule(), ['lpar1'], cache)
+    assert sources == {'cached': [], 'collected': ['lpar1'], 'failed': []}
+    assert 'none' in cmds[0][2]
+    collected = inventories['lpar1']
+
+    # the filesets are not listed again
+    inventories, sources = get_inventories(FakeModule(), ['lpar1'], cache)
+    assert sources == {'cached': ['lpar1'], 'collected': [], 'failed': []}
+    assert '"$fp" = "3141592653-1048576"' in cmds[1][2]
+    assert inventories['lpar1'] == collected
+    assert inventories['lpar1']['filesets']['bos.rte'] == '7.2.5.0'
+
+
+def test_compare_inventories():
+    inventories = {
+        'lpar1': {'oslevel': '7200-05-03-2148', 'efixes': {'IJ25165s2a': 'S'},
+                  'filesets': {'bos.rte': '7.2.5.0', 'bos.net.tcp.client': '7.2.5.1', 'openssl.base': '1.1.1.1200'}},
+        'lpar2': {'oslevel': '7200-05-03-2148', 'efixes': {'IJ25165s2a': 'S', 'IJ31186s2a': 'Q'},
+                  'filesets': {'bos.rte': '7.2.5.0', 'bos.net.tcp.client': '7.2.5.2', 'openssl.base': '1.1.1.1200',
+                               'bos.adt.base': '7.2.5.0'}},
+    }
+
+    comparison = compare_inventories(inventories, ['lpar2', 'lpar1', 'missing'])
+    assert comparison == {
+        'machines': ['lpar2', 'lpar1'],
+        'oslevel': ['7200-05-03-2148', '7200-05-03-2148'],
+        'filesets': {'bos.net.tcp.client': ['7.2.5.2', '7.2.5.1'], 'bos.adt.base': ['7.2.5.0', None]},
+        'efixes': {'IJ31186s2a': ['Q', None]},
+        'common': 2,
+    }
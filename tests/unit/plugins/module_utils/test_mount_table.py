@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.mount_table import (
+    MountTable, parse_lsfs, parse_mount)
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+MOUNT = """  node       mounted        mounted over    vfs       date        options
+-------- ---------------  ---------------  ------ ------------ ---------------
+         /dev/hd4         /                jfs2   Jun 01 10:00 rw,log=/dev/hd8
+         /dev/hd1         /home            jfs2   Jun 01 10:00 rw,log=/dev/hd8
+         /proc            /proc            procfs Jun 01 10:00 rw
+nfssrv   /export/data     /data            nfs3   Jun 01 10:02 bg,hard,intr
+"""
+
+LSFS = """#MountPoint:Device:Vfs:Nodename:Type:Size:Options:AutoMount:Acct
+/:/dev/hd4:jfs2::bootfs:4194304:rw:yes:no
+/home:/dev/hd1:jfs2::bootfs:65536:rw:yes:no
+/data:/export/data:nfs3:nfssrv::::no
+/short:/dev/lv00:jfs2
+"""
+
+
+class MountModule(FakeModule):
+    """
+    mount and lsfs answering their outputs, only the line of the mount
+    point for 'lsfs -c <mount point>'
+    """
+
+    def __init__(self, rc=0):
+        super(MountModule, self).__init__(rc=rc, stderr='error')
+        self.outputs = {'mount': MOUNT, 'lsfs': LSFS}
+
+    def run_command(self, cmd, **kwargs):
+        self.commands.append(cmd)
+        stdout = self.outputs[cmd[0]]
+        if cmd[0] == 'lsfs' and len(cmd) > 2:
+            stdout = '\n'.join(line for line in stdout.splitlines() if line.startswith(cmd[2] + ':'))
+        return self.rc, stdout, self.stderr
+
+
+def test_parse_mount():
+    mounts = parse_mount(MOUNT)
+
+    assert [entry['mount_point'] for entry in mounts] == ['/', '/home', '/proc', '/data']
+    assert mounts[0] == {'node': '', 'device': '/dev/hd4', 'mount_point': '/', 'vfs': 'jfs2',
+                         'options': 'rw,log=/dev/hd8'}
+    assert mounts[3] == {'node': 'nfssrv', 'device': '/export/data', 'mount_point': '/data', 'vfs': 'nfs3',
+                         'options': 'bg,hard,intr'}
+
+
+def test_parse_lsfs():
+    filesystems = parse_lsfs(LSFS)
+
+    assert sorted(filesystems) == ['/', '/data', '/home', '/short']
+    assert filesystems['/home']['device'] == '/dev/hd1'
+    assert filesystems['/data']['node'] == 'nfssrv'
+    assert filesystems['/short']['size'] == ''
+
+
+def test_mount_state():
+    module = MountModule()
+    table = MountTable(module)
+
+    assert table.is_mounted('/home')
+    assert table.is_mounted('/dev/hd1')
+    assert table.is_mounted('nfssrv:/export/data')
+    assert not table.is_mounted('/short')
+    assert module.commands == [['mount']]
+
+    table.refresh_mounts()
+    module.outputs['mount'] = MOUNT.replace('/home', '/other')
+    assert not table.is_mounted('/home')
+
+
+def test_filesystem_definitions():
+    module = MountModule()
+    table = MountTable(module)
+
+    assert table.get_fs('/dev/hd1')['mount_point'] == '/home'
+    # a remote device is not a local filesystem name
+    assert table.get_fs('/export/data') is None
+    assert table.get_fs('/missing') is None
+    assert module.commands == [['lsfs', '-c']]
+
+    module.outputs['lsfs'] = LSFS.replace('/home:/dev/hd1:jfs2::bootfs:65536', '/home:/dev/hd1:jfs2::bootfs:131072')
+    table.refresh('/home')
+    assert table.get_fs('/home')['size'] == '131072'
+    assert module.commands[-1] == ['lsfs', '-c', '/home']
+    assert table.get_fs('/')['size'] == '4194304'
+    assert len(module.commands) == 2
+
+
+def test_listing_failure():
+    with pytest.raises(CommandError) as exc:
+        MountTable(MountModule(rc=1)).is_mounted('/')
+    assert exc.value.cmd == ['mount']
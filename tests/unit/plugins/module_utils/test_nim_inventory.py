@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import time
+
+import pytest
+
+from ansible_collections.ibm.power_aix.plugins.module_utils import nim_inventory
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_inventory import (
+    NimInventory, parse_lsnim)
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+LSNIM = """master:
+   class          = machines
+   type           = master
+   Cstate         = ready for a NIM operation
+quimby01:
+   class          = machines
+   type           = standalone
+   if1            = master_net quimby01 0
+   Cstate         = ready for a NIM operation
+
+vios1:
+   class          = machines
+   type           = vios
+   mgmt_profile1  = hmc1 1 cec1
+7200-05-03-2148-lpp_source:
+   class       = resources
+   type        = lpp_source
+   location    = /export/nim/lpp_source/7200-05-03-2148
+   comments    = contains = signs
+"""
+
+
+@pytest.fixture
+def nim_db(tmpdir, monkeypatch):
+    """
+    NIM database files last modified one minute ago
+    """
+    files = []
+    for name in ('nim_object', 'nim_attr'):
+        path = tmpdir.join(name)
+        path.write('')
+        os.utime(str(path), (time.time() - 60, time.time() - 60))
+        files.append(str(path))
+    monkeypatch.setattr(nim_inventory, 'NIM_DB_FILES', files)
+    return files
+
+
+def test_parse_lsnim():
+    objects = parse_lsnim(LSNIM)
+
+    assert sorted(objects) == ['7200-05-03-2148-lpp_source', 'master', 'quimby01', 'vios1']
+    assert objects['quimby01']['if1'] == 'master_net quimby01 0'
+    assert objects['vios1'] == {'class': 'machines', 'type': 'vios', 'mgmt_profile1': 'hmc1 1 cec1'}
+    assert objects['7200-05-03-2148-lpp_source']['comments'] == 'contains = signs'
+
+
+def test_inventory_indexed_by_type(nim_db, tmpdir):
+    inventory = NimInventory(FakeModule(LSNIM), str(tmpdir.join('cache.json'))).load()
+
+    assert inventory.source == 'lsnim'
+    assert inventory.names('standalone') == ['quimby01']
+    assert list(inventory.by_type('lpp_source')) == ['7200-05-03-2148-lpp_source']
+    assert inventory.get('missing') is None
+    # copies, the inventory is not modified by the callers
+    inventory.get('vios1')['type'] = 'changed'
+    assert inventory.get('vios1')['type'] == 'vios'
+
+
+def test_inventory_cache(nim_db, tmpdir):
+    cache_file = str(tmpdir.join('cache.json'))
+    NimInventory(FakeModule(LSNIM), cache_file).load()
+
+    module = FakeModule(LSNIM)
+    inventory = NimInventory(module, cache_file).load()
+    assert inventory.source == 'cache'
+    assert module.commands == []
+    assert inventory.names('vios') == ['vios1']
+
+    # any NIM operation changes the database
+    with open(nim_db[1], 'a') as nim_attr:
+        nim_attr.write('changed')
+    assert NimInventory(module, cache_file).load().source == 'lsnim'
+    assert module.commands == [['lsnim', '-l']]
+
+
+def test_inventory_lsnim_failure(nim_db, tmpdir):
+    with pytest.raises(CommandError) as exc:
+        NimInventory(FakeModule(LSNIM, rc=1, stderr='lsnim error'), str(tmpdir.join('cache.json'))).load()
+    assert exc.value.cmd == ['lsnim', '-l']
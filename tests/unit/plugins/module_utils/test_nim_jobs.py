@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import time
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_jobs import (
+    NimJobs, job_status)
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+# lsnim -a Cstate -a info -a Cstate_result c1 c2 c3
+LSNIM_STATUS = '''c1:
+   Cstate        = ready for a NIM operation
+   Cstate_result = success
+c2:
+   Cstate        = Base Operating System installation is being performed
+   info          = Filesets processed: 12 of 96
+c3:
+   Cstate        = ready for a NIM operation
+   Cstate_result = failure
+'''
+
+
+def make_jobs(tmpdir, module, names):
+    jobs_file = str(tmpdir.join('nim_jobs.json'))
+    job = {'operation': 'cust', 'resource': 'lpp', 'start': time.time(), 'rc': 0}
+    with open(jobs_file, 'w') as jobs:
+        json.dump({'version': 1, 'jobs': dict((name, dict(job)) for name in names)}, jobs)
+    return NimJobs(module, jobs_file=jobs_file)
+
+
+def test_status_empty_info_and_colon_in_info(tmpdir):
+    module = FakeModule(LSNIM_STATUS)
+    jobs = make_jobs(tmpdir, module, ['c1', 'c2', 'c3']).status()
+
+    assert module.commands == [['lsnim', '-a', 'Cstate', '-a', 'info', '-a', 'Cstate_result', 'c1', 'c2', 'c3']]
+    # no info attribute
+    assert jobs['c1']['status'] == 'success'
+    assert jobs['c1']['info'] == ''
+    assert jobs['c1']['progress'] == 100
+    # colon in the info value
+    assert jobs['c2']['status'] == 'running'
+    assert jobs['c2']['info'] == 'Filesets processed: 12 of 96'
+    assert jobs['c2']['progress'] == 12
+    assert jobs['c3']['status'] == 'failure'
+
+
+def test_status_object_removed(tmpdir):
+    module = FakeModule(LSNIM_STATUS, rc=1)
+    jobs = make_jobs(tmpdir, module, ['c1', 'gone']).status()
+
+    assert jobs['c1']['status'] == 'success'
+    assert jobs['gone']['status'] == 'unknown'
+
+
+def test_job_status_launch_failed():
+    job = {'operation': 'cust', 'resource': 'lpp', 'start': time.time(), 'rc': 1}
+    status = job_status(job, {'Cstate': 'ready for a NIM operation'})
+
+    assert status['status'] == 'failure'
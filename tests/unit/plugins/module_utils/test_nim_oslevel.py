@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import sys
+import time
+
+from ansible_collections.ibm.power_aix.plugins.module_utils import nim_oslevel
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_oslevel import (
+    OslevelCache, TIMEDOUT, get_oslevels, nim_state, run_cmd)
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+
+def test_cache_keyed_by_state(tmpdir):
+    path = str(tmpdir.join('nim_oslevel.json'))
+    cache = OslevelCache(FakeModule(), path)
+    cache.set('lpar1', 'ready|success|', '7200-05-03-2148')
+    cache.set('lpar2', None, '7200-05-03-2148')
+    cache.save()
+
+    cache = OslevelCache(FakeModule(), path)
+    assert cache.get('lpar1', 'ready|success|') == '7200-05-03-2148'
+    assert cache.get('lpar1', 'ready|failure|') is None
+    assert cache.get('lpar1', None) is None
+    # not cached without a state
+    assert cache.get('lpar2', None) is None
+    assert list(cache.entries) == ['lpar1']
+
+
+def test_cache_expired_and_invalidated(tmpdir):
+    path = str(tmpdir.join('nim_oslevel.json'))
+    cache = OslevelCache(FakeModule(), path, ttl=60)
+    for machine in ('lpar1', 'lpar2', 'lpar3'):
+        cache.set(machine, 'ready||', '7200-05-03-2148')
+    cache.entries['lpar1']['time'] -= 120
+    assert cache.get('lpar1', 'ready||') is None
+
+    cache.invalidate(['lpar2'])
+    cache.save()
+    assert list(OslevelCache(FakeModule(), path, ttl=60).entries) == ['lpar3']
+
+
+class FakeOslevel(object):
+    """
+    run_cmd answering the oslevel command of each machine, with the c_rsh
+    output 'oslevel; echo rc=$?' for the NIM clients
+    """
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.machines = []
+
+    def __call__(self, module, cmd, deadline):
+        machine = 'master' if cmd[0] == '/usr/bin/oslevel' else cmd[1]
+        self.machines.append(machine)
+        return self.answers[machine]
+
+
+def test_run_cmd_killed_at_deadline():
+    start = time.time()
+    rc, stdout, stderr = run_cmd(FakeModule(), [sys.executable, '-c', 'import time; time.sleep(10)'], start + 0.3)
+    assert rc is None
+    assert time.time() - start < 3
+
+    rc, stdout, stderr = run_cmd(FakeModule(), [sys.executable, '-c', 'print("7200-05-03-2148")'], time.time() + 10)
+    assert (rc, stdout) == (0, '7200-05-03-2148\n')
+    assert run_cmd(FakeModule(), ['/nonexistent/oslevel'], time.time() + 10)[0] == 127
+
+
+def test_rc_parsing(monkeypatch):
+    monkeypatch.setattr(nim_oslevel, 'run_cmd', FakeOslevel({
+        'master': (0, '7300-01-01-2246\n', ''),
+        'lpar1': (0, '7200-05-03-2148\nrc=0\n', ''),
+        'lpar2': (0, 'oslevel: not found\nrc=127\n', ''),
+        'lpar3': (1, '', 'c_rsh: connection refused'),
+        'lpar4': (None, '', ''),
+        'lpar5': (0, 'rc=0\n', '')}))
+    module = FakeModule()
+
+    oslevels = get_oslevels(module, ['master', 'lpar1', 'lpar2', 'lpar3', 'lpar4', 'lpar5'])
+    assert oslevels == {'master': '7300-01-01-2246', 'lpar1': '7200-05-03-2148', 'lpar2': TIMEDOUT,
+                        'lpar3': TIMEDOUT, 'lpar4': TIMEDOUT, 'lpar5': TIMEDOUT}
+    assert 'Failed to get oslevel for lpar2: oslevel returned 127' in module.logs
+    assert any(msg.startswith('[WARNING] lpar4 not responding') for msg in module.logs)
+
+
+def test_oslevels_cached_per_cstate(tmpdir, monkeypatch):
+    fake = FakeOslevel({'lpar1': (0, '7200-05-03-2148\nrc=0\n', ''),
+                        'lpar2': (0, '7200-05-03-2148\nrc=0\n', '')})
+    monkeypatch.setattr(nim_oslevel, 'run_cmd', fake)
+    path = str(tmpdir.join('nim_oslevel.json'))
+    ready = nim_state({'Cstate': 'ready for a NIM operation', 'Cstate_result': 'success'})
+    states = {'lpar1': ready, 'lpar2': ready}
+
+    get_oslevels(FakeModule(), ['lpar1', 'lpar2'], states=states, cache=OslevelCache(FakeModule(), path))
+    assert sorted(fake.machines) == ['lpar1', 'lpar2']
+
+    # lpar2 has been updated since
+    fake.machines = []
+    states['lpar2'] = nim_state({'Cstate': 'ready for a NIM operation', 'Cstate_result': 'success',
+                                 'prev_state': 'customization is being performed'})
+    oslevels = get_oslevels(FakeModule(), ['lpar1', 'lpar2'], states=states, cache=OslevelCache(FakeModule(), path))
+    assert oslevels == {'lpar1': '7200-05-03-2148', 'lpar2': '7200-05-03-2148'}
+    assert fake.machines == ['lpar2']
+
+    # not cached without NIM state
+    fake.machines = []
+    get_oslevels(FakeModule(), ['lpar1'], cache=OslevelCache(FakeModule(), path))
+    assert fake.machines == ['lpar1']
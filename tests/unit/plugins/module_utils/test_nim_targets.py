@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import time
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_targets import (
+    NimTargets, group_members)
+
+CLIENTS = {
+    'standalone': ['quimby1', 'quimby2', 'quimby07', 'quimby10', 'quimby12', 'quimbyx', 'bart'],
+    'vios': ['vios1', 'vios2'],
+}
+GROUPS = {
+    'cluster': {'type': 'mac_group', 'member1': 'quimby2', 'member2': 'bart', 'member3': 'gone'},
+}
+
+
+def test_group_members_in_member_order():
+    attrs = {'member10': 'c', 'member2': 'b', 'member1': 'a  EXCLUDED', 'type': 'mac_group'}
+    assert group_members(attrs) == ['a', 'b', 'c']
+
+
+def test_match_names_types_and_groups():
+    targets = NimTargets(CLIENTS, GROUPS)
+
+    assert targets.expand(['bart']) == ['bart']
+    assert targets.expand(['VIOS']) == ['vios1', 'vios2']
+    assert targets.expand(['cluster']) == ['bart', 'quimby2']
+    assert targets.expand(['ALL']) == targets.expand(['*'])
+    assert len(targets.expand(['*'])) == 9
+    assert targets.expand(['unknown']) == []
+
+
+def test_match_globs_and_ranges():
+    targets = NimTargets(CLIENTS)
+
+    assert targets.expand(['quimby1*']) == ['quimby1', 'quimby10', 'quimby12']
+    assert targets.expand(['quimby?']) == ['quimby1', 'quimby2', 'quimbyx']
+    assert targets.expand(['quimby[0-1]*']) == ['quimby07', 'quimby1', 'quimby10', 'quimby12']
+    # the range is numeric, quimby07 is not quimby7
+    assert targets.expand(['quimby[2:10]']) == ['quimby10', 'quimby2']
+    assert targets.expand(['quimby[1:1000]']) == ['quimby1', 'quimby10', 'quimby12', 'quimby2']
+
+
+def test_negation_and_master():
+    assert NimTargets(CLIENTS).expand(['quimby*', '!quimby1*', '!quimbyx']) == ['quimby07', 'quimby2']
+    assert NimTargets(CLIENTS).expand(['master']) == []
+    assert NimTargets(CLIENTS, master=True).expand(['master', 'bart']) == ['bart', 'master']
+
+
+def test_benchmark_20k_objects():
+    clients = {
+        'standalone': ['lpar{0}'.format(i) for i in range(18000)],
+        'vios': ['vios{0}'.format(i) for i in range(2000)],
+    }
+    groups = dict(('group{0}'.format(g),
+                   dict(('member{0}'.format(i), 'lpar{0}'.format(g * 100 + i)) for i in range(1, 101)))
+                  for g in range(100))
+    patterns = (['lpar{0}*'.format(i) for i in range(1000)]
+                + ['lpar[{0}:{1}]'.format(i * 10, i * 10 + 50) for i in range(1000)]
+                + ['lpar{0}'.format(i * 7) for i in range(1000)]
+                + ['group{0}'.format(g) for g in range(100)]
+                + ['vios1?', '!lpar1*'])
+
+    start = time.time()
+    targets = NimTargets(clients, groups)
+    resolved = targets.expand(patterns)
+    elapsed = time.time() - start
+
+    assert 'vios15' in resolved
+    assert not [name for name in resolved if name.startswith('lpar1')]
+    # a few tens of milliseconds, the bound only catches a per-client scan
+    assert elapsed < 2
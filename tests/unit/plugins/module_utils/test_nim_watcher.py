@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import threading
+import time
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_watcher import (
+    NimWatcher, WATCHED_ATTRS)
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+READY = 'ready for a NIM operation'
+
+
+class FakeNim(FakeModule):
+    """
+    run_command of lsnim, the Cstate of each object given by a function
+    of the time elapsed since the fake has been created
+    """
+
+    def __init__(self, cstates):
+        super(FakeNim, self).__init__()
+        self.cstates = cstates
+        self.start = time.time()
+        self.calls = []
+
+    def run_command(self, cmd, **kwargs):
+        names = cmd[1 + 2 * len(WATCHED_ATTRS):]
+        elapsed = time.time() - self.start
+        self.calls.append((elapsed, names))
+        stdout = ''
+        for name in names:
+            if name in self.cstates:
+                stdout += '{0}:\n   Cstate = {1}\n'.format(name, self.cstates[name](elapsed))
+        rc = 0 if all(name in self.cstates for name in names) else 1
+        return rc, stdout, '' if rc == 0 else '0042-053 lsnim: there is no NIM object named "{0}"'.format(names[-1])
+
+
+def ready(state):
+    return state.get('Cstate') == READY
+
+
+def test_state_before_the_operation_ignored():
+    # the object is ready until the operation starts after 0.1s
+    nim = FakeNim({'vios1': lambda elapsed: READY if elapsed < 0.1 or elapsed > 0.5 else 'in progress'})
+    watcher = NimWatcher(nim, min_interval=0.05, max_interval=0.1)
+    progress = []
+
+    status, state = watcher.wait('vios1', ready, 5, on_progress=progress.append, delay=0.2)
+    assert status == 'done'
+    assert [item['Cstate'] for item in progress] == ['in progress', READY]
+    assert nim.calls[0][0] >= 0.05
+
+
+def test_backoff_and_stall():
+    nim = FakeNim({'vios1': lambda elapsed: 'in progress'})
+    watcher = NimWatcher(nim, min_interval=0.05, max_interval=0.2)
+
+    assert watcher.wait('vios1', ready, 1, delay=0) == ('stalled', {'Cstate': 'in progress'})
+    gaps = [after[0] - before[0] for before, after in zip(nim.calls, nim.calls[1:])]
+    # reset by the first state, then doubled up to the maximum interval
+    assert 0.04 <= gaps[0] < 0.09
+    assert 0.09 <= gaps[1] < 0.15
+    assert all(0.18 <= gap < 0.3 for gap in gaps[2:])
+
+
+def test_operations_batched():
+    nim = FakeNim({'vios1': lambda elapsed: READY if elapsed > 0.3 else 'in progress',
+                   'vios2': lambda elapsed: READY if elapsed > 0.4 else 'in progress'})
+    watcher = NimWatcher(nim, min_interval=0.05, max_interval=0.1)
+    results = {}
+
+    def wait(name):
+        results[name] = watcher.wait(name, ready, 5, delay=0)[0]
+
+    threads = [threading.Thread(target=wait, args=(name,)) for name in ('vios1', 'vios2')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {'vios1': 'done', 'vios2': 'done'}
+    # a single lsnim for both objects
+    assert ['vios1', 'vios2'] in [names for elapsed, names in nim.calls]
+    assert all(len(names) == 2 for elapsed, names in nim.calls if elapsed < 0.3)
+    # the polling thread ends with the last operation
+    time.sleep(0.2)
+    assert watcher.thread is None
+
+
+def test_lsnim_error():
+    nim = FakeNim({'vios1': lambda elapsed: 'in progress'})
+    watcher = NimWatcher(nim, min_interval=0.05, max_interval=0.1)
+
+    status, msg = watcher.wait('missing', ready, 5, delay=0)
+    assert status == 'error'
+    assert 'there is no NIM object named "missing"' in msg
+
+
+def test_stop_event():
+    nim = FakeNim({'vios1': lambda elapsed: 'in progress'})
+    watcher = NimWatcher(nim, min_interval=0.05, max_interval=0.1)
+    stop = threading.Event()
+    stop.set()
+
+    assert watcher.wait('vios1', ready, 5, stop=stop)[0] == 'stopped'
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import threading
+import time
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.pool import run_pool
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+
+class Tracker(object):
+    """
+    Item function recording the items and the peak concurrency
+    """
+
+    def __init__(self, duration=0.01):
+        self.duration = duration
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.done = []
+
+    def run(self, item):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.duration)
+        with self.lock:
+            self.running -= 1
+            self.done.append(item)
+
+
+def test_all_items_bounded():
+    tracker = Tracker()
+
+    assert run_pool(FakeModule(), tracker.run, range(20), 4) == ([], [])
+    assert sorted(tracker.done) == list(range(20))
+    assert tracker.peak == 4
+
+
+def test_no_item():
+    assert run_pool(FakeModule(), Tracker().run, [], 4) == ([], [])
+
+
+def test_stop_event():
+    stop = threading.Event()
+    done = []
+
+    def func(item):
+        done.append(item)
+        if item == 2:
+            stop.set()
+
+    assert run_pool(FakeModule(), func, range(10), 1, stop=stop) == (list(range(3, 10)), [])
+    assert done == [0, 1, 2]
+
+
+def test_deadline():
+    tracker = Tracker(duration=0.2)
+    module = FakeModule()
+
+    not_started, failed = run_pool(module, tracker.run, range(10), 2, deadline=time.time() + 0.3)
+    assert failed == []
+    assert len(tracker.done) + len(not_started) == 10
+    assert 2 <= len(tracker.done) <= 4
+    assert module.logs == []
+
+
+def test_can_start_limit_per_key():
+    tracker = Tracker(duration=0.05)
+    running = {}
+    peaks = {}
+
+    def can_start(item):
+        key = item % 2
+        if running.get(key, 0) >= 2:
+            return False
+        running[key] = running.get(key, 0) + 1
+        peaks[key] = max(peaks.get(key, 0), running[key])
+        return True
+
+    def release(item):
+        running[item % 2] -= 1
+
+    assert run_pool(FakeModule(), tracker.run, range(12), 8, can_start=can_start, release=release) == ([], [])
+    assert sorted(tracker.done) == list(range(12))
+    assert tracker.peak == 4
+    assert peaks == {0: 2, 1: 2}
+    assert running == {0: 0, 1: 0}
+
+
+def test_busy_items_skipped():
+    # item 'a1' waits for 'a0', 'b0' starts before it
+    busy = set()
+    started = []
+
+    def func(item):
+        started.append(item)
+        time.sleep(0.05)
+
+    def can_start(item):
+        if item[0] in busy:
+            return False
+        busy.add(item[0])
+        return True
+
+    def release(item):
+        busy.discard(item[0])
+
+    assert run_pool(FakeModule(), func, ['a0', 'a1', 'b0'], 2, can_start=can_start, release=release) == ([], [])
+    assert sorted(started[:2]) == ['a0', 'b0']
+    assert started[2] == 'a1'
+
+
+def test_never_startable_items():
+    assert run_pool(FakeModule(), Tracker().run, range(3), 2, can_start=lambda item: item != 1) == ([1], [])
+
+
+def test_failed_items():
+    module = FakeModule()
+    done = []
+    released = []
+
+    def func(item):
+        if item == 1:
+            # module.fail_json
+            raise SystemExit(1)
+        if item == 2:
+            raise ValueError('bad item')
+        time.sleep(0.01)
+        done.append(item)
+
+    not_started, failed = run_pool(module, func, range(6), 2, release=released.append)
+    assert not_started == []
+    assert sorted(failed) == [1, 2]
+    assert sorted(done) == [0, 3, 4, 5]
+    assert sorted(released) == list(range(6))
+    assert len(module.logs) == 2
+    assert "func failed for 2: ValueError('bad item')" in ' '.join(module.logs)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.command import CommandError
+from ansible_collections.ibm.power_aix.plugins.module_utils.principals import (
+    PrincipalInventory, diff_attributes, parse_colon_records)
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+# lsuser -c -a id pgrp groups home gecos ALL
+LSUSER = """#name:id:pgrp:groups:home:gecos
+root:0:system:system,bin,sys:/:
+#name:id:pgrp:groups:home:gecos
+guest:100:usr:usr:/home/guest:Guest#!: no login
+"""
+
+
+def test_parse_colon_records():
+    users = parse_colon_records(LSUSER)
+
+    assert users == {
+        'root': {'id': '0', 'pgrp': 'system', 'groups': 'system,bin,sys', 'home': '/', 'gecos': ''},
+        'guest': {'id': '100', 'pgrp': 'usr', 'groups': 'usr', 'home': '/home/guest', 'gecos': 'Guest: no login'},
+    }
+    assert parse_colon_records('no header\n') == {}
+
+
+def test_diff_attributes():
+    current = {'id': '100', 'groups': 'usr,staff', 'login': 'true'}
+    requested = {'id': 100, 'groups': ['staff', 'usr'], 'login': False, 'home': '/home/guest',
+                 'load_module': 'LDAP'}
+
+    assert diff_attributes(requested, current) == {
+        'login': {'before': 'true', 'after': 'false'},
+        'home': {'before': None, 'after': '/home/guest'},
+    }
+    assert diff_attributes({'id': 100}, None) == {'id': {'before': None, 'after': '100'}}
+
+
+def test_inventory_loaded_once():
+    module = FakeModule(LSUSER)
+    inventory = PrincipalInventory(module, 'lsuser')
+
+    inventory.load()
+    inventory.load()
+    assert module.commands == [['lsuser', '-c', 'ALL']]
+    assert inventory.get('guest')['home'] == '/home/guest'
+    assert inventory.get('missing') is None
+    assert len(module.commands) == 1
+
+    inventory.load('LDAP')
+    assert module.commands[-1] == ['lsuser', '-R', 'LDAP', '-c', 'ALL']
+
+
+def test_inventory_single_lookup_and_updates():
+    module = FakeModule(LSUSER)
+    inventory = PrincipalInventory(module, 'lsuser')
+
+    assert inventory.get('guest')['id'] == '100'
+    assert module.commands == [['lsuser', '-c', 'guest']]
+
+    inventory.added('new', {'id': 200, 'load_module': 'files'})
+    assert inventory.get('new') == {'id': '200'}
+    inventory.changed('new', {'id': {'before': '200', 'after': '201'}})
+    assert inventory.get('new') == {'id': '201'}
+    inventory.removed('new')
+    module.rc = 2
+    assert inventory.get('new') is None
+
+
+def test_inventory_load_failure():
+    with pytest.raises(CommandError) as exc:
+        PrincipalInventory(FakeModule(LSUSER, rc=1, stderr='lsgroup error'), 'lsgroup').load()
+    assert exc.value.cmd == ['lsgroup', '-c', 'ALL']
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import subprocess
+
+import pytest
+
+from ansible_collections.ibm.power_aix.plugins.modules import nim
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+EMGR_LIST = """ID  STATE LABEL      INSTALL TIME      UPDATED BY ABSTRACT
+=== ===== ========== ================= ========== ======================================
+1    S    IJ25165s2a 04/28/21 10:01:36            IJ25165 for AIX 7.2 TL5 SP2
+2    S    IJ31186s2a 04/28/21 10:02:01            IJ31186 for AIX 7.2 TL5 SP2
+
+STATE codes:
+ S = STABLE
+ M = MOUNTED
+"""
+
+EMGR_NO_FIX = "There is no efix data on this system.\n"
+
+EMGR_LIST_ERROR = "emgr: 0645-007 ATTENTION: /usr/emgrdata/DBS/efix.db is locked.\n"
+
+EMGR_REMOVED = """+-----------------------------------------------------------------------------+
+Efix Manager Initialization
++-----------------------------------------------------------------------------+
+Removing efix {0} ...
+EFIX NUMBER       LABEL         OPERATION              RESULT
+===========       ==============  =================    ==============
+1                 {0}      REMOVE                 SUCCESS
+
+Return Status = SUCCESS
+"""
+
+EMGR_BUSY = """+-----------------------------------------------------------------------------+
+Efix Manager Initialization
++-----------------------------------------------------------------------------+
+emgr: 0645-027 The file /usr/lib/drivers/if_en is in use, efix {0} cannot be removed.
+
+Return Status = FAILURE
+"""
+
+
+def script_output(tmpdir, list_out, list_rc, removals):
+    """
+    Output of EFIX_REMOVE_SCRIPT with a fake emgr listing list_out with
+    list_rc, and removing each label with its (output, rc) in removals
+    """
+    emgr = tmpdir.join('emgr')
+    lines = ['#!/bin/sh',
+             'if [ "$1" = "-l" ]; then',
+             "    cat <<'EOF'", list_out.rstrip('\n'), 'EOF',
+             '    exit {0}'.format(list_rc),
+             'fi',
+             'case "$3" in']
+    for label, (out, rc) in removals.items():
+        lines += ['{0})'.format(label), "    cat <<'EOF'", out.format(label).rstrip('\n'), 'EOF',
+                  '    exit {0};;'.format(rc)]
+    lines.append('esac')
+    emgr.write('\n'.join(lines) + '\n')
+    emgr.chmod(0o755)
+    script = nim.EFIX_REMOVE_SCRIPT.replace('/usr/sbin/emgr', str(emgr))
+    return subprocess.check_output(['/bin/sh', '-c', script]).decode('utf-8')
+
+
+@pytest.fixture
+def results(monkeypatch):
+    results = {'nim_output': [], 'fix_removal': {}}
+    monkeypatch.setattr(nim, 'results', results, raising=False)
+    return results
+
+
+def test_all_fixes_removed(tmpdir, results):
+    stdout = script_output(tmpdir, EMGR_LIST, 0, {'IJ25165s2a': (EMGR_REMOVED, 0),
+                                                  'IJ31186s2a': (EMGR_REMOVED, 0)})
+
+    list_rc, fixes, output = nim.parse_fix_removal(stdout)
+    assert list_rc == 0
+    assert fixes == [{'label': 'IJ25165s2a', 'rc': 0}, {'label': 'IJ31186s2a', 'rc': 0}]
+    assert output[:len(EMGR_LIST.splitlines())] == EMGR_LIST.splitlines()
+    assert 'Removing efix IJ31186s2a ...' in output
+
+    assert nim.remove_fixes(FakeModule(stdout), 'lpar1') == 0
+    assert results['fix_removal']['lpar1'] == {'rc': 0, 'fixes': fixes}
+
+
+def test_no_fix(tmpdir, results):
+    stdout = script_output(tmpdir, EMGR_NO_FIX, 0, {})
+
+    assert nim.parse_fix_removal(stdout) == (0, [], [EMGR_NO_FIX.rstrip('\n')])
+    assert nim.remove_fixes(FakeModule(stdout), 'lpar1') == 0
+    assert results['fix_removal']['lpar1'] == {'rc': 0, 'fixes': []}
+
+
+def test_list_failure(tmpdir, results):
+    stdout = script_output(tmpdir, EMGR_LIST_ERROR, 2, {})
+
+    assert nim.parse_fix_removal(stdout) == (2, [], [EMGR_LIST_ERROR.rstrip('\n')])
+    assert nim.remove_fixes(FakeModule(stdout), 'lpar1') == 2
+    assert results['fix_removal']['lpar1'] == {'rc': 2, 'fixes': []}
+    assert results['nim_output'][-1] == 'EMGR list - Error: emgr -l returns above error on lpar1!'
+
+
+def test_list_not_run(results):
+    # c_rsh failed before running the script
+    module = FakeModule('', rc=255, stderr='c_rsh: connection refused')
+
+    assert nim.parse_fix_removal('') == (None, [], [])
+    assert nim.remove_fixes(module, 'lpar1') == 255
+    assert results['fix_removal']['lpar1'] == {'rc': 255, 'fixes': []}
+    assert results['nim_output'] == ['c_rsh: connection refused',
+                                     'EMGR list - Error: Command {0} returns above error!'.format(
+                                         ['/usr/lpp/bos.sysmgt/nim/methods/c_rsh', 'lpar1', nim.EFIX_REMOVE_SCRIPT])]
+
+
+def test_partial_removal_failure(tmpdir, results):
+    stdout = script_output(tmpdir, EMGR_LIST, 0, {'IJ25165s2a': (EMGR_BUSY, 1),
+                                                  'IJ31186s2a': (EMGR_REMOVED, 0)})
+
+    list_rc, fixes, output = nim.parse_fix_removal(stdout)
+    assert list_rc == 0
+    # the next fixes are removed after a failure
+    assert fixes == [{'label': 'IJ25165s2a', 'rc': 1}, {'label': 'IJ31186s2a', 'rc': 0}]
+
+    assert nim.remove_fixes(FakeModule(stdout), 'lpar1') == 1
+    assert results['fix_removal']['lpar1'] == {'rc': 1, 'fixes': fixes}
+    assert results['nim_output'][-1] == 'EMGR remove - Error: emgr -r -L IJ25165s2a returns above error on lpar1!'
+    assert 'emgr: 0645-027 The file /usr/lib/drivers/if_en is in use, efix IJ25165s2a cannot be removed.' \
+        in results['nim_output']
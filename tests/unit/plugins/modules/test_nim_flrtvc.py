@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import os
+import re
+import threading
+import time
+
+import pytest
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.flrtvc_cache import parse_epkg_info
+from ansible_collections.ibm.power_aix.plugins.modules import nim_flrtvc
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule, ModuleExit
+
+FILES_PER_EPKG = 20
+
+
+def emgr_output(number):
+    """
+    Synthetic 'emgr -dXv3' output of the efix <number>. The efixes 2n and
+    2n+1 both lock /usr/lib/shared<n>, the most recent one is 2n+1.
+    """
+    lines = ['LABEL:            IJ{0:05d}s0a'.format(number),
+             'PACKAGING DATE:   Mon Oct  9 09:{0:02d}:{1:02d} CDT 2017'.format(number // 60 % 60, number % 60),
+             '   PACKAGE:       bos.mp64']
+    lines += ['   LOCATION:      /usr/lib/efix{0}/file{1}'.format(number, i) for i in range(FILES_PER_EPKG)]
+    lines.append('   LOCATION:      /usr/lib/shared{0}'.format(number // 2))
+    return '\n'.join(lines) + '\n'
+
+
+class FakeIndex(object):
+    """
+    EpkgIndex already holding the parsed emgr output of the epkgs
+    """
+
+    def __init__(self):
+        self.index = {}
+
+    def add(self, path):
+        number = int(re.search(r'/epkg(\d+)\.epkg\.Z$', path).group(1))
+        self.index[path] = parse_epkg_info(emgr_output(number))
+
+    def get(self, output, machine, path):
+        return self.index[path]
+
+
+def prepare(count):
+    """
+    Index the emgr output of count epkgs
+    """
+    nim_flrtvc.module = FakeModule()
+    nim_flrtvc.epkg_index = FakeIndex()
+    epkgs = ['/tmp/efixes/epkg{0}.epkg.Z'.format(number) for number in range(count)]
+    for epkg in epkgs:
+        nim_flrtvc.epkg_index.add(epkg)
+    return nim_flrtvc.module, epkgs
+
+
+def run_check(module, epkgs, efixes=None):
+    output = {'messages': []}
+    kept, rejected = nim_flrtvc.check_epkgs(module, output, 'lpar1', epkgs, {}, efixes or {})
+    return kept, rejected, output
+
+
+def test_interlocked_efixes():
+    module, epkgs = prepare(4)
+    efixes = {'IJ00099s0a': {'files': ['/usr/lib/efix3/file0']}}
+
+    kept, rejected, output = run_check(module, list(reversed(epkgs)), efixes)
+
+    # most recent first, epkg0 is locked by epkg1, epkg3 by an installed efix
+    assert kept == [epkgs[2], epkgs[1]]
+    assert rejected == ['epkg0.epkg.Z: locked by previous efix to install',
+                        'epkg3.epkg.Z: installed efix IJ00099s0a is locking /usr/lib/efix3/file0']
+    assert len(output['messages']) == 2
+
+
+def test_benchmark_interlocks_are_linear():
+    timings = []
+    for count in (250, 1000):
+        module, epkgs = prepare(count)
+        best = None
+        for dummy in range(3):
+            start = time.time()
+            kept, rejected, output = run_check(module, epkgs)
+            elapsed = time.time() - start
+            best = elapsed if best is None else min(best, elapsed)
+        assert len(kept) == count // 2
+        assert len(rejected) == count // 2
+        timings.append(best)
+
+    # 4 times the efixes and LOCATION entries, a quadratic resolution
+    # would take 16 times longer
+    assert timings[1] < 10 * max(timings[0], 0.001)
+
+
+class Downloads(object):
+    """
+    download() writing the url in the destination file, slow enough for
+    concurrent fetches to overlap
+    """
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.urls = []
+
+    def __call__(self, module, output, src, dst, resize_fs=True):
+        self.urls.append(src)
+        time.sleep(self.delay)
+        with open(dst, 'w') as f:
+            f.write('content of {0}\n'.format(src))
+        return True
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    downloads = Downloads()
+    monkeypatch.setattr(nim_flrtvc, 'download', downloads)
+    return downloads
+
+
+def epkg_url(number):
+    return 'https://aix.software.ibm.com/aix/efixes/security/epkg{0}.epkg.Z'.format(number)
+
+
+def test_cache_single_flight(tmpdir, downloads):
+    cache = nim_flrtvc.DownloadCache(FakeModule(), str(tmpdir.join('cache')), 0)
+    paths = []
+
+    def fetch():
+        paths.append(cache.fetch({'messages': []}, epkg_url(1)))
+
+    threads = [threading.Thread(target=fetch) for dummy in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # a single download, the other fetches wait for it
+    assert downloads.urls == [epkg_url(1)]
+    assert len(set(paths)) == 1 and os.path.isfile(paths[0])
+    assert cache.stats == {'hits': 4, 'misses': 1, 'evictions': 0}
+
+
+def test_cache_lru_eviction(tmpdir, downloads):
+    cachedir = str(tmpdir.join('cache'))
+    cache = nim_flrtvc.DownloadCache(FakeModule(), cachedir, 0)
+    for number in range(3):
+        cache.fetch({'messages': []}, epkg_url(number))
+    size = cache.index[max(cache.index)]['size']
+
+    # next run with room for three entries, epkg0 used again
+    cache = nim_flrtvc.DownloadCache(FakeModule(), cachedir, 3 * size + 10)
+    cache.fetch({'messages': []}, epkg_url(0))
+    cache.fetch({'messages': []}, epkg_url(3))
+
+    urls = sorted(entry['url'] for entry in cache.index.values())
+    # epkg1 is now the least recently used
+    assert urls == [epkg_url(0), epkg_url(2), epkg_url(3)]
+    assert cache.stats == {'hits': 1, 'misses': 1, 'evictions': 1}
+    assert sorted(os.listdir(cachedir)) == sorted(list(cache.index) + ['index.json'])
+    with open(os.path.join(cachedir, 'index.json')) as f:
+        assert json.load(f)['entries'] == cache.index
+
+
+def test_cache_corrupted_entry(tmpdir, downloads):
+    cachedir = str(tmpdir.join('cache'))
+    cache = nim_flrtvc.DownloadCache(FakeModule(), cachedir, 0)
+    path = cache.fetch({'messages': []}, epkg_url(1))
+    assert cache.fetch({'messages': []}, epkg_url(1)) == path
+    with open(path, 'w') as f:
+        f.write('truncated')
+
+    # verified once per run, the next run downloads it again
+    assert cache.fetch({'messages': []}, epkg_url(1)) == path
+    cache = nim_flrtvc.DownloadCache(FakeModule(), cachedir, 0)
+    assert cache.fetch({'messages': []}, epkg_url(1)) == path
+
+    assert downloads.urls == [epkg_url(1), epkg_url(1)]
+    assert cache.stats == {'hits': 0, 'misses': 1, 'evictions': 0}
+    with open(path) as f:
+        assert f.read() == 'content of {0}\n'.format(epkg_url(1))
+
+
+def flrtvc_module(**params):
+    """
+    nim_flrtvc module with the default options, running the report only
+    """
+    options = dict(targets=['lpar1', 'lpar2'], apar=None, filesets=None, csv='/tmp/apar.csv',
+                   save_report=False, verbose=False, force=False, clean=False, check_only=True,
+                   download_only=False, extend_fs=False, max_workers=2, cache_size=2048,
+                   flrtvc_zip=None, csv_ttl=24)
+    options.update(params)
+    return FakeModule(**options)
+
+
+def test_cache_counts_returned(tmpdir, downloads, monkeypatch):
+    module = flrtvc_module(path=str(tmpdir))
+
+    def run_pipeline(module, machine, output, *args):
+        # both targets need epkg1, lpar2 also needs epkg2
+        for number in range(1 if machine == 'lpar1' else 3):
+            nim_flrtvc.download_cache.fetch(output, epkg_url(number))
+
+    monkeypatch.setattr(nim_flrtvc, 'AnsibleModule', lambda **kwargs: module)
+    monkeypatch.setattr(nim_flrtvc, 'get_nim_clients_info', lambda module: {})
+    monkeypatch.setattr(nim_flrtvc, 'expand_targets', lambda module, targets, clients: targets)
+    monkeypatch.setattr(nim_flrtvc, 'check_targets', lambda module, output, targets, clients: targets)
+    monkeypatch.setattr(nim_flrtvc, 'install_flrtvc', lambda *args: True)
+    monkeypatch.setattr(nim_flrtvc, 'run_pipeline', run_pipeline)
+
+    with pytest.raises(ModuleExit):
+        nim_flrtvc.main()
+    assert module.result['meta']['cache'] == {'hits': 1, 'misses': 3, 'evictions': 0}
+    assert sorted(downloads.urls) == [epkg_url(0), epkg_url(1), epkg_url(2)]
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.ibm.power_aix.plugins.modules import nim_updateios
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+# vios1 and vios2 on cec1, the other ones on their own CEC;
+# vios3 and vios5 in the same SSP cluster
+VIOS = {
+    'vios1': {'mgmt_profile1': 'hmc1 1 cec1'},
+    'vios2': {'mgmt_profile1': 'hmc1 2 cec1'},
+    'vios3': {'mgmt_profile1': 'hmc1 1 cec3', 'cluster': {'name': 'ssp1'}},
+    'vios4': {'mgmt_profile1': 'hmc1 1 cec4'},
+    'vios5': {'mgmt_profile1': 'hmc1 1 cec5', 'cluster': {'name': 'ssp1'}},
+    'vios6': {'mgmt_profile1': 'hmc1 1 cec6'},
+}
+
+
+@pytest.fixture
+def results(monkeypatch):
+    results = {'nim_node': {'vios': dict((name, dict(info)) for name, info in VIOS.items())},
+               'status': {}, 'meta': {'messages': []}}
+    monkeypatch.setattr(nim_updateios, 'results', results)
+    return results
+
+
+def test_tuple_domains(results):
+    assert nim_updateios.tuple_domains(['vios3', 'vios4']) == set(['vios3', 'vios4', 'cec:cec3', 'cec:cec4',
+                                                                   'cluster:ssp1'])
+    assert nim_updateios.tuple_domains(['unknown']) == set(['unknown'])
+
+
+def test_shared_cec(results):
+    domains = nim_updateios.TupleDomains()
+
+    assert domains.can_start(['vios1'])
+    assert not domains.can_start(['vios2'])
+    domains.release(['vios1'])
+    assert domains.can_start(['vios2'])
+
+
+def test_shared_cluster(results):
+    domains = nim_updateios.TupleDomains()
+
+    assert domains.can_start(['vios3'])
+    assert not domains.can_start(['vios5', 'vios6'])
+    # the cluster refreshed during the update is not the one released
+    results['nim_node']['vios']['vios3']['cluster'] = {}
+    domains.release(['vios3'])
+    assert domains.busy == set()
+    assert domains.can_start(['vios5', 'vios6'])
+
+
+def test_independent_tuples(results):
+    domains = nim_updateios.TupleDomains()
+
+    assert domains.can_start(['vios1'])
+    assert domains.can_start(['vios3', 'vios4'])
+    assert domains.can_start(['vios6'])
+
+
+def test_unknown_cluster_not_scheduled(results, monkeypatch):
+    targets = [['vios3'], ['vios5'], ['vios4']]
+    for target in targets:
+        results['status'][nim_updateios.tuple_str(target)] = ''
+        results['meta'][nim_updateios.tuple_str(target)] = {'messages': []}
+    updated = []
+
+    def get_vios_cluster(module, vios):
+        if vios == 'vios5':
+            # the cluster name is unknown
+            results['nim_node']['vios'][vios]['cluster'] = {}
+            return 'Cannot get cluster status on vios5', '', ''
+        return None
+
+    monkeypatch.setattr(nim_updateios, 'get_updateios_cmd', lambda module: ['updateios'])
+    monkeypatch.setattr(nim_updateios, 'get_vios_cluster', get_vios_cluster)
+    monkeypatch.setattr(nim_updateios, 'nim_updateios_tuple',
+                        lambda module, target_tuple, vios_status, time_limit, cmd: updated.append(target_tuple))
+    module = FakeModule(parallel=2, action='install', manage_cluster=True)
+
+    nim_updateios.nim_updateios(module, targets, {}, None)
+    assert sorted(updated) == [['vios3'], ['vios4']]
+    assert results['status']['vios5'] == 'FAILURE-CLUSTER'
+    assert results['meta']['vios5']['messages'][-1] == 'Cannot get cluster status on vios5'
+    assert 'timing' in results['meta']['vios3']
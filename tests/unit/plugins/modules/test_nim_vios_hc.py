@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.hmc_cache import HmcUuidCache
+from ansible_collections.ibm.power_aix.plugins.modules import nim_vios_hc
+from ansible_collections.ibm.power_aix.tests.unit.utils import FakeModule
+
+
+def test_stale_cached_uuids_invalidated(tmpdir, monkeypatch):
+    path = str(tmpdir.join('hmc_uuids.json'))
+    module = FakeModule(parallel=2, max_per_hmc=2)
+    cache = HmcUuidCache(module, path)
+    cache.set('hmc1', 'cec1', 'cec-uuid1', {'1': 'vios-uuid1'})
+    cache.set('hmc1', 'cec2', 'cec-uuid2', {'1': 'vios-uuid2'})
+    cache.save()
+
+    nim_node = {'nim_hmc': {'hmc1': {'ip': '10.0.0.1'}},
+                'nim_vios': {'vios1': {'mgmt_hmc_id': 'hmc1', 'mgmt_cec_serial': 'cec1', 'mgmt_vios_id': '1'},
+                             'vios2': {'mgmt_hmc_id': 'hmc1', 'mgmt_cec_serial': 'cec2', 'mgmt_vios_id': '1'}}}
+
+    def vios_health(module, mgmt_uuid, hmc_ip, vios_uuids, output):
+        # the UUID of vios2 is not known by the HMC anymore
+        return 0 if vios_uuids == ['vios-uuid1'] else 1
+
+    def vios_health_init(module, hmc_id, hmc_ip):
+        raise AssertionError('UUIDs listed through the HMC')
+
+    monkeypatch.setattr(nim_vios_hc, 'NIM_NODE', nim_node)
+    monkeypatch.setattr(nim_vios_hc, 'OUTPUT', [])
+    monkeypatch.setattr(nim_vios_hc, 'UUID_CACHE', HmcUuidCache(module, path))
+    monkeypatch.setattr(nim_vios_hc, 'vios_health', vios_health)
+    monkeypatch.setattr(nim_vios_hc, 'vios_health_init', vios_health_init)
+
+    health_tab = nim_vios_hc.health_check(module, [['vios1'], ['vios2']])
+    assert health_tab == {'vios1': 'SUCCESS-HC', 'vios2': 'FAILURE-HC'}
+
+    # discovered again by the next health check
+    cache = HmcUuidCache(module, path)
+    assert cache.get('hmc1', 'cec1')['vios'] == {'1': 'vios-uuid1'}
+    assert cache.get('hmc1', 'cec2') is None
@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import re
+import shutil
+import ssl
+import subprocess
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from ansible.module_utils.six.moves import BaseHTTPServer, socketserver
+
+# the script imports pycurl at load time
+pytest.importorskip('pycurl')
+
+VIOSHC_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..',
+                           'roles', 'power_aix_vioshc', 'files', 'vioshc.py')
+
+# HMC answer with the HTTP headers written before the XML document
+VIOS_XML = b"""HTTP/1.1 200 OK
+Content-Type: application/atom+xml
+
+<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<entry xmlns="http://www.w3.org/2005/Atom" xmlns:ns2="http://www.w3.org/1999/xhtml">
+  <id>3443DB77-AE3A-4C0B-AF2C-E3A4B4D9D1B6</id>
+  <content type="application/vnd.ibm.powervm.uom+xml; type=VirtualIOServer">
+    <VirtualIOServer xmlns="http://www.ibm.com/xmlns/systems/power/firmware/uom/mc/2012_10/">
+      <PartitionName>vios1</PartitionName>
+      <PartitionID>1</PartitionID>
+      <ServerAdapter>
+        <ConnectingPartitionID>3</ConnectingPartitionID>
+        <Location><Code>U8286.42A.21C1B6V1-C3</Code></Location>
+      </ServerAdapter>
+      <ServerAdapter>
+        <ConnectingPartitionID>4</ConnectingPartitionID>
+        <Location><Code>U8286.42A.21C1B6V1-C4</Code></Location>
+      </ServerAdapter>
+    </VirtualIOServer>
+  </content>
+</entry>
+"""
+
+
+def load_vioshc():
+    """
+    Load the script installed by the power_aix_vioshc role as a library
+    """
+    import importlib.machinery
+    import importlib.util
+    loader = importlib.machinery.SourceFileLoader('vioshc', VIOSHC_PATH)
+    spec = importlib.util.spec_from_file_location('vioshc', VIOSHC_PATH, loader=loader)
+    vioshc = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(vioshc)
+    return vioshc
+
+
+@pytest.fixture
+def vioshc():
+    return load_vioshc()
+
+
+@pytest.fixture(params=['collection', 'standalone'])
+def any_vioshc(request, monkeypatch):
+    """
+    The script loaded by nim_vios_hc, and run as a command where the
+    collection run_pool cannot be imported
+    """
+    if request.param == 'standalone':
+        monkeypatch.setitem(sys.modules, 'ansible_collections.ibm.power_aix.plugins.module_utils.pool', None)
+    return load_vioshc()
+
+
+def test_xml_extract_tags_and_paths(vioshc, tmpdir):
+    filename = str(tmpdir.join('vios1.xml'))
+    with open(filename, 'wb') as f:
+        f.write(VIOS_XML)
+
+    values = vioshc.xml_extract(filename, ['PartitionName', 'ServerAdapter/ConnectingPartitionID',
+                                           'ServerAdapter/Location/Code', 'Missing'])
+    assert values == {'PartitionName': ['vios1'],
+                      'ServerAdapter/ConnectingPartitionID': ['3', '4'],
+                      'ServerAdapter/Location/Code': ['U8286.42A.21C1B6V1-C3', 'U8286.42A.21C1B6V1-C4'],
+                      'Missing': []}
+
+
+def test_xml_extract_memoized_until_rewritten(vioshc, tmpdir):
+    filename = str(tmpdir.join('vios1.xml'))
+    with open(filename, 'wb') as f:
+        f.write(VIOS_XML)
+    assert vioshc.xml_extract(filename, ['PartitionID']) == {'PartitionID': ['1']}
+    assert filename in vioshc.xml_cache
+
+    vioshc.xml_invalidate(filename)
+    with open(filename, 'wb') as f:
+        f.write(VIOS_XML.replace(b'<PartitionID>1<', b'<PartitionID>2<'))
+    assert vioshc.xml_extract(filename, ['PartitionID']) == {'PartitionID': ['2']}
+
+    vioshc.xml_forget(str(tmpdir))
+    assert filename not in vioshc.xml_cache
+
+
+def test_xml_extract_errors(vioshc, tmpdir):
+    filename = str(tmpdir.join('bad.xml'))
+    with open(filename, 'wb') as f:
+        f.write(b'<entry><id>unterminated</entry>')
+
+    assert vioshc.xml_extract(filename, ['id']) is None
+    assert vioshc.xml_extract(str(tmpdir.join('missing.xml')), ['id']) is None
+
+
+class HmcStubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    HMC REST API stub serving the recorded XML on keep-alive connections,
+    answering 503 to the first request of the URLs ending with '/busy'
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests.append(self.path)
+            busy = self.path.endswith('/busy') and self.path not in self.server.failed
+            if busy:
+                self.server.failed.add(self.path)
+        if self.headers.get('X-API-Session') != 'key':
+            self.answer(401, b'')
+        elif busy:
+            self.answer(503, b'')
+        else:
+            self.answer(200, VIOS_XML.split(b'\n\n', 1)[1])
+
+    def answer(self, code, body):
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/atom+xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HmcStub(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class FakeRun(object):
+    def __init__(self):
+        self.logs = []
+
+    def log(self, txt, debug='no'):
+        self.logs.append(txt)
+
+    def write(self, txt, lvl=1):
+        self.logs.append(txt)
+
+    def fail(self, rc, txt):
+        raise AssertionError(txt)
+
+
+@pytest.fixture
+def hmc_stub(tmpdir):
+    """
+    Local HTTPS stub of the HMC REST API with a self-signed certificate
+    """
+    if not shutil.which('openssl'):
+        pytest.skip('openssl is required to create the stub certificate')
+    cert = str(tmpdir.join('cert.pem'))
+    key = str(tmpdir.join('key.pem'))
+    # the script does not verify the certificate, only its host name
+    subprocess.check_call(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                           '-subj', '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost',
+                           '-keyout', key, '-out', cert],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    server = HmcStub(('127.0.0.1', 0), HmcStubHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = []
+    server.failed = set()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_pooled_client_against_stub(vioshc, hmc_stub, tmpdir):
+    client = vioshc.HmcClient('localhost', max_conn=4, retry_delay=0)
+    run = FakeRun()
+    base = 'https://localhost:{0}/rest/api/uom/LogicalPartition'.format(hmc_stub.server_address[1])
+    urls = ['{0}/{1}/{2}'.format(base, i, 'busy' if i % 10 == 0 else 'VirtualNICDedicated')
+            for i in range(100)]
+    results = {}
+
+    def fetch(i):
+        results[i] = client.request(run, 'key', urls[i], str(tmpdir.join('lpar{0}.xml'.format(i))))
+
+    threads = [threading.Thread(target=fetch, args=(i,)) for i in range(len(urls))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(ret == 0 for ret in results.values())
+    assert vioshc.xml_extract(str(tmpdir.join('lpar10.xml')), ['PartitionName']) == {'PartitionName': ['vios1']}
+    # the 10 busy URLs are retried once
+    assert len(hmc_stub.requests) == 110
+    # the handles keep their connection open
+    assert hmc_stub.connections <= 4
+
+
+def test_pooled_client_relogon(vioshc, hmc_stub, tmpdir):
+    client = vioshc.HmcClient('localhost', max_conn=1, retry_delay=0)
+    client.relogon = lambda run, stale_key: 'key'
+    url = 'https://localhost:{0}/rest/api/uom/ManagedSystem'.format(hmc_stub.server_address[1])
+
+    assert client.request(FakeRun(), 'expired', url, str(tmpdir.join('ms.xml'))) == 0
+    assert len(hmc_stub.requests) == 2
+
+    client.relogon = lambda run, stale_key: ''
+    assert client.request(FakeRun(), 'expired', url, str(tmpdir.join('ms.xml')))[0] == '401'
+
+
+def lpar_run(vioshc, tmpdir):
+    """
+    Run state of a health check with 20 client LPARs
+    """
+    run = vioshc.Vioshc.__new__(vioshc.Vioshc)
+    run.mode = 'debug'
+    run.log_file = None
+    run.hmc = 'hmc'
+    run.xml_dir = str(tmpdir)
+    run.lpar_info = dict((str(i), {'name': 'lpar%d' % i, 'uuid': 'uuid%d' % i}) for i in range(20))
+    return run
+
+
+def test_fetch_lpar_files_bounded(any_vioshc, tmpdir):
+    vioshc = any_vioshc
+    run = lpar_run(vioshc, tmpdir)
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+    fetched = {}
+
+    def get_func(hmc, uuid, filename):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.01)
+        with lock:
+            state['running'] -= 1
+            fetched[uuid] = filename
+
+    files = run.fetch_lpar_files(get_func, ['missing'] + list(run.lpar_info), 'vnic_info')
+    assert sorted(files) == sorted(run.lpar_info)
+    assert files['1'] == '{0}/lpar1_vnic_info.xml'.format(tmpdir)
+    assert sorted(fetched.values()) == sorted(files.values())
+    assert state['peak'] == vioshc.HMC_MAX_CONNECTIONS
+
+
+def test_fetch_lpar_files_error_raised_in_caller(any_vioshc, tmpdir):
+    run = lpar_run(any_vioshc, tmpdir)
+    fetched = []
+
+    def get_func(hmc, uuid, filename):
+        if uuid == 'uuid3':
+            raise any_vioshc.VioshcError(1, 'relogon failed')
+        fetched.append(uuid)
+
+    with pytest.raises(any_vioshc.VioshcError) as exc:
+        run.fetch_lpar_files(get_func, list(run.lpar_info), 'vnic_info')
+    assert exc.value.msg == 'relogon failed'
+    assert len(fetched) == 19
+
+
+class BrokenCurl(object):
+    """
+    Curl handle whose transfer raises another error than pycurl.error
+    """
+    closed = 0
+
+    def __getattr__(self, name):
+        return 0
+
+    def reset(self):
+        pass
+
+    def setopt(self, option, value):
+        pass
+
+    def perform(self):
+        raise RuntimeError('write callback failed')
+
+    def close(self):
+        BrokenCurl.closed += 1
+
+
+def test_perform_releases_the_slot(vioshc, tmpdir, monkeypatch):
+    monkeypatch.setattr(vioshc.pycurl, 'Curl', BrokenCurl)
+    client = vioshc.HmcClient('localhost', max_conn=1)
+
+    for i in range(2):
+        with pytest.raises(RuntimeError):
+            client.perform(FakeRun(), 'key', 'https://localhost/rest', str(tmpdir.join('ms.xml')))
+    assert client.slots.acquire(False)
+    assert client.handles == []
+    assert BrokenCurl.closed == 2
+
+
+def hmc_feed(kind, entries, adapters):
+    """
+    ManagedSystem or LogicalPartition Atom feed of the HMC REST API, with
+    the HTTP headers written before the XML document
+    """
+    lines = ['HTTP/1.1 200 OK', 'Content-Type: application/atom+xml', '',
+             '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+             '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:ns2="http://www.w3.org/1999/xhtml">']
+    for i in range(entries):
+        lines += ['<entry>',
+                  '  <id>{0:08d}-AE3A-4C0B-AF2C-E3A4B4D9D1B6</id>'.format(i),
+                  '  <content type="application/vnd.ibm.powervm.uom+xml; type={0}">'.format(kind),
+                  '    <{0} xmlns="http://www.ibm.com/xmlns/systems/power/firmware/uom/mc/2012_10/">'.format(kind),
+                  '      <PartitionName>lpar{0}</PartitionName>'.format(i),
+                  '      <PartitionID>{0}</PartitionID>'.format(i + 1),
+                  '      <PartitionUUID>{0:08d}-UUID</PartitionUUID>'.format(i),
+                  '      <PartitionState>running</PartitionState>',
+                  '      <AssociatedVirtualIOServer href="vios{0}"/>'.format(i % 2)]
+        for j in range(adapters):
+            lines += ['      <ServerAdapter>',
+                      '        <ConnectingPartitionID>{0}</ConnectingPartitionID>'.format(j + 1),
+                      '        <VirtualSlotNumber>{0}</VirtualSlotNumber>'.format(j + 10),
+                      '        <Location><Code>U8286.42A.21C1B6V{0}-C{1}</Code></Location>'.format(i, j),
+                      '      </ServerAdapter>']
+        lines += ['    </{0}>'.format(kind), '  </content>', '</entry>']
+    lines.append('</feed>')
+    return '\n'.join(lines) + '\n'
+
+
+def legacy_parse(filename):
+    """
+    The parsing of grep, grep_array and awk before xml_extract: remove the
+    HTTP headers rewriting the file, then build the whole tree
+    """
+    with open(filename, 'r+') as xml:
+        lines = xml.readlines()
+        xml.seek(0)
+        start_writing = False
+        for line in lines:
+            if line[0] == '<':
+                start_writing = True
+            if start_writing:
+                xml.write(line)
+        xml.truncate()
+    return ET.ElementTree(file=filename)
+
+
+def legacy_grep_array(filename, tag):
+    return [elem.text for elem in legacy_parse(filename).iter()
+            if re.sub(r'{[^>]*}', "", elem.tag) == tag]
+
+
+def legacy_awk(filename, tag1, tag2):
+    values = []
+    for elem in legacy_parse(filename).iter():
+        if re.sub(r'{[^>]*}', "", elem.tag) == tag1:
+            for child in list(elem):
+                if re.sub(r'{[^>]*}', "", child.tag) == tag2:
+                    values.append(child.text)
+    return values
+
+
+# the lookups done by a health check on a feed
+LOOKUPS = ['HttpErrorResponse', 'PartitionName', 'PartitionID', 'PartitionUUID', 'PartitionState',
+           'ServerAdapter/ConnectingPartitionID', 'ServerAdapter/VirtualSlotNumber']
+
+
+def test_benchmark_xml_extract(vioshc, tmpdir):
+    for kind in ('ManagedSystem', 'LogicalPartition'):
+        feed = hmc_feed(kind, 300, 20)
+        legacy_file = tmpdir.join('legacy_{0}.xml'.format(kind))
+        legacy_file.write(feed)
+        new_file = tmpdir.join('{0}.xml'.format(kind))
+        new_file.write(feed)
+
+        start = time.time()
+        legacy = {}
+        for path in LOOKUPS:
+            if '/' in path:
+                legacy[path] = legacy_awk(str(legacy_file), *path.split('/'))
+            else:
+                legacy[path] = legacy_grep_array(str(legacy_file), path)
+        legacy_time = time.time() - start
+
+        start = time.time()
+        values = dict((path, vioshc.xml_extract(str(new_file), [path])[path]) for path in LOOKUPS)
+        new_time = time.time() - start
+
+        start = time.time()
+        memoized = vioshc.xml_extract(str(new_file), LOOKUPS)
+        memo_time = time.time() - start
+
+        assert values == legacy == memoized
+        assert len(values['ServerAdapter/ConnectingPartitionID']) == 6000
+        # the file is not rewritten
+        assert new_file.read() == feed
+        # a single pass instead of one per lookup
+        assert new_time * 3 < legacy_time, (new_time, legacy_time)
+        assert memo_time * 10 < new_time, (memo_time, new_time)
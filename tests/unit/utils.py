@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+class ModuleExit(Exception):
+    """
+    Raised by exit_json and fail_json, which do not return
+    """
+    pass
+
+
+class FakeModule(object):
+    """
+    Ansible module of the unit tests.
+
+    The keyword arguments are the module params. run_command records the
+    commands and returns rc, stdout and stderr, log records the messages,
+    exit_json and fail_json record the result and raise ModuleExit.
+    """
+
+    def __init__(self, stdout='', rc=0, stderr='', **params):
+        self.stdout = stdout
+        self.rc = rc
+        self.stderr = stderr
+        self.params = params
+        self.commands = []
+        self.logs = []
+        self.result = None
+
+    def run_command(self, cmd, **kwargs):
+        self.commands.append(cmd)
+        return self.rc, self.stdout, self.stderr
+
+    def debug(self, msg):
+        pass
+
+    def log(self, msg):
+        self.logs.append(msg)
+
+    def exit_json(self, **kwargs):
+        self.result = dict(kwargs, failed=False)
+        raise ModuleExit()
+
+    def fail_json(self, **kwargs):
+        self.result = dict(kwargs, failed=True)
+        raise ModuleExit()